@@ -5,13 +5,36 @@ This paper API router module contains the API router for the paper model.
 
 """
 
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Annotated, Any
 
+from fastapi import APIRouter, Body, Depends, Header, Query, status
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+
+from app.common.cache import CacheStats
+from app.common.enums import PaperDocumentDelivery
+from app.common.exceptions import (
+    InvalidFieldError,
+    InvalidPageTokenError,
+    NotFoundError,
+    RangeNotSatisfiableError,
+)
+from app.common.http_range import (
+    format_etag,
+    format_http_date,
+    is_if_range_fresh,
+    is_not_modified,
+    parse_range_header,
+)
 from app.common.response import CustomResponseCode, ResponseBase, ResponseModel
+from app.core.config import settings
 from app.schemas.paper_metadata import (
+    ExportPaperMetadataParam,
     GetPaperDetailSchema,
+    GetPaperDocumentUrlSchema,
     GetPaperListDetailSchema,
     GetPaperMetadataListParam,
+    RegisterPaperBulkResultSchema,
     RegisterPaperSchema,
 )
 from app.services.paper_service import PaperService
@@ -19,30 +42,184 @@ from app.services.paper_service import PaperService
 router = APIRouter()
 
 
-@router.get("/metadata")
+def get_paper_metadata_headers(etag: str, updated_at: datetime | None = None) -> dict[str, str]:
+    """Get the validator headers of the paper metadata.
+
+    Args:
+        etag (str): The entity tag of the paper metadata.
+        updated_at (datetime | None): The time of the last write of the paper metadata.
+
+    Returns:
+        dict[str, str]: The `ETag`, `Last-Modified` and `Cache-Control` headers.
+
+    """
+
+    headers = {"ETag": format_etag(etag), "Cache-Control": settings.PAPER_METADATA_CACHE_CONTROL}
+
+    if updated_at is not None:
+        headers["Last-Modified"] = format_http_date(updated_at)
+
+    return headers
+
+
+@router.get(
+    "/metadata",
+    response_model=ResponseModel[GetPaperListDetailSchema],
+    response_model_exclude_unset=True,
+)
 async def get_paper_metadata_list(
     obj: GetPaperMetadataListParam = Depends(),
+    if_none_match: Annotated[str | None, Header()] = None,
     paper_service: PaperService = Depends(),
-) -> ResponseModel[GetPaperListDetailSchema]:
+) -> Response | ResponseModel[GetPaperListDetailSchema]:
     """Get paper metadata list.
 
-    This function is responsible for getting the paper metadata list.
+    This function is responsible for getting the paper metadata list. The papers only have
+    the fields of the requested view or fields. The page is serialized once as it is
+    validated by the service.
+
+    The page has a strong entity tag of the revisions of its papers, which are read along
+    with the page. If the `If-None-Match` header is sent, only the revisions are read first,
+    and the page is answered with 304 Not Modified if the header has their entity tag.
 
     Args:
         obj (GetPaperMetadataListParam): The get paper metadata list parameter.
+        if_none_match (str | None): The `If-None-Match` header.
         paper_service (PaperService): The paper service.
 
     Returns:
-        ResponseModel[GetPaperListDetailSchema]: The paper metadata list.
+        Response | ResponseModel[GetPaperListDetailSchema]: The paper metadata list.
 
     """
 
-    paper_metadata_list = await paper_service.get_paper_metadata_list(obj)
+    try:
+        if if_none_match is not None:
+            headers = get_paper_metadata_headers(
+                await paper_service.get_paper_metadata_list_etag(obj)
+            )
+
+            if is_not_modified(if_none_match, None, headers["ETag"], None):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        paper_metadata_list, etag = await paper_service.get_paper_metadata_list_with_etag(obj)
+
+    except (InvalidPageTokenError, InvalidFieldError):
+        return await ResponseBase.failed(res=CustomResponseCode.HTTP_400)
 
     if not paper_metadata_list:
         return await ResponseBase.failed(res=CustomResponseCode.HTTP_404)
 
-    return await ResponseBase.success(data=paper_metadata_list)
+    return await ResponseBase.fast_success(
+        data=paper_metadata_list, exclude_unset=True, headers=get_paper_metadata_headers(etag)
+    )
+
+
+@router.get("/metadata/cache")
+async def get_paper_metadata_cache_stats(
+    paper_service: PaperService = Depends(),
+) -> ResponseModel[CacheStats]:
+    """Get paper metadata cache stats.
+
+    This function is responsible for getting the size, the hits, the misses and the
+    evictions of the paper metadata cache of the process, to size the cache with.
+
+    Args:
+        paper_service (PaperService): The paper service.
+
+    Returns:
+        ResponseModel[CacheStats]: The paper metadata cache stats.
+
+    """
+
+    return await ResponseBase.success(data=paper_service.get_paper_metadata_cache_stats())
+
+
+@router.get("/metadata/export", response_model=None)
+async def export_paper_metadata(
+    obj: ExportPaperMetadataParam = Depends(),
+    paper_service: PaperService = Depends(),
+) -> StreamingResponse | ResponseModel:
+    """Export paper metadata.
+
+    This function is responsible for streaming every paper, or the filtered papers, as
+    newline delimited JSON in the order of their ids, with the fields of the requested view
+    or fields. Only a batch of the papers is held in memory at a time, and the total is not
+    counted. A dropped export is resumed with the id of its last line as `after_id`.
+
+    Args:
+        obj (ExportPaperMetadataParam): The export paper metadata parameter.
+        paper_service (PaperService): The paper service.
+
+    Returns:
+        StreamingResponse | ResponseModel: The lines of the papers.
+
+    """
+
+    try:
+        lines = paper_service.iter_paper_metadata_export(obj)
+
+    except InvalidFieldError:
+        return await ResponseBase.failed(res=CustomResponseCode.HTTP_400)
+
+    return StreamingResponse(
+        lines, headers={"Cache-Control": "no-store"}, media_type="application/x-ndjson"
+    )
+
+
+@router.get("/{paper_id}/metadata", response_model=ResponseModel[GetPaperDetailSchema])
+async def get_paper_metadata(
+    paper_id: str,
+    if_none_match: Annotated[str | None, Header()] = None,
+    if_modified_since: Annotated[str | None, Header()] = None,
+    paper_service: PaperService = Depends(),
+) -> Response | ResponseModel[GetPaperDetailSchema]:
+    """Get paper metadata.
+
+    This function is responsible for getting the paper metadata, whose `gcs_blob_url` tells
+    the status of the upload of its paper document.
+
+    The paper metadata has a strong entity tag of its revision. A conditional request with
+    the `If-None-Match` or the `If-Modified-Since` header is answered with 304 Not Modified
+    after only the revision is read, if the client has the current revision. Otherwise the
+    paper metadata of at least that revision is answered, even if an older one is cached.
+
+    Args:
+        paper_id (str): The paper object id.
+        if_none_match (str | None): The `If-None-Match` header.
+        if_modified_since (str | None): The `If-Modified-Since` header.
+        paper_service (PaperService): The paper service.
+
+    Returns:
+        Response | ResponseModel[GetPaperDetailSchema]: The paper metadata.
+
+    """
+
+    min_revision = 0
+
+    try:
+        if if_none_match is not None or if_modified_since is not None:
+            revision = await paper_service.get_paper_metadata_revision(paper_id)
+            min_revision = revision.revision
+            headers = get_paper_metadata_headers(
+                f"{revision.id}-{revision.revision}", revision.updated_at
+            )
+
+            if is_not_modified(
+                if_none_match, if_modified_since, headers["ETag"], revision.updated_at
+            ):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        paper_metadata = await paper_service.get_paper_metadata(paper_id, min_revision=min_revision)
+
+    except NotFoundError:
+        return await ResponseBase.failed(res=CustomResponseCode.HTTP_404)
+
+    return await ResponseBase.fast_success(
+        data=paper_metadata,
+        headers=get_paper_metadata_headers(
+            f"{paper_metadata.id}-{paper_metadata.revision}", paper_metadata.updated_at
+        ),
+    )
 
 
 @router.post("")
@@ -69,3 +246,120 @@ async def register_paper(
         return await ResponseBase.failed(res=CustomResponseCode.HTTP_404)
 
     return await ResponseBase.success(data=result)
+
+
+@router.post("/bulk")
+async def register_paper_bulk(
+    objs: Annotated[list[dict[str, Any]], Body(max_length=settings.BULK_REGISTER_MAX_ITEMS)],
+    paper_service: PaperService = Depends(),
+) -> ResponseModel[RegisterPaperBulkResultSchema]:
+    """Register papers in bulk.
+
+    This function is responsible for registering papers in bulk. Each paper is validated
+    separately, so the result reports the success or the failure of each paper.
+
+    Args:
+        objs (list[dict[str, Any]]): The register paper schemas.
+        paper_service (PaperService): The paper service.
+
+    Returns:
+        ResponseModel[RegisterPaperBulkResultSchema]: The results of the papers.
+
+    """
+
+    result = await paper_service.register_paper_bulk(objs=objs)
+
+    return await ResponseBase.success(data=result)
+
+
+@router.get("/{paper_id}/document", response_model=None)
+async def download_paper_document(
+    paper_id: str,
+    delivery: Annotated[PaperDocumentDelivery | None, Query()] = None,
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
+    if_range: Annotated[str | None, Header()] = None,
+    paper_service: PaperService = Depends(),
+) -> Response | ResponseModel[GetPaperDocumentUrlSchema]:
+    """Download paper document.
+
+    This function is responsible for delivering the paper document. By default it is
+    streamed from the storage, and a single byte range asked with the `Range` header is
+    served as a partial content, unless the `If-Range` header refers to another version of
+    the paper document.
+
+    With the `redirect` or the `signed_url` delivery, the client is given a short lived
+    signed url to download the paper document from the storage directly. The storages which
+    can not sign urls fall back to the streaming.
+
+    Args:
+        paper_id (str): The paper object id.
+        delivery (PaperDocumentDelivery | None): The delivery, defaults to
+            `settings.PAPER_DOCUMENT_DELIVERY`.
+        range_header (str | None): The `Range` header.
+        if_range (str | None): The `If-Range` header.
+        paper_service (PaperService): The paper service.
+
+    Returns:
+        Response | ResponseModel[GetPaperDocumentUrlSchema]: The paper document stream, the
+            redirect to the signed url or the signed url.
+
+    """
+
+    if delivery is None:
+        delivery = PaperDocumentDelivery(settings.PAPER_DOCUMENT_DELIVERY)
+
+    try:
+        if delivery != PaperDocumentDelivery.STREAM:
+            document_url = await paper_service.get_paper_document_url(paper_id)
+
+            if document_url is not None and delivery == PaperDocumentDelivery.REDIRECT:
+                return RedirectResponse(
+                    document_url.url, status_code=status.HTTP_307_TEMPORARY_REDIRECT
+                )
+
+            if document_url is not None:
+                return await ResponseBase.success(data=document_url)
+
+        blob_url, blob_metadata = await paper_service.get_paper_document(paper_id)
+
+    except NotFoundError:
+        failed = await ResponseBase.failed(res=CustomResponseCode.HTTP_404)
+
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=failed.model_dump())
+
+    size = blob_metadata.size
+    headers = {"Accept-Ranges": "bytes", "ETag": format_etag(blob_metadata.etag)}
+
+    if blob_metadata.updated_at is not None:
+        headers["Last-Modified"] = format_http_date(blob_metadata.updated_at)
+
+    byte_range = None
+
+    if range_header is not None and (
+        if_range is None
+        or is_if_range_fresh(if_range, headers["ETag"], headers.get("Last-Modified"))
+    ):
+        try:
+            byte_range = parse_range_header(range_header, size)
+
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+
+    else:
+        (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        paper_service.iter_paper_document(blob_url, start=start, end=end),
+        status_code=status_code,
+        headers=headers,
+        media_type=blob_metadata.content_type or "application/pdf",
+    )
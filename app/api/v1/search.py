@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Search API Router.
+
+This search API router module contains the API router to search the papers.
+
+"""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+
+from app.common.exceptions import ServiceUnavailableError
+from app.common.response import CustomResponseCode, ResponseBase, ResponseModel
+from app.schemas.search import (
+    HybridSearchPaperParam,
+    HybridSearchPaperResultSchema,
+    SearchPaperParam,
+    SearchPaperResultSchema,
+)
+from app.services.search_service import SearchService
+
+router = APIRouter()
+
+
+@router.get(
+    "", response_model=ResponseModel[SearchPaperResultSchema], response_model_exclude_unset=True
+)
+async def search_papers(
+    obj: SearchPaperParam = Depends(),
+    search_service: SearchService = Depends(),
+) -> Response | ResponseModel[SearchPaperResultSchema]:
+    """Search papers.
+
+    This function is responsible for searching the papers by keywords over their titles,
+    abstracts, keywords and authors. The papers only have the fields of the requested view.
+
+    Args:
+        obj (SearchPaperParam): The search paper parameter.
+        search_service (SearchService): The search service.
+
+    Returns:
+        Response | ResponseModel[SearchPaperResultSchema]: The found papers, the most
+            relevant first.
+
+    """
+
+    try:
+        result = await search_service.search_papers(obj)
+
+    except ServiceUnavailableError:
+        return await ResponseBase.failed(res=CustomResponseCode.HTTP_503)
+
+    return await ResponseBase.fast_success(data=result, exclude_unset=True)
+
+
+@router.get(
+    "/semantic",
+    response_model=ResponseModel[SearchPaperResultSchema],
+    response_model_exclude_unset=True,
+)
+async def search_papers_semantic(
+    obj: SearchPaperParam = Depends(),
+    search_service: SearchService = Depends(),
+) -> Response | ResponseModel[SearchPaperResultSchema]:
+    """Search papers semantically.
+
+    This function is responsible for searching the papers whose titles and abstracts are
+    the closest to the query in the embedding space. The papers only have the fields of the
+    requested view.
+
+    Args:
+        obj (SearchPaperParam): The search paper parameter.
+        search_service (SearchService): The search service.
+
+    Returns:
+        Response | ResponseModel[SearchPaperResultSchema]: The found papers, the most
+            similar first.
+
+    """
+
+    try:
+        result = await search_service.search_papers_semantic(obj)
+
+    except ServiceUnavailableError:
+        return await ResponseBase.failed(res=CustomResponseCode.HTTP_503)
+
+    return await ResponseBase.fast_success(data=result, exclude_unset=True)
+
+
+@router.get(
+    "/hybrid",
+    response_model=ResponseModel[HybridSearchPaperResultSchema],
+    response_model_exclude_unset=True,
+)
+async def search_papers_hybrid(
+    obj: HybridSearchPaperParam = Depends(),
+    search_service: SearchService = Depends(),
+) -> Response | ResponseModel[HybridSearchPaperResultSchema]:
+    """Search papers by the keywords and the embeddings.
+
+    This function is responsible for gathering the candidate papers by the keywords and, if
+    the semantic search is enabled, by the embeddings, then ranking the candidates by both.
+    The papers only have the fields of the requested view, and the milliseconds of the
+    stages of the search are returned with them.
+
+    Args:
+        obj (HybridSearchPaperParam): The hybrid search paper parameter.
+        search_service (SearchService): The search service.
+
+    Returns:
+        Response | ResponseModel[HybridSearchPaperResultSchema]: The found papers, the
+            most relevant first.
+
+    """
+
+    try:
+        result = await search_service.search_papers_hybrid(obj)
+
+    except ServiceUnavailableError:
+        return await ResponseBase.failed(res=CustomResponseCode.HTTP_503)
+
+    return await ResponseBase.fast_success(data=result, exclude_unset=True)
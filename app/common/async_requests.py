@@ -6,12 +6,64 @@ This module is used to make async requests.
 """
 
 from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from urllib.parse import urlparse
 
 import aiohttp
 import backoff
 from pydantic import AnyHttpUrl
 
+from app.common.exceptions import PayloadTooLargeError
+from app.core.config import settings
+
+
+class HTTPSessionManager:
+    """HTTP session manager class.
+
+    This class is responsible for the client session shared for the application lifetime, so
+    outbound requests reuse pooled keep-alive connections and cached DNS lookups.
+
+    """
+
+    def __init__(self):
+        """Initialize the http session manager.
+
+        This method is responsible for initializing the http session manager.
+
+        """
+
+        self.session: aiohttp.ClientSession | None = None
+
+    async def connect(self):
+        """Open the shared client session.
+
+        This method is responsible for opening the shared client session.
+
+        """
+
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_CLIENT_CONNECTION_LIMIT,
+            limit_per_host=settings.HTTP_CLIENT_CONNECTION_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.HTTP_CLIENT_DNS_CACHE_TTL,
+            keepalive_timeout=settings.HTTP_CLIENT_KEEPALIVE_TIMEOUT,
+        )
+
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.HTTP_CLIENT_TIMEOUT),
+        )
+
+    async def close_connection(self):
+        """Close the shared client session.
+
+        This method is responsible for closing the shared client session.
+
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
 
 class AsyncRequestHandler:
     """Async request handler class.
@@ -20,29 +72,60 @@ class AsyncRequestHandler:
 
     """
 
-    def __init__(self, num_connection: int = 1, timeout: int = 10):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        num_connection: int = 1,
+        timeout: int = 10,
+    ):
         """Initialize async request handler class.
 
         Args:
+            session (aiohttp.ClientSession | None): The shared client session. If it is not
+                given, a client session is created and closed for each request.
             num_connection (int): The number of connection.
             timeout (int): The request timeout.
 
         """
 
+        self.session = session
         self.num_connection = num_connection
         self.timeout = timeout
 
+    @staticmethod
+    def validate_url(url: AnyHttpUrl) -> str:
+        """Validate the url.
+
+        Args:
+            url (AnyHttpUrl): The request url.
+
+        Returns:
+            str: The validated url.
+
+        """
+
+        parsed_url = urlparse(str(url))
+
+        if not parsed_url.hostname or not parsed_url.path:
+            raise ValueError("Invalid url")
+
+        return str(url)
+
     @asynccontextmanager
-    async def connect_session(self, host: str):
+    async def connect_session(self):
         """Connect to the session.
 
         Yields:
-            aiohttp.ClientSession: The client session.
+            aiohttp.ClientSession: The shared client session if it is given, otherwise a
+                client session which is closed on exit.
 
         """
 
+        if self.session is not None:
+            yield self.session
+            return
+
         session = aiohttp.ClientSession(
-            base_url=host,
             connector=aiohttp.TCPConnector(limit=self.num_connection),
             timeout=aiohttp.ClientTimeout(total=self.timeout),
         )
@@ -66,16 +149,101 @@ class AsyncRequestHandler:
 
         """
 
-        parsed_url = urlparse(str(url))
+        url = self.validate_url(url)
 
-        if not parsed_url.hostname or not parsed_url.path:
-            raise ValueError("Invalid url")
+        async with self.connect_session() as session:
+            return await self._request(session=session, method=method, url=url, **kwargs)
+
+    async def stream(
+        self,
+        method: str,
+        url: AnyHttpUrl,
+        chunk_size: int,
+        max_size: int | None = None,
+        **kwargs,
+    ) -> AsyncIterator[bytes]:
+        """Stream the response body.
+
+        The response body is read in chunks of at most `chunk_size` bytes, so only a single
+        chunk is held in memory at a time. The connection is kept until the iterator is
+        exhausted or closed.
+
+        Args:
+            method (str): The request method.
+            url (AnyHttpUrl): The request url.
+            chunk_size (int): The maximum size of each chunk in bytes.
+            max_size (int | None): The maximum size of the response body in bytes.
+            **kwargs: The request keyword arguments.
+
+        Yields:
+            bytes: The chunk of the response body.
 
-        async with self.connect_session(parsed_url.hostname) as session:
-            return await self._request(
-                session=session, method=method, url=parsed_url.path, **kwargs
+        Raises:
+            PayloadTooLargeError: If the response body is larger than `max_size`.
+
+        """
+
+        # Large bodies can take longer than the total timeout, so only bound the idle time.
+        kwargs.setdefault("timeout", aiohttp.ClientTimeout(total=None, sock_read=self.timeout))
+
+        async with self.connect_session() as session:
+            response = await self._open(
+                session=session, method=method, url=self.validate_url(url), **kwargs
             )
 
+            try:
+                if (
+                    max_size is not None
+                    and response.content_length is not None
+                    and response.content_length > max_size
+                ):
+                    raise PayloadTooLargeError(
+                        f"Response body of {url} is {response.content_length} bytes, "
+                        f"which exceeds the limit of {max_size} bytes"
+                    )
+
+                received = 0
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    received += len(chunk)
+
+                    if max_size is not None and received > max_size:
+                        raise PayloadTooLargeError(
+                            f"Response body of {url} exceeds the limit of {max_size} bytes"
+                        )
+
+                    yield chunk
+
+            finally:
+                response.release()
+
+    @backoff.on_exception(
+        backoff.expo,
+        aiohttp.ClientError,
+        max_tries=3,
+        factor=2,
+        logger=None,
+    )
+    async def _open(
+        self, session: aiohttp.ClientSession, method: str, url: str, **kwargs
+    ) -> aiohttp.ClientResponse:
+        """Open a response without reading its body.
+
+        Args:
+            session (aiohttp.ClientSession): The client session.
+            method (str): The request method.
+            url (str): The request url.
+            **kwargs: The request keyword arguments.
+
+        Returns:
+            aiohttp.ClientResponse: The response whose body is not read yet.
+
+        """
+
+        response = await session.request(method=method, url=url, **kwargs)
+        response.raise_for_status()
+
+        return response
+
     @backoff.on_exception(
         backoff.expo,
         aiohttp.ClientError,
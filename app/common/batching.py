@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Batching module.
+
+This module contains the scheduler which runs the concurrent calls of a blocking function
+as batches.
+
+"""
+
+import asyncio
+import contextlib
+from typing import Callable, Generic, Sequence, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Micro batcher class.
+
+    This class is responsible for collecting the items submitted by the concurrent callers
+    for up to `max_wait` seconds, or until `max_batch_size` items are collected, and for
+    running the blocking batch function on them at once in the threadpool. A batch runs at a
+    time, and the items submitted meanwhile make the next batch.
+
+    If the batch function raises, every caller of the batch gets the exception. A cancelled
+    caller is dropped from its batch if the batch has not run yet, and does not affect the
+    other callers. The batcher is bound to the event loop of its first submission.
+
+    """
+
+    def __init__(self, fn: Callable[[list[T]], Sequence[R]], max_batch_size: int, max_wait: float):
+        """Initialize the micro batcher.
+
+        Args:
+            fn (Callable[[list[T]], Sequence[R]]): The blocking batch function, which returns
+                the results in the order of the items.
+            max_batch_size (int): The maximum number of the items of a batch.
+            max_wait (float): The seconds to wait for more items after the first item of a
+                batch is submitted.
+
+        """
+
+        self.fn = fn
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait
+
+        self._pending: list[tuple[T, asyncio.Future[R]]] = []
+        self._ready: asyncio.Event | None = None
+        self._full: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def submit(self, item: T) -> R:
+        """Submit the item and wait for its result.
+
+        Args:
+            item (T): The item.
+
+        Returns:
+            R: The result of the item.
+
+        """
+
+        if self._worker is None or self._worker.done():
+            self._ready = asyncio.Event()
+            self._full = asyncio.Event()
+            self._worker = asyncio.create_task(self._run(self._ready, self._full))
+
+        future: asyncio.Future[R] = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self._notify()
+
+        return await future
+
+    async def stop(self):
+        """Stop the batcher and cancel the callers waiting for their results."""
+
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+        for _, future in self._pending:
+            future.cancel()
+
+        self._pending = []
+
+    def _notify(self):
+        """Update the events of the pending items."""
+
+        if self._ready is None or self._full is None:
+            return
+
+        if self._pending:
+            self._ready.set()
+
+        else:
+            self._ready.clear()
+
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+
+        else:
+            self._full.clear()
+
+    async def _run(self, ready: asyncio.Event, full: asyncio.Event):
+        """Run the batches until the batcher is stopped.
+
+        Args:
+            ready (asyncio.Event): The event set while an item is pending.
+            full (asyncio.Event): The event set while a full batch is pending.
+
+        """
+
+        while True:
+            await ready.wait()
+
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(full.wait(), timeout=self.max_wait)
+
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            self._notify()
+
+            await self._run_batch([(item, future) for item, future in batch if not future.done()])
+
+    async def _run_batch(self, batch: list[tuple[T, asyncio.Future[R]]]):
+        """Run the batch function and resolve the callers of the batch.
+
+        Args:
+            batch (list[tuple[T, asyncio.Future[R]]]): The items and the futures of their
+                callers.
+
+        """
+
+        if not batch:
+            return
+
+        try:
+            results = await run_in_threadpool(self.fn, [item for item, _ in batch])
+
+            if len(results) != len(batch):
+                raise ValueError(f"Expected {len(batch)} results, got {len(results)}")
+
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results, strict=True):
+            if not future.done():
+                future.set_result(result)
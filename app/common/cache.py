@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Cache module.
+
+This module contains the in process cache with a time to live per entry.
+
+"""
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+from pydantic import Field
+
+from app.common.pydantic_model import ModelBase
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats(ModelBase):
+    """Cache stats class.
+
+    This class is responsible for the counters of a cache since it is created, which tell
+    whether the cache is large enough for its working set.
+
+    """
+
+    size: int = Field(..., description="The number of entries.")
+    maxsize: int = Field(..., description="The maximum number of entries.")
+    hits: int = Field(..., description="The number of lookups which found a live entry.")
+    misses: int = Field(..., description="The number of lookups which found no live entry.")
+    evictions: int = Field(
+        ..., description="The number of entries evicted as the least recently used ones."
+    )
+    expirations: int = Field(..., description="The number of entries dropped as expired.")
+
+
+class TTLCache(Generic[K, V]):
+    """Time to live cache class.
+
+    This class is responsible for keeping the values until their time to live elapses. Once
+    `maxsize` entries are kept, the least recently used entry is evicted. The cache is not
+    shared between the processes, and is meant to be used from the event loop thread.
+
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """Initialize the time to live cache.
+
+        Args:
+            maxsize (int): The maximum number of entries.
+            ttl (float): The default time to live of an entry in seconds.
+
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        """Get the number of entries, including the expired ones not evicted yet."""
+
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """Get the value of the key.
+
+        Args:
+            key (K): The key.
+
+        Returns:
+            Optional[V]: The value, or None if the key is missing or expired.
+
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        """Set the value of the key.
+
+        Args:
+            key (K): The key.
+            value (V): The value.
+            ttl (Optional[float]): The time to live in seconds, defaults to `self.ttl`.
+
+        """
+
+        ttl = self.ttl if ttl is None else ttl
+
+        if ttl <= 0 or self.maxsize <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: K):
+        """Delete the key.
+
+        Args:
+            key (K): The key.
+
+        """
+
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Delete every key."""
+
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Get the counters of the cache.
+
+        Returns:
+            CacheStats: The size and the counters of the cache.
+
+        """
+
+        return CacheStats(
+            size=len(self._entries),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+        )
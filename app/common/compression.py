@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""Compression module.
+
+This module contains the content codings of the responses, the negotiation of them with the
+`Accept-Encoding` request header (RFC 9110 section 12.5.3), and the middleware which
+compresses the responses.
+
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+class CompressorBase(ABC):
+    """Compressor base class.
+
+    This class is the interface of the compressors of a content coding, which compress a
+    body chunk by chunk.
+
+    """
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Compress the chunk of the body.
+
+        Args:
+            data (bytes): The chunk of the body.
+
+        Returns:
+            bytes: The compressed data which is ready, which can be empty.
+
+        """
+
+    @abstractmethod
+    def flush(self) -> bytes:
+        """Flush the compressed data of the chunks so far.
+
+        Returns:
+            bytes: The compressed data, which the client can decompress up to the end of
+                the chunks so far.
+
+        """
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """Finish the compressed body.
+
+        Returns:
+            bytes: The rest of the compressed body.
+
+        """
+
+
+class GzipCompressor(CompressorBase):
+    """Gzip compressor class.
+
+    This class is responsible for the `gzip` content coding.
+
+    """
+
+    def __init__(self, level: int):
+        """Initialize the gzip compressor.
+
+        Args:
+            level (int): The compression level, from 1 to 9.
+
+        """
+
+        # The window bits of 16 + 15 write the gzip header and trailer.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress the chunk of the body."""
+
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Flush the compressed data of the chunks so far."""
+
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """Finish the compressed body."""
+
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class ZstdCompressor(CompressorBase):
+    """Zstandard compressor class.
+
+    This class is responsible for the `zstd` content coding. `zstandard` is an optional
+    dependency, which is only imported when the compressor is created.
+
+    """
+
+    def __init__(self, level: int):
+        """Initialize the zstandard compressor.
+
+        Args:
+            level (int): The compression level, from 1 to 22.
+
+        """
+
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor: Any = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress the chunk of the body."""
+
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Flush the compressed data of the chunks so far."""
+
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        """Finish the compressed body."""
+
+        return self._compressor.flush()
+
+
+def get_available_encodings() -> list[str]:
+    """Get the available content codings.
+
+    This function is used to get the content codings which can be used, in the order of
+    the preference of the server. `zstd` is only available if `zstandard` is installed.
+
+    Returns:
+        list[str]: The content codings.
+
+    """
+
+    try:
+        import zstandard  # noqa: F401
+
+    except ImportError:
+        return ["gzip"]
+
+    return ["zstd", "gzip"]
+
+
+def negotiate_encoding(accept_encoding: str, encodings: list[str]) -> str | None:
+    """Negotiate content coding.
+
+    This function is used to select the content coding of the highest quality value in the
+    `Accept-Encoding` header. The ties are broken by the order of `encodings`.
+
+    Args:
+        accept_encoding (str): The value of the `Accept-Encoding` header, e.g.
+            `gzip;q=0.8, zstd`.
+        encodings (list[str]): The available content codings, the preferred first.
+
+    Returns:
+        str | None: The content coding, or None if the body should not be encoded.
+
+    """
+
+    qualities: dict[str, float] = {}
+
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+
+        for param in params:
+            name, _, value = param.partition("=")
+
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+
+                except ValueError:
+                    quality = 0.0
+
+        if coding:
+            qualities[coding.lower()] = quality
+
+    best, best_quality = None, 0.0
+
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+class CompressionMiddleware:
+    """Compression middleware class.
+
+    This class is responsible for compressing the bodies of the responses with the content
+    coding negotiated with the client. The bodies smaller than `minimum_size` are not
+    compressed, and neither are the encoded bodies, the partial contents, and the content
+    types in `excluded_content_types`, e.g. the PDF documents which are compressed already.
+
+    A body sent at once is compressed at once. A streamed body is compressed chunk by chunk
+    once `minimum_size` bytes of it are received, and each chunk is flushed to the client as
+    it is compressed, so the body is never buffered as a whole. The strong entity tags of
+    the compressed responses are weakened, as they are of the uncompressed representations.
+
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = settings.COMPRESSION_GZIP_LEVEL,
+        zstd_level: int = settings.COMPRESSION_ZSTD_LEVEL,
+        excluded_content_types: list[str] = settings.COMPRESSION_EXCLUDED_CONTENT_TYPES,
+    ):
+        """Initialize the compression middleware.
+
+        Args:
+            app (ASGIApp): The application.
+            minimum_size (int): The minimum size of the compressed bodies in bytes.
+            gzip_level (int): The compression level of `gzip`.
+            zstd_level (int): The compression level of `zstd`.
+            excluded_content_types (list[str]): The prefixes of the content types which are
+                not compressed.
+
+        """
+
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_content_types = tuple(excluded_content_types)
+        self.encodings = get_available_encodings()
+        self.compressors: dict[str, Callable[[], CompressorBase]] = {
+            "gzip": lambda: GzipCompressor(gzip_level),
+            "zstd": lambda: ZstdCompressor(zstd_level),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Run the application and compress its response.
+
+        Args:
+            scope (Scope): The scope of the request.
+            receive (Receive): The receive channel.
+            send (Send): The send channel.
+
+        """
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        responder = CompressionResponder(self, send, encoding)
+
+        await self.app(scope, receive, responder.send)
+
+    def is_compressible(self, message: Message) -> bool:
+        """Check the response start message.
+
+        Args:
+            message (Message): The `http.response.start` message.
+
+        Returns:
+            bool: True if the body of the response can be compressed.
+
+        """
+
+        headers = Headers(raw=message["headers"])
+
+        return (
+            message["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and not headers.get("content-type", "").lower().startswith(self.excluded_content_types)
+        )
+
+
+class CompressionResponder:
+    """Compression responder class.
+
+    This class is responsible for compressing the messages of a response.
+
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str | None):
+        """Initialize the compression responder.
+
+        Args:
+            middleware (CompressionMiddleware): The compression middleware.
+            send (Send): The send channel.
+            encoding (str | None): The negotiated content coding, or None if the client
+                does not accept any.
+
+        """
+
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+
+        self.start: Message | None = None
+        self.buffer: list[bytes] = []
+        self.buffer_size = 0
+        self.compressor: CompressorBase | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        """Send the message of the response.
+
+        Args:
+            message (Message): The message.
+
+        """
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            compressible = self.middleware.is_compressible(message)
+
+            if compressible:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+
+            if self.encoding is None or not compressible:
+                self.passthrough = True
+                await self._send(message)
+                return
+
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            data = self.compressor.compress(body)
+            data += self.compressor.flush() if more_body else self.compressor.finish()
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        self.buffer.append(body)
+        self.buffer_size += len(body)
+
+        if self.buffer_size < self.middleware.minimum_size:
+            if more_body:
+                return
+
+            await self._send_uncompressed()
+            return
+
+        await self._send_compressed(more_body)
+
+    async def _send_uncompressed(self):
+        """Send the buffered body of the response as it is."""
+
+        start = self.start or {}
+        self.passthrough = True
+
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": b"".join(self.buffer)})
+
+    async def _send_compressed(self, more_body: bool):
+        """Start compressing the body of the response with the buffered chunks.
+
+        Args:
+            more_body (bool): Whether more chunks of the body follow.
+
+        """
+
+        start = self.start or {}
+        encoding = self.encoding or "identity"
+
+        self.compressor = self.middleware.compressors[encoding]()
+        data = self.compressor.compress(b"".join(self.buffer))
+        data += self.compressor.flush() if more_body else self.compressor.finish()
+        self.buffer = []
+
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = encoding
+
+        if more_body:
+            del headers["Content-Length"]
+
+        else:
+            headers["Content-Length"] = str(len(data))
+
+        etag = headers.get("ETag")
+
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -4,7 +4,7 @@ This module contains the application wise enums.
 
 """
 
-from enum import IntEnum
+from enum import Enum, IntEnum
 
 
 class BackgroundTaskStatus(IntEnum):
@@ -17,3 +17,65 @@ class BackgroundTaskStatus(IntEnum):
     IN_PROGRESS = 0  # Background task is in progress.
     SUCCESS = 1  # Background task is success.
     FAILED = 2  # Background task is failed.
+
+
+class IngestionJobStatus(IntEnum):
+    """Ingestion job status enum.
+
+    This class is responsible for ingestion job status enum.
+
+    """
+
+    PENDING = 0  # Job is waiting to be claimed by a worker.
+    RUNNING = 1  # Job is leased by a worker.
+    SUCCESS = 2  # Job is done.
+    FAILED = 3  # Job is failed and will not be retried.
+
+
+class PaperDocumentDelivery(str, Enum):
+    """Paper document delivery enum.
+
+    This class is responsible for the ways to deliver a paper document to a client.
+
+    """
+
+    STREAM = "stream"  # Stream the paper document through the server.
+    REDIRECT = "redirect"  # Redirect to a signed url of the storage.
+    SIGNED_URL = "signed_url"  # Return a signed url of the storage.
+
+
+class CountStrategy(IntEnum):
+    """Count strategy enum.
+
+    This class is responsible for the ways to count the documents of a paginated query.
+
+    """
+
+    EXACT = 0  # Count the matching documents on every query.
+    ESTIMATED = 1  # Read the document count of the collection metadata, for empty filters.
+    CACHED = 2  # Count the matching documents and cache the count until a write.
+    SKIP = 3  # Do not count the documents.
+
+
+class PaperSortOrder(str, Enum):
+    """Paper sort order enum.
+
+    This class is responsible for the sort orders of the paper list, each of which is served
+    by a compound index ending with `_id`.
+
+    """
+
+    ID = "id"  # Registration order.
+    PUBLISHED_AT = "published_at"  # Newest published first.
+    TITLE = "title"  # Alphabetical order of the title.
+
+
+class PaperListView(str, Enum):
+    """Paper list view enum.
+
+    This class is responsible for the named sets of the fields of the paper list items.
+
+    """
+
+    SUMMARY = "summary"  # The fields shown in a list, without the abstract.
+    FULL = "full"  # Every field of the paper detail.
@@ -29,3 +29,43 @@ class NotFoundError(PaperQuestException):
     This class represents a not found error.
 
     """
+
+
+class PayloadTooLargeError(PaperQuestException):
+    """Payload too large error class.
+
+    This class represents an error for a payload which exceeds the size limit.
+
+    """
+
+
+class RangeNotSatisfiableError(PaperQuestException):
+    """Range not satisfiable error class.
+
+    This class represents an error for a byte range which does not overlap the content.
+
+    """
+
+
+class InvalidPageTokenError(PaperQuestException):
+    """Invalid page token error class.
+
+    This class represents an error for a malformed page token or one of another sort order.
+
+    """
+
+
+class InvalidFieldError(PaperQuestException):
+    """Invalid field error class.
+
+    This class represents an error for a requested field which does not exist.
+
+    """
+
+
+class ServiceUnavailableError(PaperQuestException):
+    """Service unavailable error class.
+
+    This class represents an error for a resource which is not available in the process.
+
+    """
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""HTTP range utility functions
+
+This module contains the functions to serve a part of a content with the `Range` and `If-Range`
+request headers (RFC 9110 section 14), and to answer the conditional requests of the
+representations the client already has (RFC 9110 section 13).
+
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from app.common.exceptions import RangeNotSatisfiableError
+
+
+def parse_range_header(range_header: str, size: int) -> tuple[int, int] | None:
+    """Parse range header.
+
+    This function is used to resolve a `Range` header of a single byte range against the
+    size of the content. A header which can not be parsed, has another unit or asks for
+    several ranges is ignored, so the whole content is served.
+
+    Args:
+        range_header (str): The value of the `Range` header, e.g. `bytes=0-1023`.
+        size (int): The size of the content in bytes.
+
+    Returns:
+        tuple[int, int] | None: The first and the last byte positions of the range, both
+            inclusive, or None if the header is ignored.
+
+    Raises:
+        RangeNotSatisfiableError: If the range does not overlap the content.
+
+    """
+
+    unit, _, byte_range = range_header.partition("=")
+
+    if unit.strip().lower() != "bytes" or "," in byte_range:
+        return None
+
+    first_text, separator, last_text = byte_range.strip().partition("-")
+
+    if not separator:
+        return None
+
+    try:
+        if not first_text:
+            suffix_length = int(last_text)
+
+            if suffix_length <= 0 or size == 0:
+                raise RangeNotSatisfiableError(f"Range {range_header} is not satisfiable")
+
+            return max(size - suffix_length, 0), size - 1
+
+        first = int(first_text)
+        last = int(last_text) if last_text else size - 1
+
+    except ValueError:
+        return None
+
+    if first < 0:
+        return None
+
+    if first >= size:
+        raise RangeNotSatisfiableError(f"Range {range_header} is not satisfiable")
+
+    if last < first:
+        return None
+
+    return first, min(last, size - 1)
+
+
+def format_etag(etag: str) -> str:
+    """Format entity tag.
+
+    This function is used to quote an entity tag for the `ETag` header.
+
+    Args:
+        etag (str): The entity tag, quoted or not.
+
+    Returns:
+        str: The strong entity tag, e.g. `"abc"`.
+
+    """
+
+    return '"' + etag.strip('"') + '"'
+
+
+def format_http_date(value: datetime) -> str:
+    """Format http date.
+
+    This function is used to format a datetime as the IMF-fixdate of the http headers.
+
+    Args:
+        value (datetime): The datetime, which is taken as UTC if it is naive.
+
+    Returns:
+        str: The http date, e.g. `Sun, 06 Nov 1994 08:49:37 GMT`.
+
+    """
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_if_range_fresh(if_range: str, etag: str, last_modified: str | None) -> bool:
+    """Check if-range header.
+
+    This function is used to check if the representation the client has a part of is
+    still the current one, in which case the `Range` header is honoured.
+
+    Args:
+        if_range (str): The value of the `If-Range` header, an entity tag or an http date.
+        etag (str): The current entity tag of the content, quoted.
+        last_modified (str | None): The current `Last-Modified` http date of the content.
+
+    Returns:
+        bool: True if the range should be served.
+
+    """
+
+    if_range = if_range.strip()
+
+    if if_range.startswith(('"', "W/")):
+        # Weak entity tags never match (RFC 9110 section 13.1.5).
+        return not if_range.startswith("W/") and if_range == etag
+
+    return last_modified is not None and if_range == last_modified
+
+
+def is_not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    last_modified: datetime | None,
+) -> bool:
+    """Check if-none-match and if-modified-since headers.
+
+    This function is used to check if the representation the client has is still the
+    current one, in which case it is answered with 304 Not Modified. The `If-Modified-Since`
+    header is only checked if there is no `If-None-Match` header (RFC 9110 section 13.2.2).
+
+    Args:
+        if_none_match (str | None): The value of the `If-None-Match` header, `*` or the
+            comma separated entity tags.
+        if_modified_since (str | None): The value of the `If-Modified-Since` header.
+        etag (str): The current entity tag of the representation, quoted.
+        last_modified (datetime | None): The time of the last modification of the
+            representation, which is taken as UTC if it is naive.
+
+    Returns:
+        bool: True if the representation is not modified.
+
+    """
+
+    if if_none_match is not None:
+        # The weak comparison is used (RFC 9110 section 13.1.2).
+        etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in etags or etag in etags
+
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        modified_since = parsedate_to_datetime(if_modified_since)
+
+    except (TypeError, ValueError):
+        return False
+
+    if modified_since.tzinfo is None:
+        modified_since = modified_since.replace(tzinfo=timezone.utc)
+
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    # The http dates have a resolution of seconds.
+    return last_modified.replace(microsecond=0) <= modified_since
@@ -36,3 +36,28 @@ def count_total_pages(total: int, page_size: int) -> int:
     """
 
     return (total + page_size - 1) // page_size
+
+
+def parse_blob_url(blob_url: str) -> tuple[str, str, str]:
+    """Parse storage blob url.
+
+    This function is used to split a storage blob url into its parts.
+
+    Args:
+        blob_url (str): The storage blob url, `<scheme>://<bucket>/<blob name>`.
+
+    Returns:
+        tuple[str, str, str]: The url scheme, the bucket name and the blob name.
+
+    Raises:
+        ValueError: If the blob url is malformed.
+
+    """
+
+    scheme, separator, path = blob_url.partition("://")
+    bucket_name, _, blob_name = path.partition("/")
+
+    if not separator or not scheme or not bucket_name or not blob_name:
+        raise ValueError(f"Invalid blob url {blob_url}")
+
+    return scheme, bucket_name, blob_name
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Keyset pagination module.
+
+This module contains the page cursor and the functions to seek a page of documents sorted by
+a compound key, e.g. `(published_at desc, _id desc)`. A page is found by a range on the sort
+key, which is served by the compound index of the key, so the cost of a page does not depend
+on how deep it is.
+
+"""
+
+import base64
+import binascii
+from typing import Any
+
+from bson import json_util
+from bson.errors import InvalidBSON
+from pydantic import Field, ValidationError
+
+from app.common.exceptions import InvalidPageTokenError
+from app.common.pydantic_model import ModelBase
+
+SortKeys = list[tuple[str, int]]
+
+
+class PageCursor(ModelBase):
+    """Page cursor model.
+
+    This class is responsible for the position of a page in a sorted list of documents.
+
+    """
+
+    sort: str = Field(..., description="The sort order of the list.")
+    values: list[Any] = Field(..., description="The sort key of the document to seek from.")
+    backward: bool = Field(default=False, description="Whether to seek the previous page.")
+
+
+def encode_page_cursor(cursor: PageCursor) -> str:
+    """Encode page cursor.
+
+    This function is used to encode a page cursor into an opaque url safe page token.
+
+    Args:
+        cursor (PageCursor): The page cursor.
+
+    Returns:
+        str: The page token.
+
+    """
+
+    raw = json_util.dumps([cursor.sort, cursor.values, cursor.backward])
+
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_page_cursor(page_token: str) -> PageCursor:
+    """Decode page cursor.
+
+    This function is used to decode a page token into the page cursor.
+
+    Args:
+        page_token (str): The page token.
+
+    Returns:
+        PageCursor: The page cursor.
+
+    Raises:
+        InvalidPageTokenError: If the page token is malformed.
+
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(page_token + "=" * (-len(page_token) % 4))
+        sort, values, backward = json_util.loads(raw)
+
+        return PageCursor(sort=sort, values=values, backward=backward)
+
+    except (binascii.Error, InvalidBSON, TypeError, ValueError, ValidationError) as e:
+        raise InvalidPageTokenError(f"Invalid page token {page_token}") from e
+
+
+def get_sort_values(document: Any, sort_keys: SortKeys) -> list[Any]:
+    """Get sort values.
+
+    This function is used to get the sort key of a document.
+
+    Args:
+        document (Any): The document.
+        sort_keys (SortKeys): The fields and the directions of the sort key.
+
+    Returns:
+        list[Any]: The values of the sort key.
+
+    """
+
+    return [getattr(document, "id" if key == "_id" else key) for key, _ in sort_keys]
+
+
+def get_seek_sort(sort_keys: SortKeys, backward: bool) -> SortKeys:
+    """Get seek sort.
+
+    This function is used to get the sort to seek the documents with. The previous page is
+    sought in the reverse order, and reversed back once found.
+
+    Args:
+        sort_keys (SortKeys): The fields and the directions of the sort key.
+        backward (bool): Whether to seek the previous page.
+
+    Returns:
+        SortKeys: The sort to seek the documents with.
+
+    """
+
+    return [(key, -direction if backward else direction) for key, direction in sort_keys]
+
+
+def build_keyset_query(sort_keys: SortKeys, values: list[Any], backward: bool) -> dict:
+    """Build keyset query.
+
+    This function is used to build the query of the documents after the sort key in the
+    seek sort. The first field is bounded at the top level, so the query is a single range
+    scan of the compound index, and the disjunction only breaks the ties of the first field.
+
+    Args:
+        sort_keys (SortKeys): The fields and the directions of the sort key.
+        values (list[Any]): The values of the sort key to seek from.
+        backward (bool): Whether to seek the previous page.
+
+    Returns:
+        dict: The query.
+
+    Raises:
+        InvalidPageTokenError: If the values do not match the sort key.
+
+    """
+
+    if len(values) != len(sort_keys):
+        raise InvalidPageTokenError("The page token does not match the sort order")
+
+    seek_sort = get_seek_sort(sort_keys, backward)
+    clauses = []
+
+    for index, (key, direction) in enumerate(seek_sort):
+        clause: dict[str, Any] = {
+            prefix_key: prefix_value
+            for (prefix_key, _), prefix_value in zip(seek_sort[:index], values[:index], strict=True)
+        }
+        clause[key] = {"$gt" if direction > 0 else "$lt": values[index]}
+        clauses.append(clause)
+
+    first_key, first_direction = seek_sort[0]
+
+    return {first_key: {"$gte" if first_direction > 0 else "$lte": values[0]}, "$or": clauses}
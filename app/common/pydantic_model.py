@@ -7,7 +7,7 @@ This module contains the common Pydantic models for the application.
 
 import base64
 from datetime import datetime
-from typing import Generic
+from typing import Generic, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -39,10 +39,15 @@ class PaginatedResult(ModelBase, Generic[MODEL_TYPE]):
     This class is the base class for the paginated result.
 
     Attributes:
-        total (int): The total number of items which match the query without the pagination.
+        total (Optional[int]): The total number of items which match the query without the
+            pagination, or None if it is not counted.
         items (list[MODEL_TYPE]): The list of items.
+        next_page_token (Optional[str]): The token of the next page, if there is one.
+        prev_page_token (Optional[str]): The token of the previous page, if there is one.
 
     """
 
-    total: int
+    total: Optional[int]
     items: list[MODEL_TYPE]
+    next_page_token: Optional[str] = None
+    prev_page_token: Optional[str] = None
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 """Response module for handling response messages."""
 
-from .response_base import ResponseBase, ResponseModel
+from .response_base import ModelJSONResponse, ResponseBase, ResponseModel
 from .response_code import CustomErrorCode, CustomResponseCode
 
 __all__ = [
+    "ModelJSONResponse",
     "ResponseBase",
     "ResponseModel",
     "CustomResponseCode",
@@ -5,7 +5,9 @@ This module contains response schema
 
 """
 
-from typing import Any, Generic, Optional
+from typing import Any, Generic, Mapping, Optional
+
+from fastapi.responses import Response
 
 from app.common.pydantic_model import ModelBase
 from app.common.response.response_code import CustomResponseCode
@@ -24,6 +26,51 @@ class ResponseModel(ModelBase, Generic[MODEL_TYPE]):
     data: Optional[MODEL_TYPE] = None
 
 
+class ModelJSONResponse(Response):
+    """Model JSON response
+
+    This class is used to render a response model whose data is already validated to JSON
+    once, with the serializer of the model. The route returning it skips the validation and
+    the serialization of its response model by FastAPI, which only documents the schema.
+
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: ResponseModel[Any],
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        exclude_unset: bool = False,
+    ):
+        """Initialize the model JSON response
+
+        Args:
+            content (ResponseModel): response model
+            status_code (int): http status code
+            headers (Mapping[str, str] | None): response headers
+            exclude_unset (bool): whether to leave out the fields which are not set
+
+        """
+
+        self.exclude_unset = exclude_unset
+        super().__init__(content=content, status_code=status_code, headers=headers)
+
+    def render(self, content: ResponseModel[Any]) -> bytes:
+        """Render the response model to JSON
+
+        Args:
+            content (ResponseModel): response model
+
+        Returns:
+            bytes: JSON of the response model
+
+        """
+
+        return content.__pydantic_serializer__.to_json(content, exclude_unset=self.exclude_unset)
+
+
 class ResponseBase:
     """Response base
 
@@ -85,3 +132,32 @@ class ResponseBase:
         """
 
         return await ResponseBase._response(res=res, data=data)
+
+    @staticmethod
+    async def fast_success(
+        res: CustomResponseCode = CustomResponseCode.HTTP_200,
+        data: Optional[Any] = None,
+        exclude_unset: bool = False,
+        headers: Mapping[str, str] | None = None,
+    ) -> ModelJSONResponse:
+        """Fast success
+
+        The data is serialized once as it is, so it must be a validated model of the
+        response model of the route.
+
+        Args:
+            res (CustomResponseCode): custom response code
+            data (Any): validated response data
+            exclude_unset (bool): whether to leave out the fields which are not set
+            headers (Mapping[str, str] | None): response headers
+
+        Returns:
+            ModelJSONResponse: JSON response of the response model
+
+        """
+
+        return ModelJSONResponse(
+            await ResponseBase._response(res=res, data=data),
+            headers=headers,
+            exclude_unset=exclude_unset,
+        )
@@ -50,6 +50,7 @@ class CustomResponseCode(CustomCodeBase):
     HTTP_400 = (400, "Request failed")
     HTTP_403 = (403, "Forbidden")
     HTTP_404 = (404, "Not found")
+    HTTP_503 = (503, "Service unavailable")
     UNKNOWN = (999, "Unknown response code")
 
 
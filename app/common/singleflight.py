@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Single flight module.
+
+This module contains the coalescer which shares a call among the concurrent callers with
+the same key.
+
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+R = TypeVar("R")
+
+
+class _Flight(Generic[R]):
+    """Flight class.
+
+    This class is responsible for the task of a call in flight and the number of its callers.
+
+    """
+
+    def __init__(self, task: asyncio.Future[R]):
+        """Initialize the flight.
+
+        Args:
+            task (asyncio.Future[R]): The task of the call.
+
+        """
+
+        self.task = task
+        self.callers = 0
+
+
+class SingleFlight(Generic[K, R]):
+    """Single flight class.
+
+    This class is responsible for running a call once for the concurrent callers with the
+    same key. The first caller starts the call in a task, and the callers which come while it
+    is in flight wait for the same task. The key is forgotten once the call is done, so the
+    results are not cached, and the next caller starts a new call.
+
+    Every caller of a call gets its result, which is shared and must not be modified, or its
+    exception. A cancelled caller stops waiting without cancelling the call for the other
+    callers, and the call is cancelled once all of its callers are cancelled. The callers of
+    another event loop do not join the calls in flight.
+
+    """
+
+    def __init__(self):
+        """Initialize the single flight."""
+
+        self._flights: dict[K, _Flight[R]] = {}
+
+    def __len__(self) -> int:
+        """Get the number of the calls in flight."""
+
+        return len(self._flights)
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[R]]) -> R:
+        """Run the call of the key, or wait for the one in flight.
+
+        Args:
+            key (K): The key of the call.
+            fn (Callable[[], Awaitable[R]]): The function which starts the call, which is
+                only called if no call of the key is in flight.
+
+        Returns:
+            R: The result of the call.
+
+        """
+
+        flight = self._flights.get(key)
+
+        if (
+            flight is None
+            or flight.task.done()
+            or flight.task.get_loop() is not asyncio.get_running_loop()
+        ):
+            flight = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self._flights[key] = flight
+
+        flight.callers += 1
+
+        try:
+            return await asyncio.shield(flight.task)
+
+        finally:
+            flight.callers -= 1
+
+            if flight.callers == 0 and not flight.task.done():
+                # Every caller is cancelled, so nobody waits for the call.
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def forget(self, key: K):
+        """Forget the call of the key in flight.
+
+        The callers which come later start a new call, e.g. after a write which the call in
+        flight may not see. The callers of the forgotten call still get its result.
+
+        Args:
+            key (K): The key of the call.
+
+        """
+
+        self._flights.pop(key, None)
+
+    def _forget(self, key: K, flight: _Flight[R]):
+        """Forget the flight if it is still the one of the key.
+
+        Args:
+            key (K): The key of the call.
+            flight (_Flight[R]): The flight.
+
+        """
+
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -16,3 +16,4 @@ MODEL_TYPE = TypeVar("MODEL_TYPE", bound=BaseModel)
 T = TypeVar("T")
 
 GCSBlobUrl = Annotated[str, StringConstraints(pattern=r"gs://.*")]
+BlobUrl = Annotated[str, StringConstraints(pattern=r"(gs|local)://.*")]
@@ -39,6 +39,101 @@ class Settings(BaseSettings):
     MONGODB_USER_NAME: str | None = None
     MONGODB_USER_PASSWORD: str | None = None
     MONGODB_DB_NAME: str = "PaperQuest"
+    MONGODB_BULK_WRITE_CHUNK_SIZE: int = 1000
+    # Counts of the filtered queries are cached per process until a write or the ttl.
+    MONGODB_COUNT_CACHE_TTL: int = 60
+    MONGODB_COUNT_CACHE_SIZE: int = 1024
+
+    # Bulk registration settings
+    BULK_REGISTER_MAX_ITEMS: int = 10000
+
+    # Response compression settings
+    COMPRESSION_ENABLED: bool = True
+    # Bodies smaller than this are sent uncompressed, as the saving does not pay for the cost.
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    # zstd is only negotiated if the optional zstandard package is installed.
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # Prefixes of the content types which are compressed already.
+    COMPRESSION_EXCLUDED_CONTENT_TYPES: list[str] = [
+        "application/pdf",
+        "application/zip",
+        "application/gzip",
+        "application/zstd",
+        "image/",
+        "audio/",
+        "video/",
+    ]
+
+    # Paper metadata settings
+    # Cache-Control of the paper metadata, which the caches revalidate with their ETags.
+    PAPER_METADATA_CACHE_CONTROL: str = "no-cache"
+    # Paper metadata read by id are cached per process until a write through the process or
+    # the ttl, and the missing ones for the shorter miss ttl.
+    PAPER_METADATA_CACHE_SIZE: int = 10000
+    PAPER_METADATA_CACHE_TTL: float = 60
+    PAPER_METADATA_CACHE_MISS_TTL: float = 5
+    # The export streams the paper metadata read in batches, holding one batch at a time.
+    PAPER_METADATA_EXPORT_BATCH_SIZE: int = 500
+    PAPER_METADATA_EXPORT_MAX_BATCH_SIZE: int = 5000
+
+    # Ingestion worker settings
+    INGESTION_WORKER_ENABLED: bool = True
+    INGESTION_WORKER_CONCURRENCY: int = 4
+    INGESTION_WORKER_POLL_INTERVAL: float = 1.0
+    INGESTION_JOB_LEASE_SECONDS: float = 60.0
+    INGESTION_JOB_HEARTBEAT_INTERVAL: float = 20.0
+    INGESTION_JOB_MAX_ATTEMPTS: int = 5
+    INGESTION_JOB_RETRY_BASE_DELAY: float = 10.0
+    INGESTION_JOB_RETRY_MAX_DELAY: float = 3600.0
+
+    # Search index settings, the index is built in memory when the application starts.
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_INDEX_BUILD_BATCH_SIZE: int = 5000
+    SEARCH_MAX_RESULTS: int = 100
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    # The hybrid search rescores at most the max candidates from each of the keyword and
+    # the vector index exactly, and fuses the rankings with the reciprocal rank fusion.
+    SEARCH_CANDIDATES: int = 200
+    SEARCH_MAX_CANDIDATES: int = 2000
+    SEARCH_RRF_K: int = 60
+    # The semantic search needs `torch` to run the embedding model on CPU.
+    SEMANTIC_SEARCH_ENABLED: bool = False
+    EMBEDDING_ENCODER: str = "TransformersTextEncoder"
+    EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_LENGTH: int = 256
+    # The queries are embedded in batches collected for up to the max wait seconds, and
+    # their embeddings are cached by the normalized queries.
+    EMBEDDING_QUERY_BATCH_SIZE: int = 32
+    EMBEDDING_QUERY_MAX_WAIT: float = 0.005
+    EMBEDDING_QUERY_CACHE_SIZE: int = 10000
+    EMBEDDING_QUERY_CACHE_TTL: int = 3600
+    # Vector index backend, the name of an index in the vector index registry.
+    VECTOR_INDEX_BACKEND: str = "FlatVectorIndex"
+    # The vector index is loaded from and saved to the npz file, if it is set.
+    VECTOR_INDEX_PATH: str | None = None
+    # The clusters of the inverted file index, and the clusters scanned by a query.
+    IVF_NLIST: int = 1024
+    IVF_NPROBE: int = 16
+    IVF_TRAIN_SIZE: int = 50000
+    IVF_TRAIN_ITERATIONS: int = 10
+    # The quantized indexes keep the codes of the vectors in memory and the float vectors
+    # in a temporary file of the store directory, and rescore the rescore factor times k
+    # best codes by the float vectors. The product quantizer trains the centroids of its
+    # subspaces with the IVF train iterations.
+    QUANTIZATION_TRAIN_SIZE: int = 50000
+    QUANTIZATION_RESCORE_FACTOR: int = 16
+    PQ_SUBSPACES: int = 96
+    VECTOR_STORE_DIR: str | None = None
+
+    # Outbound http client settings
+    HTTP_CLIENT_CONNECTION_LIMIT: int = 100
+    HTTP_CLIENT_CONNECTION_LIMIT_PER_HOST: int = 8
+    HTTP_CLIENT_DNS_CACHE_TTL: int = 300
+    HTTP_CLIENT_KEEPALIVE_TIMEOUT: float = 30.0
+    HTTP_CLIENT_TIMEOUT: int = 10
 
     # Data directory settings
     DATA_DIR: str = "andrew/paperquest/data"
@@ -46,9 +141,31 @@ class Settings(BaseSettings):
     # Google cloud storage settings
     GOOGLE_CLOUD_PROJECT_ID: str | None = None
     GOOGLE_CLOUD_STORAGE_BUCKET_ID: str | None = None
+    # Size of each resumable upload request, it must be a multiple of 256 KiB.
+    GOOGLE_CLOUD_STORAGE_CHUNK_SIZE: int = 8 * 1024 * 1024
+
+    # Paper document settings
+    PAPER_DOCUMENT_STREAMING: bool = True
+    PAPER_DOCUMENT_CHUNK_SIZE: int = 256 * 1024
+    PAPER_DOCUMENT_MAX_SIZE: int = 256 * 1024 * 1024
+    # Store paper documents under their content hash and upload each content only once.
+    PAPER_DOCUMENT_DEDUPLICATION: bool = True
+    PAPER_DOCUMENT_SPOOL_MEMORY_SIZE: int = 8 * 1024 * 1024
+    # Size of each read from the storage while a paper document is served to a client.
+    PAPER_DOCUMENT_DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Default delivery of the paper documents, one of "stream", "redirect" and "signed_url".
+    PAPER_DOCUMENT_DELIVERY: str = "stream"
+    # Lifetime of the signed urls, which are reused until the refresh margin before expiry.
+    PAPER_DOCUMENT_SIGNED_URL_EXPIRATION: int = 15 * 60
+    PAPER_DOCUMENT_SIGNED_URL_REFRESH_MARGIN: int = 60
+    PAPER_DOCUMENT_SIGNED_URL_CACHE_SIZE: int = 10000
 
     # Local storage settings
     LOCAL_STORAGE_PATH: str = "/artifacts"
+    LOCAL_STORAGE_BUCKET_ID: str = "paperquest"
+
+    # Storage backend settings, the name of a handler in the storage registry.
+    STORAGE_BACKEND: str = "GoogleCloudStorageHandler"
 
 
 settings = Settings()
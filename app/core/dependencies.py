@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Dependencies of Fast api application.
+
+This module contains the dependencies which provide the application lifetime resources.
+
+"""
+
+import aiohttp
+from fastapi import Request
+
+from app.services.search_index import PaperSearchIndex
+
+
+def get_http_session(request: Request) -> aiohttp.ClientSession | None:
+    """Get the shared http client session.
+
+    This function is responsible for getting the client session opened by the application
+    lifecycle.
+
+    Args:
+        request (Request): The request.
+
+    Returns:
+        aiohttp.ClientSession | None: The shared client session, or None if the application
+            is running without the lifecycle.
+
+    """
+
+    session_state = getattr(request.app.state, "session_state", None)
+
+    if session_state is None:
+        return None
+
+    return session_state.http_session_manager.session
+
+
+def get_paper_search_index(request: Request) -> PaperSearchIndex | None:
+    """Get the paper search index.
+
+    This function is responsible for getting the search index built by the application
+    lifecycle.
+
+    Args:
+        request (Request): The request.
+
+    Returns:
+        PaperSearchIndex | None: The paper search index, or None if the application is
+            running without the lifecycle or the search index is disabled.
+
+    """
+
+    session_state = getattr(request.app.state, "session_state", None)
+
+    if session_state is None:
+        return None
+
+    return session_state.paper_search_index
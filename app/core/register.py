@@ -11,8 +11,13 @@ from fastapi import FastAPI
 from starlette.datastructures import State
 
 from app.api.routers import v1_router
+from app.common.async_requests import HTTPSessionManager
+from app.common.compression import CompressionMiddleware
 from app.core.config import settings
 from app.external.database.mongo import MongoDBSessionManager
+from app.search.embedding import get_text_encoder
+from app.services.ingestion_worker import IngestionWorkerPool
+from app.services.search_index import PaperSearchIndex
 
 
 class SessionStatae(State):
@@ -23,6 +28,9 @@ class SessionStatae(State):
     """
 
     mongodb_session_manager: MongoDBSessionManager
+    http_session_manager: HTTPSessionManager
+    ingestion_worker_pool: IngestionWorkerPool | None
+    paper_search_index: PaperSearchIndex | None
 
     def __init__(self):
         """Initialize the application state.
@@ -33,23 +41,49 @@ class SessionStatae(State):
 
         super().__init__()
         self.mongodb_session_manager = MongoDBSessionManager()
+        self.http_session_manager = HTTPSessionManager()
+        self.ingestion_worker_pool = None
+        self.paper_search_index = None
 
     async def connect(self):
-        """Connect to the database.
+        """Connect to the database, open the http client session and start the workers.
 
-        This method is responsible for connecting to the database.
+        This method is responsible for connecting to the database, opening the shared http
+        client session, starting to build the search index and starting the ingestion
+        workers.
 
         """
 
         await self.mongodb_session_manager.connect_to_mongodb()
+        await self.http_session_manager.connect()
+
+        if settings.SEARCH_INDEX_ENABLED:
+            self.paper_search_index = PaperSearchIndex(
+                encoder=get_text_encoder() if settings.SEMANTIC_SEARCH_ENABLED else None
+            )
+            await self.paper_search_index.start()
+
+        if settings.INGESTION_WORKER_ENABLED:
+            self.ingestion_worker_pool = IngestionWorkerPool(
+                http_session=self.http_session_manager.session
+            )
+            await self.ingestion_worker_pool.start()
 
     async def close(self):
-        """Close the database connection.
+        """Stop the workers, close the database connection and the http client session.
 
-        This method is responsible for closing the database connection.
+        This method is responsible for stopping the ingestion workers and the build of the
+        search index, closing the database connection and the shared http client session.
 
         """
 
+        if self.ingestion_worker_pool is not None:
+            await self.ingestion_worker_pool.stop()
+
+        if self.paper_search_index is not None:
+            await self.paper_search_index.stop()
+
+        await self.http_session_manager.close_connection()
         await self.mongodb_session_manager.close_connection()
 
 
@@ -68,6 +102,8 @@ async def lifecycle(app: FastAPI):
 
     await session_state.connect()
 
+    app.state.session_state = session_state
+
     yield
 
     await session_state.close()
@@ -85,9 +121,15 @@ def register_router(app: FastAPI) -> None:
 
 
 def register_middleware(app: FastAPI) -> None:
-    """Register middlewares"""
+    """Register middlewares
+
+    Args:
+        app (FastAPI): FastAPI application
+
+    """
 
-    pass
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
 
 
 def init_app():
@@ -6,11 +6,16 @@ This module contains the mongo db handler class.
 """
 
 import asyncio
-from typing import ClassVar, Generic, Type
+from typing import Any, AsyncIterator, ClassVar, Generic, Optional, Type
 
-from beanie import PydanticObjectId, init_beanie
+from beanie import PydanticObjectId, UpdateResponse, init_beanie
+from bson import json_util
 from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
+from pymongo.errors import BulkWriteError
 
+from app.common.cache import TTLCache
+from app.common.enums import CountStrategy
 from app.common.pydantic_model import PaginatedResult
 from app.common.types import DOCUMENT_TYPE
 from app.core.config import settings
@@ -91,6 +96,10 @@ class MongoDBDocumentHandler(Generic[DOCUMENT_TYPE]):
     """
 
     semaphore: ClassVar[asyncio.Semaphore] = asyncio.Semaphore(settings.CONCURRENCY_LIMIT)
+    count_caches: ClassVar[dict[str, TTLCache[str, int]]] = {}
+    # The fields the counted queries filter on, whose updates clear the count cache. None if
+    # the counted queries may filter on any field.
+    count_fields: ClassVar[frozenset[str] | None] = None
 
     def __init__(self, model: Type[DOCUMENT_TYPE]):
         """Initialize the mongo db document handler.
@@ -104,6 +113,29 @@ class MongoDBDocumentHandler(Generic[DOCUMENT_TYPE]):
 
         self.model = model
 
+    @property
+    def count_cache(self) -> TTLCache[str, int]:
+        """Get the count cache of the collection.
+
+        The count cache is shared by the handlers of the collection in the process, and is
+        cleared on every insert and replacement through them, and on the updates of the
+        `count_fields`. The writes of the other processes are only seen once the cached
+        counts expire.
+
+        Returns:
+            TTLCache[str, int]: The counts keyed by the canonical json of the query.
+
+        """
+
+        name = self.model.get_collection_name()
+
+        if name not in MongoDBDocumentHandler.count_caches:
+            MongoDBDocumentHandler.count_caches[name] = TTLCache(
+                maxsize=settings.MONGODB_COUNT_CACHE_SIZE, ttl=settings.MONGODB_COUNT_CACHE_TTL
+            )
+
+        return MongoDBDocumentHandler.count_caches[name]
+
     async def get(self, obj_id: PydanticObjectId) -> DOCUMENT_TYPE | None:
         """Get the document.
 
@@ -119,6 +151,25 @@ class MongoDBDocumentHandler(Generic[DOCUMENT_TYPE]):
 
         return await self.model.get(document_id=obj_id)
 
+    async def get_projection(
+        self, obj_id: PydanticObjectId, projection_model: Type[BaseModel]
+    ) -> Any | None:
+        """Get the fields of the document.
+
+        This method is responsible for reading only the fields of the projection model of
+        the document by bson object id.
+
+        Args:
+            obj_id (PydanticObjectId): The bson object id.
+            projection_model (Type[BaseModel]): The model of the fields to read.
+
+        Returns:
+            Any | None: The projection of the document, or None if it does not exist.
+
+        """
+
+        return await self.model.find_one({"_id": obj_id}, projection_model=projection_model)
+
     async def create(self, document: DOCUMENT_TYPE) -> DOCUMENT_TYPE:
         """Create the document.
 
@@ -132,8 +183,44 @@ class MongoDBDocumentHandler(Generic[DOCUMENT_TYPE]):
 
         """
 
+        self.count_cache.clear()
+
         return await document.create()
 
+    async def create_many(self, documents: list[DOCUMENT_TYPE]) -> dict[int, str]:
+        """Create the documents with an unordered bulk insert.
+
+        This method is responsible for creating the documents in a single round trip. The
+        insert is unordered, so a failing document does not stop the others from being
+        inserted. The ids of the documents are assigned before the insert.
+
+        Args:
+            documents (list[DOCUMENT_TYPE]): The documents.
+
+        Returns:
+            dict[int, str]: The error messages of the documents which are failed to be
+                created, keyed by their index in `documents`.
+
+        """
+
+        if not documents:
+            return {}
+
+        for document in documents:
+            if document.id is None:
+                document.id = PydanticObjectId()
+
+        self.count_cache.clear()
+
+        try:
+            async with MongoDBDocumentHandler.semaphore:
+                await self.model.insert_many(documents, ordered=False)
+
+        except BulkWriteError as e:
+            return {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+
+        return {}
+
     async def replace(self, document: DOCUMENT_TYPE) -> DOCUMENT_TYPE:
         """Replace the origianl document with current one.
 
@@ -147,28 +234,155 @@ class MongoDBDocumentHandler(Generic[DOCUMENT_TYPE]):
 
         """
 
+        self.count_cache.clear()
+
         return await self.model.replace(document)
 
+    async def update(self, obj_id: PydanticObjectId, update: dict) -> DOCUMENT_TYPE | None:
+        """Update the document atomically.
+
+        This method is responsible for applying the update operators to the document in a
+        single round trip, so the concurrent updates do not overwrite each other. The count
+        cache is only cleared if the update touches the `count_fields`.
+
+        Args:
+            obj_id (PydanticObjectId): The bson object id.
+            update (dict): The update operators, e.g. `{"$set": {...}, "$inc": {...}}`.
+
+        Returns:
+            DOCUMENT_TYPE | None: The updated document, or None if it does not exist.
+
+        """
+
+        fields = {key.split(".")[0] for operand in update.values() for key in operand}
+
+        if self.count_fields is None or not fields.isdisjoint(self.count_fields):
+            self.count_cache.clear()
+
+        return await self.model.find_one({"_id": obj_id}).update(
+            update, response_type=UpdateResponse.NEW_DOCUMENT
+        )
+
+    async def count(self, query: dict, strategy: CountStrategy) -> int | None:
+        """Count the documents.
+
+        This method is responsible for counting the documents which match the query with the
+        strategy. An estimated count is only taken for an empty query, other queries are
+        counted exactly.
+
+        Args:
+            query (dict): The query.
+            strategy (CountStrategy): The count strategy.
+
+        Returns:
+            int | None: The number of the documents, or None if the count is skipped.
+
+        """
+
+        if strategy == CountStrategy.SKIP:
+            return None
+
+        if strategy == CountStrategy.ESTIMATED and not query:
+            return await self.model.get_motor_collection().estimated_document_count()
+
+        if strategy != CountStrategy.CACHED:
+            return await self.model.find_many(query).count()
+
+        key = json_util.dumps(query, sort_keys=True)
+        total = self.count_cache.get(key)
+
+        if total is None:
+            total = await self.model.find_many(query).count()
+            self.count_cache.set(key, total)
+
+        return total
+
     async def find_many(
-        self, query: dict, limit: int, sort_query: list[tuple] | None
+        self,
+        query: dict,
+        limit: int,
+        sort_query: list[tuple] | None,
+        count_query: dict | None = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        projection_model: Optional[Type[BaseModel]] = None,
     ) -> PaginatedResult[DOCUMENT_TYPE]:
         """Find the documents.
 
-        This method is responsible for finding the documents.
+        This method is responsible for finding the documents. The total is counted with
+        `count_query`, which is the query without the conditions of the page, so it does not
+        change between the pages.
 
         Args:
             query (dict): The query.
             limit (int): The limit.
             sort_query (dict): The sort query.
+            count_query (dict | None): The query to count the total, defaults to `query`.
+            count_strategy (CountStrategy): The count strategy of the total.
+            projection_model (Optional[Type[BaseModel]]): The model of the items, whose
+                fields are the only ones read from the database, defaults to the document.
 
         Returns:
             PaginatedResult[DOCUMENT_TYPE]: The paginated result.
 
         """
 
-        cursor = self.model.find_many(query, sort=sort_query).limit(limit)
+        cursor = self.model.find_many(
+            query, sort=sort_query, projection_model=projection_model
+        ).limit(limit)
+        count_query = query if count_query is None else count_query
 
         async with MongoDBDocumentHandler.semaphore:
-            total, items = await asyncio.gather(cursor.count(), cursor.to_list(length=limit))
+            total, items = await asyncio.gather(
+                self.count(count_query, count_strategy), cursor.to_list(length=limit)
+            )
 
         return PaginatedResult(total=total, items=items)
+
+    async def iter_many(
+        self,
+        query: dict,
+        batch_size: int,
+        projection_model: Optional[Type[BaseModel]] = None,
+        after_id: Optional[PydanticObjectId] = None,
+    ) -> AsyncIterator[list[Any]]:
+        """Iterate the documents in batches.
+
+        This method is responsible for reading every document which matches the query in the
+        order of the ids. Each batch is sought after the last id of the previous batch, so no
+        cursor is held open between the batches and a batch is a range scan of the id index.
+
+        Args:
+            query (dict): The query.
+            batch_size (int): The number of documents read in a round trip.
+            projection_model (Optional[Type[BaseModel]]): The model of the items, whose
+                fields are the only ones read from the database, defaults to the document.
+                It must have the `id` field.
+            after_id (Optional[PydanticObjectId]): The id to read the documents after.
+
+        Yields:
+            list[Any]: The documents of a batch.
+
+        """
+
+        while True:
+            id_query = {} if after_id is None else {"_id": {"$gt": after_id}}
+            batch_query = {"$and": [query, id_query]} if query and id_query else query or id_query
+
+            async with MongoDBDocumentHandler.semaphore:
+                batch = (
+                    await self.model.find_many(
+                        batch_query, sort=[("_id", 1)], projection_model=projection_model
+                    )
+                    .limit(batch_size)
+                    .to_list(length=batch_size)
+                )
+
+            if not batch:
+                return
+
+            yield batch
+
+            if len(batch) < batch_size:
+                return
+
+            after_id = batch[-1].id
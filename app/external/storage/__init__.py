@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""Storage module for handling the paper document blobs."""
+
+from .base import STORAGE_REGISTRY, BlobMetadata, StorageHandlerBase, get_storage_handler
+from .google_cloud_storage import GoogleCloudStorageHandler
+from .local_storage import LocalStorageHandler
+
+__all__ = [
+    "STORAGE_REGISTRY",
+    "BlobMetadata",
+    "StorageHandlerBase",
+    "get_storage_handler",
+    "GoogleCloudStorageHandler",
+    "LocalStorageHandler",
+]
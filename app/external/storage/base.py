@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Storage handler base module.
+
+This module contains the interface of the storage handlers and the registry to select one.
+
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import IO, AsyncIterator, ClassVar, Optional
+
+from pydantic import Field
+
+from app.common.pydantic_model import ModelBase
+from app.common.registry import Registry
+from app.common.types import BlobUrl
+from app.core.config import settings
+
+
+class BlobMetadata(ModelBase):
+    """Blob metadata model.
+
+    This class is responsible for the metadata of a stored blob.
+
+    """
+
+    size: int = Field(..., description="The size of the blob in bytes.")
+    etag: str = Field(..., description="The identifier of the blob content.")
+    updated_at: Optional[datetime] = Field(default=None, description="The last write time.")
+    content_type: Optional[str] = Field(default=None, description="The content type.")
+
+
+class StorageHandlerBase(ABC):
+    """Storage handler base class
+
+    This class is the interface of the storage handlers. A blob is addressed by a bucket name
+    and a blob name, and is referred from the documents by `<url_scheme>://<bucket>/<blob>`.
+
+    """
+
+    url_scheme: ClassVar[str]
+
+    bucket_id: str
+
+    @classmethod
+    @abstractmethod
+    def from_settings(cls) -> "StorageHandlerBase":
+        """Create the storage handler from the settings.
+
+        Returns:
+            StorageHandlerBase: The storage handler.
+
+        """
+
+    def get_blob_url(self, bucket_name: str, blob_name: str) -> BlobUrl:
+        """Get the blob url.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            BlobUrl: The blob url.
+
+        """
+
+        return f"{self.url_scheme}://{bucket_name}/{blob_name}"
+
+    @abstractmethod
+    async def upload_blob(
+        self, bucket_name: str, raw_file_bytes: bytes, destination_blob_name: str
+    ) -> BlobUrl:
+        """Upload the blob
+
+        Args:
+            bucket_name (str): The bucket name.
+            raw_file_bytes (bytes): The raw file bytes.
+            destination_blob_name (str): The destination blob name.
+
+        Returns:
+            BlobUrl: The url of the blob uploaded.
+
+        """
+
+    @abstractmethod
+    async def upload_blob_from_stream(
+        self,
+        bucket_name: str,
+        stream: AsyncIterator[bytes],
+        destination_blob_name: str,
+        chunk_size: int,
+        content_type: str = "application/pdf",
+    ) -> BlobUrl:
+        """Upload the blob from the stream
+
+        The blob must not be created if the stream raises an error.
+
+        Args:
+            bucket_name (str): The bucket name.
+            stream (AsyncIterator[bytes]): The stream of the raw file chunks.
+            destination_blob_name (str): The destination blob name.
+            chunk_size (int): The size of each write to the storage.
+            content_type (str): The content type of the blob.
+
+        Returns:
+            BlobUrl: The url of the blob uploaded.
+
+        """
+
+    @abstractmethod
+    async def upload_blob_from_file(
+        self,
+        bucket_name: str,
+        file: IO[bytes],
+        destination_blob_name: str,
+        chunk_size: int,
+        content_type: str = "application/pdf",
+    ) -> BlobUrl:
+        """Upload the blob from the start of the file
+
+        Args:
+            bucket_name (str): The bucket name.
+            file (IO[bytes]): The file to upload.
+            destination_blob_name (str): The destination blob name.
+            chunk_size (int): The size of each write to the storage.
+            content_type (str): The content type of the blob.
+
+        Returns:
+            BlobUrl: The url of the blob uploaded.
+
+        """
+
+    @abstractmethod
+    async def get_blob_metadata(self, bucket_name: str, blob_name: str) -> BlobMetadata | None:
+        """Get the blob metadata
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            BlobMetadata | None: The blob metadata, or None if the blob does not exist.
+
+        """
+
+    @abstractmethod
+    async def download_blob(self, bucket_name: str, source_blob_name: str) -> bytes:
+        """Download the blob
+
+        Args:
+            bucket_name (str): The bucket name.
+            source_blob_name (str): The source blob name.
+
+        Returns:
+            bytes: The downloaded blob.
+
+        """
+
+    @abstractmethod
+    async def delete_blob(self, bucket_name: str, blob_name: str) -> bool:
+        """Delete the blob
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            bool: False if the blob does not exist.
+
+        """
+
+    @abstractmethod
+    def iter_blob(
+        self, bucket_name: str, blob_name: str, start: int, end: int, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Iterate the byte range of the blob
+
+        The range is read from the storage one chunk at a time, so the memory used does not
+        grow with the size of the range.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+            start (int): The first byte position of the range.
+            end (int): The last byte position of the range, inclusive.
+            chunk_size (int): The size of each read from the storage.
+
+        Returns:
+            AsyncIterator[bytes]: The chunks of the range.
+
+        """
+
+    async def generate_signed_url(
+        self, bucket_name: str, blob_name: str, expiration: timedelta
+    ) -> str | None:
+        """Generate a signed url of the blob
+
+        The signed url lets a client download the blob from the storage directly until it
+        expires. The storage handlers which can not sign urls return None.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+            expiration (timedelta): The lifetime of the signed url.
+
+        Returns:
+            str | None: The signed url, or None if the storage can not sign urls.
+
+        """
+
+        return None
+
+
+STORAGE_REGISTRY = Registry("storage", StorageHandlerBase)
+
+
+@lru_cache(maxsize=1)
+def get_storage_handler() -> StorageHandlerBase:
+    """Get the storage handler selected by `settings.STORAGE_BACKEND`.
+
+    The storage handler is created once per process.
+
+    Returns:
+        StorageHandlerBase: The storage handler.
+
+    """
+
+    return STORAGE_REGISTRY.get(settings.STORAGE_BACKEND).from_settings()
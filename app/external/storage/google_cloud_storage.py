@@ -4,33 +4,123 @@ This module contains the google cloud storage handler class.
 
 """
 
+import contextlib
+import uuid
+from datetime import timedelta
+from typing import IO, AsyncIterator, ClassVar
+
+import google.auth
 from fastapi.concurrency import run_in_threadpool
-from google.cloud.storage import Blob, Client
+from google.api_core.exceptions import NotFound
+from google.auth.credentials import Credentials, Signing
+from google.auth.transport.requests import Request
+from google.cloud.storage import Blob, Bucket, Client
+from google.cloud.storage.fileio import BlobWriter
+
+from app.common.misc import get_gcs_url
+from app.common.types import GCSBlobUrl
+from app.core.config import settings
+from app.external.storage.base import STORAGE_REGISTRY, BlobMetadata, StorageHandlerBase
 
 
-class GoogleCloudStorageHandler:
+@STORAGE_REGISTRY.register
+class GoogleCloudStorageHandler(StorageHandlerBase):
     """Google cloud storage handler class
 
-    This class is responsible for handling the google cloud storage.
+    This class is responsible for handling the google cloud storage. Every call which may
+    send a request is run in the threadpool, and the clients and the buckets are resolved once
+    per process and shared by the handlers. The credentials each client is built with are kept
+    to sign the urls.
 
     """
 
-    def __init__(self, project_id: str):
+    url_scheme = "gs"
+
+    clients: ClassVar[dict[str, tuple[Client, Credentials]]] = {}
+    buckets: ClassVar[dict[tuple[str, str], Bucket]] = {}
+
+    def __init__(self, project_id: str, bucket_id: str):
         """Initialize the google cloud storage handler
 
         This method is responsible for initializing the google cloud storage handler.
 
         Args:
             project_id (str): The project id.
+            bucket_id (str): The default bucket id.
 
         """
 
-        self.client = Client(project=project_id)
+        self.project_id = project_id
+        self.bucket_id = bucket_id
+
+    @classmethod
+    def from_settings(cls) -> "GoogleCloudStorageHandler":
+        """Create the google cloud storage handler from the settings.
+
+        Returns:
+            GoogleCloudStorageHandler: The google cloud storage handler.
+
+        """
+
+        return cls(
+            project_id=str(settings.GOOGLE_CLOUD_PROJECT_ID),
+            bucket_id=str(settings.GOOGLE_CLOUD_STORAGE_BUCKET_ID),
+        )
+
+    def get_blob_url(self, bucket_name: str, blob_name: str) -> GCSBlobUrl:
+        """Get the blob url.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            GCSBlobUrl: The google cloud storage url.
 
-    def get_bucket(self, bucket_name: str):
+        """
+
+        return get_gcs_url(bucket_name, blob_name)
+
+    @staticmethod
+    def _create_client(project_id: str) -> tuple[Client, Credentials]:
+        """Create the client with the application default credentials
+
+        Args:
+            project_id (str): The project id.
+
+        Returns:
+            tuple[Client, Credentials]: The client and the credentials it is built with.
+
+        """
+
+        credentials, _ = google.auth.default(scopes=Client.SCOPE)
+
+        return Client(project=project_id, credentials=credentials), credentials
+
+    async def get_client(self) -> tuple[Client, Credentials]:
+        """Get the client
+
+        This method is responsible for getting the client of the project and its credentials.
+        The client is created in the threadpool because it loads the credentials.
+
+        Returns:
+            tuple[Client, Credentials]: The client and the credentials it is built with.
+
+        """
+
+        client = GoogleCloudStorageHandler.clients.get(self.project_id)
+
+        if client is None:
+            client = await run_in_threadpool(self._create_client, self.project_id)
+            client = GoogleCloudStorageHandler.clients.setdefault(self.project_id, client)
+
+        return client
+
+    async def get_bucket(self, bucket_name: str) -> Bucket:
         """Get the bucket
 
-        This method is responsible for getting the bucket.
+        This method is responsible for getting the bucket. The metadata of the bucket is
+        fetched once and the bucket is cached for the later calls.
 
         Args:
             bucket_name (str): The bucket name.
@@ -40,11 +130,19 @@ class GoogleCloudStorageHandler:
 
         """
 
-        return self.client.get_bucket(bucket_name)
+        key = (self.project_id, bucket_name)
+        bucket = GoogleCloudStorageHandler.buckets.get(key)
+
+        if bucket is None:
+            client, _ = await self.get_client()
+            bucket = await run_in_threadpool(client.get_bucket, bucket_name)
+            bucket = GoogleCloudStorageHandler.buckets.setdefault(key, bucket)
+
+        return bucket
 
     async def upload_blob(
         self, bucket_name: str, raw_file_bytes: bytes, destination_blob_name: str
-    ) -> Blob:
+    ) -> GCSBlobUrl:
         """Upload the blob
 
         This method is responsible for uploading the blob.
@@ -55,18 +153,118 @@ class GoogleCloudStorageHandler:
             destination_blob_name (str): The destination blob name.
 
         Returns:
-            Blob: The blob uploaded.
+            GCSBlobUrl: The url of the blob uploaded.
 
         """
 
-        bucket = self.get_bucket(bucket_name)
+        bucket = await self.get_bucket(bucket_name)
         blob = bucket.blob(destination_blob_name)
 
         await run_in_threadpool(blob.upload_from_string, raw_file_bytes)
 
-        return blob
+        return self.get_blob_url(bucket_name, destination_blob_name)
+
+    async def upload_blob_from_stream(
+        self,
+        bucket_name: str,
+        stream: AsyncIterator[bytes],
+        destination_blob_name: str,
+        chunk_size: int,
+        content_type: str = "application/pdf",
+    ) -> GCSBlobUrl:
+        """Upload the blob from the stream
+
+        This method is responsible for uploading the blob with a resumable upload. The chunks
+        of the stream are buffered until `chunk_size` bytes are available and then sent as
+        one request, so at most `chunk_size` bytes are held in memory.
+
+        The stream is uploaded to a partial blob, which is copied to the destination blob
+        once the stream is exhausted and then deleted. If the stream raises an error, the
+        partial blob is deleted and the destination blob is left as it is.
+
+        Args:
+            bucket_name (str): The bucket name.
+            stream (AsyncIterator[bytes]): The stream of the raw file chunks.
+            destination_blob_name (str): The destination blob name.
+            chunk_size (int): The size of each upload request, a multiple of 256 KiB.
+            content_type (str): The content type of the blob.
+
+        Returns:
+            GCSBlobUrl: The url of the blob uploaded.
+
+        """
+
+        bucket = await self.get_bucket(bucket_name)
+        partial_blob = bucket.blob(
+            f"{destination_blob_name}.{uuid.uuid4().hex}.partial", chunk_size=chunk_size
+        )
+        writer = partial_blob.open("wb", content_type=content_type)
+
+        try:
+            async for chunk in stream:
+                await run_in_threadpool(writer.write, chunk)
+
+            await run_in_threadpool(writer.close)
+            await run_in_threadpool(bucket.copy_blob, partial_blob, bucket, destination_blob_name)
+
+        finally:
+            await run_in_threadpool(self._discard_partial_blob, writer, partial_blob)
+
+        return self.get_blob_url(bucket_name, destination_blob_name)
+
+    @staticmethod
+    def _discard_partial_blob(writer: BlobWriter, partial_blob: Blob):
+        """Discard the partial blob of an upload
+
+        The writer of a failed upload is closed, which finalizes the partial blob, so it is
+        deleted along with the partial blob of a completed upload.
+
+        Args:
+            writer (BlobWriter): The writer of the partial blob.
+            partial_blob (Blob): The partial blob.
+
+        """
+
+        if not writer.closed:
+            with contextlib.suppress(Exception):
+                writer.close()
+
+        with contextlib.suppress(NotFound):
+            partial_blob.delete()
 
-    async def get_blob_metadata(self, bucket_name: str, blob_name: str) -> Blob | None:
+    async def upload_blob_from_file(
+        self,
+        bucket_name: str,
+        file: IO[bytes],
+        destination_blob_name: str,
+        chunk_size: int,
+        content_type: str = "application/pdf",
+    ) -> GCSBlobUrl:
+        """Upload the blob from the file
+
+        This method is responsible for uploading the blob from the start of the file with a
+        resumable upload of `chunk_size` bytes per request.
+
+        Args:
+            bucket_name (str): The bucket name.
+            file (IO[bytes]): The file to upload.
+            destination_blob_name (str): The destination blob name.
+            chunk_size (int): The size of each upload request, a multiple of 256 KiB.
+            content_type (str): The content type of the blob.
+
+        Returns:
+            GCSBlobUrl: The url of the blob uploaded.
+
+        """
+
+        bucket = await self.get_bucket(bucket_name)
+        blob = bucket.blob(destination_blob_name, chunk_size=chunk_size)
+
+        await run_in_threadpool(blob.upload_from_file, file, rewind=True, content_type=content_type)
+
+        return self.get_blob_url(bucket_name, destination_blob_name)
+
+    async def get_blob_metadata(self, bucket_name: str, blob_name: str) -> BlobMetadata | None:
         """Get the blob metadata
 
         This method is responsible for getting the blob metadata.
@@ -76,14 +274,22 @@ class GoogleCloudStorageHandler:
             blob_name (str): The blob name.
 
         Returns:
-            Blob: The blob.
+            BlobMetadata | None: The blob metadata, or None if the blob does not exist.
 
         """
 
-        bucket = self.get_bucket(bucket_name)
+        bucket = await self.get_bucket(bucket_name)
         blob = await run_in_threadpool(bucket.get_blob, blob_name)
 
-        return blob
+        if blob is None:
+            return None
+
+        return BlobMetadata(
+            size=blob.size,
+            etag=blob.etag,
+            updated_at=blob.updated,
+            content_type=blob.content_type,
+        )
 
     async def download_blob(self, bucket_name: str, source_blob_name: str) -> bytes:
         """Download the blob
@@ -99,7 +305,125 @@ class GoogleCloudStorageHandler:
 
         """
 
-        bucket = self.get_bucket(bucket_name)
+        bucket = await self.get_bucket(bucket_name)
         blob = bucket.blob(source_blob_name)
 
         return await run_in_threadpool(blob.download_as_bytes)
+
+    async def delete_blob(self, bucket_name: str, blob_name: str) -> bool:
+        """Delete the blob
+
+        This method is responsible for deleting the blob.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            bool: False if the blob does not exist.
+
+        """
+
+        bucket = await self.get_bucket(bucket_name)
+
+        try:
+            await run_in_threadpool(bucket.delete_blob, blob_name)
+
+        except NotFound:
+            return False
+
+        return True
+
+    async def iter_blob(
+        self, bucket_name: str, blob_name: str, start: int, end: int, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Iterate the byte range of the blob
+
+        This method is responsible for downloading the range of the blob with a ranged
+        request per chunk.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+            start (int): The first byte position of the range.
+            end (int): The last byte position of the range, inclusive.
+            chunk_size (int): The size of each ranged request.
+
+        Yields:
+            bytes: The chunks of the range.
+
+        """
+
+        bucket = await self.get_bucket(bucket_name)
+        blob = bucket.blob(blob_name)
+        position = start
+
+        while position <= end:
+            chunk = await run_in_threadpool(
+                blob.download_as_bytes, start=position, end=min(position + chunk_size, end + 1) - 1
+            )
+
+            if not chunk:
+                break
+
+            position += len(chunk)
+
+            yield chunk
+
+    @staticmethod
+    def _generate_signed_url(blob: Blob, credentials: Credentials, expiration: timedelta) -> str:
+        """Generate a v4 signed url of the blob
+
+        The url is signed with the private key of the credentials if they have one, otherwise
+        it is signed by the IAM credentials api on behalf of the service account, e.g. with
+        the credentials of the compute engine metadata server.
+
+        Args:
+            blob (Blob): The blob.
+            credentials (Credentials): The credentials the client of the blob is built with.
+            expiration (timedelta): The lifetime of the signed url.
+
+        Returns:
+            str: The signed url.
+
+        """
+
+        if isinstance(credentials, Signing):
+            return blob.generate_signed_url(
+                version="v4", expiration=expiration, method="GET", credentials=credentials
+            )
+
+        if not credentials.valid:
+            credentials.refresh(Request())
+
+        return blob.generate_signed_url(
+            version="v4",
+            expiration=expiration,
+            method="GET",
+            service_account_email=credentials.service_account_email,
+            access_token=credentials.token,
+        )
+
+    async def generate_signed_url(
+        self, bucket_name: str, blob_name: str, expiration: timedelta
+    ) -> str | None:
+        """Generate a signed url of the blob
+
+        This method is responsible for generating a v4 signed url to download the blob.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+            expiration (timedelta): The lifetime of the signed url.
+
+        Returns:
+            str | None: The signed url.
+
+        """
+
+        _, credentials = await self.get_client()
+        bucket = await self.get_bucket(bucket_name)
+
+        return await run_in_threadpool(
+            self._generate_signed_url, bucket.blob(blob_name), credentials, expiration
+        )
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""Local storage handler module
+
+This module contains the local file system storage handler class.
+
+"""
+
+import hashlib
+import mimetypes
+import mmap
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import IO, AsyncIterator
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.common.types import BlobUrl
+from app.core.config import settings
+from app.external.storage.base import STORAGE_REGISTRY, BlobMetadata, StorageHandlerBase
+
+
+@STORAGE_REGISTRY.register
+class LocalStorageHandler(StorageHandlerBase):
+    """Local storage handler class
+
+    This class is responsible for storing the blobs in the local file system. A blob is
+    stored at `<root>/<bucket>/<shard>/<blob name>`, where the shard is two levels of
+    directories taken from the hash of the blob name, so no directory grows too large.
+
+    A blob is written to a temporary file in its directory and renamed over the destination,
+    so a reader never sees a partially written blob.
+
+    """
+
+    url_scheme = "local"
+
+    def __init__(self, root_path: str, bucket_id: str):
+        """Initialize the local storage handler
+
+        This method is responsible for initializing the local storage handler.
+
+        Args:
+            root_path (str): The directory to store the buckets.
+            bucket_id (str): The default bucket id.
+
+        """
+
+        self.root_path = os.path.abspath(root_path)
+        self.bucket_id = bucket_id
+
+    @classmethod
+    def from_settings(cls) -> "LocalStorageHandler":
+        """Create the local storage handler from the settings.
+
+        Returns:
+            LocalStorageHandler: The local storage handler.
+
+        """
+
+        return cls(
+            root_path=settings.LOCAL_STORAGE_PATH, bucket_id=settings.LOCAL_STORAGE_BUCKET_ID
+        )
+
+    def get_blob_path(self, bucket_name: str, blob_name: str) -> str:
+        """Get the path of the blob
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            str: The path of the blob.
+
+        Raises:
+            ValueError: If the path is outside of the bucket.
+
+        """
+
+        bucket_path = os.path.join(self.root_path, bucket_name)
+        digest = hashlib.sha1(blob_name.encode(), usedforsecurity=False).hexdigest()
+        path = os.path.normpath(os.path.join(bucket_path, digest[:2], digest[2:4], blob_name))
+
+        if os.path.commonpath([bucket_path, path]) != bucket_path:
+            raise ValueError(f"Invalid blob name {blob_name}")
+
+        return path
+
+    @staticmethod
+    def _open_temporary_file(path: str) -> IO[bytes]:
+        """Open a temporary file next to the path
+
+        Args:
+            path (str): The path of the blob.
+
+        Returns:
+            IO[bytes]: The temporary file which is not deleted on close.
+
+        """
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        return tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path), prefix=".", suffix=".tmp", delete=False
+        )
+
+    @staticmethod
+    def _commit_temporary_file(file: IO[bytes], path: str):
+        """Flush the temporary file and rename it over the path
+
+        Args:
+            file (IO[bytes]): The temporary file.
+            path (str): The path of the blob.
+
+        """
+
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+        os.replace(file.name, path)
+
+    @staticmethod
+    def _discard_temporary_file(file: IO[bytes]):
+        """Close and remove the temporary file
+
+        Args:
+            file (IO[bytes]): The temporary file.
+
+        """
+
+        file.close()
+
+        if os.path.exists(file.name):
+            os.unlink(file.name)
+
+    def _write_blob(self, path: str, raw_file_bytes: bytes):
+        """Write the blob atomically
+
+        Args:
+            path (str): The path of the blob.
+            raw_file_bytes (bytes): The raw file bytes.
+
+        """
+
+        file = self._open_temporary_file(path)
+
+        try:
+            file.write(raw_file_bytes)
+            self._commit_temporary_file(file, path)
+
+        except BaseException:
+            self._discard_temporary_file(file)
+            raise
+
+    def _copy_blob_from_file(self, path: str, file: IO[bytes], chunk_size: int):
+        """Copy the file to the blob atomically
+
+        The data is copied in the kernel with `os.sendfile` if the file is backed by a file
+        descriptor, otherwise it is copied in chunks of `chunk_size` bytes.
+
+        Args:
+            path (str): The path of the blob.
+            file (IO[bytes]): The file to copy from its start.
+            chunk_size (int): The size of each copy.
+
+        """
+
+        file.seek(0)
+        destination = self._open_temporary_file(path)
+
+        try:
+            try:
+                source_fd = file.fileno()
+
+            except (AttributeError, OSError):
+                shutil.copyfileobj(file, destination, chunk_size)
+
+            else:
+                file.flush()
+                offset, size = 0, os.fstat(source_fd).st_size
+
+                while offset < size:
+                    offset += os.sendfile(
+                        destination.fileno(), source_fd, offset, min(chunk_size, size - offset)
+                    )
+
+            self._commit_temporary_file(destination, path)
+
+        except BaseException:
+            self._discard_temporary_file(destination)
+            raise
+
+    @staticmethod
+    def _read_blob(path: str) -> bytes:
+        """Read the whole blob
+
+        The blob is read into a single bytes object; a memory map would be copied out into
+        one anyway. The byte ranges are read through the memory map by `iter_blob` instead.
+
+        Args:
+            path (str): The path of the blob.
+
+        Returns:
+            bytes: The raw file bytes.
+
+        """
+
+        with open(path, "rb") as file:
+            return file.read()
+
+    @staticmethod
+    def _map_blob(path: str) -> mmap.mmap | None:
+        """Map the blob to the memory
+
+        The memory map keeps its own file descriptor, so the file is closed once mapped.
+
+        Args:
+            path (str): The path of the blob.
+
+        Returns:
+            mmap.mmap | None: The read only memory map, or None if the blob is empty.
+
+        """
+
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return None
+
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    async def upload_blob(
+        self, bucket_name: str, raw_file_bytes: bytes, destination_blob_name: str
+    ) -> BlobUrl:
+        """Upload the blob
+
+        This method is responsible for writing the blob.
+
+        Args:
+            bucket_name (str): The bucket name.
+            raw_file_bytes (bytes): The raw file bytes.
+            destination_blob_name (str): The destination blob name.
+
+        Returns:
+            BlobUrl: The url of the blob uploaded.
+
+        """
+
+        path = self.get_blob_path(bucket_name, destination_blob_name)
+
+        await run_in_threadpool(self._write_blob, path, raw_file_bytes)
+
+        return self.get_blob_url(bucket_name, destination_blob_name)
+
+    async def upload_blob_from_stream(
+        self,
+        bucket_name: str,
+        stream: AsyncIterator[bytes],
+        destination_blob_name: str,
+        chunk_size: int,
+        content_type: str = "application/pdf",
+    ) -> BlobUrl:
+        """Upload the blob from the stream
+
+        This method is responsible for writing the chunks of the stream to a temporary file,
+        which replaces the blob once the stream is exhausted.
+
+        Args:
+            bucket_name (str): The bucket name.
+            stream (AsyncIterator[bytes]): The stream of the raw file chunks.
+            destination_blob_name (str): The destination blob name.
+            chunk_size (int): Unused, the chunks are written as they arrive.
+            content_type (str): Unused, the local storage does not keep the content type.
+
+        Returns:
+            BlobUrl: The url of the blob uploaded.
+
+        """
+
+        path = self.get_blob_path(bucket_name, destination_blob_name)
+        file = await run_in_threadpool(self._open_temporary_file, path)
+
+        try:
+            async for chunk in stream:
+                await run_in_threadpool(file.write, chunk)
+
+            await run_in_threadpool(self._commit_temporary_file, file, path)
+
+        except BaseException:
+            await run_in_threadpool(self._discard_temporary_file, file)
+            raise
+
+        return self.get_blob_url(bucket_name, destination_blob_name)
+
+    async def upload_blob_from_file(
+        self,
+        bucket_name: str,
+        file: IO[bytes],
+        destination_blob_name: str,
+        chunk_size: int,
+        content_type: str = "application/pdf",
+    ) -> BlobUrl:
+        """Upload the blob from the file
+
+        This method is responsible for copying the file to the blob.
+
+        Args:
+            bucket_name (str): The bucket name.
+            file (IO[bytes]): The file to upload.
+            destination_blob_name (str): The destination blob name.
+            chunk_size (int): The size of each copy.
+            content_type (str): Unused, the local storage does not keep the content type.
+
+        Returns:
+            BlobUrl: The url of the blob uploaded.
+
+        """
+
+        path = self.get_blob_path(bucket_name, destination_blob_name)
+
+        await run_in_threadpool(self._copy_blob_from_file, path, file, chunk_size)
+
+        return self.get_blob_url(bucket_name, destination_blob_name)
+
+    async def get_blob_metadata(self, bucket_name: str, blob_name: str) -> BlobMetadata | None:
+        """Get the blob metadata
+
+        This method is responsible for getting the blob metadata from the file status.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            BlobMetadata | None: The blob metadata, or None if the blob does not exist.
+
+        """
+
+        path = self.get_blob_path(bucket_name, blob_name)
+
+        try:
+            stat = await run_in_threadpool(os.stat, path)
+
+        except FileNotFoundError:
+            return None
+
+        return BlobMetadata(
+            size=stat.st_size,
+            etag=f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            updated_at=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            content_type=mimetypes.guess_type(blob_name)[0],
+        )
+
+    async def download_blob(self, bucket_name: str, source_blob_name: str) -> bytes:
+        """Download the blob
+
+        This method is responsible for reading the blob.
+
+        Args:
+            bucket_name (str): The bucket name.
+            source_blob_name (str): The source blob name.
+
+        Returns:
+            bytes: The downloaded blob.
+
+        """
+
+        path = self.get_blob_path(bucket_name, source_blob_name)
+
+        return await run_in_threadpool(self._read_blob, path)
+
+    async def delete_blob(self, bucket_name: str, blob_name: str) -> bool:
+        """Delete the blob
+
+        This method is responsible for removing the file of the blob. The readers which
+        have the blob open or mapped keep reading it until they close it.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+
+        Returns:
+            bool: False if the blob does not exist.
+
+        """
+
+        path = self.get_blob_path(bucket_name, blob_name)
+
+        try:
+            await run_in_threadpool(os.unlink, path)
+
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    async def iter_blob(
+        self, bucket_name: str, blob_name: str, start: int, end: int, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Iterate the byte range of the blob
+
+        This method is responsible for copying the range of the blob out of its memory map
+        one chunk at a time. The copies are run in the threadpool because they may fault the
+        pages in from the disk.
+
+        Args:
+            bucket_name (str): The bucket name.
+            blob_name (str): The blob name.
+            start (int): The first byte position of the range.
+            end (int): The last byte position of the range, inclusive.
+            chunk_size (int): The size of each copy.
+
+        Yields:
+            bytes: The chunks of the range.
+
+        """
+
+        path = self.get_blob_path(bucket_name, blob_name)
+        mapped = await run_in_threadpool(self._map_blob, path)
+
+        if mapped is None:
+            return
+
+        try:
+            position, stop = start, min(end + 1, len(mapped))
+
+            while position < stop:
+                chunk = await run_in_threadpool(
+                    mapped.__getitem__, slice(position, min(position + chunk_size, stop))
+                )
+                position += len(chunk)
+
+                yield chunk
+
+        finally:
+            mapped.close()
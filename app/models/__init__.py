@@ -1,2 +1,4 @@
 from .base import DOCUMENT_REGISTRY
+from .ingestion_job import IngestionJob
+from .paper_blob import PaperBlob
 from .paper_metadata import PaperMetadata
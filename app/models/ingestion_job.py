@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Ingestion job document model.
+
+This module contains the ingestion job document model.
+
+"""
+
+from datetime import datetime, timezone
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+
+from app.common.enums import IngestionJobStatus
+from app.common.pydantic_model import ModelBase
+from app.models.base import DOCUMENT_REGISTRY
+
+
+@DOCUMENT_REGISTRY.register
+class IngestionJob(Document, ModelBase):
+    """Ingestion job document model.
+
+    This class is responsible for the job which uploads the paper document of a paper.
+
+    """
+
+    paper_id: PydanticObjectId = Field(..., description="The id of the paper to ingest.")
+    status: IngestionJobStatus = Field(
+        default=IngestionJobStatus.PENDING, description="The status of the job."
+    )
+    attempts: int = Field(default=0, description="The number of times the job is claimed.")
+    next_run_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="The time after which the job can be claimed.",
+    )
+    lease_owner: str | None = Field(default=None, description="The worker holding the lease.")
+    lease_expires_at: datetime | None = Field(
+        default=None, description="The time after which the lease can be taken over."
+    )
+    last_error: str | None = Field(default=None, description="The error of the last attempt.")
+
+    class Settings:
+        """Settings for the document model."""
+
+        collection = "ingestion_job"
+        indexes = ["paper_id", [("status", 1), ("next_run_at", 1)], "lease_expires_at"]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Paper blob document model.
+
+This module contains the paper blob document model.
+
+"""
+
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+
+from app.common.pydantic_model import ModelBase
+from app.models.base import DOCUMENT_REGISTRY
+
+
+@DOCUMENT_REGISTRY.register
+class PaperBlob(Document, ModelBase):
+    """Paper blob document model.
+
+    This class is responsible for the index from the content hash of a paper document to the
+    blob storing it, shared by every paper whose document has the same content.
+
+    """
+
+    content_hash: str = Field(..., description="The sha256 hex digest of the paper document.")
+    blob_url: str = Field(..., description="The url of the blob storing the paper document.")
+    size: int = Field(..., description="The size of the paper document in bytes.")
+    ref_count: int = Field(default=0, description="The number of papers referring the blob.")
+
+    class Settings:
+        """Settings for the document model."""
+
+        collection = "paper_blob"
+        indexes = [IndexModel("content_hash", unique=True)]
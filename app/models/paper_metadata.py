@@ -9,10 +9,11 @@ from datetime import datetime
 
 from beanie import Document
 from pydantic import AnyHttpUrl, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 from app.common.enums import BackgroundTaskStatus
 from app.common.pydantic_model import ModelBase
-from app.common.types import GCSBlobUrl
+from app.common.types import BlobUrl
 from app.models.base import DOCUMENT_REGISTRY
 
 
@@ -31,15 +32,44 @@ class PaperMetadata(Document, ModelBase):
     venue: str = Field(..., description="The venue of the paper.")
     keywords: list[str] = Field(..., description="The keywords of the paper.")
     url: AnyHttpUrl = Field(..., description="The pdf file url of the paper.")
-    gcs_blob_url: GCSBlobUrl | BackgroundTaskStatus = Field(
+    gcs_blob_url: BlobUrl | BackgroundTaskStatus = Field(
         default=BackgroundTaskStatus.IN_PROGRESS,
-        description="""The gcs blob url of the paper if paper is uploaded to gcs.
+        description="""The storage blob url of the paper if paper is uploaded to the storage.
         If background task is in progress then it will be BackgroundTaskStatus.IN_PROGRESS.
         """,
     )
+    content_hash: str | None = Field(
+        default=None, description="The sha256 hex digest of the uploaded paper document."
+    )
+    # The revision is 1 when the paper metadata is created and is incremented atomically by
+    # every write, so it versions the representations of the paper metadata. The documents
+    # created before it was added read as the revision 0.
+    revision: int = Field(default=0, description="The revision of the paper metadata.")
+    updated_at: datetime | None = Field(
+        default=None, description="The time of the last write of the paper metadata."
+    )
 
     class Settings:
         """Settings for the document model."""
 
         collection = "paper_metadata"
-        indexes = ["title", "authors", "published_at", "venue", "keywords"]
+        # The filters of the paper list are equality matches on venue, authors and keywords
+        # and a range on published_at. Each filter field has a compound index for every sort
+        # order, which follows the equality, sort, range rule, so a filtered page in any sort
+        # order is read in the index order without sorting in memory.
+        # authors and keywords are arrays, which can not share a compound index.
+        indexes = [
+            IndexModel([("published_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("title", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("venue", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("venue", ASCENDING), ("published_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("venue", ASCENDING), ("title", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("authors", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("authors", ASCENDING), ("published_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("authors", ASCENDING), ("title", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("keywords", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel(
+                [("keywords", ASCENDING), ("published_at", DESCENDING), ("_id", DESCENDING)]
+            ),
+            IndexModel([("keywords", ASCENDING), ("title", ASCENDING), ("_id", ASCENDING)]),
+        ]
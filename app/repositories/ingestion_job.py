@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""Ingestion job repository.
+
+This module is for ingestion job repository which manage the paper document upload queue
+
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument
+
+from app.common.enums import IngestionJobStatus
+from app.core.config import settings
+from app.external.database.mongo import MongoDBDocumentHandler
+from app.models.ingestion_job import IngestionJob
+
+
+class IngestionJobRepository(MongoDBDocumentHandler[IngestionJob]):
+    """Ingestion job repository.
+
+    This class is responsible for ingestion job repository. A job is claimed by a worker with
+    a lease, and the lease is extended by heartbeats while the job runs. If the worker dies,
+    the lease expires and the job is claimed again by another worker.
+
+    """
+
+    def __init__(self):
+        """Initialize the ingestion job repository.
+
+        This method is responsible for initializing the ingestion job repository.
+
+        """
+
+        super().__init__(model=IngestionJob)
+
+    async def enqueue(self, paper_id: PydanticObjectId) -> IngestionJob:
+        """Enqueue the ingestion job of the paper.
+
+        This method is responsible for adding the ingestion job of the paper.
+
+        Args:
+            paper_id (PydanticObjectId): The paper object id.
+
+        Returns:
+            IngestionJob: The enqueued job.
+
+        """
+
+        return await self.create(document=IngestionJob(paper_id=paper_id))
+
+    async def enqueue_many(
+        self,
+        paper_ids: list[PydanticObjectId],
+        chunk_size: int = settings.MONGODB_BULK_WRITE_CHUNK_SIZE,
+    ) -> dict[int, str]:
+        """Enqueue the ingestion jobs of the papers.
+
+        This method is responsible for adding the ingestion jobs of the papers with unordered
+        bulk inserts of at most `chunk_size` jobs each.
+
+        Args:
+            paper_ids (list[PydanticObjectId]): The paper object ids.
+            chunk_size (int): The number of jobs inserted in a round trip.
+
+        Returns:
+            dict[int, str]: The error messages of the failed jobs keyed by their index.
+
+        """
+
+        documents = [IngestionJob(paper_id=paper_id) for paper_id in paper_ids]
+        errors: dict[int, str] = {}
+
+        for offset in range(0, len(documents), chunk_size):
+            chunk_errors = await self.create_many(documents=documents[offset : offset + chunk_size])
+            errors.update({offset + index: error for index, error in chunk_errors.items()})
+
+        return errors
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> IngestionJob | None:
+        """Claim a runnable job.
+
+        This method is responsible for atomically leasing the oldest pending job which is due,
+        or a running job whose lease is expired and which has attempts left. A job whose
+        worker keeps dying, e.g. of a payload which crashes it, never reaches `fail`, so it
+        is left for `dead_letter_expired` once it runs out of attempts.
+
+        Args:
+            worker_id (str): The id of the claiming worker.
+            lease_seconds (float): The length of the lease.
+
+        Returns:
+            IngestionJob | None: The claimed job, or None if no job is runnable.
+
+        """
+
+        now = datetime.now(timezone.utc)
+
+        raw_job = await self.model.get_motor_collection().find_one_and_update(
+            {
+                "$or": [
+                    {"status": IngestionJobStatus.PENDING, "next_run_at": {"$lte": now}},
+                    {
+                        "status": IngestionJobStatus.RUNNING,
+                        "lease_expires_at": {"$lte": now},
+                        "attempts": {"$lt": settings.INGESTION_JOB_MAX_ATTEMPTS},
+                    },
+                ]
+            },
+            {
+                "$set": {
+                    "status": IngestionJobStatus.RUNNING,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if raw_job is None:
+            return None
+
+        return IngestionJob.model_validate(raw_job)
+
+    async def dead_letter_expired(self) -> list[IngestionJob]:
+        """Mark the expired jobs without attempts left as failed.
+
+        This method is responsible for failing the running jobs whose leases are expired
+        after their last attempt, which are never claimed again. Each job is failed
+        atomically, so a job is returned to a single caller.
+
+        Returns:
+            list[IngestionJob]: The failed jobs.
+
+        """
+
+        jobs = []
+
+        while True:
+            raw_job = await self.model.get_motor_collection().find_one_and_update(
+                {
+                    "status": IngestionJobStatus.RUNNING,
+                    "lease_expires_at": {"$lte": datetime.now(timezone.utc)},
+                    "attempts": {"$gte": settings.INGESTION_JOB_MAX_ATTEMPTS},
+                },
+                {
+                    "$set": {
+                        "status": IngestionJobStatus.FAILED,
+                        "last_error": "Lease expired on the last attempt",
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                    }
+                },
+                return_document=ReturnDocument.AFTER,
+            )
+
+            if raw_job is None:
+                return jobs
+
+            jobs.append(IngestionJob.model_validate(raw_job))
+
+    async def heartbeat(self, job: IngestionJob, lease_seconds: float) -> bool:
+        """Extend the lease of the job.
+
+        This method is responsible for extending the lease while the owner still holds it.
+
+        Args:
+            job (IngestionJob): The claimed job.
+            lease_seconds (float): The length of the lease from now.
+
+        Returns:
+            bool: False if the lease is taken over by another worker.
+
+        """
+
+        lease_expires_at = datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+
+        result = await self.model.get_motor_collection().update_one(
+            {
+                "_id": job.id,
+                "status": IngestionJobStatus.RUNNING,
+                "lease_owner": job.lease_owner,
+            },
+            {"$set": {"lease_expires_at": lease_expires_at}},
+        )
+
+        return result.matched_count == 1
+
+    async def complete(self, job: IngestionJob) -> bool:
+        """Mark the job as succeeded.
+
+        Args:
+            job (IngestionJob): The claimed job.
+
+        Returns:
+            bool: False if the lease is taken over by another worker.
+
+        """
+
+        return await self._release(job, {"status": IngestionJobStatus.SUCCESS, "last_error": None})
+
+    async def fail(
+        self, job: IngestionJob, error: str, retry: bool = True
+    ) -> IngestionJobStatus | None:
+        """Mark the job as failed.
+
+        The job is rescheduled with an exponential backoff until it runs out of attempts, then
+        it is marked as failed for good.
+
+        Args:
+            job (IngestionJob): The claimed job.
+            error (str): The error of the attempt.
+            retry (bool): Whether the job can be retried.
+
+        Returns:
+            IngestionJobStatus | None: PENDING if the job will be retried, FAILED if it is
+                failed for good, or None if the lease is taken over by another worker.
+
+        """
+
+        if not retry or job.attempts >= settings.INGESTION_JOB_MAX_ATTEMPTS:
+            status = IngestionJobStatus.FAILED
+            fields = {"status": status, "last_error": error}
+
+        else:
+            delay = min(
+                settings.INGESTION_JOB_RETRY_BASE_DELAY * 2 ** (job.attempts - 1),
+                settings.INGESTION_JOB_RETRY_MAX_DELAY,
+            )
+            status = IngestionJobStatus.PENDING
+            fields = {
+                "status": status,
+                "next_run_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+                "last_error": error,
+            }
+
+        if not await self._release(job, fields):
+            return None
+
+        return status
+
+    async def _release(self, job: IngestionJob, fields: dict) -> bool:
+        """Release the lease of the job and update the fields.
+
+        Args:
+            job (IngestionJob): The claimed job.
+            fields (dict): The fields to update.
+
+        Returns:
+            bool: False if the lease is taken over by another worker.
+
+        """
+
+        result = await self.model.get_motor_collection().update_one(
+            {
+                "_id": job.id,
+                "status": IngestionJobStatus.RUNNING,
+                "lease_owner": job.lease_owner,
+            },
+            {"$set": {**fields, "lease_owner": None, "lease_expires_at": None}},
+        )
+
+        return result.matched_count == 1
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""Paper blob repository.
+
+This module is for paper blob repository which manage the content hash index of paper documents
+
+"""
+
+import backoff
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.external.database.mongo import MongoDBDocumentHandler
+from app.models.paper_blob import PaperBlob
+
+
+class PaperBlobRepository(MongoDBDocumentHandler[PaperBlob]):
+    """Paper blob repository.
+
+    This class is responsible for paper blob repository. A paper blob whose reference count
+    is -1 is being deleted; it is not found or acquired until its deletion is finished.
+
+    """
+
+    def __init__(self):
+        """Initialize the paper blob repository.
+
+        This method is responsible for initializing the paper blob repository.
+
+        """
+
+        super().__init__(model=PaperBlob)
+
+    async def get_by_hash(self, content_hash: str) -> PaperBlob | None:
+        """Get the paper blob by content hash.
+
+        Args:
+            content_hash (str): The sha256 hex digest of the paper document.
+
+        Returns:
+            PaperBlob | None: The paper blob if the content is already stored.
+
+        """
+
+        return await self.model.find_one({"content_hash": content_hash, "ref_count": {"$gte": 0}})
+
+    @backoff.on_exception(
+        backoff.expo,
+        DuplicateKeyError,
+        max_tries=5,
+        factor=0.1,
+        logger=None,
+    )
+    async def acquire(self, content_hash: str, blob_url: str, size: int) -> PaperBlob:
+        """Add a reference to the paper blob.
+
+        This method is responsible for atomically creating the paper blob if it does not
+        exist and incrementing its reference count. The paper blob being deleted conflicts
+        with the created one, so the reference is retried until the deletion is finished.
+
+        Args:
+            content_hash (str): The sha256 hex digest of the paper document.
+            blob_url (str): The url of the blob storing the paper document.
+            size (int): The size of the paper document in bytes.
+
+        Returns:
+            PaperBlob: The referenced paper blob.
+
+        """
+
+        raw_paper_blob = await self.model.get_motor_collection().find_one_and_update(
+            {"content_hash": content_hash, "ref_count": {"$gte": 0}},
+            {
+                "$setOnInsert": {"blob_url": blob_url, "size": size},
+                "$inc": {"ref_count": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        return PaperBlob.model_validate(raw_paper_blob)
+
+    async def release(self, content_hash: str) -> PaperBlob | None:
+        """Remove a reference to the paper blob.
+
+        Args:
+            content_hash (str): The sha256 hex digest of the paper document.
+
+        Returns:
+            PaperBlob | None: The released paper blob, or None if it does not exist.
+
+        """
+
+        raw_paper_blob = await self.model.get_motor_collection().find_one_and_update(
+            {"content_hash": content_hash, "ref_count": {"$gt": 0}},
+            {"$inc": {"ref_count": -1}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if raw_paper_blob is None:
+            return None
+
+        return PaperBlob.model_validate(raw_paper_blob)
+
+    async def mark_deleting(self, content_hash: str) -> PaperBlob | None:
+        """Mark the unreferenced paper blob as being deleted.
+
+        This method is responsible for the guarded step of the deletion, which only succeeds
+        if no paper refers the blob, and prevents any paper from referring it afterwards.
+
+        Args:
+            content_hash (str): The sha256 hex digest of the paper document.
+
+        Returns:
+            PaperBlob | None: The marked paper blob, or None if it is referred again.
+
+        """
+
+        raw_paper_blob = await self.model.get_motor_collection().find_one_and_update(
+            {"content_hash": content_hash, "ref_count": 0},
+            {"$set": {"ref_count": -1}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if raw_paper_blob is None:
+            return None
+
+        return PaperBlob.model_validate(raw_paper_blob)
+
+    async def unmark_deleting(self, content_hash: str) -> bool:
+        """Restore the paper blob whose deletion failed.
+
+        Args:
+            content_hash (str): The sha256 hex digest of the paper document.
+
+        Returns:
+            bool: True if the paper blob is restored.
+
+        """
+
+        result = await self.model.get_motor_collection().update_one(
+            {"content_hash": content_hash, "ref_count": -1}, {"$set": {"ref_count": 0}}
+        )
+
+        return result.modified_count > 0
+
+    async def delete_marked(self, content_hash: str) -> bool:
+        """Delete the paper blob marked as being deleted.
+
+        Args:
+            content_hash (str): The sha256 hex digest of the paper document.
+
+        Returns:
+            bool: True if the paper blob is deleted.
+
+        """
+
+        result = await self.model.get_motor_collection().delete_one(
+            {"content_hash": content_hash, "ref_count": -1}
+        )
+
+        return result.deleted_count > 0
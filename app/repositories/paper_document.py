@@ -5,98 +5,453 @@ This module is for paper pdf repository which manage paper pdf
 
 """
 
+import contextlib
+import hashlib
+import io
 import os
-
+import tempfile
+import weakref
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import IO, AsyncIterator, ClassVar
+
+import aiohttp
+from fastapi.concurrency import run_in_threadpool
 from pydantic import AnyHttpUrl
 
 from app.common.async_requests import AsyncRequestHandler
-from app.common.misc import get_gcs_url
-from app.common.types import GCSBlobUrl
+from app.common.cache import TTLCache
+from app.common.misc import parse_blob_url
+from app.common.singleflight import SingleFlight
+from app.common.types import BlobUrl
 from app.core.config import settings
-from app.external.storage.google_cloud_storage import GoogleCloudStorageHandler
+from app.external.storage import BlobMetadata, StorageHandlerBase, get_storage_handler
+
+
+def _remove_spool_file(file: IO[bytes]):
+    """Close and remove the temporary file of a paper document spool.
+
+    Args:
+        file (IO[bytes]): The temporary file.
+
+    """
+
+    file.close()
+
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(file.name)
+
+
+class PaperDocumentSpool:
+    """Paper document spool class.
+
+    This class is responsible for a downloaded paper document and its content hash. The
+    document is kept in memory up to `max_memory_size` bytes and spilled to a temporary file
+    beyond it. The spool is shared by the concurrent spools of the same url, so each of them
+    reads it with its own reader, and the temporary file is removed once the spool is no
+    longer referenced.
+
+    """
+
+    def __init__(self, max_memory_size: int):
+        """Initialize the paper document spool.
+
+        Args:
+            max_memory_size (int): The maximum size of the paper document kept in memory.
+
+        """
+
+        self.max_memory_size = max_memory_size
+        self.size = 0
+
+        self._hash = hashlib.sha256()
+        self._chunks: list[bytes] = []
+        self._data = b""
+        self._file: IO[bytes] | None = None
+        self._finalizer: weakref.finalize | None = None
+
+    @property
+    def content_hash(self) -> str:
+        """Get the sha256 hex digest of the paper document."""
+
+        return self._hash.hexdigest()
+
+    async def write(self, chunk: bytes):
+        """Write a chunk of the paper document.
+
+        Args:
+            chunk (bytes): The chunk.
+
+        """
+
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+        if self._file is None and self.size <= self.max_memory_size:
+            self._chunks.append(chunk)
+            return
+
+        if self._file is None:
+            self._file = await run_in_threadpool(tempfile.NamedTemporaryFile, delete=False)
+            self._finalizer = weakref.finalize(self, _remove_spool_file, self._file)
+
+            chunk = b"".join([*self._chunks, chunk])
+            self._chunks = []
+
+        await run_in_threadpool(self._file.write, chunk)
+
+    async def close(self):
+        """Finish writing the paper document."""
+
+        if self._file is not None:
+            await run_in_threadpool(self._file.flush)
+
+        else:
+            self._data = b"".join(self._chunks)
+            self._chunks = []
+
+    def discard(self):
+        """Remove the temporary file of the paper document."""
 
+        if self._finalizer is not None:
+            self._finalizer()
 
-class PaperDocumentRepository(GoogleCloudStorageHandler, AsyncRequestHandler):
+    async def open(self) -> IO[bytes]:
+        """Open a reader of the paper document.
+
+        Returns:
+            IO[bytes]: The reader positioned at the start of the paper document.
+
+        """
+
+        if self._file is None:
+            return io.BytesIO(self._data)
+
+        return await run_in_threadpool(open, self._file.name, "rb")
+
+
+class PaperDocumentRepository(AsyncRequestHandler):
     """Paper document repository.
 
-    This class is used to manage paper pdf.
+    This class is used to manage paper pdf. The paper documents are stored with the storage
+    handler selected by `settings.STORAGE_BACKEND`.
+
+    The signed urls of the paper documents are shared by the repositories of the process and
+    reused until shortly before they expire. The concurrent metadata lookups of the same
+    paper document share a single storage call, and the concurrent spools of the same url
+    share a single download.
 
     """
 
-    def __init__(self):
-        GoogleCloudStorageHandler.__init__(self, project_id=str(settings.GOOGLE_CLOUD_PROJECT_ID))
-        AsyncRequestHandler.__init__(self)
+    signed_urls: ClassVar[TTLCache[str, tuple[str, datetime]]] = TTLCache(
+        maxsize=settings.PAPER_DOCUMENT_SIGNED_URL_CACHE_SIZE,
+        ttl=settings.PAPER_DOCUMENT_SIGNED_URL_EXPIRATION
+        - settings.PAPER_DOCUMENT_SIGNED_URL_REFRESH_MARGIN,
+    )
+    metadata_lookups: ClassVar[SingleFlight[tuple[str, str], BlobMetadata | None]] = SingleFlight()
+    spools: ClassVar[SingleFlight[str, PaperDocumentSpool]] = SingleFlight()
+
+    def __init__(
+        self,
+        http_session: aiohttp.ClientSession | None = None,
+        storage: StorageHandlerBase | None = None,
+    ):
+        """Initialize the paper document repository.
 
-        self.bucket_id = str(settings.GOOGLE_CLOUD_STORAGE_BUCKET_ID)
+        Args:
+            http_session (aiohttp.ClientSession | None): The shared http client session.
+            storage (StorageHandlerBase | None): The storage handler, defaults to the one
+                selected by the settings.
+
+        """
+
+        AsyncRequestHandler.__init__(self, session=http_session)
+
+        self.storage = storage if storage is not None else get_storage_handler()
+        self.bucket_id = self.storage.bucket_id
 
     @staticmethod
-    def get_gcs_paper_blob_name(paper_obj_id: str):
-        """Get google cloud storage paper document path.
+    def get_paper_blob_name(paper_obj_id: str):
+        """Get paper document path.
 
-        This method is used to get google cloud storage paper document path.
+        This method is used to get paper document path in the storage.
 
         Args:
             paper_obj_id (str): The paper object id.
 
         Returns:
-            str: The google cloud storage paper document path.
+            str: The paper document path.
 
         """
 
         return os.path.join(settings.DATA_DIR, "paper_documents", f"{paper_obj_id}.pdf")
 
-    async def download_paper_document(self, paper_obj_id: str) -> bytes:
-        """Get paper document from google cloud storage.
+    @staticmethod
+    def get_content_blob_name(content_hash: str):
+        """Get content addressed paper document path.
 
-        This method is used to get paper document from google cloud storage.
+        This method is used to get the path of the paper document keyed by its content hash.
+        The first two characters of the hash shard the documents into sub directories.
 
         Args:
-            paper_obj_id (str): The paper object id.
+            content_hash (str): The sha256 hex digest of the paper document.
 
         Returns:
-            bytes: The raw file bytes.
+            str: The paper document path.
 
         """
 
-        try:
-            blob_name = PaperDocumentRepository.get_gcs_paper_blob_name(paper_obj_id)
+        return os.path.join(
+            settings.DATA_DIR, "paper_documents", "sha256", content_hash[:2], f"{content_hash}.pdf"
+        )
+
+    def split_blob_url(self, blob_url: BlobUrl) -> tuple[str, str]:
+        """Split paper document url.
 
-            return await self.download_blob(
-                bucket_name=self.bucket_id,
-                source_blob_name=blob_name,
+        This method is used to get the bucket and the blob name of a paper document url.
+
+        Args:
+            blob_url (BlobUrl): The storage blob url.
+
+        Returns:
+            tuple[str, str]: The bucket name and the blob name.
+
+        Raises:
+            ValueError: If the url does not belong to the storage.
+
+        """
+
+        scheme, bucket_name, blob_name = parse_blob_url(blob_url)
+
+        if scheme != self.storage.url_scheme:
+            raise ValueError(
+                f"Blob url {blob_url} does not belong to the {self.storage.url_scheme} storage"
             )
 
-        except Exception as e:
-            raise e
+        return bucket_name, blob_name
 
-    async def upload_paper_document(self, paper_obj_id: str, paper_url: AnyHttpUrl) -> GCSBlobUrl:
-        """Upload paper document to google cloud storage.
+    async def get_paper_document_metadata(self, blob_url: BlobUrl) -> BlobMetadata | None:
+        """Get paper document metadata.
 
-        This method is used to upload paper document to google cloud storage.
+        This method is used to get the size and the version of a stored paper document.
+
+        Args:
+            blob_url (BlobUrl): The storage blob url.
+
+        Returns:
+            BlobMetadata | None: The blob metadata, or None if the blob does not exist.
+
+        """
+
+        bucket_name, blob_name = self.split_blob_url(blob_url)
+
+        return await self.metadata_lookups.do(
+            (bucket_name, blob_name),
+            lambda: self.storage.get_blob_metadata(bucket_name=bucket_name, blob_name=blob_name),
+        )
+
+    async def delete_paper_document(self, blob_url: BlobUrl) -> bool:
+        """Delete paper document.
+
+        This method is used to delete a stored paper document.
+
+        Args:
+            blob_url (BlobUrl): The storage blob url.
+
+        Returns:
+            bool: False if the paper document does not exist.
+
+        """
+
+        bucket_name, blob_name = self.split_blob_url(blob_url)
+
+        return await self.storage.delete_blob(bucket_name=bucket_name, blob_name=blob_name)
+
+    def iter_paper_document(self, blob_url: BlobUrl, start: int, end: int) -> AsyncIterator[bytes]:
+        """Iterate paper document.
+
+        This method is used to read a byte range of a stored paper document in chunks of
+        `settings.PAPER_DOCUMENT_DOWNLOAD_CHUNK_SIZE` bytes.
+
+        Args:
+            blob_url (BlobUrl): The storage blob url.
+            start (int): The first byte position of the range.
+            end (int): The last byte position of the range, inclusive.
+
+        Returns:
+            AsyncIterator[bytes]: The chunks of the range.
+
+        """
+
+        bucket_name, blob_name = self.split_blob_url(blob_url)
+
+        return self.storage.iter_blob(
+            bucket_name=bucket_name,
+            blob_name=blob_name,
+            start=start,
+            end=end,
+            chunk_size=settings.PAPER_DOCUMENT_DOWNLOAD_CHUNK_SIZE,
+        )
+
+    async def get_paper_document_signed_url(self, blob_url: BlobUrl) -> tuple[str, datetime] | None:
+        """Get paper document signed url.
+
+        This method is used to get a signed url to download a stored paper document from the
+        storage directly. The signed url lives `settings.PAPER_DOCUMENT_SIGNED_URL_EXPIRATION`
+        seconds and is reused until `settings.PAPER_DOCUMENT_SIGNED_URL_REFRESH_MARGIN` seconds
+        before it expires.
+
+        Args:
+            blob_url (BlobUrl): The storage blob url.
+
+        Returns:
+            tuple[str, datetime] | None: The signed url and its expiration time, or None if the
+                storage can not sign urls.
+
+        """
+
+        cached = self.signed_urls.get(blob_url)
+
+        if cached is not None:
+            return cached
+
+        bucket_name, blob_name = self.split_blob_url(blob_url)
+        expiration = timedelta(seconds=settings.PAPER_DOCUMENT_SIGNED_URL_EXPIRATION)
+        expires_at = datetime.now(tz=timezone.utc) + expiration
+
+        signed_url = await self.storage.generate_signed_url(
+            bucket_name=bucket_name, blob_name=blob_name, expiration=expiration
+        )
+
+        if signed_url is None:
+            return None
+
+        self.signed_urls.set(blob_url, (signed_url, expires_at))
+
+        return signed_url, expires_at
+
+    async def upload_paper_document(self, paper_obj_id: str, paper_url: AnyHttpUrl) -> BlobUrl:
+        """Upload paper document to the storage.
+
+        This method is used to upload paper document to the storage.
+        If `settings.PAPER_DOCUMENT_STREAMING` is enabled, the chunks of the response body are
+        written to the storage as they arrive, so the memory used per upload does not grow
+        with the size of the paper document. Otherwise the paper document is spooled, and the
+        uploads of the same url share the download.
 
         Args:
             paper_obj_id (str): The paper object id.
             paper_url (AnyHttpUrl): The paper url.
 
         Returns:
-            GCSBlobUrl: The google cloud storage blob url.
+            BlobUrl: The storage blob url.
+
+        Raises:
+            PayloadTooLargeError: If the paper document exceeds `settings.PAPER_DOCUMENT_MAX_SIZE`.
 
         """
 
         try:
-            response = await self.request(method="GET", url=paper_url)
+            blob_name = PaperDocumentRepository.get_paper_blob_name(paper_obj_id)
+
+            if settings.PAPER_DOCUMENT_STREAMING:
+                return await self.storage.upload_blob_from_stream(
+                    bucket_name=self.bucket_id,
+                    stream=self.stream(
+                        method="GET",
+                        url=paper_url,
+                        chunk_size=settings.PAPER_DOCUMENT_CHUNK_SIZE,
+                        max_size=settings.PAPER_DOCUMENT_MAX_SIZE,
+                    ),
+                    destination_blob_name=blob_name,
+                    chunk_size=settings.GOOGLE_CLOUD_STORAGE_CHUNK_SIZE,
+                )
+
+            async with self.spool_paper_document(paper_url) as (file, _, _):
+                return await self.storage.upload_blob_from_file(
+                    bucket_name=self.bucket_id,
+                    file=file,
+                    destination_blob_name=blob_name,
+                    chunk_size=settings.GOOGLE_CLOUD_STORAGE_CHUNK_SIZE,
+                )
 
-            raw_paper_bytes = await response.content.read()
+        except Exception as e:
+            raise e
 
-            blob_name = PaperDocumentRepository.get_gcs_paper_blob_name(paper_obj_id)
+    @asynccontextmanager
+    async def spool_paper_document(
+        self, paper_url: AnyHttpUrl
+    ) -> AsyncIterator[tuple[IO[bytes], str, int]]:
+        """Download paper document to a temporary file.
 
-            await self.upload_blob(
-                bucket_name=self.bucket_id,
-                raw_file_bytes=raw_paper_bytes,
-                destination_blob_name=blob_name,
-            )
+        This method is used to download paper document while computing its content hash.
+        The document is kept in memory up to `settings.PAPER_DOCUMENT_SPOOL_MEMORY_SIZE` bytes
+        and spilled to disk beyond it. The concurrent spools of the same url share a single
+        download, and each of them gets its own reader of the downloaded document. The file is
+        removed once every spool of the download has exited.
+
+        Args:
+            paper_url (AnyHttpUrl): The paper url.
 
-            return get_gcs_url(self.bucket_id, blob_name)
+        Yields:
+            tuple[IO[bytes], str, int]: The file, the sha256 hex digest and the size of the
+                paper document.
 
-        except Exception as e:
-            raise e
+        Raises:
+            PayloadTooLargeError: If the paper document exceeds `settings.PAPER_DOCUMENT_MAX_SIZE`.
+
+        """
+
+        url = self.validate_url(paper_url)
+
+        async def download() -> PaperDocumentSpool:
+            spool = PaperDocumentSpool(max_memory_size=settings.PAPER_DOCUMENT_SPOOL_MEMORY_SIZE)
+
+            try:
+                async for chunk in self.stream(
+                    method="GET",
+                    url=url,
+                    chunk_size=settings.PAPER_DOCUMENT_CHUNK_SIZE,
+                    max_size=settings.PAPER_DOCUMENT_MAX_SIZE,
+                ):
+                    await spool.write(chunk)
+
+                await spool.close()
+
+            except BaseException:
+                spool.discard()
+                raise
+
+            return spool
+
+        spool = await self.spools.do(url, download)
+        file = await spool.open()
+
+        try:
+            yield file, spool.content_hash, spool.size
+
+        finally:
+            file.close()
+
+    async def upload_paper_document_file(self, file: IO[bytes], content_hash: str) -> BlobUrl:
+        """Upload paper document file to the storage.
+
+        This method is used to upload the spooled paper document under its content hash.
+
+        Args:
+            file (IO[bytes]): The paper document file.
+            content_hash (str): The sha256 hex digest of the paper document.
+
+        Returns:
+            BlobUrl: The storage blob url.
+
+        """
+
+        blob_name = PaperDocumentRepository.get_content_blob_name(content_hash)
+
+        return await self.storage.upload_blob_from_file(
+            bucket_name=self.bucket_id,
+            file=file,
+            destination_blob_name=blob_name,
+            chunk_size=settings.GOOGLE_CLOUD_STORAGE_CHUNK_SIZE,
+        )
@@ -5,15 +5,51 @@ This module is for paper metadata repository which manage paper metadata
 
 """
 
+from datetime import datetime, timezone
+from typing import AsyncIterator, ClassVar
+
 from beanie import PydanticObjectId
 from beanie.odm.enums import SortDirection
 
-from app.common.enums import BackgroundTaskStatus
+from app.common.cache import TTLCache
+from app.common.enums import BackgroundTaskStatus, CountStrategy, PaperListView, PaperSortOrder
+from app.common.exceptions import InvalidFieldError, InvalidPageTokenError, NotFoundError
+from app.common.pagination import (
+    PageCursor,
+    SortKeys,
+    build_keyset_query,
+    decode_page_cursor,
+    encode_page_cursor,
+    get_seek_sort,
+    get_sort_values,
+)
 from app.common.pydantic_model import PaginatedResult
-from app.common.types import GCSBlobUrl
+from app.common.singleflight import SingleFlight
+from app.common.types import BlobUrl
+from app.core.config import settings
 from app.external.database.mongo import MongoDBDocumentHandler
 from app.models.paper_metadata import PaperMetadata
-from app.schemas.paper_metadata import GetPaperMetadataListParam, RegisterPaperSchema
+from app.schemas.paper_metadata import (
+    PAPER_LIST_VIEW_FIELDS,
+    ExportPaperMetadataParam,
+    GetPaperDetailSchema,
+    GetPaperListItemSchema,
+    GetPaperMetadataListParam,
+    PaperMetadataFilterSchemaBase,
+    PaperRevisionSchema,
+    RegisterPaperSchema,
+    get_paper_projection_model,
+)
+
+# Sort keys of the sort orders, each of which has a compound index of the paper metadata.
+PAPER_SORT_KEYS: dict[str, SortKeys] = {
+    PaperSortOrder.ID: [("_id", SortDirection.ASCENDING)],
+    PaperSortOrder.PUBLISHED_AT: [
+        ("published_at", SortDirection.DESCENDING),
+        ("_id", SortDirection.DESCENDING),
+    ],
+    PaperSortOrder.TITLE: [("title", SortDirection.ASCENDING), ("_id", SortDirection.ASCENDING)],
+}
 
 
 class PaperMetadataRepository(MongoDBDocumentHandler[PaperMetadata]):
@@ -21,8 +57,36 @@ class PaperMetadataRepository(MongoDBDocumentHandler[PaperMetadata]):
 
     This class is responsible for paper metadata repository.
 
+    The paper metadata read by id are cached in the process as the validated detail schemas,
+    which are shared by the callers and must not be modified. The missing paper metadata are
+    cached for `settings.PAPER_METADATA_CACHE_MISS_TTL`. An entry is invalidated by every
+    write of its paper metadata through the repositories of the process, and a read which
+    overlaps a write is not cached. The writes of the other processes are only seen once the
+    entries expire.
+
+    The concurrent reads of the same paper metadata by id share a single database read, and
+    a write makes the later reads start a new one.
+
     """
 
+    # The misses are cached as `(None,)`, as the cache returns None for the missing keys.
+    detail_cache: ClassVar[TTLCache[PydanticObjectId, tuple[GetPaperDetailSchema | None]]] = (
+        TTLCache(maxsize=settings.PAPER_METADATA_CACHE_SIZE, ttl=settings.PAPER_METADATA_CACHE_TTL)
+    )
+    # Incremented by every invalidation, so the reads overlapping a write are not cached.
+    detail_cache_generation: ClassVar[int] = 0
+    metadata_flights: ClassVar[SingleFlight[PydanticObjectId, PaperMetadata | None]] = (
+        SingleFlight()
+    )
+    detail_flights: ClassVar[SingleFlight[PydanticObjectId, GetPaperDetailSchema | None]] = (
+        SingleFlight()
+    )
+    # The fields of the filter query of the paper list, which is the only counted query, so
+    # the uploads and the status updates keep the cached counts.
+    count_fields: ClassVar[frozenset[str] | None] = frozenset(
+        ["venue", "authors", "keywords", "published_at"]
+    )
+
     def __init__(self):
         """Initialize the paper metadata repository.
 
@@ -35,7 +99,9 @@ class PaperMetadataRepository(MongoDBDocumentHandler[PaperMetadata]):
     async def get_metadata_by_id(self, obj_id: str) -> PaperMetadata | None:
         """Get the paper metadata by object id.
 
-        This method is responsible for getting the paper metadata by object id.
+        This method is responsible for getting the paper metadata by object id. The
+        concurrent reads of the object id share the paper metadata, which must not be
+        modified.
 
         Args:
             obj_id (str): The object id.
@@ -45,7 +111,191 @@ class PaperMetadataRepository(MongoDBDocumentHandler[PaperMetadata]):
 
         """
 
-        return await self.get(obj_id=PydanticObjectId(obj_id))
+        key = PydanticObjectId(obj_id)
+
+        return await self.metadata_flights.do(key, lambda: self.get(obj_id=key))
+
+    async def get_metadata_detail_by_id(
+        self, obj_id: str, min_revision: int = 0
+    ) -> GetPaperDetailSchema | None:
+        """Get the paper metadata detail by object id through the cache.
+
+        This method is responsible for reading the paper metadata from the cache, or from
+        the database into the cache. The cache is only invalidated by the writes of this
+        process, so a cached detail older than `min_revision`, which another process has
+        written, is evicted and read again.
+
+        Args:
+            obj_id (str): The object id.
+            min_revision (int): The revision the detail must have at least, e.g. the one just
+                read from the database.
+
+        Returns:
+            GetPaperDetailSchema | None: The paper metadata detail, or None if the paper
+                metadata does not exist.
+
+        """
+
+        key = PydanticObjectId(obj_id)
+        cached = self.detail_cache.get(key)
+
+        if cached is not None:
+            detail = cached[0]
+
+            if not min_revision or detail is not None and detail.revision >= min_revision:
+                return detail
+
+            self.detail_cache.delete(key)
+            self.detail_flights.forget(key)
+
+        return await self.detail_flights.do(key, lambda: self._load_detail(key))
+
+    async def _load_detail(self, key: PydanticObjectId) -> GetPaperDetailSchema | None:
+        """Read the paper metadata detail from the database into the cache.
+
+        Args:
+            key (PydanticObjectId): The object id.
+
+        Returns:
+            GetPaperDetailSchema | None: The paper metadata detail, or None if the paper
+                metadata does not exist.
+
+        """
+
+        generation = PaperMetadataRepository.detail_cache_generation
+        document = await self.get(obj_id=key)
+        detail = None if document is None else GetPaperDetailSchema.model_validate(document)
+
+        if generation == PaperMetadataRepository.detail_cache_generation:
+            self.detail_cache.set(
+                key, (detail,), ttl=None if detail else settings.PAPER_METADATA_CACHE_MISS_TTL
+            )
+
+        return detail
+
+    def invalidate_detail_cache(self, obj_ids: list[PydanticObjectId | None]):
+        """Invalidate the cached paper metadata details and the reads in flight.
+
+        Args:
+            obj_ids (list[PydanticObjectId | None]): The object ids of the written paper
+                metadata.
+
+        """
+
+        PaperMetadataRepository.detail_cache_generation += 1
+
+        for obj_id in obj_ids:
+            if obj_id is not None:
+                self.detail_cache.delete(obj_id)
+                self.metadata_flights.forget(obj_id)
+                self.detail_flights.forget(obj_id)
+
+    async def create(self, document: PaperMetadata) -> PaperMetadata:
+        """Create the paper metadata and invalidate its cached detail.
+
+        Args:
+            document (PaperMetadata): The paper metadata.
+
+        Returns:
+            PaperMetadata: The created paper metadata.
+
+        """
+
+        try:
+            return await super().create(document=document)
+
+        finally:
+            self.invalidate_detail_cache([document.id])
+
+    async def create_many(self, documents: list[PaperMetadata]) -> dict[int, str]:
+        """Create the paper metadata and invalidate their cached details.
+
+        Args:
+            documents (list[PaperMetadata]): The paper metadata.
+
+        Returns:
+            dict[int, str]: The error messages of the paper metadata which are failed to be
+                created, keyed by their index in `documents`.
+
+        """
+
+        try:
+            return await super().create_many(documents=documents)
+
+        finally:
+            self.invalidate_detail_cache([document.id for document in documents])
+
+    async def replace(self, document: PaperMetadata) -> PaperMetadata:
+        """Replace the paper metadata and invalidate its cached detail.
+
+        Args:
+            document (PaperMetadata): The paper metadata.
+
+        Returns:
+            PaperMetadata: The replaced paper metadata.
+
+        """
+
+        try:
+            return await super().replace(document=document)
+
+        finally:
+            self.invalidate_detail_cache([document.id])
+
+    async def update(self, obj_id: PydanticObjectId, update: dict) -> PaperMetadata | None:
+        """Update the paper metadata atomically and invalidate its cached detail.
+
+        Args:
+            obj_id (PydanticObjectId): The object id.
+            update (dict): The update operators.
+
+        Returns:
+            PaperMetadata | None: The updated paper metadata, or None if it does not exist.
+
+        """
+
+        try:
+            return await super().update(obj_id=obj_id, update=update)
+
+        finally:
+            self.invalidate_detail_cache([obj_id])
+
+    async def get_metadata_revision(self, obj_id: str) -> PaperRevisionSchema | None:
+        """Get the revision of the paper metadata by object id.
+
+        This method is responsible for reading only the revision and the time of the last
+        write of the paper metadata, without the rest of the document.
+
+        Args:
+            obj_id (str): The object id.
+
+        Returns:
+            PaperRevisionSchema | None: The revision, or None if the paper metadata does not
+                exist.
+
+        """
+
+        return await self.get_projection(
+            obj_id=PydanticObjectId(obj_id), projection_model=PaperRevisionSchema
+        )
+
+    @staticmethod
+    def create_document(obj: RegisterPaperSchema) -> PaperMetadata:
+        """Create the paper metadata document of the first revision.
+
+        Args:
+            obj (RegisterPaperSchema): The register paper schema.
+
+        Returns:
+            PaperMetadata: The paper metadata document, which is not inserted yet.
+
+        """
+
+        document = PaperMetadata.model_validate(obj)
+        document.revision = 1
+        document.updated_at = datetime.now(timezone.utc)
+
+        return document
 
     async def register_metadata(self, obj: RegisterPaperSchema) -> PaperMetadata:
         """Register the paper metadata.
@@ -60,51 +310,373 @@ class PaperMetadataRepository(MongoDBDocumentHandler[PaperMetadata]):
 
         """
 
-        return await self.create(document=PaperMetadata.model_validate(obj))
+        return await self.create(document=self.create_document(obj))
+
+    async def register_metadata_bulk(
+        self,
+        objs: list[RegisterPaperSchema],
+        chunk_size: int = settings.MONGODB_BULK_WRITE_CHUNK_SIZE,
+    ) -> tuple[list[PaperMetadata], dict[int, str]]:
+        """Register the paper metadata in bulk.
+
+        This method is responsible for adding the paper metadata with unordered bulk inserts
+        of at most `chunk_size` documents each.
+
+        Args:
+            objs (list[RegisterPaperSchema]): The paper metadata.
+            chunk_size (int): The number of documents inserted in a round trip.
+
+        Returns:
+            tuple[list[PaperMetadata], dict[int, str]]: The paper metadata in the order of
+                `objs`, and the error messages of the failed ones keyed by their index.
+
+        """
+
+        documents = [self.create_document(obj) for obj in objs]
+        errors: dict[int, str] = {}
+
+        for offset in range(0, len(documents), chunk_size):
+            chunk_errors = await self.create_many(documents=documents[offset : offset + chunk_size])
+            errors.update({offset + index: error for index, error in chunk_errors.items()})
+
+        return documents, errors
 
     async def update_gcs_blob_url(
-        self, obj: PaperMetadata, upload_status: GCSBlobUrl | BackgroundTaskStatus
+        self,
+        obj: PaperMetadata,
+        upload_status: BlobUrl | BackgroundTaskStatus,
+        content_hash: str | None = None,
     ) -> PaperMetadata:
         """Update gcs blob url of the paper metadata.
 
-        This method is responsible for updating the paper metadata.
+        This method is responsible for updating the paper metadata. The fields are set and
+        the revision is incremented atomically, so the other fields of `obj` are not written
+        back and the concurrent writes each get their own revision.
 
         Args:
             obj (PaperMetadata): The paper metadata.
-            upload_status (GCSBlobUrl | BackgroundTaskStatus): The upload status.
+            upload_status (BlobUrl | BackgroundTaskStatus): The upload status.
+            content_hash (str | None): The content hash of the uploaded paper document.
 
         Returns:
             PaperMetadata: The updated paper metadata.
 
+        Raises:
+            NotFoundError: If the paper metadata does not exist.
+
+        """
+
+        fields: dict = {"gcs_blob_url": upload_status, "updated_at": datetime.now(timezone.utc)}
+
+        if content_hash is not None:
+            fields["content_hash"] = content_hash
+
+        result = await self.update(obj_id=obj.id, update={"$set": fields, "$inc": {"revision": 1}})
+
+        if result is None:
+            raise NotFoundError(f"Paper metadata not found with {obj.id}")
+
+        return result
+
+    async def get_metadata_by_ids(
+        self, obj_ids: list[PydanticObjectId], fields: frozenset[str]
+    ) -> dict[PydanticObjectId, GetPaperListItemSchema]:
+        """Get the paper metadata by object ids.
+
+        This method is responsible for getting the fields of the paper metadata of the object
+        ids, which are missing from the result if they do not exist.
+
+        Args:
+            obj_ids (list[PydanticObjectId]): The object ids.
+            fields (frozenset[str]): The fields of `GetPaperListItemSchema` to read.
+
+        Returns:
+            dict[PydanticObjectId, GetPaperListItemSchema]: The paper metadata keyed by their
+                object ids.
+
+        """
+
+        if not obj_ids:
+            return {}
+
+        result = await self.find_many(
+            query={"_id": {"$in": obj_ids}},
+            limit=len(obj_ids),
+            sort_query=None,
+            count_strategy=CountStrategy.SKIP,
+            projection_model=get_paper_projection_model(fields | {"id"}),
+        )
+
+        return {item.id: item for item in result.items}
+
+    def iter_metadata(
+        self, fields: frozenset[str], batch_size: int
+    ) -> AsyncIterator[list[GetPaperListItemSchema]]:
+        """Iterate every paper metadata in batches.
+
+        This method is responsible for reading the fields of every paper metadata in the
+        order of the object ids.
+
+        Args:
+            fields (frozenset[str]): The fields of `GetPaperListItemSchema` to read.
+            batch_size (int): The number of paper metadata read in a round trip.
+
+        Returns:
+            AsyncIterator[list[GetPaperListItemSchema]]: The batches of the paper metadata.
+
+        """
+
+        return self.iter_many(
+            query={},
+            batch_size=batch_size,
+            projection_model=get_paper_projection_model(fields | {"id"}),
+        )
+
+    def iter_metadata_by_filter(
+        self, obj: ExportPaperMetadataParam
+    ) -> AsyncIterator[list[GetPaperListItemSchema]]:
+        """Iterate the filtered paper metadata in batches.
+
+        This method is responsible for reading the requested fields of the filtered paper
+        metadata in the order of the object ids, after `obj.after_id` if it is given. Only
+        a batch of `obj.batch_size` paper metadata is read at a time.
+
+        Args:
+            obj (ExportPaperMetadataParam): The export paper metadata parameter.
+
+        Returns:
+            AsyncIterator[list[GetPaperListItemSchema]]: The batches of the paper metadata.
+
+        Raises:
+            InvalidFieldError: If a requested field does not exist, before any batch is read.
+
+        """
+
+        return self.iter_many(
+            query=self.get_metadata_filter_query(obj),
+            batch_size=obj.batch_size,
+            projection_model=get_paper_projection_model(self.get_metadata_fields(obj) | {"id"}),
+            after_id=obj.after_id,
+        )
+
+    @staticmethod
+    def get_metadata_filter_query(obj: PaperMetadataFilterSchemaBase) -> dict:
+        """Get the filter query of the paper metadata list.
+
+        This method is responsible for translating the filters into equality matches on
+        venue, authors and keywords and a range on published_at, which are the prefixes of
+        the compound indexes of the paper metadata.
+
+        Args:
+            obj (PaperMetadataFilterSchemaBase): The paper metadata filter parameter.
+
+        Returns:
+            dict: The filter query.
+
+        """
+
+        query: dict = {}
+
+        if obj.venue is not None:
+            query["venue"] = obj.venue
+
+        if obj.author is not None:
+            query["authors"] = obj.author
+
+        if obj.keyword is not None:
+            query["keywords"] = obj.keyword
+
+        published_at = {}
+
+        if obj.published_from is not None:
+            published_at["$gte"] = obj.published_from
+
+        if obj.published_to is not None:
+            published_at["$lt"] = obj.published_to
+
+        if published_at:
+            query["published_at"] = published_at
+
+        return query
+
+    @staticmethod
+    def get_metadata_fields(obj: PaperMetadataFilterSchemaBase) -> frozenset[str]:
+        """Get the fields of the paper metadata to read.
+
+        This method is responsible for resolving the requested fields, or the fields of the
+        requested view.
+
+        Args:
+            obj (PaperMetadataFilterSchemaBase): The paper metadata filter parameter.
+
+        Returns:
+            frozenset[str]: The fields of `GetPaperListItemSchema`.
+
+        Raises:
+            InvalidFieldError: If a requested field does not exist.
+
         """
 
-        obj.gcs_blob_url = upload_status
+        if obj.fields is None:
+            return PAPER_LIST_VIEW_FIELDS[obj.view]
+
+        fields = frozenset(field.strip() for field in obj.fields.split(",") if field.strip())
+        unknown_fields = fields - PAPER_LIST_VIEW_FIELDS[PaperListView.FULL]
+
+        if unknown_fields:
+            raise InvalidFieldError(f"Unknown fields {', '.join(sorted(unknown_fields))}")
 
-        return await self.replace(document=obj)
+        return fields
+
+    @staticmethod
+    def get_metadata_projection_model(
+        obj: GetPaperMetadataListParam,
+    ) -> type[GetPaperListItemSchema]:
+        """Get the projection model of the paper metadata list.
+
+        This method is responsible for resolving the requested fields, or the fields of the
+        requested view, into the model which reads only them from the database. The id, the
+        revision and the fields of the sort order are always read, as the page tokens and the
+        entity tag of the page are made of them.
+
+        Args:
+            obj (GetPaperMetadataListParam): The get paper metadata list parameter.
+
+        Returns:
+            type[GetPaperListItemSchema]: The projection model.
+
+        Raises:
+            InvalidFieldError: If a requested field does not exist.
+
+        """
+
+        fields = PaperMetadataRepository.get_metadata_fields(obj)
+        sort_fields = {"id" if key == "_id" else key for key, _ in PAPER_SORT_KEYS[obj.sort]}
+
+        return get_paper_projection_model(fields | sort_fields | {"id", "revision"})
 
     async def get_metadata_list_by_page(
-        self, obj: GetPaperMetadataListParam
+        self,
+        obj: GetPaperMetadataListParam,
+        projection_model: type[GetPaperListItemSchema] | None = None,
     ) -> PaginatedResult[PaperMetadata]:
         """Get the paper metadata list by page.
 
-        This method is responsible for getting the paper metadata list by page.
+        This method is responsible for getting the filtered paper metadata list by page. The
+        pages are sought from the sort key in the page token with a range on the compound
+        index of the sort order, so no documents are skipped. The previous page is sought in
+        the reverse order. Only the requested fields of the paper metadata are read.
+
+        The total is not counted if `obj.include_total` is false. Otherwise the total of an
+        unfiltered list is estimated from the collection metadata, and the total of a
+        filtered list is counted once and cached until a write.
 
         Args:
             obj (GetPaperMetadataListParam): The get paper metadata list parameter.
+            projection_model (type[GetPaperListItemSchema] | None): The projection model of
+                the items, which must read the id and the fields of the sort order, defaults
+                to the one of the requested fields.
 
         Returns:
             PaginatedResult[PaperMetadata]: The paper metadata list.
 
+        Raises:
+            InvalidPageTokenError: If the page token is malformed or of another sort order.
+            InvalidFieldError: If a requested field does not exist.
+
         """
 
-        query = {}
-        sort_query = None
+        if projection_model is None:
+            projection_model = self.get_metadata_projection_model(obj)
+
+        sort_keys = PAPER_SORT_KEYS[obj.sort]
+        count_query = self.get_metadata_filter_query(obj)
+        query = dict(count_query)
+        backward = False
+
         if obj.page_token is not None:
-            query["_id"] = {"$gt": obj.page_token}
-            sort_query = [("_id", SortDirection.ASCENDING)]
+            cursor = decode_page_cursor(obj.page_token)
+
+            if cursor.sort != obj.sort:
+                raise InvalidPageTokenError(f"The page token is not of the {obj.sort} order")
+
+            backward = cursor.backward
+            keyset_query = build_keyset_query(sort_keys, cursor.values, backward)
+            query = {"$and": [count_query, keyset_query]} if count_query else keyset_query
+
+        if not obj.include_total:
+            count_strategy = CountStrategy.SKIP
 
-        return await self.find_many(
+        elif not count_query:
+            count_strategy = CountStrategy.ESTIMATED
+
+        else:
+            count_strategy = CountStrategy.CACHED
+
+        result = await self.find_many(
             query=query,
-            limit=obj.page_size,
-            sort_query=sort_query,
+            limit=obj.page_size + 1,
+            sort_query=get_seek_sort(sort_keys, backward),
+            count_query=count_query,
+            count_strategy=count_strategy,
+            projection_model=projection_model,
+        )
+
+        has_more = len(result.items) > obj.page_size
+        has_next = has_more or backward
+        has_prev = has_more if backward else obj.page_token is not None
+        result.items = result.items[: obj.page_size]
+
+        if backward:
+            result.items.reverse()
+
+        if not result.items:
+            return result
+
+        if has_next:
+            result.next_page_token = encode_page_cursor(
+                PageCursor(sort=obj.sort, values=get_sort_values(result.items[-1], sort_keys))
+            )
+
+        if has_prev:
+            result.prev_page_token = encode_page_cursor(
+                PageCursor(
+                    sort=obj.sort,
+                    values=get_sort_values(result.items[0], sort_keys),
+                    backward=True,
+                )
+            )
+
+        return result
+
+    async def get_metadata_revisions_by_page(
+        self, obj: GetPaperMetadataListParam
+    ) -> PaginatedResult[GetPaperListItemSchema]:
+        """Get the revisions of the paper metadata list by page.
+
+        This method is responsible for getting the page of `get_metadata_list_by_page` with
+        only the ids, the revisions and the fields of the sort order of the paper metadata,
+        which are enough to version the page without reading the rest of the documents.
+
+        Args:
+            obj (GetPaperMetadataListParam): The get paper metadata list parameter.
+
+        Returns:
+            PaginatedResult[GetPaperListItemSchema]: The revisions of the paper metadata list.
+
+        Raises:
+            InvalidPageTokenError: If the page token is malformed or of another sort order.
+            InvalidFieldError: If a requested field does not exist.
+
+        """
+
+        # The requested fields are checked as the page of them would be.
+        self.get_metadata_projection_model(obj)
+        sort_fields = {"id" if key == "_id" else key for key, _ in PAPER_SORT_KEYS[obj.sort]}
+
+        return await self.get_metadata_list_by_page(
+            obj,
+            projection_model=get_paper_projection_model(
+                frozenset(sort_fields | {"id", "revision"})
+            ),
         )
@@ -3,7 +3,6 @@
 
 from typing import Generic, Optional
 
-from beanie import PydanticObjectId
 from pydantic import Field
 
 from app.common.pydantic_model import ModelBase
@@ -17,8 +16,13 @@ class PaginationParamSchemaBase(ModelBase):
 
     """
 
-    page_token: Optional[PydanticObjectId] = Field(default=None, description="The page token.")
+    page_token: Optional[str] = Field(
+        default=None, description="The opaque token of the page, from a previous page."
+    )
     page_size: int = Field(default=10, description="The page size.")
+    include_total: bool = Field(
+        default=True, description="Whether to count the total items and the total pages."
+    )
 
 
 class PaginatedResultSchemaBase(ModelBase, Generic[T]):
@@ -28,8 +32,17 @@ class PaginatedResultSchemaBase(ModelBase, Generic[T]):
 
     """
 
-    page_token: Optional[PydanticObjectId] = Field(default=None, description="The page token.")
+    page_token: Optional[str] = Field(
+        default=None, description="The token of the next page, if there is one."
+    )
+    prev_page_token: Optional[str] = Field(
+        default=None, description="The token of the previous page, if there is one."
+    )
     page_size: int = Field(default=10, description="The page size.")
-    total_items: int = Field(default=0, description="The total items for requested query")
-    total_pages: int = Field(default=0, description="The total pages for requested query")
+    total_items: Optional[int] = Field(
+        default=None, description="The total items for requested query, if counted."
+    )
+    total_pages: Optional[int] = Field(
+        default=None, description="The total pages for requested query, if counted."
+    )
     items: list[T] = Field(default=[], description="The items for requested query")
@@ -6,10 +6,16 @@ This module contains the paper schema.
 """
 
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
 
-from pydantic import AnyHttpUrl, Field
+from beanie import PydanticObjectId
+from pydantic import AliasChoices, AnyHttpUrl, Field, create_model
 
+from app.common.enums import BackgroundTaskStatus, PaperListView, PaperSortOrder
 from app.common.pydantic_model import ModelBase
+from app.common.types import BlobUrl
+from app.core.config import settings
 from app.schemas.base import PaginatedResultSchemaBase, PaginationParamSchemaBase
 
 
@@ -37,13 +43,93 @@ class RegisterPaperSchema(PaperSchemaBase):
     """
 
 
-class GetPaperMetadataListParam(PaginationParamSchemaBase):
+class RegisterPaperBulkItemResultSchema(ModelBase):
+    """Register paper bulk item result schema.
+
+    This class is responsible for the result of a paper in the bulk registration.
+
+    """
+
+    index: int = Field(..., description="The index of the paper in the request.")
+    success: bool = Field(..., description="Whether the paper is registered.")
+    id: Optional[PydanticObjectId] = Field(default=None, description="The registered paper id.")
+    error: Optional[str] = Field(default=None, description="The reason of the failure.")
+
+
+class RegisterPaperBulkResultSchema(ModelBase):
+    """Register paper bulk result schema.
+
+    This class is responsible for the register paper bulk result schema.
+
+    """
+
+    total: int = Field(default=0, description="The number of papers in the request.")
+    succeeded: int = Field(default=0, description="The number of registered papers.")
+    failed: int = Field(default=0, description="The number of failed papers.")
+    items: list[RegisterPaperBulkItemResultSchema] = Field(
+        default=[], description="The results of the papers in the request order."
+    )
+
+
+class PaperMetadataFilterSchemaBase(ModelBase):
+    """Paper metadata filter schema base class.
+
+    This class is the base class for the parameters which filter the paper metadata and
+    select their fields.
+
+    """
+
+    venue: Optional[str] = Field(default=None, description="The venue of the papers.")
+    author: Optional[str] = Field(default=None, description="One of the authors of the papers.")
+    keyword: Optional[str] = Field(default=None, description="One of the keywords of the papers.")
+    published_from: Optional[datetime] = Field(
+        default=None, description="The earliest published date of the papers, inclusive."
+    )
+    published_to: Optional[datetime] = Field(
+        default=None, description="The latest published date of the papers, exclusive."
+    )
+    view: PaperListView = Field(
+        default=PaperListView.FULL, description="The named set of the fields of the papers."
+    )
+    fields: Optional[str] = Field(
+        default=None,
+        description="""The comma separated fields of the papers, which override the view.
+        The id and the fields of the sort order are always included.
+        """,
+    )
+
+
+class GetPaperMetadataListParam(PaginationParamSchemaBase, PaperMetadataFilterSchemaBase):
     """Get paper metadata list parameter schema.
 
     This class is responsible for the get paper metadata list parameter schema.
 
     """
 
+    sort: PaperSortOrder = Field(
+        default=PaperSortOrder.ID, description="The sort order of the paper list."
+    )
+
+
+class ExportPaperMetadataParam(PaperMetadataFilterSchemaBase):
+    """Export paper metadata parameter schema.
+
+    This class is responsible for the export paper metadata parameter schema. The papers are
+    exported in the order of their ids, so an interrupted export is resumed after the id of
+    the last exported paper.
+
+    """
+
+    after_id: Optional[PydanticObjectId] = Field(
+        default=None, description="The id of the paper to export the papers after."
+    )
+    batch_size: int = Field(
+        default=settings.PAPER_METADATA_EXPORT_BATCH_SIZE,
+        ge=1,
+        le=settings.PAPER_METADATA_EXPORT_MAX_BATCH_SIZE,
+        description="The number of the papers read from the database at a time.",
+    )
+
 
 class GetPaperDetailSchema(PaperSchemaBase):
     """Get paper detail schema.
@@ -52,10 +138,116 @@ class GetPaperDetailSchema(PaperSchemaBase):
 
     """
 
+    id: Optional[PydanticObjectId] = Field(
+        default=None, validation_alias=AliasChoices("_id", "id"), description="The paper id."
+    )
+    gcs_blob_url: Optional[BlobUrl | BackgroundTaskStatus] = Field(
+        default=None,
+        description="The storage blob url of the paper, or the status of its upload.",
+    )
+    revision: int = Field(default=0, description="The revision of the paper metadata.")
+    updated_at: Optional[datetime] = Field(
+        default=None, description="The time of the last write of the paper metadata."
+    )
+
+
+class PaperRevisionSchema(ModelBase):
+    """Paper revision schema.
+
+    This class is responsible for reading only the revision of the paper metadata, which
+    decides whether a client has its current representation.
+
+    """
 
-class GetPaperListDetailSchema(PaginatedResultSchemaBase[GetPaperDetailSchema]):
+    id: PydanticObjectId = Field(
+        ..., validation_alias=AliasChoices("_id", "id"), description="The paper id."
+    )
+    revision: int = Field(default=0, description="The revision of the paper metadata.")
+    updated_at: Optional[datetime] = Field(
+        default=None, description="The time of the last write of the paper metadata."
+    )
+
+    class Settings:
+        """Settings for the projection model."""
+
+        projection = {"_id": 1, "revision": 1, "updated_at": 1}
+
+
+class GetPaperListItemSchema(ModelBase):
+    """Get paper list item schema.
+
+    This class is responsible for a paper of the paper list. Only the fields read from the
+    database are set, and the fields which are not set are left out of the response.
+
+    """
+
+    id: Optional[PydanticObjectId] = Field(
+        default=None, validation_alias=AliasChoices("_id", "id"), description="The paper id."
+    )
+    title: Optional[str] = Field(default=None, description="The title of the paper.")
+    authors: Optional[list[str]] = Field(default=None, description="The authors of the paper.")
+    abstract: Optional[str] = Field(default=None, description="The abstract of the paper.")
+    published_at: Optional[datetime] = Field(
+        default=None, description="The published date of the paper."
+    )
+    venue: Optional[str] = Field(default=None, description="The venue of the paper.")
+    keywords: Optional[list[str]] = Field(default=None, description="The keywords of the paper.")
+    url: Optional[AnyHttpUrl] = Field(default=None, description="The pdf file url of the paper.")
+    revision: Optional[int] = Field(default=None, description="The revision of the paper metadata.")
+    updated_at: Optional[datetime] = Field(
+        default=None, description="The time of the last write of the paper metadata."
+    )
+
+
+# Fields of the paper list items of the views.
+PAPER_LIST_VIEW_FIELDS: dict[str, frozenset[str]] = {
+    PaperListView.SUMMARY: frozenset(["id", "title", "authors", "published_at", "venue"]),
+    PaperListView.FULL: frozenset(GetPaperListItemSchema.model_fields),
+}
+
+
+@lru_cache(maxsize=128)
+def get_paper_projection_model(fields: frozenset[str]) -> type[GetPaperListItemSchema]:
+    """Get paper projection model.
+
+    This function is used to get the projection model which reads only the fields of the
+    paper metadata from the database.
+
+    Args:
+        fields (frozenset[str]): The fields of `GetPaperListItemSchema`.
+
+    Returns:
+        type[GetPaperListItemSchema]: The projection model.
+
+    """
+
+    projection_model = create_model(
+        "GetPaperProjectionSchema", __base__=GetPaperListItemSchema, __module__=__name__
+    )
+    projection_model.Settings = type(  # type: ignore[attr-defined]
+        "Settings",
+        (),
+        {"projection": {"_id" if field == "id" else field: 1 for field in sorted(fields)}},
+    )
+
+    return projection_model
+
+
+class GetPaperListDetailSchema(PaginatedResultSchemaBase[GetPaperListItemSchema]):
     """Get paper list detail schema.
 
     This class is responsible for the get paper list detail schema.
 
     """
+
+
+class GetPaperDocumentUrlSchema(ModelBase):
+    """Get paper document url schema.
+
+    This class is responsible for the signed url to download a paper document from the
+    storage directly.
+
+    """
+
+    url: str = Field(..., description="The signed url of the paper document.")
+    expires_at: datetime = Field(..., description="The expiration time of the signed url.")
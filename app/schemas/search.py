@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Search schema module.
+
+This module contains the paper search schema.
+
+"""
+
+from pydantic import Field
+
+from app.common.enums import PaperListView
+from app.common.pydantic_model import ModelBase
+from app.core.config import settings
+from app.schemas.paper_metadata import GetPaperListItemSchema
+
+
+class SearchPaperParam(ModelBase):
+    """Search paper parameter schema.
+
+    This class is responsible for the search paper parameter schema.
+
+    """
+
+    query: str = Field(..., min_length=1, description="The keywords to search the papers with.")
+    k: int = Field(
+        default=10, ge=1, le=settings.SEARCH_MAX_RESULTS, description="The number of the papers."
+    )
+    view: PaperListView = Field(
+        default=PaperListView.SUMMARY, description="The named set of the fields of the papers."
+    )
+
+
+class HybridSearchPaperParam(SearchPaperParam):
+    """Hybrid search paper parameter schema.
+
+    This class is responsible for the hybrid search paper parameter schema.
+
+    """
+
+    candidates: int = Field(
+        default=settings.SEARCH_CANDIDATES,
+        ge=1,
+        le=settings.SEARCH_MAX_CANDIDATES,
+        description="The number of the candidates taken from each of the keyword and the "
+        "vector index to rescore, at least the number of the papers.",
+    )
+
+
+class SearchPaperHitSchema(ModelBase):
+    """Search paper hit schema.
+
+    This class is responsible for a paper found by the search and its relevance.
+
+    """
+
+    score: float = Field(..., description="The relevance score of the paper, higher first.")
+    paper: GetPaperListItemSchema = Field(..., description="The paper.")
+
+
+class SearchPaperResultSchema(ModelBase):
+    """Search paper result schema.
+
+    This class is responsible for the search paper result schema.
+
+    """
+
+    query: str = Field(..., description="The query.")
+    items: list[SearchPaperHitSchema] = Field(
+        default=[], description="The papers in the order of relevance."
+    )
+
+
+class SearchTimingSchema(ModelBase):
+    """Search timing schema.
+
+    This class is responsible for the milliseconds spent by the stages of a search.
+
+    """
+
+    candidates_ms: float = Field(
+        ..., description="The milliseconds to gather the candidates from the indexes."
+    )
+    rerank_ms: float = Field(
+        ..., description="The milliseconds to rescore the candidates and to fuse the rankings."
+    )
+    fetch_ms: float = Field(..., description="The milliseconds to read the found papers.")
+    total_ms: float = Field(..., description="The milliseconds of the search.")
+
+
+class HybridSearchPaperResultSchema(SearchPaperResultSchema):
+    """Hybrid search paper result schema.
+
+    This class is responsible for the hybrid search paper result schema.
+
+    """
+
+    candidates: int = Field(..., description="The number of the distinct candidates.")
+    timings: SearchTimingSchema = Field(..., description="The timings of the stages.")
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Search module for ranking the papers in memory."""
+
+from .bm25 import BM25Index, tokenize
+from .embedding import (
+    TEXT_ENCODER_REGISTRY,
+    QueryEncoder,
+    TextEncoderBase,
+    TransformersTextEncoder,
+    get_text_encoder,
+    normalize_query,
+    normalize_vectors,
+)
+from .fusion import reciprocal_rank_fusion
+from .ivf import IVFFlatIndex
+from .quantization import (
+    FloatVectorStore,
+    ProductQuantizedIndex,
+    QuantizedIndexBase,
+    ScalarQuantizedIndex,
+)
+from .vector import (
+    VECTOR_INDEX_REGISTRY,
+    FlatVectorIndex,
+    VectorIndexBase,
+    create_vector_index,
+    load_vector_index,
+)
+
+__all__ = [
+    "BM25Index",
+    "tokenize",
+    "TEXT_ENCODER_REGISTRY",
+    "QueryEncoder",
+    "TextEncoderBase",
+    "TransformersTextEncoder",
+    "get_text_encoder",
+    "normalize_query",
+    "normalize_vectors",
+    "reciprocal_rank_fusion",
+    "IVFFlatIndex",
+    "FloatVectorStore",
+    "ProductQuantizedIndex",
+    "QuantizedIndexBase",
+    "ScalarQuantizedIndex",
+    "VECTOR_INDEX_REGISTRY",
+    "FlatVectorIndex",
+    "VectorIndexBase",
+    "create_vector_index",
+    "load_vector_index",
+]
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""BM25 index module.
+
+This module contains the in memory inverted index which ranks the documents with Okapi BM25.
+
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from operator import itemgetter
+from typing import Iterable, Mapping
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+STOPWORDS = frozenset(
+    """a an and are as at be by for from has in is it its of on or that the this to was were
+    which with we our via using based""".split()
+)
+
+# Term frequencies are stored as unsigned shorts.
+MAX_TERM_FREQUENCY = 0xFFFF
+
+
+def tokenize(text: str) -> list[str]:
+    """Tokenize the text.
+
+    This function is used to split the text into the lower cased words which are not stop
+    words.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list[str]: The tokens.
+
+    """
+
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """BM25 index class.
+
+    This class is responsible for ranking the documents which are made of the weighted text
+    fields. Each term has its postings in two integer arrays, the document numbers in the
+    ascending order and the term frequencies, which take 6 bytes per posting. A query
+    accumulates the scores of the documents in the postings of its terms and selects the top
+    k documents with a heap. The postings of the common terms are skipped once they can not
+    change the top k documents.
+
+    The documents are only appended, and adding a document twice is ignored. The searches
+    may run in other threads while a document is added.
+
+    """
+
+    def __init__(self, field_weights: Mapping[str, int], k1: float = 1.2, b: float = 0.75):
+        """Initialize the BM25 index.
+
+        Args:
+            field_weights (Mapping[str, int]): The weights of the fields, by which the term
+                frequencies of the fields are multiplied.
+            k1 (float): The saturation of the term frequency.
+            b (float): The normalization of the document length.
+
+        """
+
+        self.field_weights = dict(field_weights)
+        self.k1 = k1
+        self.b = b
+
+        self.vocabulary: dict[str, int] = {}
+        self.postings_documents: list[array] = []
+        self.postings_frequencies: list[array] = []
+
+        self.doc_ids: list[str] = []
+        self.doc_numbers: dict[str, int] = {}
+        self.doc_lengths = array("I")
+        self.total_length = 0
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of the documents."""
+
+        return len(self.doc_ids)
+
+    def __contains__(self, doc_id: object) -> bool:
+        """Check if the document is indexed."""
+
+        return doc_id in self.doc_numbers
+
+    def count_terms(self, fields: Mapping[str, str | Iterable[str]]) -> Counter[str]:
+        """Count the weighted terms of the document.
+
+        Args:
+            fields (Mapping[str, str | Iterable[str]]): The texts of the fields, or the lists
+                of the texts of the fields.
+
+        Returns:
+            Counter[str]: The weighted term frequencies.
+
+        """
+
+        counts: Counter[str] = Counter()
+
+        for name, weight in self.field_weights.items():
+            value = fields.get(name) or ""
+            text = value if isinstance(value, str) else " ".join(value)
+
+            for token in tokenize(text):
+                counts[token] += weight
+
+        return counts
+
+    def add(self, doc_id: str, fields: Mapping[str, str | Iterable[str]]):
+        """Add the document.
+
+        Args:
+            doc_id (str): The document id.
+            fields (Mapping[str, str | Iterable[str]]): The texts of the fields, or the lists
+                of the texts of the fields.
+
+        """
+
+        counts = self.count_terms(fields)
+
+        with self._lock:
+            if doc_id in self.doc_numbers:
+                return
+
+            doc_number = len(self.doc_ids)
+            length = sum(counts.values())
+
+            # The document is visible to the searches once its postings are appended.
+            self.doc_ids.append(doc_id)
+            self.doc_lengths.append(length)
+            self.doc_numbers[doc_id] = doc_number
+            self.total_length += length
+
+            for term, frequency in counts.items():
+                term_id = self.vocabulary.get(term)
+
+                if term_id is None:
+                    term_id = len(self.postings_documents)
+                    self.postings_documents.append(array("I"))
+                    self.postings_frequencies.append(array("H"))
+                    self.vocabulary[term] = term_id
+
+                self.postings_documents[term_id].append(doc_number)
+                self.postings_frequencies[term_id].append(min(frequency, MAX_TERM_FREQUENCY))
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Search the documents.
+
+        Args:
+            query (str): The query.
+            k (int): The maximum number of the documents.
+
+        Returns:
+            list[tuple[str, float]]: The document ids and their scores, the best first.
+
+        """
+
+        term_ids = {self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary}
+        num_documents = len(self.doc_ids)
+
+        if not term_ids or num_documents == 0 or k <= 0:
+            return []
+
+        k1, doc_lengths = self.k1, self.doc_lengths
+        length_norm = k1 * self.b * num_documents / max(self.total_length, 1)
+        constant_norm = k1 * (1 - self.b)
+
+        terms = []
+
+        for term_id in term_ids:
+            documents = self.postings_documents[term_id]
+            frequencies = self.postings_frequencies[term_id]
+            # The postings may grow while they are read, so only the consistent prefix is read.
+            size = min(len(documents), len(frequencies))
+            idf = math.log(1 + (num_documents - size + 0.5) / (size + 0.5))
+            terms.append((idf, documents[:size], frequencies[:size]))
+
+        # The terms are scored from the rarest. The score of a term is below its idf times
+        # `k1 + 1`, so once the remaining terms can not lift a new document above the k-th
+        # best score, they only add to the scores of the documents found so far.
+        terms.sort(key=itemgetter(0), reverse=True)
+        bounds = list(itertools.accumulate(idf * (k1 + 1) for idf, _, _ in reversed(terms)))
+        scores: dict[int, float] = {}
+
+        for (idf, documents, frequencies), bound in zip(terms, reversed(bounds), strict=True):
+            weight = idf * (k1 + 1)
+
+            if (
+                k <= len(scores) < len(documents) // 8
+                and heapq.nlargest(k, scores.values())[-1] >= bound
+            ):
+                for doc_number, score in scores.items():
+                    index = bisect.bisect_left(documents, doc_number)
+
+                    if index < len(documents) and documents[index] == doc_number:
+                        frequency = frequencies[index]
+                        scores[doc_number] = score + weight * frequency / (
+                            frequency + constant_norm + length_norm * doc_lengths[doc_number]
+                        )
+                continue
+
+            for doc_number, frequency in zip(documents, frequencies, strict=True):
+                scores[doc_number] = scores.get(doc_number, 0.0) + weight * frequency / (
+                    frequency + constant_norm + length_norm * doc_lengths[doc_number]
+                )
+
+        top = heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+        return [(self.doc_ids[doc_number], score) for doc_number, score in top]
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Text embedding module.
+
+This module contains the interface of the text encoders, the registry to select one and the
+encoder of the search queries.
+
+"""
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from app.common.batching import MicroBatcher
+from app.common.cache import TTLCache
+from app.common.registry import Registry
+from app.core.config import settings
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """Normalize vectors.
+
+    This function is used to scale the rows of a matrix to the unit length, so the inner
+    products of the rows are their cosine similarities. The zero rows are left as they are.
+
+    Args:
+        vectors (np.ndarray): The matrix of the vectors.
+
+    Returns:
+        np.ndarray: The contiguous float32 matrix of the unit vectors.
+
+    """
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    return np.ascontiguousarray(vectors / np.maximum(norms, np.finfo(np.float32).tiny))
+
+
+class TextEncoderBase(ABC):
+    """Text encoder base class.
+
+    This class is the interface of the text encoders, which embed the texts into the unit
+    vectors of `dim` dimensions. The encoders are blocking, and are run in the threadpool.
+
+    """
+
+    dim: int
+
+    @classmethod
+    @abstractmethod
+    def from_settings(cls) -> "TextEncoderBase":
+        """Create the text encoder from the settings.
+
+        Returns:
+            TextEncoderBase: The text encoder.
+
+        """
+
+    @abstractmethod
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode the texts.
+
+        Args:
+            texts (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The float32 matrix of the unit vectors of the texts, of the shape
+                `(len(texts), dim)`.
+
+        """
+
+
+TEXT_ENCODER_REGISTRY = Registry("text_encoder", TextEncoderBase)
+
+
+@TEXT_ENCODER_REGISTRY.register
+class TransformersTextEncoder(TextEncoderBase):
+    """Transformers text encoder class.
+
+    This class embeds the texts with a sentence embedding model of the Hugging Face hub on
+    CPU, by the mean of the token embeddings. `torch` and `transformers` are only imported
+    when the encoder is created.
+
+    """
+
+    def __init__(self, model_name: str, batch_size: int, max_length: int):
+        """Initialize the transformers text encoder.
+
+        Args:
+            model_name (str): The name of the model in the Hugging Face hub.
+            batch_size (int): The number of the texts embedded in a forward pass.
+            max_length (int): The maximum number of the tokens of a text.
+
+        """
+
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.torch = torch
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer: Any = AutoTokenizer.from_pretrained(model_name)
+        self.model: Any = AutoModel.from_pretrained(model_name).to("cpu").eval()
+        self.dim = self.model.config.hidden_size
+
+    @classmethod
+    def from_settings(cls) -> "TransformersTextEncoder":
+        """Create the transformers text encoder from the settings.
+
+        Returns:
+            TransformersTextEncoder: The transformers text encoder.
+
+        """
+
+        return cls(
+            model_name=settings.EMBEDDING_MODEL_NAME,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            max_length=settings.EMBEDDING_MAX_LENGTH,
+        )
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode the texts in batches of `batch_size`.
+
+        Args:
+            texts (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The float32 matrix of the unit vectors of the texts.
+
+        """
+
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        for offset in range(0, len(texts), self.batch_size):
+            inputs = self.tokenizer(
+                texts[offset : offset + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt",
+            )
+
+            with self.torch.inference_mode():
+                hidden = self.model(**inputs).last_hidden_state
+
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            vectors[offset : offset + len(pooled)] = pooled.numpy()
+
+        return normalize_vectors(vectors)
+
+
+@lru_cache(maxsize=1)
+def get_text_encoder() -> TextEncoderBase:
+    """Get the text encoder selected by `settings.EMBEDDING_ENCODER`.
+
+    The text encoder is created once per process.
+
+    Returns:
+        TextEncoderBase: The text encoder.
+
+    """
+
+    return TEXT_ENCODER_REGISTRY.get(settings.EMBEDDING_ENCODER).from_settings()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query.
+
+    This function is used to lower case the query and to collapse its whitespaces, so the
+    queries which differ only in them share their embedding.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        str: The normalized query.
+
+    """
+
+    return " ".join(query.lower().split())
+
+
+class QueryEncoder:
+    """Query encoder class.
+
+    This class is responsible for embedding the queries of the concurrent searches. The
+    queries are collected into batches by the micro batcher, so a forward pass of the model
+    embeds many queries, and the embeddings are cached by the normalized queries.
+
+    """
+
+    def __init__(
+        self,
+        encoder: TextEncoderBase,
+        max_batch_size: int = settings.EMBEDDING_QUERY_BATCH_SIZE,
+        max_wait: float = settings.EMBEDDING_QUERY_MAX_WAIT,
+        cache_size: int = settings.EMBEDDING_QUERY_CACHE_SIZE,
+        cache_ttl: float = settings.EMBEDDING_QUERY_CACHE_TTL,
+    ):
+        """Initialize the query encoder.
+
+        Args:
+            encoder (TextEncoderBase): The text encoder.
+            max_batch_size (int): The maximum number of the queries of a forward pass.
+            max_wait (float): The seconds to wait for more queries to embed together.
+            cache_size (int): The maximum number of the cached embeddings.
+            cache_ttl (float): The seconds to cache an embedding.
+
+        """
+
+        self.encoder = encoder
+        self.cache: TTLCache[str, np.ndarray] = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.batcher: MicroBatcher[str, np.ndarray] = MicroBatcher(
+            self._encode_batch, max_batch_size=max_batch_size, max_wait=max_wait
+        )
+
+    def _encode_batch(self, queries: list[str]) -> list[np.ndarray]:
+        """Encode the batch of the normalized queries, each distinct query once.
+
+        Args:
+            queries (list[str]): The normalized queries.
+
+        Returns:
+            list[np.ndarray]: The unit vectors of the queries.
+
+        """
+
+        distinct = list(dict.fromkeys(queries))
+        vectors = self.encoder.encode(distinct)
+        rows = {query: row for row, query in enumerate(distinct)}
+
+        return [vectors[rows[query]] for query in queries]
+
+    async def encode(self, query: str) -> np.ndarray:
+        """Encode the query.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            np.ndarray: The unit vector of the query.
+
+        """
+
+        key = normalize_query(query)
+        vector = self.cache.get(key)
+
+        if vector is None:
+            vector = await self.batcher.submit(key)
+            self.cache.set(key, vector)
+
+        return vector
+
+    async def stop(self):
+        """Stop the micro batcher."""
+
+        await self.batcher.stop()
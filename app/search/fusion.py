@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Rank fusion module.
+
+This module contains the fusion of the rankings of the documents by different signals.
+
+"""
+
+from app.core.config import settings
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[str]], k: int, rrf_k: int = settings.SEARCH_RRF_K
+) -> list[tuple[str, float]]:
+    """Fuse the rankings by the reciprocal rank fusion.
+
+    This function is used to score each document by the sum of `1 / (rrf_k + rank)` over
+    the rankings it is in, with the ranks from 1, so the documents ranked high by several
+    signals come first whatever the scales of the signals are. The ties keep the order of
+    the first ranking the documents are met in.
+
+    Args:
+        rankings (list[list[str]]): The rankings of the document ids, the best first.
+        k (int): The maximum number of the documents.
+        rrf_k (int): The constant which damps the weight of the top ranks.
+
+    Returns:
+        list[tuple[str, float]]: The document ids and their fused scores, the best first.
+
+    """
+
+    scores: dict[str, float] = {}
+
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+"""Inverted file vector index module.
+
+This module contains the approximate nearest neighbour index which only scans the clusters
+of the vectors nearest to a query.
+
+"""
+
+import logging
+import threading
+from typing import Mapping
+
+import numpy as np
+
+from app.core.config import settings
+from app.search.embedding import normalize_vectors
+from app.search.vector import VECTOR_INDEX_REGISTRY, FlatVectorIndex, VectorIndexBase, select_top_k
+
+logger = logging.getLogger(__name__)
+
+# Number of the vectors assigned to the centroids at a time while they are trained.
+TRAIN_CHUNK_SIZE = 16384
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int, seed: int = 0) -> np.ndarray:
+    """Train centroids.
+
+    This function is used to cluster the unit vectors with the spherical k-means, whose
+    centroids are the normalized means of their clusters. An empty cluster is seeded again
+    with a random vector.
+
+    Args:
+        vectors (np.ndarray): The matrix of the unit vectors.
+        nlist (int): The number of the clusters.
+        iterations (int): The number of the iterations.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        np.ndarray: The matrix of the unit centroids.
+
+    """
+
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_centroids(vectors, centroids)
+        counts = np.bincount(assignments, minlength=nlist)
+        filled = counts > 0
+        starts = (np.cumsum(counts) - counts)[filled]
+
+        sums = np.empty_like(centroids)
+        sums[filled] = np.add.reduceat(
+            vectors[np.argsort(assignments, kind="stable")], starts, axis=0
+        )
+        sums[~filled] = vectors[rng.choice(len(vectors), size=int((~filled).sum()))]
+        centroids = normalize_vectors(sums)
+
+    return centroids
+
+
+def assign_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Assign the vectors to their nearest centroids.
+
+    Args:
+        vectors (np.ndarray): The matrix of the unit vectors.
+        centroids (np.ndarray): The matrix of the unit centroids.
+
+    Returns:
+        np.ndarray: The numbers of the nearest centroids of the vectors.
+
+    """
+
+    assignments = np.empty(len(vectors), dtype=np.int64)
+
+    for offset in range(0, len(vectors), TRAIN_CHUNK_SIZE):
+        chunk = vectors[offset : offset + TRAIN_CHUNK_SIZE]
+        assignments[offset : offset + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+    return assignments
+
+
+@VECTOR_INDEX_REGISTRY.register
+class IVFFlatIndex(VectorIndexBase):
+    """Inverted file flat index class.
+
+    This class is responsible for the approximate nearest neighbour search. The vectors are
+    clustered around `nlist` centroids, and each cluster keeps the float32 vectors and the
+    document numbers of its members in contiguous arrays. A query only scans the `nprobe`
+    clusters of the centroids nearest to it, so `nprobe` trades the recall for the latency.
+    The cluster and the position of each document are kept to rescore the documents exactly.
+
+    The documents are searched exactly until `train_size` of them are added, when the
+    centroids are trained on them in a background thread, so neither the add nor the searches
+    wait for the training. The documents added during the training are assigned to the
+    centroids once they are trained. The centroids are not trained again, and the documents
+    added later are assigned to the nearest ones.
+
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: int,
+        nprobe: int,
+        train_size: int,
+        iterations: int = 10,
+    ):
+        """Initialize the inverted file flat index.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            nlist (int): The number of the clusters.
+            nprobe (int): The number of the clusters scanned by a query.
+            train_size (int): The number of the documents to train the centroids on, which
+                is at least `nlist`.
+            iterations (int): The number of the k-means iterations.
+
+        """
+
+        super().__init__(dim)
+
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = max(train_size, nlist)
+        self.iterations = iterations
+
+        self.centroids = np.empty((0, dim), dtype=np.float32)
+        self._flat: FlatVectorIndex | None = FlatVectorIndex(dim=dim)
+        self._list_vectors: list[np.ndarray] = []
+        self._list_numbers: list[np.ndarray] = []
+        self._list_sizes: list[int] = []
+        self._locations = np.full((0, 2), -1, dtype=np.int64)
+        self._training: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls, dim: int) -> "IVFFlatIndex":
+        """Create the inverted file flat index from the settings.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+
+        Returns:
+            IVFFlatIndex: The inverted file flat index.
+
+        """
+
+        return cls(
+            dim=dim,
+            nlist=settings.IVF_NLIST,
+            nprobe=settings.IVF_NPROBE,
+            train_size=settings.IVF_TRAIN_SIZE,
+            iterations=settings.IVF_TRAIN_ITERATIONS,
+        )
+
+    @classmethod
+    def from_arrays(
+        cls, dim: int, doc_ids: list[str], arrays: Mapping[str, np.ndarray]
+    ) -> "IVFFlatIndex":
+        """Create the inverted file flat index from the persisted arrays.
+
+        The number of the probed clusters is taken from the settings, so it can be tuned
+        without training the centroids again.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            doc_ids (list[str]): The document ids in the order of their numbers.
+            arrays (dict[str, np.ndarray]): The arrays of `to_arrays`.
+
+        Returns:
+            IVFFlatIndex: The inverted file flat index.
+
+        """
+
+        index = cls.from_settings(dim)
+
+        if "centroids" not in arrays:
+            index.add(doc_ids, arrays["vectors"])
+            return index
+
+        index._set_centroids(arrays["centroids"])
+        index.doc_ids = list(doc_ids)
+        index.doc_numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+
+        offsets = arrays["list_offsets"]
+        vectors = arrays["vectors"]
+        numbers = arrays["numbers"]
+
+        for cluster, (start, end) in enumerate(zip(offsets[:-1], offsets[1:], strict=True)):
+            index._list_vectors[cluster] = np.ascontiguousarray(vectors[start:end])
+            index._list_numbers[cluster] = numbers[start:end].astype(np.int64)
+            index._list_sizes[cluster] = int(end - start)
+
+        locations = np.full((len(doc_ids), 2), -1, dtype=np.int64)
+
+        for cluster, numbers in enumerate(index._list_numbers):
+            locations[numbers, 0] = cluster
+            locations[numbers, 1] = np.arange(len(numbers))
+
+        index._locations = locations
+
+        return index
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Get the arrays to persist the inverted file flat index with.
+
+        Returns:
+            dict[str, np.ndarray]: The dimensions, the centroids and the vectors and the
+                document numbers of the clusters concatenated, with the offsets of the
+                clusters. The vectors of an untrained index are persisted as a flat index.
+
+        """
+
+        flat = self._flat
+
+        if flat is not None:
+            return flat.to_arrays()
+
+        sizes = self._list_sizes
+
+        return {
+            "dim": np.array(self.dim),
+            "centroids": self.centroids,
+            "vectors": np.concatenate(
+                [vectors[:size] for vectors, size in zip(self._list_vectors, sizes, strict=True)]
+            ),
+            "numbers": np.concatenate(
+                [numbers[:size] for numbers, size in zip(self._list_numbers, sizes, strict=True)]
+            ),
+            "list_offsets": np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64),
+        }
+
+    def _set_centroids(self, centroids: np.ndarray):
+        """Set the centroids and create their empty clusters.
+
+        Args:
+            centroids (np.ndarray): The matrix of the unit centroids.
+
+        """
+
+        self.nlist = len(centroids)
+        self._list_vectors = [np.empty((0, self.dim), dtype=np.float32) for _ in centroids]
+        self._list_numbers = [np.empty(0, dtype=np.int64) for _ in centroids]
+        self._list_sizes = [0] * len(centroids)
+        self.centroids = centroids
+        self._flat = None
+
+    def _add_to_clusters(self, numbers: np.ndarray, vectors: np.ndarray):
+        """Add the vectors to the clusters of their nearest centroids.
+
+        Args:
+            numbers (np.ndarray): The document numbers.
+            vectors (np.ndarray): The matrix of the unit vectors.
+
+        """
+
+        assignments = assign_centroids(vectors, self.centroids)
+        locations = self._locations
+
+        if len(numbers) and int(numbers.max()) >= len(locations):
+            capacity = max(int(numbers.max()) + 1, 2 * len(locations))
+            locations = np.full((capacity, 2), -1, dtype=np.int64)
+            locations[: len(self._locations)] = self._locations
+
+        for cluster in np.unique(assignments).tolist():
+            members = assignments == cluster
+            count = int(members.sum())
+            size = self._list_sizes[cluster]
+            cluster_vectors = self._list_vectors[cluster]
+            cluster_numbers = self._list_numbers[cluster]
+
+            if size + count > len(cluster_vectors):
+                capacity = max(size + count, 2 * len(cluster_vectors))
+                cluster_vectors = np.empty((capacity, self.dim), dtype=np.float32)
+                cluster_vectors[:size] = self._list_vectors[cluster][:size]
+                cluster_numbers = np.empty(capacity, dtype=np.int64)
+                cluster_numbers[:size] = self._list_numbers[cluster][:size]
+
+            cluster_vectors[size : size + count] = vectors[members]
+            cluster_numbers[size : size + count] = numbers[members]
+            self._list_vectors[cluster] = cluster_vectors
+            self._list_numbers[cluster] = cluster_numbers
+
+            # The members are visible to the searches once they are written.
+            self._list_sizes[cluster] = size + count
+            locations[numbers[members], 1] = np.arange(size, size + count)
+            locations[numbers[members], 0] = cluster
+
+        self._locations = locations
+
+    def _add_rows(self, numbers: np.ndarray, vectors: np.ndarray):
+        """Add the vectors of the new documents, with the lock held.
+
+        Args:
+            numbers (np.ndarray): The numbers of the new documents.
+            vectors (np.ndarray): The matrix of the unit vectors of the new documents.
+
+        """
+
+        flat = self._flat
+
+        if flat is None:
+            self._add_to_clusters(numbers, vectors)
+            return
+
+        flat.add([self.doc_ids[number] for number in numbers.tolist()], vectors)
+
+        if len(flat) >= self.train_size and self._training is None:
+            self._training = threading.Thread(
+                target=self._train, args=(flat, len(flat)), name="ivf-training", daemon=True
+            )
+            self._training.start()
+
+    def _train(self, flat: FlatVectorIndex, size: int):
+        """Train the centroids on the first documents, without the lock held.
+
+        The clusters are built from a snapshot of the first `size` vectors of the flat index,
+        and the documents added meanwhile are assigned to them before they are swapped in.
+
+        Args:
+            flat (FlatVectorIndex): The flat index of the untrained documents.
+            size (int): The number of the documents to train the centroids on.
+
+        """
+
+        try:
+            # The rows of the flat index are never written again, so the snapshot is a view.
+            training = flat.vectors[:size]
+            clusters = IVFFlatIndex(self.dim, self.nlist, self.nprobe, self.train_size)
+            clusters._set_centroids(
+                train_centroids(training, nlist=self.nlist, iterations=self.iterations)
+            )
+            clusters._add_to_clusters(np.arange(size), training)
+
+        except Exception:
+            logger.exception("Failed to train the centroids on %d documents", size)
+
+            with self._lock:
+                self._training = None
+            return
+
+        with self._lock:
+            if len(flat) > size:
+                clusters._add_to_clusters(np.arange(size, len(flat)), flat.vectors[size:])
+
+            # The searches use the flat index until the clusters are complete.
+            self._list_vectors = clusters._list_vectors
+            self._list_numbers = clusters._list_numbers
+            self._list_sizes = clusters._list_sizes
+            self._locations = clusters._locations
+            self.centroids = clusters.centroids
+            self._flat = None
+
+    def wait_trained(self, timeout: float | None = None) -> bool:
+        """Wait for the training of the centroids to finish.
+
+        Args:
+            timeout (float | None): The maximum seconds to wait, or None to wait forever.
+
+        Returns:
+            bool: True if the centroids are trained.
+
+        """
+
+        training = self._training
+
+        if training is not None:
+            training.join(timeout)
+
+        return self._flat is None
+
+    def _get_vectors(self, numbers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Get the exact vectors of the documents from their clusters.
+
+        Args:
+            numbers (np.ndarray): The document numbers.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The numbers of the documents whose vectors are
+                written, and the matrix of their unit vectors.
+
+        """
+
+        flat = self._flat
+
+        if flat is not None:
+            return flat._get_vectors(numbers)
+
+        locations = self._locations
+        numbers = numbers[numbers < len(locations)]
+        numbers = numbers[locations[numbers, 0] >= 0]
+        vectors = np.empty((len(numbers), self.dim), dtype=np.float32)
+
+        for row, (cluster, position) in enumerate(locations[numbers].tolist()):
+            vectors[row] = self._list_vectors[cluster][position]
+
+        return numbers, vectors
+
+    def search(self, query: np.ndarray, k: int) -> list[tuple[str, float]]:
+        """Search the documents in the clusters nearest to the query.
+
+        Args:
+            query (np.ndarray): The vector of the query.
+            k (int): The maximum number of the documents.
+
+        Returns:
+            list[tuple[str, float]]: The document ids and their cosine similarities, the
+                best first.
+
+        """
+
+        flat = self._flat
+
+        if flat is not None:
+            return flat.search(query, k)
+
+        centroids = self.centroids
+
+        if len(centroids) == 0 or k <= 0:
+            return []
+
+        query = normalize_vectors(query).reshape(self.dim)
+        probes = select_top_k(centroids @ query, self.nprobe)
+
+        scores, numbers = [], []
+
+        for cluster in probes.tolist():
+            size = self._list_sizes[cluster]
+
+            if size:
+                scores.append(self._list_vectors[cluster][:size] @ query)
+                numbers.append(self._list_numbers[cluster][:size])
+
+        if not scores:
+            return []
+
+        all_scores = np.concatenate(scores)
+        top = select_top_k(all_scores, k)
+
+        return self.get_results(np.concatenate(numbers)[top], all_scores[top])
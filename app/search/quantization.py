@@ -0,0 +1,731 @@
+# -*- coding: utf-8 -*-
+"""Quantized vector index module.
+
+This module contains the vector indexes which keep the compressed codes of the vectors in
+memory and score the codes directly, and which rescore the best documents by their float
+vectors kept on disk.
+
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from abc import abstractmethod
+from typing import Mapping
+
+import numpy as np
+
+from app.core.config import settings
+from app.search.embedding import normalize_vectors
+from app.search.vector import (
+    VECTOR_INDEX_REGISTRY,
+    VectorIndexBase,
+    iter_array_chunks,
+    select_top_k,
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of the vectors encoded or scored at a time, which bounds the temporary memory.
+CHUNK_SIZE = 16384
+
+# Number of the centroids of a subspace of the product quantizer, so a code is a byte.
+PQ_CENTROIDS = 256
+
+
+def train_kmeans(vectors: np.ndarray, k: int, iterations: int, seed: int = 0) -> np.ndarray:
+    """Train centroids.
+
+    This function is used to cluster the vectors with the k-means by the euclidean distance.
+    An empty cluster is seeded again with a random vector.
+
+    Args:
+        vectors (np.ndarray): The matrix of the vectors.
+        k (int): The number of the clusters, at most the number of the vectors.
+        iterations (int): The number of the iterations.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        np.ndarray: The matrix of the centroids.
+
+    """
+
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].astype(np.float32)
+
+    for _ in range(iterations):
+        assignments = assign_nearest(vectors, centroids)
+        counts = np.bincount(assignments, minlength=k)
+        sums = np.stack(
+            [
+                np.bincount(assignments, weights=vectors[:, column], minlength=k)
+                for column in range(vectors.shape[1])
+            ],
+            axis=1,
+        )
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        centroids[~filled] = vectors[rng.choice(len(vectors), size=int((~filled).sum()))]
+
+    return centroids
+
+
+def assign_nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Assign the vectors to their nearest centroids by the euclidean distance.
+
+    Args:
+        vectors (np.ndarray): The matrix of the vectors.
+        centroids (np.ndarray): The matrix of the centroids.
+
+    Returns:
+        np.ndarray: The numbers of the nearest centroids of the vectors.
+
+    """
+
+    # The squared distance is the squared norm of the vector, which does not change the
+    # nearest centroid, less twice this.
+    half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(len(vectors), dtype=np.int64)
+
+    for offset in range(0, len(vectors), CHUNK_SIZE):
+        chunk = vectors[offset : offset + CHUNK_SIZE]
+        assignments[offset : offset + len(chunk)] = np.argmax(
+            chunk @ centroids.T - half_norms, axis=1
+        )
+
+    return assignments
+
+
+class FloatVectorStore:
+    """Float vector store class.
+
+    This class is responsible for keeping the float32 vectors in an anonymous temporary
+    file, which is memory mapped to read them. The operating system pages the vectors in as
+    they are read, so only the vectors read recently take memory. The vectors are only
+    appended.
+
+    """
+
+    def __init__(self, dim: int, directory: str | None = settings.VECTOR_STORE_DIR):
+        """Initialize the float vector store.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            directory (str | None): The directory of the temporary file, which is the
+                default temporary directory if it is None.
+
+        """
+
+        self.dim = dim
+
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._size = 0
+        self._mapped = np.empty((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        """Get the number of the vectors."""
+
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The read only matrix of the vectors, in the order they are appended."""
+
+        size = self._size
+        mapped = self._mapped
+
+        if len(mapped) < size:
+            mapped = np.memmap(self._file, dtype=np.float32, mode="r", shape=(size, self.dim))
+            self._mapped = mapped
+
+        return mapped[:size]
+
+    def append(self, vectors: np.ndarray):
+        """Append the vectors.
+
+        Args:
+            vectors (np.ndarray): The matrix of the vectors.
+
+        """
+
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._file.flush()
+
+        # The vectors are visible to the readers once they are written.
+        self._size += len(vectors)
+
+
+class QuantizedIndexBase(VectorIndexBase):
+    """Quantized index base class.
+
+    This class is the base of the indexes which keep a code of `code_size` bytes per
+    document in memory, and the float vectors in a `FloatVectorStore`. A query scores every
+    code with the asymmetric distance computation, which compares the float query with the
+    codes without decoding them, then rescores the `rescore_factor` times k best documents
+    by their float vectors.
+
+    The documents are searched exactly until `train_size` of them are added, when the
+    quantizer is trained on them and the stored vectors are encoded in a background thread,
+    so neither the add nor the searches wait for the training. The documents added during
+    the training are encoded once the quantizer is trained. The quantizer is not trained
+    again.
+
+    """
+
+    def __init__(self, dim: int, train_size: int, rescore_factor: int):
+        """Initialize the quantized index.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            train_size (int): The number of the documents to train the quantizer on.
+            rescore_factor (int): The number of the documents rescored by their float
+                vectors, per document searched.
+
+        """
+
+        super().__init__(dim)
+
+        self.train_size = train_size
+        self.rescore_factor = max(rescore_factor, 1)
+        self.trained = False
+
+        self._store = FloatVectorStore(dim)
+        self._codes = np.empty((0, 0), dtype=np.uint8)
+        self._size = 0
+        self._training: threading.Thread | None = None
+
+    @classmethod
+    def from_arrays(
+        cls, dim: int, doc_ids: list[str], arrays: Mapping[str, np.ndarray]
+    ) -> "QuantizedIndexBase":
+        """Create the quantized index from the persisted arrays.
+
+        The float vectors are copied to the store a chunk at a time.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            doc_ids (list[str]): The document ids in the order of their numbers.
+            arrays (Mapping[str, np.ndarray]): The arrays of `to_arrays`.
+
+        Returns:
+            QuantizedIndexBase: The quantized index.
+
+        """
+
+        index = cls.from_settings(dim)
+
+        if "codes" not in arrays:
+            for offset, vectors in zip(
+                range(0, len(doc_ids), CHUNK_SIZE),
+                iter_array_chunks(arrays, "vectors", CHUNK_SIZE),
+                strict=True,
+            ):
+                index.add(doc_ids[offset : offset + CHUNK_SIZE], vectors)
+            return index
+
+        index._set_quantizer(arrays)
+        index.doc_ids = list(doc_ids)
+        index.doc_numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+        index._codes = np.ascontiguousarray(arrays["codes"])
+        index._size = len(index._codes)
+
+        for vectors in iter_array_chunks(arrays, "vectors", CHUNK_SIZE):
+            index._store.append(vectors)
+
+        index.trained = True
+
+        return index
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Get the arrays to persist the quantized index with.
+
+        Returns:
+            dict[str, np.ndarray]: The dimensions and the float vectors, and the quantizer
+                and the codes of a trained index. The float vectors are memory mapped, and
+                are written a chunk at a time.
+
+        """
+
+        arrays = {"dim": np.array(self.dim), "vectors": self._store.vectors}
+
+        if self.trained:
+            arrays.update(self._get_quantizer_arrays(), codes=self._codes[: self._size])
+
+        return arrays
+
+    @property
+    @abstractmethod
+    def code_size(self) -> int:
+        """The number of the bytes of a code."""
+
+    @abstractmethod
+    def _train(self, vectors: np.ndarray):
+        """Train the quantizer.
+
+        Args:
+            vectors (np.ndarray): The matrix of the unit vectors to train on.
+
+        """
+
+    @abstractmethod
+    def _get_quantizer_arrays(self) -> dict[str, np.ndarray]:
+        """Get the arrays to persist the trained quantizer with.
+
+        Returns:
+            dict[str, np.ndarray]: The arrays of the quantizer.
+
+        """
+
+    @abstractmethod
+    def _set_quantizer(self, arrays: Mapping[str, np.ndarray]):
+        """Set the trained quantizer from the persisted arrays.
+
+        Args:
+            arrays (Mapping[str, np.ndarray]): The arrays of `_get_quantizer_arrays`.
+
+        """
+
+    @abstractmethod
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Encode the vectors.
+
+        Args:
+            vectors (np.ndarray): The matrix of the unit vectors.
+
+        Returns:
+            np.ndarray: The uint8 matrix of the codes.
+
+        """
+
+    @abstractmethod
+    def _score(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Score the codes by the approximate inner products with the query.
+
+        Args:
+            query (np.ndarray): The unit vector of the query.
+            codes (np.ndarray): The uint8 matrix of the codes.
+
+        Returns:
+            np.ndarray: The approximate inner products.
+
+        """
+
+    def _append_codes(self, vectors: np.ndarray):
+        """Encode the vectors and append their codes, a chunk at a time.
+
+        Args:
+            vectors (np.ndarray): The matrix of the unit vectors.
+
+        """
+
+        size = self._size
+        codes = self._codes
+
+        if size + len(vectors) > len(codes):
+            capacity = max(size + len(vectors), 2 * len(codes))
+            codes = np.empty((capacity, self.code_size), dtype=np.uint8)
+
+            if size:
+                codes[:size] = self._codes[:size]
+
+        for offset in range(0, len(vectors), CHUNK_SIZE):
+            chunk = vectors[offset : offset + CHUNK_SIZE]
+            codes[size + offset : size + offset + len(chunk)] = self._encode(chunk)
+
+        self._codes = codes
+
+        # The codes are visible to the searches once they are written.
+        self._size = size + len(vectors)
+
+    def _add_rows(self, numbers: np.ndarray, vectors: np.ndarray):
+        """Add the vectors of the new documents, with the lock held.
+
+        Args:
+            numbers (np.ndarray): The numbers of the new documents, which follow the last one.
+            vectors (np.ndarray): The matrix of the unit vectors of the new documents.
+
+        """
+
+        self._store.append(vectors)
+
+        if self.trained:
+            self._append_codes(vectors)
+            return
+
+        if len(self._store) >= self.train_size and self._training is None:
+            self._training = threading.Thread(
+                target=self._train_codes,
+                args=(len(self._store),),
+                name="quantizer-training",
+                daemon=True,
+            )
+            self._training.start()
+
+    def _train_codes(self, size: int):
+        """Train the quantizer and encode the first documents, without the lock held.
+
+        The untrained index neither reads the quantizer nor the codes, so they are written
+        outside the lock. The documents added meanwhile are encoded before the searches use
+        the codes.
+
+        Args:
+            size (int): The number of the stored documents to encode outside the lock.
+
+        """
+
+        try:
+            # The stored vectors are never written again, so the snapshot is a view.
+            stored = self._store.vectors[:size]
+            self._train(np.asarray(stored[: self.train_size]))
+            self._append_codes(stored)
+
+        except Exception:
+            logger.exception("Failed to train the quantizer on %d documents", self.train_size)
+
+            with self._lock:
+                self._size = 0
+                self._training = None
+            return
+
+        with self._lock:
+            stored = self._store.vectors
+
+            if len(stored) > size:
+                self._append_codes(stored[size:])
+
+            # The searches use the float vectors until the codes are complete.
+            self.trained = True
+
+    def wait_trained(self, timeout: float | None = None) -> bool:
+        """Wait for the training of the quantizer to finish.
+
+        Args:
+            timeout (float | None): The maximum seconds to wait, or None to wait forever.
+
+        Returns:
+            bool: True if the quantizer is trained.
+
+        """
+
+        training = self._training
+
+        if training is not None:
+            training.join(timeout)
+
+        return self.trained
+
+    def _get_vectors(self, numbers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Get the float vectors of the documents from the store.
+
+        Args:
+            numbers (np.ndarray): The document numbers.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The numbers of the documents whose vectors are
+                written, and the matrix of their unit vectors.
+
+        """
+
+        stored = self._store.vectors
+        numbers = numbers[numbers < len(stored)]
+
+        return numbers, np.asarray(stored[numbers])
+
+    def search(self, query: np.ndarray, k: int) -> list[tuple[str, float]]:
+        """Search the documents by their codes, and rescore the best by their vectors.
+
+        Args:
+            query (np.ndarray): The vector of the query.
+            k (int): The maximum number of the documents.
+
+        Returns:
+            list[tuple[str, float]]: The document ids and their cosine similarities, the
+                best first.
+
+        """
+
+        if k <= 0:
+            return []
+
+        query = normalize_vectors(query).reshape(self.dim)
+
+        if not self.trained:
+            scores = self._store.vectors @ query
+            top = select_top_k(scores, k)
+
+            return self.get_results(top, scores[top])
+
+        codes = self._codes[: self._size]
+        scores = np.empty(len(codes), dtype=np.float32)
+
+        for offset in range(0, len(codes), CHUNK_SIZE):
+            chunk = codes[offset : offset + CHUNK_SIZE]
+            scores[offset : offset + len(chunk)] = self._score(query, chunk)
+
+        numbers, vectors = self._get_vectors(select_top_k(scores, k * self.rescore_factor))
+        exact = vectors @ query
+        top = select_top_k(exact, k)
+
+        return self.get_results(numbers[top], exact[top])
+
+
+@VECTOR_INDEX_REGISTRY.register
+class ScalarQuantizedIndex(QuantizedIndexBase):
+    """Scalar quantized index class.
+
+    This class is responsible for the int8 scalar quantization, which maps each dimension
+    of a vector linearly from its range over the training vectors to a byte. A code takes a
+    quarter of the memory of the float vector, and the inner product of a query with a code
+    is that of the query scaled by the ranges with the bytes, plus that of the query with the
+    minimums.
+
+    """
+
+    def __init__(self, dim: int, train_size: int, rescore_factor: int):
+        """Initialize the scalar quantized index.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            train_size (int): The number of the documents to train the quantizer on.
+            rescore_factor (int): The number of the documents rescored by their float
+                vectors, per document searched.
+
+        """
+
+        super().__init__(dim, train_size=train_size, rescore_factor=rescore_factor)
+
+        self.minimums = np.zeros(dim, dtype=np.float32)
+        self.scales = np.ones(dim, dtype=np.float32)
+
+    @classmethod
+    def from_settings(cls, dim: int) -> "ScalarQuantizedIndex":
+        """Create the scalar quantized index from the settings.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+
+        Returns:
+            ScalarQuantizedIndex: The scalar quantized index.
+
+        """
+
+        return cls(
+            dim=dim,
+            train_size=settings.QUANTIZATION_TRAIN_SIZE,
+            rescore_factor=settings.QUANTIZATION_RESCORE_FACTOR,
+        )
+
+    @property
+    def code_size(self) -> int:
+        """The number of the bytes of a code, which is the dimensions."""
+
+        return self.dim
+
+    def _train(self, vectors: np.ndarray):
+        """Train the ranges of the dimensions.
+
+        Args:
+            vectors (np.ndarray): The matrix of the unit vectors to train on.
+
+        """
+
+        minimums = vectors.min(axis=0)
+        scales = (vectors.max(axis=0) - minimums) / 255
+
+        self.minimums = minimums.astype(np.float32)
+        self.scales = np.maximum(scales, np.finfo(np.float32).tiny).astype(np.float32)
+
+    def _get_quantizer_arrays(self) -> dict[str, np.ndarray]:
+        """Get the arrays to persist the ranges of the dimensions with.
+
+        Returns:
+            dict[str, np.ndarray]: The minimums and the scales of the dimensions.
+
+        """
+
+        return {"minimums": self.minimums, "scales": self.scales}
+
+    def _set_quantizer(self, arrays: Mapping[str, np.ndarray]):
+        """Set the ranges of the dimensions from the persisted arrays.
+
+        Args:
+            arrays (Mapping[str, np.ndarray]): The arrays of `_get_quantizer_arrays`.
+
+        """
+
+        self.minimums = arrays["minimums"]
+        self.scales = arrays["scales"]
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Encode the vectors, clipping the values out of the ranges.
+
+        Args:
+            vectors (np.ndarray): The matrix of the unit vectors.
+
+        Returns:
+            np.ndarray: The uint8 matrix of the codes.
+
+        """
+
+        codes = np.rint((vectors - self.minimums) / self.scales)
+
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def _score(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Score the codes by the approximate inner products with the query.
+
+        Args:
+            query (np.ndarray): The unit vector of the query.
+            codes (np.ndarray): The uint8 matrix of the codes.
+
+        Returns:
+            np.ndarray: The approximate inner products.
+
+        """
+
+        return codes.astype(np.float32) @ (query * self.scales) + float(query @ self.minimums)
+
+
+@VECTOR_INDEX_REGISTRY.register
+class ProductQuantizedIndex(QuantizedIndexBase):
+    """Product quantized index class.
+
+    This class is responsible for the product quantization, which splits the vectors into
+    `subspaces` equal parts and replaces each part by the nearest of the 256 centroids of
+    its subspace, so a code is a byte per subspace. A query computes its inner products with
+    the centroids of the subspaces once, and the inner product with a code is the sum of the
+    ones of its centroids.
+
+    """
+
+    def __init__(
+        self, dim: int, subspaces: int, train_size: int, rescore_factor: int, iterations: int = 10
+    ):
+        """Initialize the product quantized index.
+
+        Args:
+            dim (int): The dimensions of the vectors, divisible by `subspaces`.
+            subspaces (int): The number of the subspaces.
+            train_size (int): The number of the documents to train the quantizer on.
+            rescore_factor (int): The number of the documents rescored by their float
+                vectors, per document searched.
+            iterations (int): The number of the k-means iterations.
+
+        Raises:
+            ValueError: If the dimensions are not divisible by the number of the subspaces.
+
+        """
+
+        if dim % subspaces:
+            raise ValueError(f"{dim} dimensions are not divisible into {subspaces} subspaces")
+
+        super().__init__(dim, train_size=train_size, rescore_factor=rescore_factor)
+
+        self.subspaces = subspaces
+        self.iterations = iterations
+        self.centroids = np.empty((subspaces, 0, dim // subspaces), dtype=np.float32)
+
+    @classmethod
+    def from_settings(cls, dim: int) -> "ProductQuantizedIndex":
+        """Create the product quantized index from the settings.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+
+        Returns:
+            ProductQuantizedIndex: The product quantized index.
+
+        """
+
+        return cls(
+            dim=dim,
+            subspaces=settings.PQ_SUBSPACES,
+            train_size=settings.QUANTIZATION_TRAIN_SIZE,
+            rescore_factor=settings.QUANTIZATION_RESCORE_FACTOR,
+            iterations=settings.IVF_TRAIN_ITERATIONS,
+        )
+
+    @property
+    def code_size(self) -> int:
+        """The number of the bytes of a code, which is the number of the subspaces."""
+
+        return self.subspaces
+
+    def _train(self, vectors: np.ndarray):
+        """Train the centroids of the subspaces.
+
+        Args:
+            vectors (np.ndarray): The matrix of the unit vectors to train on.
+
+        """
+
+        parts = vectors.reshape(len(vectors), self.subspaces, -1)
+        k = min(PQ_CENTROIDS, len(vectors))
+
+        self.centroids = np.stack(
+            [
+                train_kmeans(np.ascontiguousarray(parts[:, subspace]), k, self.iterations)
+                for subspace in range(self.subspaces)
+            ]
+        )
+
+    def _get_quantizer_arrays(self) -> dict[str, np.ndarray]:
+        """Get the arrays to persist the centroids of the subspaces with.
+
+        Returns:
+            dict[str, np.ndarray]: The centroids of the subspaces.
+
+        """
+
+        return {"centroids": self.centroids}
+
+    def _set_quantizer(self, arrays: Mapping[str, np.ndarray]):
+        """Set the centroids of the subspaces from the persisted arrays.
+
+        Args:
+            arrays (Mapping[str, np.ndarray]): The arrays of `_get_quantizer_arrays`.
+
+        """
+
+        self.centroids = arrays["centroids"]
+        self.subspaces = len(self.centroids)
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Encode the vectors by the nearest centroids of their parts.
+
+        Args:
+            vectors (np.ndarray): The matrix of the unit vectors.
+
+        Returns:
+            np.ndarray: The uint8 matrix of the codes.
+
+        """
+
+        parts = vectors.reshape(len(vectors), self.subspaces, -1)
+
+        return np.stack(
+            [
+                assign_nearest(np.ascontiguousarray(parts[:, subspace]), centroids)
+                for subspace, centroids in enumerate(self.centroids)
+            ],
+            axis=1,
+        ).astype(np.uint8)
+
+    def _score(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Score the codes by the sums of the inner products of the query with the centroids.
+
+        Args:
+            query (np.ndarray): The unit vector of the query.
+            codes (np.ndarray): The uint8 matrix of the codes.
+
+        Returns:
+            np.ndarray: The approximate inner products.
+
+        """
+
+        table = np.einsum("sd,skd->sk", query.reshape(self.subspaces, -1), self.centroids)
+        offsets = np.arange(self.subspaces) * table.shape[1]
+
+        return table.ravel()[codes + offsets].sum(axis=1, dtype=np.float32)
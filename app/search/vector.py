@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+"""Vector index module.
+
+This module contains the interface of the in memory indexes which rank the documents by the
+cosine similarity of their vectors, and the registry to select one.
+
+"""
+
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterator, Mapping
+
+import numpy as np
+
+from app.common.registry import Registry
+from app.core.config import settings
+from app.search.embedding import normalize_vectors
+
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Select the top k scores.
+
+    This function is used to find the positions of the k highest scores with
+    `np.argpartition`, and to sort only them.
+
+    Args:
+        scores (np.ndarray): The scores.
+        k (int): The number of the scores.
+
+    Returns:
+        np.ndarray: The positions of the top k scores, the highest first.
+
+    """
+
+    size = len(scores)
+    k = min(k, size)
+
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    top = np.argpartition(scores, size - k)[size - k :]
+
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class VectorIndexBase(ABC):
+    """Vector index base class.
+
+    This class is the interface of the vector indexes, which keep the unit vectors of the
+    documents and find the documents nearest to a query. The documents are only appended,
+    and adding a document twice is ignored. The searches may run in other threads while a
+    document is added.
+
+    An index is persisted to a npz file of its arrays, which is written atomically.
+
+    """
+
+    dim: int
+
+    def __init__(self, dim: int):
+        """Initialize the vector index.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+
+        """
+
+        self.dim = dim
+        self.doc_ids: list[str] = []
+        self.doc_numbers: dict[str, int] = {}
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of the documents."""
+
+        return len(self.doc_ids)
+
+    def __contains__(self, doc_id: object) -> bool:
+        """Check if the document is indexed."""
+
+        return doc_id in self.doc_numbers
+
+    @classmethod
+    @abstractmethod
+    def from_settings(cls, dim: int) -> "VectorIndexBase":
+        """Create the vector index from the settings.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+
+        Returns:
+            VectorIndexBase: The vector index.
+
+        """
+
+    @classmethod
+    @abstractmethod
+    def from_arrays(cls, dim: int, doc_ids: list[str], arrays: Mapping[str, np.ndarray]):
+        """Create the vector index from the persisted arrays.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            doc_ids (list[str]): The document ids in the order of their numbers.
+            arrays (dict[str, np.ndarray]): The arrays of `to_arrays`.
+
+        Returns:
+            VectorIndexBase: The vector index.
+
+        """
+
+    @abstractmethod
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Get the arrays to persist the vector index with.
+
+        Returns:
+            dict[str, np.ndarray]: The arrays of the index, other than the document ids.
+
+        """
+
+    @abstractmethod
+    def _add_rows(self, numbers: np.ndarray, vectors: np.ndarray):
+        """Add the vectors of the new documents, with the lock held.
+
+        Args:
+            numbers (np.ndarray): The numbers of the new documents.
+            vectors (np.ndarray): The matrix of the unit vectors of the new documents.
+
+        """
+
+    @abstractmethod
+    def _get_vectors(self, numbers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Get the exact vectors of the documents.
+
+        Args:
+            numbers (np.ndarray): The document numbers.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The numbers of the documents whose vectors are
+                written, and the matrix of their unit vectors.
+
+        """
+
+    @abstractmethod
+    def search(self, query: np.ndarray, k: int) -> list[tuple[str, float]]:
+        """Search the documents.
+
+        Args:
+            query (np.ndarray): The vector of the query.
+            k (int): The maximum number of the documents.
+
+        Returns:
+            list[tuple[str, float]]: The document ids and their cosine similarities, the
+                best first.
+
+        """
+
+    def add(self, doc_ids: list[str], vectors: np.ndarray):
+        """Add the documents.
+
+        Args:
+            doc_ids (list[str]): The document ids.
+            vectors (np.ndarray): The matrix of the vectors of the documents, which are
+                normalized to the unit length.
+
+        """
+
+        vectors = normalize_vectors(vectors).reshape(-1, self.dim)
+
+        with self._lock:
+            rows: list[int] = []
+            added: set[str] = set()
+
+            for index, doc_id in enumerate(doc_ids):
+                if doc_id not in self.doc_numbers and doc_id not in added:
+                    added.add(doc_id)
+                    rows.append(index)
+
+            if not rows:
+                return
+
+            size = len(self.doc_ids)
+
+            for number, index in enumerate(rows, start=size):
+                self.doc_numbers[doc_ids[index]] = number
+                self.doc_ids.append(doc_ids[index])
+
+            self._add_rows(np.arange(size, size + len(rows)), vectors[rows])
+
+    def rescore(self, query: np.ndarray, doc_ids: list[str]) -> list[tuple[str, float]]:
+        """Score the documents by the exact cosine similarities of their vectors.
+
+        Args:
+            query (np.ndarray): The vector of the query.
+            doc_ids (list[str]): The document ids, of which the unknown ones are ignored.
+
+        Returns:
+            list[tuple[str, float]]: The document ids and their cosine similarities, the
+                best first.
+
+        """
+
+        doc_numbers = self.doc_numbers
+        numbers = np.fromiter(
+            (doc_numbers[doc_id] for doc_id in dict.fromkeys(doc_ids) if doc_id in doc_numbers),
+            dtype=np.int64,
+        )
+        numbers, vectors = self._get_vectors(numbers)
+
+        if len(numbers) == 0:
+            return []
+
+        scores = vectors @ normalize_vectors(query).reshape(self.dim)
+        order = np.argsort(-scores, kind="stable")
+
+        return self.get_results(numbers[order], scores[order])
+
+    def get_results(self, numbers: np.ndarray, scores: np.ndarray) -> list[tuple[str, float]]:
+        """Get the document ids of the top scores.
+
+        Args:
+            numbers (np.ndarray): The document numbers of the top scores.
+            scores (np.ndarray): The top scores.
+
+        Returns:
+            list[tuple[str, float]]: The document ids and their scores.
+
+        """
+
+        return [
+            (self.doc_ids[number], float(score))
+            for number, score in zip(numbers.tolist(), scores.tolist(), strict=True)
+        ]
+
+    def save(self, path: str):
+        """Save the vector index.
+
+        The arrays are written to a temporary file next to the path, which is renamed over
+        the path once it is complete.
+
+        Args:
+            path (str): The path of the npz file.
+
+        """
+
+        with self._lock:
+            arrays = self.to_arrays()
+            doc_ids = np.array(self.doc_ids, dtype=np.str_)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".npz", delete=False) as file:
+            try:
+                np.savez(file, index_type=np.array(type(self).__name__), doc_ids=doc_ids, **arrays)
+
+            except BaseException:
+                os.unlink(file.name)
+                raise
+
+        os.replace(file.name, path)
+
+    @staticmethod
+    def load(path: str) -> "VectorIndexBase":
+        """Load the vector index.
+
+        Args:
+            path (str): The path of the npz file.
+
+        Returns:
+            VectorIndexBase: The vector index, of the type it is saved with.
+
+        """
+
+        with np.load(path, allow_pickle=False) as file:
+            index_type = VECTOR_INDEX_REGISTRY.get(str(file["index_type"]))
+
+            return index_type.from_arrays(
+                dim=int(file["dim"]), doc_ids=file["doc_ids"].tolist(), arrays=file
+            )
+
+
+def iter_array_chunks(
+    arrays: Mapping[str, np.ndarray], name: str, rows: int
+) -> Iterator[np.ndarray]:
+    """Iterate over the rows of a persisted array in chunks.
+
+    This function is used to read a large array of a npz file a chunk of rows at a time, so
+    the array is never in memory at once.
+
+    Args:
+        arrays (Mapping[str, np.ndarray]): The arrays, of `np.load` or in memory.
+        name (str): The name of the array.
+        rows (int): The number of the rows of a chunk.
+
+    Yields:
+        np.ndarray: The chunks of the rows of the array.
+
+    """
+
+    if not isinstance(arrays, np.lib.npyio.NpzFile):
+        array = arrays[name]
+
+        for offset in range(0, len(array), rows):
+            yield array[offset : offset + rows]
+        return
+
+    with arrays.zip.open(f"{name}.npy") as file:
+        version = np.lib.format.read_magic(file)
+        read_header = (
+            np.lib.format.read_array_header_1_0
+            if version == (1, 0)
+            else np.lib.format.read_array_header_2_0
+        )
+        shape, _, dtype = read_header(file)
+        row_shape = tuple(shape[1:])
+        row_bytes = dtype.itemsize * int(np.prod(row_shape))
+
+        for offset in range(0, shape[0], rows):
+            count = min(rows, shape[0] - offset)
+            yield np.frombuffer(file.read(count * row_bytes), dtype=dtype).reshape(
+                count, *row_shape
+            )
+
+
+VECTOR_INDEX_REGISTRY = Registry("vector_index", VectorIndexBase)
+
+
+@VECTOR_INDEX_REGISTRY.register
+class FlatVectorIndex(VectorIndexBase):
+    """Flat vector index class.
+
+    This class is responsible for the exact nearest neighbour search. The vectors are the
+    rows of a contiguous float32 matrix, so a query is a single matrix vector product, and
+    the top k rows are selected with `np.argpartition` before only they are sorted. The
+    matrix doubles its capacity when it is full.
+
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        """Initialize the flat vector index.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            capacity (int): The initial number of the rows of the matrix.
+
+        """
+
+        super().__init__(dim)
+
+        self._vectors = np.empty((max(capacity, 1), dim), dtype=np.float32)
+        self._size = 0
+
+    @classmethod
+    def from_settings(cls, dim: int) -> "FlatVectorIndex":
+        """Create the flat vector index.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+
+        Returns:
+            FlatVectorIndex: The flat vector index.
+
+        """
+
+        return cls(dim=dim)
+
+    @classmethod
+    def from_arrays(
+        cls, dim: int, doc_ids: list[str], arrays: Mapping[str, np.ndarray]
+    ) -> "FlatVectorIndex":
+        """Create the flat vector index from the persisted arrays.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            doc_ids (list[str]): The document ids in the order of their numbers.
+            arrays (dict[str, np.ndarray]): The arrays of `to_arrays`.
+
+        Returns:
+            FlatVectorIndex: The flat vector index.
+
+        """
+
+        index = cls(dim=dim, capacity=len(doc_ids))
+        index.add(doc_ids, arrays["vectors"])
+
+        return index
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Get the arrays to persist the flat vector index with.
+
+        Returns:
+            dict[str, np.ndarray]: The dimensions and the matrix of the vectors.
+
+        """
+
+        return {"dim": np.array(self.dim), "vectors": self.vectors}
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The matrix of the vectors of the documents, in the order of their numbers."""
+
+        size = self._size
+
+        return self._vectors[:size]
+
+    def _add_rows(self, numbers: np.ndarray, vectors: np.ndarray):
+        """Add the vectors of the new documents, with the lock held.
+
+        Args:
+            numbers (np.ndarray): The numbers of the new documents, which follow the last one.
+            vectors (np.ndarray): The matrix of the unit vectors of the new documents.
+
+        """
+
+        size = self._size
+
+        if size + len(vectors) > len(self._vectors):
+            capacity = max(size + len(vectors), 2 * len(self._vectors))
+            grown = np.empty((capacity, self.dim), dtype=np.float32)
+            grown[:size] = self._vectors[:size]
+            self._vectors = grown
+
+        self._vectors[size : size + len(vectors)] = vectors
+
+        # The rows are visible to the searches once they are written.
+        self._size = size + len(vectors)
+
+    def _get_vectors(self, numbers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Get the exact vectors of the documents.
+
+        Args:
+            numbers (np.ndarray): The document numbers.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The numbers of the documents whose vectors are
+                written, and the matrix of their unit vectors.
+
+        """
+
+        matrix = self.vectors
+        numbers = numbers[numbers < len(matrix)]
+
+        return numbers, matrix[numbers]
+
+    def search(self, query: np.ndarray, k: int) -> list[tuple[str, float]]:
+        """Search the documents exactly.
+
+        Args:
+            query (np.ndarray): The vector of the query.
+            k (int): The maximum number of the documents.
+
+        Returns:
+            list[tuple[str, float]]: The document ids and their cosine similarities, the
+                best first.
+
+        """
+
+        matrix = self.vectors
+
+        if len(matrix) == 0 or k <= 0:
+            return []
+
+        scores = matrix @ normalize_vectors(query).reshape(self.dim)
+        top = select_top_k(scores, k)
+
+        return self.get_results(top, scores[top])
+
+
+def create_vector_index(dim: int) -> VectorIndexBase:
+    """Create the vector index selected by `settings.VECTOR_INDEX_BACKEND`.
+
+    Args:
+        dim (int): The dimensions of the vectors.
+
+    Returns:
+        VectorIndexBase: The empty vector index.
+
+    """
+
+    return VECTOR_INDEX_REGISTRY.get(settings.VECTOR_INDEX_BACKEND).from_settings(dim)
+
+
+def load_vector_index(path: str | None, dim: int) -> VectorIndexBase:
+    """Load the vector index, or create it if it is not saved.
+
+    The saved vector index is ignored if it is of another type than the one selected by
+    `settings.VECTOR_INDEX_BACKEND` or of other dimensions.
+
+    Args:
+        path (str | None): The path of the npz file.
+        dim (int): The dimensions of the vectors.
+
+    Returns:
+        VectorIndexBase: The vector index.
+
+    """
+
+    if path is None or not os.path.exists(path):
+        return create_vector_index(dim)
+
+    index = VectorIndexBase.load(path)
+
+    if type(index).__name__ != settings.VECTOR_INDEX_BACKEND or index.dim != dim:
+        return create_vector_index(dim)
+
+    return index
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Ingestion worker module.
+
+This module contains the worker pool which drains the paper document ingestion queue.
+
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import socket
+import time
+
+import aiohttp
+
+from app.common.enums import BackgroundTaskStatus, IngestionJobStatus
+from app.common.exceptions import PayloadTooLargeError
+from app.core.config import settings
+from app.models.ingestion_job import IngestionJob
+from app.repositories.ingestion_job import IngestionJobRepository
+from app.services.paper_service import PaperService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorkerPool:
+    """Ingestion worker pool class.
+
+    This class runs a bounded number of workers, each of which claims one ingestion job at a
+    time and uploads the paper document of the job. The lease of a running job is extended
+    by heartbeats, so a job of a crashed process is claimed again once its lease expires,
+    and it is failed along with its paper once its lease expires on its last attempt.
+
+    """
+
+    def __init__(
+        self,
+        http_session: aiohttp.ClientSession | None = None,
+        concurrency: int = settings.INGESTION_WORKER_CONCURRENCY,
+        poll_interval: float = settings.INGESTION_WORKER_POLL_INTERVAL,
+    ):
+        """Initialize the ingestion worker pool.
+
+        Args:
+            http_session (aiohttp.ClientSession | None): The shared http client session.
+            concurrency (int): The number of jobs processed at the same time.
+            poll_interval (float): The seconds to wait when no job is runnable.
+
+        """
+
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.ingestion_job_repo = IngestionJobRepository()
+        self.paper_service = PaperService(http_session=http_session, search_index=None)
+
+        self._stopping = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+        self._dead_lettered_at = -math.inf
+
+    async def start(self):
+        """Start the workers.
+
+        This method is responsible for starting the workers in the background.
+
+        """
+
+        self._stopping.clear()
+        self._workers = [
+            asyncio.create_task(self._run(f"{self.worker_id_prefix}:{index}"))
+            for index in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """Stop the workers.
+
+        This method is responsible for stopping the workers. The jobs being processed are
+        cancelled and claimed again after their leases expire.
+
+        """
+
+        self._stopping.set()
+
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _run(self, worker_id: str):
+        """Run a worker until the pool is stopped.
+
+        Args:
+            worker_id (str): The id of the worker.
+
+        """
+
+        while not self._stopping.is_set():
+            await self._dead_letter()
+
+            try:
+                job = await self.ingestion_job_repo.claim(
+                    worker_id=worker_id, lease_seconds=settings.INGESTION_JOB_LEASE_SECONDS
+                )
+
+            except Exception:
+                logger.exception("Failed to claim an ingestion job")
+                job = None
+
+            if job is None:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                continue
+
+            try:
+                await self.process(job)
+
+            except Exception:
+                # The job is claimed again after its lease expires.
+                logger.exception("Failed to process ingestion job %s", job.id)
+
+    async def _dead_letter(self):
+        """Fail the expired jobs without attempts left and their papers.
+
+        The expired jobs are looked for at most once per lease length by the workers of the
+        pool, as a job only expires once per lease.
+
+        """
+
+        now = time.monotonic()
+
+        if now - self._dead_lettered_at < settings.INGESTION_JOB_LEASE_SECONDS:
+            return
+
+        self._dead_lettered_at = now
+
+        try:
+            jobs = await self.ingestion_job_repo.dead_letter_expired()
+
+            for job in jobs:
+                logger.error("Ingestion job %s ran out of attempts", job.id)
+                paper_metadata = await self.paper_service.paper_metadata_repo.get_metadata_by_id(
+                    str(job.paper_id)
+                )
+
+                if paper_metadata is not None:
+                    await self.paper_service.paper_metadata_repo.update_gcs_blob_url(
+                        paper_metadata, BackgroundTaskStatus.FAILED
+                    )
+
+        except Exception:
+            logger.exception("Failed to dead letter the expired ingestion jobs")
+
+    async def process(self, job: IngestionJob):
+        """Process the claimed job while extending its lease.
+
+        Args:
+            job (IngestionJob): The claimed job.
+
+        """
+
+        ingestion = asyncio.create_task(self._ingest(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, ingestion))
+
+        try:
+            await ingestion
+
+        except asyncio.CancelledError:
+            # The heartbeat only finishes by itself when the lease is lost.
+            if heartbeat.done() and not heartbeat.cancelled():
+                logger.warning("Lost the lease of ingestion job %s", job.id)
+                return
+            raise
+
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job: IngestionJob, ingestion: asyncio.Task):
+        """Extend the lease of the job until the lease is lost.
+
+        Args:
+            job (IngestionJob): The claimed job.
+            ingestion (asyncio.Task): The task processing the job, cancelled if the lease is
+                lost.
+
+        """
+
+        while True:
+            await asyncio.sleep(settings.INGESTION_JOB_HEARTBEAT_INTERVAL)
+
+            try:
+                extended = await self.ingestion_job_repo.heartbeat(
+                    job, lease_seconds=settings.INGESTION_JOB_LEASE_SECONDS
+                )
+
+            except Exception:
+                logger.exception("Failed to extend the lease of ingestion job %s", job.id)
+                continue
+
+            if not extended:
+                ingestion.cancel()
+                return
+
+    async def _ingest(self, job: IngestionJob):
+        """Upload the paper document of the job and record the result.
+
+        Args:
+            job (IngestionJob): The claimed job.
+
+        """
+
+        paper_obj_id = str(job.paper_id)
+        paper_metadata = await self.paper_service.paper_metadata_repo.get_metadata_by_id(
+            paper_obj_id
+        )
+
+        if paper_metadata is None:
+            await self.ingestion_job_repo.fail(job, error="Paper metadata not found", retry=False)
+            return
+
+        try:
+            await self.paper_service.upload_paper_document(paper_metadata, paper_obj_id)
+
+        except Exception as e:
+            logger.exception("Failed to ingest paper %s", paper_obj_id)
+
+            status = await self.ingestion_job_repo.fail(
+                job, error=repr(e), retry=not isinstance(e, PayloadTooLargeError)
+            )
+
+            if status == IngestionJobStatus.FAILED:
+                await self.paper_service.paper_metadata_repo.update_gcs_blob_url(
+                    paper_metadata, BackgroundTaskStatus.FAILED
+                )
+            return
+
+        await self.ingestion_job_repo.complete(job)
@@ -5,18 +5,45 @@ This module contains the service for the paper model.
 
 """
 
+import hashlib
+import json
+import logging
+from typing import Any, AsyncIterator, ClassVar
+
+import aiohttp
+from fastapi import Depends
+from pydantic import ValidationError
+
+from app.common.cache import CacheStats
 from app.common.enums import BackgroundTaskStatus
 from app.common.exceptions import NotFoundError
 from app.common.misc import count_total_pages
+from app.common.pydantic_model import PaginatedResult
+from app.common.singleflight import SingleFlight
+from app.common.types import BlobUrl
+from app.core.config import settings
+from app.core.dependencies import get_http_session, get_paper_search_index
+from app.external.storage import BlobMetadata
 from app.models.paper_metadata import PaperMetadata
+from app.repositories.ingestion_job import IngestionJobRepository
+from app.repositories.paper_blob import PaperBlobRepository
 from app.repositories.paper_document import PaperDocumentRepository
 from app.repositories.paper_metadata import PaperMetadataRepository
 from app.schemas.paper_metadata import (
+    ExportPaperMetadataParam,
     GetPaperDetailSchema,
+    GetPaperDocumentUrlSchema,
     GetPaperListDetailSchema,
+    GetPaperListItemSchema,
     GetPaperMetadataListParam,
+    PaperRevisionSchema,
+    RegisterPaperBulkItemResultSchema,
+    RegisterPaperBulkResultSchema,
     RegisterPaperSchema,
 )
+from app.services.search_index import PaperSearchIndex
+
+logger = logging.getLogger(__name__)
 
 
 class PaperService:
@@ -26,18 +53,36 @@ class PaperService:
 
     """
 
-    def __init__(self):
-        """Initialize the paper service class."""
+    uploads: ClassVar[SingleFlight[str, GetPaperDetailSchema]] = SingleFlight()
+
+    def __init__(
+        self,
+        http_session: aiohttp.ClientSession | None = Depends(get_http_session),
+        search_index: PaperSearchIndex | None = Depends(get_paper_search_index),
+    ):
+        """Initialize the paper service class.
+
+        Args:
+            http_session (aiohttp.ClientSession | None): The shared http client session.
+            search_index (PaperSearchIndex | None): The paper search index, which the
+                registered papers are added to.
+
+        """
+
+        self.search_index = search_index
 
         self.paper_metadata_repo = PaperMetadataRepository()
-        self.paper_document_repo = PaperDocumentRepository()
+        self.paper_document_repo = PaperDocumentRepository(http_session=http_session)
+        self.ingestion_job_repo = IngestionJobRepository()
+        self.paper_blob_repo = PaperBlobRepository()
 
     async def upload_paper_document(
         self, obj: PaperMetadata, paper_obj_id: str
     ) -> GetPaperDetailSchema:
         """Upload paper document.
 
-        This method uploads the paper document.
+        This method uploads the paper document. The concurrent uploads of the paper, e.g. by
+        the duplicate ingestion jobs, share a single download and upload.
 
         Args:
             obj (PaperMetadata): The paper metadata.j
@@ -48,21 +93,133 @@ class PaperService:
 
         """
 
-        upload_result = await self.paper_document_repo.upload_paper_document(
-            paper_obj_id=paper_obj_id, paper_url=obj.url
+        return await self.uploads.do(
+            paper_obj_id, lambda: self._upload_paper_document(obj, paper_obj_id)
         )
 
+    async def _upload_paper_document(
+        self, obj: PaperMetadata, paper_obj_id: str
+    ) -> GetPaperDetailSchema:
+        """Upload paper document of the single upload of the paper.
+
+        Args:
+            obj (PaperMetadata): The paper metadata.
+            paper_obj_id (str): The paper object id.
+
+        Returns:
+            GetPaperDetailSchema: The updated paper metadata.
+
+        """
+
+        content_hash = None
+
+        if settings.PAPER_DOCUMENT_DEDUPLICATION:
+            upload_result, content_hash = await self._upload_deduplicated_paper_document(obj)
+
+        else:
+            upload_result = await self.paper_document_repo.upload_paper_document(
+                paper_obj_id=paper_obj_id, paper_url=obj.url
+            )
+
         if upload_result is None:
             upload_result = BackgroundTaskStatus.FAILED
 
-        updated = await self.paper_metadata_repo.update_gcs_blob_url(obj, upload_result)
+        updated = await self.paper_metadata_repo.update_gcs_blob_url(
+            obj, upload_result, content_hash=content_hash
+        )
 
         return GetPaperDetailSchema.model_validate(updated)
 
+    async def _upload_deduplicated_paper_document(self, obj: PaperMetadata) -> tuple[BlobUrl, str]:
+        """Upload paper document under its content hash.
+
+        This method downloads the paper document and uploads it only if no other paper has
+        the same content, then adds a reference from the paper to the stored content.
+
+        Args:
+            obj (PaperMetadata): The paper metadata.
+
+        Returns:
+            tuple[BlobUrl, str]: The blob url and the content hash of the paper document.
+
+        """
+
+        async with self.paper_document_repo.spool_paper_document(obj.url) as (
+            file,
+            content_hash,
+            size,
+        ):
+            if content_hash == obj.content_hash and isinstance(obj.gcs_blob_url, str):
+                return obj.gcs_blob_url, content_hash
+
+            paper_blob = await self.paper_blob_repo.get_by_hash(content_hash)
+
+            if paper_blob is None:
+                blob_url = await self.paper_document_repo.upload_paper_document_file(
+                    file=file, content_hash=content_hash
+                )
+
+            else:
+                blob_url = paper_blob.blob_url
+
+            paper_blob = await self.paper_blob_repo.acquire(
+                content_hash=content_hash, blob_url=blob_url, size=size
+            )
+
+            # The only reference may follow a deletion of the content, which removed the blob
+            # read above, or the blob uploaded above while the deletion was in progress.
+            if (
+                paper_blob.ref_count == 1
+                and await self.paper_document_repo.get_paper_document_metadata(blob_url) is None
+            ):
+                blob_url = await self.paper_document_repo.upload_paper_document_file(
+                    file=file, content_hash=content_hash
+                )
+
+        if obj.content_hash is not None:
+            released = await self.paper_blob_repo.release(content_hash=obj.content_hash)
+
+            if released is not None and released.ref_count == 0:
+                await self._delete_unreferenced_paper_blob(obj.content_hash)
+
+        return blob_url, content_hash
+
+    async def _delete_unreferenced_paper_blob(self, content_hash: str) -> bool:
+        """Delete the paper blob no paper refers.
+
+        This method marks the paper blob as being deleted only if it is still unreferenced,
+        then deletes the paper document and the paper blob. The paper blob is restored if the
+        paper document is not deleted, so a later upload of the content can refer it again.
+
+        Args:
+            content_hash (str): The sha256 hex digest of the paper document.
+
+        Returns:
+            bool: True if the paper blob is deleted.
+
+        """
+
+        paper_blob = await self.paper_blob_repo.mark_deleting(content_hash)
+
+        if paper_blob is None:
+            return False
+
+        try:
+            await self.paper_document_repo.delete_paper_document(paper_blob.blob_url)
+
+        except Exception:
+            logger.exception("Failed to delete the paper document %s", paper_blob.blob_url)
+            await self.paper_blob_repo.unmark_deleting(content_hash)
+
+            return False
+
+        return await self.paper_blob_repo.delete_marked(content_hash)
+
     async def register_paper(self, obj: RegisterPaperSchema) -> GetPaperDetailSchema:
         """Register a paper.
 
-        This method registers a paper.
+        This method registers a paper and enqueues the upload of its paper document, which is
+        run by the ingestion workers. The paper is added to the search index.
 
         Args:
             obj (RegisterPaperSchema): The register paper schema.
@@ -77,19 +234,153 @@ class PaperService:
         if result is None or result.id is None:
             raise NotFoundError(f"Failed to register paper metadata with {obj}")
 
+        await self.ingestion_job_repo.enqueue(paper_id=result.id)
+
+        if self.search_index is not None:
+            await self.search_index.add_papers([result])
+
         return GetPaperDetailSchema.model_validate(result)
 
-    async def get_paper_metadata(self, paper_obj_id: str) -> GetPaperDetailSchema:
+    async def register_paper_bulk(
+        self, objs: list[dict[str, Any]]
+    ) -> RegisterPaperBulkResultSchema:
+        """Register papers in bulk.
+
+        This method validates each paper separately and registers the valid ones with bulk
+        inserts, so an invalid or conflicting paper does not fail the others. The uploads of
+        the paper documents of the registered papers are enqueued, and the registered papers
+        are added to the search index.
+
+        Args:
+            objs (list[dict[str, Any]]): The raw register paper schemas.
+
+        Returns:
+            RegisterPaperBulkResultSchema: The results of the papers in the request order.
+
+        """
+
+        items: list[RegisterPaperBulkItemResultSchema] = []
+        valid_items: list[RegisterPaperBulkItemResultSchema] = []
+        valid_objs: list[RegisterPaperSchema] = []
+
+        for index, raw_obj in enumerate(objs):
+            item = RegisterPaperBulkItemResultSchema(index=index, success=False)
+            items.append(item)
+
+            try:
+                valid_objs.append(RegisterPaperSchema.model_validate(raw_obj))
+                valid_items.append(item)
+
+            except ValidationError as e:
+                item.error = "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+                )
+
+        documents, errors = await self.paper_metadata_repo.register_metadata_bulk(valid_objs)
+
+        for index, (item, document) in enumerate(zip(valid_items, documents, strict=True)):
+            if index in errors:
+                item.error = errors[index]
+                continue
+
+            item.success = True
+            item.id = document.id
+
+        registered_ids = [item.id for item in items if item.success and item.id is not None]
+        await self.ingestion_job_repo.enqueue_many(paper_ids=registered_ids)
+
+        if self.search_index is not None:
+            await self.search_index.add_papers(
+                [document for index, document in enumerate(documents) if index not in errors]
+            )
+
+        succeeded = sum(item.success for item in items)
+
+        return RegisterPaperBulkResultSchema(
+            total=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            items=items,
+        )
+
+    async def get_paper_metadata(
+        self, paper_obj_id: str, min_revision: int = 0
+    ) -> GetPaperDetailSchema:
         """Get paper metadata.
 
-        This method gets the paper metadata.
+        This method gets the paper metadata, which is cached by the repository.
 
         Args:
             paper_obj_id (str): The paper object id.
+            min_revision (int): The revision the paper metadata must have at least, so an
+                older cached one is read again.
 
         Returns:
             GetPaperDetailSchema: The paper metadata.
 
+        Raises:
+            NotFoundError: If the paper does not exist.
+
+        """
+
+        result = await self.paper_metadata_repo.get_metadata_detail_by_id(
+            paper_obj_id, min_revision=min_revision
+        )
+
+        if result is None:
+            raise NotFoundError(f"Paper metadata not found with {paper_obj_id}")
+
+        return result
+
+    def get_paper_metadata_cache_stats(self) -> CacheStats:
+        """Get paper metadata cache stats.
+
+        This method gets the counters of the cache of the paper metadata of the process.
+
+        Returns:
+            CacheStats: The size and the counters of the cache.
+
+        """
+
+        return self.paper_metadata_repo.detail_cache.stats()
+
+    async def get_paper_metadata_revision(self, paper_obj_id: str) -> PaperRevisionSchema:
+        """Get paper metadata revision.
+
+        This method gets the revision of the paper metadata without reading the rest of it.
+
+        Args:
+            paper_obj_id (str): The paper object id.
+
+        Returns:
+            PaperRevisionSchema: The revision of the paper metadata.
+
+        Raises:
+            NotFoundError: If the paper does not exist.
+
+        """
+
+        result = await self.paper_metadata_repo.get_metadata_revision(paper_obj_id)
+
+        if result is None:
+            raise NotFoundError(f"Paper metadata not found with {paper_obj_id}")
+
+        return result
+
+    async def _get_paper_blob_url(self, paper_obj_id: str) -> BlobUrl:
+        """Get paper blob url.
+
+        This method gets the storage url of the uploaded paper document.
+
+        Args:
+            paper_obj_id (str): The paper object id.
+
+        Returns:
+            BlobUrl: The blob url.
+
+        Raises:
+            NotFoundError: If the paper does not exist or its paper document is not uploaded.
+
         """
 
         result = await self.paper_metadata_repo.get_metadata_by_id(paper_obj_id)
@@ -97,7 +388,122 @@ class PaperService:
         if result is None:
             raise NotFoundError(f"Paper metadata not found with {paper_obj_id}")
 
-        return GetPaperDetailSchema.model_validate(result)
+        if not isinstance(result.gcs_blob_url, str):
+            raise NotFoundError(f"Paper document is not uploaded for {paper_obj_id}")
+
+        return result.gcs_blob_url
+
+    async def get_paper_document(self, paper_obj_id: str) -> tuple[BlobUrl, BlobMetadata]:
+        """Get paper document.
+
+        This method gets the storage url and the blob metadata of the paper document.
+
+        Args:
+            paper_obj_id (str): The paper object id.
+
+        Returns:
+            tuple[BlobUrl, BlobMetadata]: The blob url and the blob metadata.
+
+        Raises:
+            NotFoundError: If the paper or its uploaded paper document does not exist.
+
+        """
+
+        blob_url = await self._get_paper_blob_url(paper_obj_id)
+        blob_metadata = await self.paper_document_repo.get_paper_document_metadata(blob_url)
+
+        if blob_metadata is None:
+            raise NotFoundError(f"Paper document not found at {blob_url}")
+
+        return blob_url, blob_metadata
+
+    async def get_paper_document_url(self, paper_obj_id: str) -> GetPaperDocumentUrlSchema | None:
+        """Get paper document url.
+
+        This method gets a signed url to download the paper document from the storage
+        directly, without reading the paper document.
+
+        Args:
+            paper_obj_id (str): The paper object id.
+
+        Returns:
+            GetPaperDocumentUrlSchema | None: The signed url, or None if the storage can not
+                sign urls.
+
+        Raises:
+            NotFoundError: If the paper does not exist or its paper document is not uploaded.
+
+        """
+
+        blob_url = await self._get_paper_blob_url(paper_obj_id)
+        signed_url = await self.paper_document_repo.get_paper_document_signed_url(blob_url)
+
+        if signed_url is None:
+            return None
+
+        url, expires_at = signed_url
+
+        return GetPaperDocumentUrlSchema(url=url, expires_at=expires_at)
+
+    def iter_paper_document(self, blob_url: BlobUrl, start: int, end: int) -> AsyncIterator[bytes]:
+        """Iterate paper document.
+
+        This method reads a byte range of the paper document from the storage.
+
+        Args:
+            blob_url (BlobUrl): The storage blob url.
+            start (int): The first byte position of the range.
+            end (int): The last byte position of the range, inclusive.
+
+        Returns:
+            AsyncIterator[bytes]: The chunks of the range.
+
+        """
+
+        return self.paper_document_repo.iter_paper_document(blob_url, start=start, end=end)
+
+    def iter_paper_metadata_export(self, obj: ExportPaperMetadataParam) -> AsyncIterator[bytes]:
+        """Iterate paper metadata export.
+
+        This method reads the filtered paper metadata in the order of their ids, a batch at
+        a time, and encodes each batch into the lines of newline delimited JSON, one paper
+        per line. An interrupted export is resumed with the id of its last line.
+
+        Args:
+            obj (ExportPaperMetadataParam): The export paper metadata parameter.
+
+        Returns:
+            AsyncIterator[bytes]: The lines of a batch of the paper metadata.
+
+        Raises:
+            InvalidFieldError: If a requested field does not exist, before any batch is read.
+
+        """
+
+        return self._encode_paper_metadata_lines(
+            self.paper_metadata_repo.iter_metadata_by_filter(obj)
+        )
+
+    @staticmethod
+    async def _encode_paper_metadata_lines(
+        batches: AsyncIterator[list[GetPaperListItemSchema]],
+    ) -> AsyncIterator[bytes]:
+        """Encode the batches of the paper metadata into the lines of newline delimited JSON.
+
+        Args:
+            batches (AsyncIterator[list[GetPaperListItemSchema]]): The batches of the paper
+                metadata.
+
+        Yields:
+            bytes: The lines of a batch of the paper metadata.
+
+        """
+
+        async for batch in batches:
+            yield b"".join(
+                item.__pydantic_serializer__.to_json(item, exclude_unset=True) + b"\n"
+                for item in batch
+            )
 
     async def get_paper_metadata_list(
         self, obj: GetPaperMetadataListParam
@@ -114,19 +520,111 @@ class PaperService:
 
         """
 
+        paper_metadata_list, _ = await self.get_paper_metadata_list_with_etag(obj)
+
+        return paper_metadata_list
+
+    async def get_paper_metadata_list_with_etag(
+        self, obj: GetPaperMetadataListParam
+    ) -> tuple[GetPaperListDetailSchema, str]:
+        """Get paper metadata list with its entity tag.
+
+        This method gets the paper metadata list and the entity tag of the papers it has
+        read, so the entity tag always matches the page. The revisions of the papers are read
+        with the page, and left out of it unless they are requested.
+
+        Args:
+            obj (GetPaperMetadataListParam): The get paper metadata list parameter.
+
+        Returns:
+            tuple[GetPaperListDetailSchema, str]: The paper metadata list and its entity tag.
+
+        """
+
         paper_metadata_list = await self.paper_metadata_repo.get_metadata_list_by_page(obj=obj)
 
         if not paper_metadata_list:
             raise NotFoundError("No paper metadata found.")
 
-        return GetPaperListDetailSchema.model_validate(
-            {
-                "page_token": paper_metadata_list.items[-1].id
-                if paper_metadata_list.items
-                else None,
-                "page_size": obj.page_size,
-                "total_items": paper_metadata_list.total,
-                "total_pages": count_total_pages(paper_metadata_list.total, obj.page_size),
-                "items": paper_metadata_list.items,
-            }
+        etag = self._get_paper_metadata_list_etag(obj, paper_metadata_list)
+        hide_revision = "revision" not in self.paper_metadata_repo.get_metadata_fields(obj)
+
+        # The items read by a projection model are validated as they are read, so only the
+        # other items are validated.
+        items = [
+            item
+            if isinstance(item, GetPaperListItemSchema)
+            else GetPaperListItemSchema.model_validate(item)
+            for item in paper_metadata_list.items
+        ]
+
+        if hide_revision:
+            items = [
+                type(item).model_construct(
+                    _fields_set=item.model_fields_set - {"revision"}, **dict(item)
+                )
+                if "revision" in item.model_fields_set
+                else item
+                for item in items
+            ]
+
+        paper_metadata_list_detail = GetPaperListDetailSchema.model_construct(
+            page_token=paper_metadata_list.next_page_token,
+            prev_page_token=paper_metadata_list.prev_page_token,
+            page_size=obj.page_size,
+            total_items=paper_metadata_list.total,
+            total_pages=count_total_pages(paper_metadata_list.total, obj.page_size)
+            if paper_metadata_list.total is not None
+            else None,
+            items=items,
         )
+
+        return paper_metadata_list_detail, etag
+
+    async def get_paper_metadata_list_etag(self, obj: GetPaperMetadataListParam) -> str:
+        """Get paper metadata list entity tag.
+
+        This method gets the entity tag of the page of the paper metadata list, which is the
+        one `get_paper_metadata_list_with_etag` returns. Only the revisions of the papers are
+        read.
+
+        Args:
+            obj (GetPaperMetadataListParam): The get paper metadata list parameter.
+
+        Returns:
+            str: The entity tag, which changes whenever the page does.
+
+        """
+
+        revisions = await self.paper_metadata_repo.get_metadata_revisions_by_page(obj=obj)
+
+        return self._get_paper_metadata_list_etag(obj, revisions)
+
+    @staticmethod
+    def _get_paper_metadata_list_etag(
+        obj: GetPaperMetadataListParam,
+        paper_metadata_list: PaginatedResult,
+    ) -> str:
+        """Get the entity tag of a page of the paper metadata list.
+
+        The entity tag is the digest of the parameters, the total, the page tokens and the
+        ids and the revisions of the papers of the page.
+
+        Args:
+            obj (GetPaperMetadataListParam): The get paper metadata list parameter.
+            paper_metadata_list (PaginatedResult): The page, whose papers have the revisions.
+
+        Returns:
+            str: The entity tag.
+
+        """
+
+        version = [
+            obj.model_dump(mode="json"),
+            paper_metadata_list.total,
+            paper_metadata_list.next_page_token,
+            paper_metadata_list.prev_page_token,
+            [[str(item.id), item.revision or 0] for item in paper_metadata_list.items],
+        ]
+
+        return hashlib.sha256(json.dumps(version, sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""Paper search index module.
+
+This module contains the in memory search index of the paper metadata.
+
+"""
+
+import asyncio
+import logging
+from typing import Iterable
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.paper_metadata import PaperMetadata
+from app.repositories.paper_metadata import PaperMetadataRepository
+from app.schemas.paper_metadata import GetPaperListItemSchema
+from app.search import (
+    BM25Index,
+    QueryEncoder,
+    TextEncoderBase,
+    VectorIndexBase,
+    create_vector_index,
+    load_vector_index,
+)
+
+logger = logging.getLogger(__name__)
+
+# Weights of the searchable fields of the paper metadata.
+PAPER_SEARCH_FIELD_WEIGHTS = {"title": 3, "keywords": 2, "authors": 2, "abstract": 1}
+
+PAPER_SEARCH_FIELDS = frozenset(PAPER_SEARCH_FIELD_WEIGHTS)
+
+
+def get_paper_embedding_text(paper: GetPaperListItemSchema | PaperMetadata) -> str:
+    """Get the text of the paper to embed.
+
+    Args:
+        paper (GetPaperListItemSchema | PaperMetadata): The paper, which has the title and
+            the abstract.
+
+    Returns:
+        str: The title and the abstract of the paper.
+
+    """
+
+    return f"{paper.title or ''}. {paper.abstract or ''}"
+
+
+class PaperSearchIndex:
+    """Paper search index class.
+
+    This class keeps the BM25 index of the searchable fields of the paper metadata and, if
+    a text encoder is given, the vector index of the embeddings of the titles and the
+    abstracts. The indexes are built in the background from the paper metadata repository
+    when it starts, and the registered papers are added to them as they are registered. The
+    papers registered through the other processes are only found after a restart.
+
+    The vector index is loaded from `vector_index_path` before it is built, so only the
+    papers which are not embedded yet are embedded, and saved there once it is built and
+    when it stops.
+
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.SEARCH_INDEX_BUILD_BATCH_SIZE,
+        encoder: TextEncoderBase | None = None,
+        vector_index_path: str | None = settings.VECTOR_INDEX_PATH,
+    ):
+        """Initialize the paper search index.
+
+        Args:
+            batch_size (int): The number of paper metadata read in a round trip while the
+                index is built.
+            encoder (TextEncoderBase | None): The text encoder of the semantic search, which
+                is disabled if it is None.
+            vector_index_path (str | None): The path of the npz file of the vector index,
+                which is not persisted if it is None.
+
+        """
+
+        self.batch_size = batch_size
+        self.paper_metadata_repo = PaperMetadataRepository()
+        self.bm25 = BM25Index(
+            field_weights=PAPER_SEARCH_FIELD_WEIGHTS, k1=settings.BM25_K1, b=settings.BM25_B
+        )
+        self.encoder = encoder
+        self.vector_index_path = vector_index_path
+        self.vectors: VectorIndexBase | None = (
+            create_vector_index(encoder.dim) if encoder is not None else None
+        )
+        self.query_encoder = QueryEncoder(encoder) if encoder is not None else None
+
+        self._build: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        """Get the number of the indexed papers."""
+
+        return len(self.bm25)
+
+    async def start(self):
+        """Start building the index.
+
+        This method is responsible for building the index in the background. The index can
+        be searched while it is built, and finds the papers indexed so far.
+
+        """
+
+        self._build = asyncio.create_task(self.build())
+
+    async def stop(self):
+        """Stop building the index and the query encoder, and save the vector index."""
+
+        if self._build is not None:
+            self._build.cancel()
+            await asyncio.gather(self._build, return_exceptions=True)
+
+        if self.query_encoder is not None:
+            await self.query_encoder.stop()
+
+        await self.save()
+
+    async def save(self):
+        """Save the vector index to `vector_index_path`."""
+
+        if self.vectors is not None and self.vector_index_path is not None:
+            await run_in_threadpool(self.vectors.save, self.vector_index_path)
+
+    async def build(self):
+        """Build the index from the paper metadata repository."""
+
+        try:
+            if self.encoder is not None and self.vector_index_path is not None:
+                self.vectors = await run_in_threadpool(
+                    load_vector_index, self.vector_index_path, self.encoder.dim
+                )
+
+            async for batch in self.paper_metadata_repo.iter_metadata(
+                fields=PAPER_SEARCH_FIELDS, batch_size=self.batch_size
+            ):
+                await self.add_papers(batch)
+
+        except Exception:
+            logger.exception("Failed to build the paper search index")
+            raise
+
+        logger.info("Built the paper search index of %d papers", len(self))
+
+        await self.save()
+
+    def _add_papers(self, papers: Iterable[GetPaperListItemSchema | PaperMetadata]):
+        """Add the papers to the index.
+
+        Args:
+            papers (Iterable[GetPaperListItemSchema | PaperMetadata]): The papers, which have
+                the id and the searchable fields.
+
+        """
+
+        papers = [paper for paper in papers if paper.id is not None]
+
+        for paper in papers:
+            self.bm25.add(
+                str(paper.id), {field: getattr(paper, field) for field in PAPER_SEARCH_FIELDS}
+            )
+
+        if self.encoder is None or self.vectors is None:
+            return
+
+        papers = [paper for paper in papers if str(paper.id) not in self.vectors]
+
+        if papers:
+            self.vectors.add(
+                [str(paper.id) for paper in papers],
+                self.encoder.encode([get_paper_embedding_text(paper) for paper in papers]),
+            )
+
+    async def add_papers(self, papers: Iterable[GetPaperListItemSchema | PaperMetadata]):
+        """Add the papers to the index.
+
+        This method is responsible for tokenizing, embedding and indexing the papers in the
+        threadpool. The papers already indexed are ignored.
+
+        Args:
+            papers (Iterable[GetPaperListItemSchema | PaperMetadata]): The papers, which have
+                the id and the searchable fields.
+
+        """
+
+        await run_in_threadpool(self._add_papers, papers)
+
+    async def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Search the papers.
+
+        Args:
+            query (str): The query.
+            k (int): The maximum number of the papers.
+
+        Returns:
+            list[tuple[str, float]]: The paper object ids and their scores, the best first.
+
+        """
+
+        return await run_in_threadpool(self.bm25.search, query, k)
+
+    @property
+    def semantic(self) -> bool:
+        """Whether the semantic search is enabled."""
+
+        return self.vectors is not None
+
+    async def encode_query(self, query: str) -> np.ndarray | None:
+        """Encode the query.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            np.ndarray | None: The unit vector of the query, or None if the semantic search
+                is disabled.
+
+        """
+
+        if self.query_encoder is None:
+            return None
+
+        return await self.query_encoder.encode(query)
+
+    async def search_vector(self, vector: np.ndarray, k: int) -> list[tuple[str, float]]:
+        """Search the papers nearest to the vector in the vector index.
+
+        The vector index may be approximate, which is what makes it cheap.
+
+        Args:
+            vector (np.ndarray): The unit vector of the query.
+            k (int): The maximum number of the papers.
+
+        Returns:
+            list[tuple[str, float]]: The paper object ids and their cosine similarities, the
+                best first.
+
+        """
+
+        if self.vectors is None:
+            return []
+
+        return await run_in_threadpool(self.vectors.search, vector, k)
+
+    async def rescore(self, vector: np.ndarray, paper_ids: list[str]) -> list[tuple[str, float]]:
+        """Score the papers by the exact cosine similarities of their embeddings.
+
+        Args:
+            vector (np.ndarray): The unit vector of the query.
+            paper_ids (list[str]): The paper object ids, of which the ones not embedded are
+                ignored.
+
+        Returns:
+            list[tuple[str, float]]: The paper object ids and their cosine similarities, the
+                best first.
+
+        """
+
+        if self.vectors is None:
+            return []
+
+        return await run_in_threadpool(self.vectors.rescore, vector, paper_ids)
+
+    async def search_semantic(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Search the papers by the embedding of the query.
+
+        Args:
+            query (str): The query.
+            k (int): The maximum number of the papers.
+
+        Returns:
+            list[tuple[str, float]]: The paper object ids and their cosine similarities, the
+                best first.
+
+        """
+
+        vector = await self.encode_query(query)
+
+        if vector is None:
+            return []
+
+        return await self.search_vector(vector, k)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Search service module.
+
+This module contains the service to search the papers.
+
+"""
+
+import asyncio
+import time
+
+import numpy as np
+from beanie import PydanticObjectId
+from fastapi import Depends
+
+from app.common.exceptions import ServiceUnavailableError
+from app.core.dependencies import get_paper_search_index
+from app.repositories.paper_metadata import PaperMetadataRepository
+from app.schemas.paper_metadata import PAPER_LIST_VIEW_FIELDS
+from app.schemas.search import (
+    HybridSearchPaperParam,
+    HybridSearchPaperResultSchema,
+    SearchPaperHitSchema,
+    SearchPaperParam,
+    SearchPaperResultSchema,
+    SearchTimingSchema,
+)
+from app.search import reciprocal_rank_fusion
+from app.services.search_index import PaperSearchIndex
+
+
+class SearchService:
+    """Search service class.
+
+    This class contains the service to search the papers.
+
+    """
+
+    def __init__(self, search_index: PaperSearchIndex | None = Depends(get_paper_search_index)):
+        """Initialize the search service class.
+
+        Args:
+            search_index (PaperSearchIndex | None): The paper search index.
+
+        """
+
+        self.search_index = search_index
+        self.paper_metadata_repo = PaperMetadataRepository()
+
+    async def search_papers(self, obj: SearchPaperParam) -> SearchPaperResultSchema:
+        """Search papers.
+
+        This method ranks the papers with the search index, then reads the fields of the
+        requested view of the found papers in a single query.
+
+        Args:
+            obj (SearchPaperParam): The search paper parameter.
+
+        Returns:
+            SearchPaperResultSchema: The found papers, the most relevant first.
+
+        Raises:
+            ServiceUnavailableError: If the search index is not available.
+
+        """
+
+        if self.search_index is None:
+            raise ServiceUnavailableError("Paper search index is not available")
+
+        ranking = await self.search_index.search(obj.query, obj.k)
+
+        return await self._get_search_result(obj, ranking)
+
+    async def search_papers_semantic(self, obj: SearchPaperParam) -> SearchPaperResultSchema:
+        """Search papers semantically.
+
+        This method ranks the papers by the cosine similarity of the embeddings of their
+        titles and abstracts to the embedding of the query, then reads the fields of the
+        requested view of the found papers in a single query.
+
+        Args:
+            obj (SearchPaperParam): The search paper parameter.
+
+        Returns:
+            SearchPaperResultSchema: The found papers, the most similar first.
+
+        Raises:
+            ServiceUnavailableError: If the semantic search is not enabled.
+
+        """
+
+        if self.search_index is None or not self.search_index.semantic:
+            raise ServiceUnavailableError("Paper semantic search is not available")
+
+        ranking = await self.search_index.search_semantic(obj.query, obj.k)
+
+        return await self._get_search_result(obj, ranking)
+
+    async def search_papers_hybrid(
+        self, obj: HybridSearchPaperParam
+    ) -> HybridSearchPaperResultSchema:
+        """Search papers by the keywords and the embeddings.
+
+        This method retrieves the papers in two stages. The first stage gathers the
+        `candidates` best papers of the keyword index and, if the semantic search is
+        enabled, of the vector index, which may be approximate, at the same time. The second
+        stage rescores only the candidates by the exact cosine similarities of their
+        embeddings, and fuses the keyword and the exact rankings by the reciprocal rank
+        fusion. The milliseconds of the stages are returned with the papers, so the number
+        of the candidates can be tuned between the recall and the latency.
+
+        Args:
+            obj (HybridSearchPaperParam): The hybrid search paper parameter.
+
+        Returns:
+            HybridSearchPaperResultSchema: The found papers, the most relevant first, with
+                their fused scores.
+
+        Raises:
+            ServiceUnavailableError: If the search index is not available.
+
+        """
+
+        search_index = self.search_index
+
+        if search_index is None:
+            raise ServiceUnavailableError("Paper search index is not available")
+
+        candidates = max(obj.candidates, obj.k)
+
+        async def search_vector() -> tuple[np.ndarray | None, list[tuple[str, float]]]:
+            vector = await search_index.encode_query(obj.query)
+
+            if vector is None:
+                return None, []
+
+            return vector, await search_index.search_vector(vector, candidates)
+
+        start = time.perf_counter()
+        keyword_ranking, (vector, vector_ranking) = await asyncio.gather(
+            search_index.search(obj.query, candidates), search_vector()
+        )
+        paper_ids = list(
+            dict.fromkeys(paper_id for paper_id, _ in keyword_ranking + vector_ranking)
+        )
+
+        rerank_start = time.perf_counter()
+        rankings = [[paper_id for paper_id, _ in keyword_ranking]]
+
+        if vector is not None:
+            rescored = await search_index.rescore(vector, paper_ids)
+            rankings.append([paper_id for paper_id, _ in rescored])
+
+        ranking = reciprocal_rank_fusion(rankings, obj.k)
+
+        fetch_start = time.perf_counter()
+        result = await self._get_search_result(obj, ranking)
+        end = time.perf_counter()
+
+        return HybridSearchPaperResultSchema(
+            query=result.query,
+            items=result.items,
+            candidates=len(paper_ids),
+            timings=SearchTimingSchema(
+                candidates_ms=(rerank_start - start) * 1000,
+                rerank_ms=(fetch_start - rerank_start) * 1000,
+                fetch_ms=(end - fetch_start) * 1000,
+                total_ms=(end - start) * 1000,
+            ),
+        )
+
+    async def _get_search_result(
+        self, obj: SearchPaperParam, ranking: list[tuple[str, float]]
+    ) -> SearchPaperResultSchema:
+        """Get the search result of the ranking.
+
+        Args:
+            obj (SearchPaperParam): The search paper parameter.
+            ranking (list[tuple[str, float]]): The paper object ids and their scores, the
+                best first.
+
+        Returns:
+            SearchPaperResultSchema: The found papers which still exist, in the ranking.
+
+        """
+
+        papers = await self.paper_metadata_repo.get_metadata_by_ids(
+            [PydanticObjectId(paper_id) for paper_id, _ in ranking],
+            fields=PAPER_LIST_VIEW_FIELDS[obj.view],
+        )
+
+        return SearchPaperResultSchema(
+            query=obj.query,
+            items=[
+                SearchPaperHitSchema(score=score, paper=papers[PydanticObjectId(paper_id)])
+                for paper_id, score in ranking
+                if PydanticObjectId(paper_id) in papers
+            ],
+        )
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Quantized vector index benchmark.
+
+This module measures the memory of the vectors kept in memory, the latency and the
+recall@10 of the quantized indexes against the exact search over the float32 vectors, on
+synthetic unit vectors drawn around random topics.
+
+Usage:
+    python -m benchmarks.quantization --size 500000 --dim 384 --rescore-factor 1 4 16
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+from app.search import FlatVectorIndex, ProductQuantizedIndex, ScalarQuantizedIndex
+from benchmarks.vector_index import make_vectors, measure
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--subspaces", type=int, default=96)
+    parser.add_argument("--rescore-factor", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--train-size", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(rng, args.size, args.dim, args.topics, args.spread)
+    queries = make_vectors(rng, args.queries, args.dim, args.topics, args.spread)
+    doc_ids = [str(number) for number in range(args.size)]
+
+    exact = FlatVectorIndex(dim=args.dim, capacity=args.size)
+    exact.add(doc_ids, vectors)
+    truth = [{doc_id for doc_id, _ in exact.search(query, args.k)} for query in queries]
+    recall, p50, p99 = measure(exact, queries, truth, args.k)
+    rows = [["FlatVectorIndex", "-", exact.vectors.nbytes / 2**20, recall, p50, p99]]
+
+    indexes = [
+        ScalarQuantizedIndex(
+            dim=args.dim, train_size=args.train_size, rescore_factor=args.rescore_factor[0]
+        ),
+        ProductQuantizedIndex(
+            dim=args.dim,
+            subspaces=args.subspaces,
+            train_size=args.train_size,
+            rescore_factor=args.rescore_factor[0],
+        ),
+    ]
+
+    for index in indexes:
+        start = time.perf_counter()
+
+        for offset in range(0, args.size, args.train_size):
+            index.add(
+                doc_ids[offset : offset + args.train_size],
+                vectors[offset : offset + args.train_size],
+            )
+
+        index.wait_trained()
+        print(f"{type(index).__name__} built in {time.perf_counter() - start:.1f}s")
+        memory = index._codes[: index._size].nbytes / 2**20
+
+        for rescore_factor in args.rescore_factor:
+            index.rescore_factor = rescore_factor
+            rows.append(
+                [
+                    type(index).__name__,
+                    rescore_factor,
+                    memory,
+                    *measure(index, queries, truth, args.k),
+                ]
+            )
+
+    print(f"{args.size} vectors of {args.dim} dims, {args.queries} queries")
+    print(
+        tabulate(
+            rows,
+            headers=["index", "rescore", "memory MiB", f"recall@{args.k}", "p50 ms", "p99 ms"],
+            floatfmt=".3f",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Query batching benchmark.
+
+This module measures the throughput of the query encoder under concurrent searches, with a
+simulated text encoder whose forward pass costs a fixed overhead plus a cost per text, as a
+padded batch of a small model does on CPU.
+
+Usage:
+    python -m benchmarks.query_batching --concurrency 100 --batch-size 1 8 32
+
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+from app.search import QueryEncoder, TextEncoderBase
+
+
+class SimulatedTextEncoder(TextEncoderBase):
+    """Simulated text encoder class.
+
+    This class sleeps for the cost of a forward pass, which releases the GIL like the model
+    does, and returns random unit vectors.
+
+    """
+
+    def __init__(self, dim: int, overhead: float, per_text: float):
+        """Initialize the simulated text encoder.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+            overhead (float): The seconds of a forward pass.
+            per_text (float): The seconds added to a forward pass by a text.
+
+        """
+
+        self.dim = dim
+        self.overhead = overhead
+        self.per_text = per_text
+        self.calls = 0
+
+    @classmethod
+    def from_settings(cls) -> "SimulatedTextEncoder":
+        """Create the simulated text encoder."""
+
+        return cls(dim=384, overhead=0.01, per_text=0.0005)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode the texts.
+
+        Args:
+            texts (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The random unit vectors of the texts.
+
+        """
+
+        self.calls += 1
+        time.sleep(self.overhead + self.per_text * len(texts))
+        vectors = np.random.default_rng().standard_normal((len(texts), self.dim))
+
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+async def measure(
+    batch_size: int, max_wait: float, concurrency: int, rounds: int, args: argparse.Namespace
+) -> tuple[float, float, float, int]:
+    """Measure the throughput and the latency of the query encoder.
+
+    Args:
+        batch_size (int): The maximum number of the queries of a forward pass.
+        max_wait (float): The seconds to wait for more queries.
+        concurrency (int): The number of the concurrent searches.
+        rounds (int): The number of the queries of a search, one after another.
+        args (argparse.Namespace): The arguments of the simulated text encoder.
+
+    Returns:
+        tuple[float, float, float, int]: The queries per second, the median and the 99th
+            percentile of the latency in milliseconds, and the number of the forward passes.
+
+    """
+
+    encoder = SimulatedTextEncoder(dim=args.dim, overhead=args.overhead, per_text=args.per_text)
+    # The queries are distinct, so the cache is never hit.
+    query_encoder = QueryEncoder(
+        encoder, max_batch_size=batch_size, max_wait=max_wait, cache_size=1, cache_ttl=0
+    )
+    latencies: list[float] = []
+
+    async def search(client: int):
+        for index in range(rounds):
+            start = time.perf_counter()
+            await query_encoder.encode(f"query {client} {index}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[search(client) for client in range(concurrency)])
+    seconds = time.perf_counter() - start
+    await query_encoder.stop()
+
+    return (
+        len(latencies) / seconds,
+        float(np.median(latencies)),
+        float(np.percentile(latencies, 99)),
+        encoder.calls,
+    )
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--max-wait", type=float, default=0.005)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--overhead", type=float, default=0.01)
+    parser.add_argument("--per-text", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    rows = [
+        [
+            batch_size,
+            *asyncio.run(measure(batch_size, args.max_wait, args.concurrency, args.rounds, args)),
+        ]
+        for batch_size in args.batch_size
+    ]
+
+    print(
+        f"{args.concurrency} concurrent searches of {args.rounds} queries, forward pass of "
+        f"{args.overhead * 1000:.1f}ms + {args.per_text * 1000:.2f}ms per query"
+    )
+    print(
+        tabulate(
+            rows,
+            headers=["batch size", "queries/s", "p50 ms", "p99 ms", "forward passes"],
+            floatfmt=".1f",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
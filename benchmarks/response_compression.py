@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Response compression benchmark.
+
+This module measures the compression ratio and the CPU time to compress the JSON body of
+a page of the paper list with the content codings of the compression middleware.
+
+Usage:
+    python -m benchmarks.response_compression --items 100 --repeat 50
+
+"""
+
+import argparse
+import asyncio
+import time
+
+from tabulate import tabulate
+
+from app.common.compression import (
+    CompressorBase,
+    GzipCompressor,
+    ZstdCompressor,
+    get_available_encodings,
+)
+from app.common.enums import PaperListView
+from benchmarks.response_serialization import make_items, render_fast
+
+LEVELS = {"gzip": [1, 6, 9], "zstd": [1, 3, 10]}
+COMPRESSORS = {"gzip": GzipCompressor, "zstd": ZstdCompressor}
+
+
+def compress(compressor: CompressorBase, body: bytes) -> bytes:
+    """Compress the body at once."""
+
+    return compressor.compress(body) + compressor.finish()
+
+
+def measure(encoding: str, level: int, body: bytes, repeat: int) -> tuple[float, int]:
+    """Measure the median CPU milliseconds and the size of compressing the body.
+
+    Args:
+        encoding (str): The content coding.
+        level (int): The compression level.
+        body (bytes): The body.
+        repeat (int): The number of the compressions.
+
+    Returns:
+        tuple[float, int]: The median CPU milliseconds of a compression and the size of the
+            compressed body.
+
+    """
+
+    timings = []
+
+    for _ in range(repeat):
+        start = time.process_time()
+        data = compress(COMPRESSORS[encoding](level), body)
+        timings.append((time.process_time() - start) * 1000)
+
+    return sorted(timings)[len(timings) // 2], len(data)
+
+
+async def run(args: argparse.Namespace):
+    """Run the benchmark."""
+
+    rows = []
+
+    for view in PaperListView:
+        body = await render_fast(make_items(args.items, view))
+
+        for encoding in get_available_encodings():
+            for level in LEVELS[encoding]:
+                cpu, size = measure(encoding, level, body, args.repeat)
+                rows.append([view.value, encoding, level, len(body), size, len(body) / size, cpu])
+
+    print(f"{args.items} items per page, median of {args.repeat} compressions")
+    print(
+        tabulate(
+            rows,
+            headers=["view", "encoding", "level", "bytes", "compressed", "ratio", "cpu ms"],
+            floatfmt=".2f",
+        )
+    )
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""Response serialization benchmark.
+
+This module measures the CPU time to turn a page of the paper list into the JSON body of
+the response, through the response model validated and serialized by FastAPI and through
+the model JSON response, which serializes the validated page once.
+
+Usage:
+    python -m benchmarks.response_serialization --items 100 --repeat 200
+
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from tabulate import tabulate
+
+from app.common.enums import PaperListView
+from app.common.response import ResponseBase, ResponseModel
+from app.schemas.paper_metadata import (
+    PAPER_LIST_VIEW_FIELDS,
+    GetPaperListDetailSchema,
+    GetPaperListItemSchema,
+    get_paper_projection_model,
+)
+
+# The words which make up most of the running text of an abstract.
+FUNCTION_WORDS = np.array(
+    (
+        "the of and to a in for is on that with we by this as are from an be our which these "
+        "it can show than both using while based over into each its not more"
+    ).split()
+)
+SYLLABLES = np.array([consonant + vowel for consonant in "bcdfghklmnprstvz" for vowel in "aeiou"])
+VENUES = ["NeurIPS", "ICML", "ICLR", "ACL", "EMNLP", "CVPR", "SIGIR", "KDD", "AAAI", "arXiv"]
+
+
+def make_word(rng: np.random.Generator, min_syllables: int, max_syllables: int) -> str:
+    """Make a pronounceable word of random syllables."""
+
+    return "".join(rng.choice(SYLLABLES, size=rng.integers(min_syllables, max_syllables + 1)))
+
+
+def make_text(
+    rng: np.random.Generator, vocabulary: np.ndarray, frequencies: np.ndarray, size: int
+) -> str:
+    """Make a text of about 40% function words and of content words of the vocabulary."""
+
+    words = np.where(
+        rng.random(size) < 0.4,
+        rng.choice(FUNCTION_WORDS, size=size),
+        rng.choice(vocabulary, size=size, p=frequencies),
+    )
+
+    return " ".join(words.tolist()).capitalize() + "."
+
+
+def make_items(size: int, view: PaperListView, seed: int = 0) -> list[GetPaperListItemSchema]:
+    """Make the paper list items as they are read by the projection model.
+
+    The texts are made of a seeded vocabulary of random words, whose frequencies follow
+    the tail of Zipf's law like the content words of real abstracts, so the page compresses
+    like a real one rather than like a repeated sentence.
+
+    Args:
+        size (int): The number of the items.
+        view (PaperListView): The view of the items.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        list[GetPaperListItemSchema]: The paper list items.
+
+    """
+
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(list(dict.fromkeys(make_word(rng, 1, 4) for _ in range(5000))))
+    frequencies = 1 / np.arange(50, 50 + len(vocabulary))
+    frequencies /= frequencies.sum()
+    authors = [
+        f"{make_word(rng, 1, 3).capitalize()} {make_word(rng, 2, 4).capitalize()}"
+        for _ in range(2000)
+    ]
+
+    fields = PAPER_LIST_VIEW_FIELDS[view]
+    projection_model = get_paper_projection_model(fields)
+    published_at = datetime(2024, 1, 1)
+    documents = [
+        {
+            "id": ObjectId(),
+            "title": make_text(rng, vocabulary, frequencies, rng.integers(6, 15))[:-1].title(),
+            "authors": rng.choice(authors, size=rng.integers(1, 9), replace=False).tolist(),
+            "abstract": " ".join(
+                make_text(rng, vocabulary, frequencies, rng.integers(12, 31))
+                for _ in range(rng.integers(5, 11))
+            ),
+            "published_at": published_at + timedelta(days=int(rng.integers(365)), seconds=number),
+            "venue": str(rng.choice(VENUES)),
+            "keywords": rng.choice(vocabulary, size=rng.integers(3, 7), p=frequencies).tolist(),
+            "url": f"https://arxiv.org/pdf/24{rng.integers(1, 13):02d}.{rng.integers(10**5):05d}.pdf",
+        }
+        for number in range(size)
+    ]
+
+    # Only the fields of the view are read from the database.
+    return [
+        projection_model.model_validate(
+            {key: value for key, value in document.items() if key in fields}
+        )
+        for document in documents
+    ]
+
+
+async def render_validated(items: list[GetPaperListItemSchema]) -> bytes:
+    """Render the page through the response model validated and serialized by FastAPI."""
+
+    page = GetPaperListDetailSchema.model_validate(
+        {"page_size": len(items), "total_items": len(items), "items": items}
+    )
+    field = create_response_field(
+        name="response", type_=ResponseModel[GetPaperListDetailSchema], mode="serialization"
+    )
+    content = await serialize_response(
+        field=field,
+        response_content=await ResponseBase.success(data=page),
+        exclude_unset=True,
+        is_coroutine=True,
+    )
+
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+async def render_fast(items: list[GetPaperListItemSchema]) -> bytes:
+    """Render the page through the model JSON response."""
+
+    page = GetPaperListDetailSchema.model_construct(
+        page_size=len(items), total_items=len(items), items=items
+    )
+
+    return (await ResponseBase.fast_success(data=page, exclude_unset=True)).body
+
+
+async def measure(render, items: list[GetPaperListItemSchema], repeat: int) -> float:
+    """Measure the median CPU milliseconds of rendering the page.
+
+    Args:
+        render: The coroutine function rendering the page.
+        items (list[GetPaperListItemSchema]): The paper list items.
+        repeat (int): The number of the renders.
+
+    Returns:
+        float: The median CPU milliseconds of a render.
+
+    """
+
+    timings = []
+
+    for _ in range(repeat):
+        start = time.process_time()
+        await render(items)
+        timings.append((time.process_time() - start) * 1000)
+
+    return sorted(timings)[len(timings) // 2]
+
+
+async def run(args: argparse.Namespace):
+    """Run the benchmark."""
+
+    rows = []
+
+    for view in PaperListView:
+        items = make_items(args.items, view)
+
+        if json.loads(await render_validated(items)) != json.loads(await render_fast(items)):
+            raise RuntimeError(f"The bodies of the {view} view differ")
+
+        validated = await measure(render_validated, items, args.repeat)
+        fast = await measure(render_fast, items, args.repeat)
+        rows.append(
+            [
+                view.value,
+                validated,
+                fast,
+                (validated - fast) * 1000 / args.items,
+                validated / fast,
+                len(await render_fast(items)),
+            ]
+        )
+
+    print(f"{args.items} items per page, median of {args.repeat} renders")
+    print(
+        tabulate(
+            rows,
+            headers=["view", "validated ms", "fast ms", "saved us/item", "speedup", "bytes"],
+            floatfmt=".2f",
+        )
+    )
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
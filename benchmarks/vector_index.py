@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Vector index benchmark.
+
+This module measures the recall@10 and the latency of the approximate vector indexes against
+the exact search, on synthetic unit vectors drawn around random topics.
+
+Usage:
+    python -m benchmarks.vector_index --size 500000 --dim 384 --nprobe 4 8 16 32
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+from app.search import FlatVectorIndex, IVFFlatIndex, VectorIndexBase, normalize_vectors
+
+
+def make_vectors(
+    rng: np.random.Generator, size: int, dim: int, topics: int, spread: float
+) -> np.ndarray:
+    """Make the unit vectors around random topics.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        size (int): The number of the vectors.
+        dim (int): The dimensions of the vectors.
+        topics (int): The number of the topics.
+        spread (float): The scale of the noise around the topics.
+
+    Returns:
+        np.ndarray: The matrix of the unit vectors.
+
+    """
+
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    vectors = np.empty((size, dim), dtype=np.float32)
+
+    for offset in range(0, size, 65536):
+        count = min(65536, size - offset)
+        noise = rng.standard_normal((count, dim), dtype=np.float32)
+        vectors[offset : offset + count] = centers[rng.integers(0, topics, count)] + spread * noise
+
+    return normalize_vectors(vectors)
+
+
+def measure(
+    index: VectorIndexBase, queries: np.ndarray, truth: list[set[str]], k: int
+) -> tuple[float, float, float]:
+    """Measure the recall and the latency of the index.
+
+    Args:
+        index (VectorIndexBase): The vector index.
+        queries (np.ndarray): The matrix of the queries.
+        truth (list[set[str]]): The exact top k document ids of the queries.
+        k (int): The number of the documents of a query.
+
+    Returns:
+        tuple[float, float, float]: The recall@k, the median and the 99th percentile of the
+            latency in milliseconds.
+
+    """
+
+    hits, latencies = 0, []
+
+    for query, expected in zip(queries, truth, strict=True):
+        start = time.perf_counter()
+        result = index.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {doc_id for doc_id, _ in result})
+
+    return (
+        hits / (k * len(queries)),
+        float(np.median(latencies)),
+        float(np.percentile(latencies, 99)),
+    )
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32, 64, 128])
+    parser.add_argument("--train-size", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(rng, args.size, args.dim, args.topics, args.spread)
+    queries = make_vectors(rng, args.queries, args.dim, args.topics, args.spread)
+    doc_ids = [str(number) for number in range(args.size)]
+
+    exact = FlatVectorIndex(dim=args.dim, capacity=args.size)
+    exact.add(doc_ids, vectors)
+    truth = [{doc_id for doc_id, _ in exact.search(query, args.k)} for query in queries]
+
+    start = time.perf_counter()
+    ivf = IVFFlatIndex(
+        dim=args.dim, nlist=args.nlist, nprobe=args.nprobe[0], train_size=args.train_size
+    )
+
+    for offset in range(0, args.size, args.train_size):
+        ivf.add(
+            doc_ids[offset : offset + args.train_size], vectors[offset : offset + args.train_size]
+        )
+
+    ivf.wait_trained()
+    build_seconds = time.perf_counter() - start
+
+    rows = [["FlatVectorIndex", "-", *measure(exact, queries, truth, args.k)]]
+
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        rows.append(["IVFFlatIndex", nprobe, *measure(ivf, queries, truth, args.k)])
+
+    print(
+        f"{args.size} vectors of {args.dim} dims, {args.queries} queries, "
+        f"nlist {args.nlist}, built in {build_seconds:.1f}s"
+    )
+    print(
+        tabulate(
+            rows,
+            headers=["index", "nprobe", f"recall@{args.k}", "p50 ms", "p99 ms"],
+            floatfmt=".3f",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
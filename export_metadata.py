@@ -0,0 +1,133 @@
+"""Export file for the project. This file will be used to export the paper metadata.
+
+This file writes every paper, or the filtered papers, to a file of newline delimited JSON in
+the order of their ids, reading them from the database a batch at a time. An interrupted
+export is resumed with `--resume`, after the last complete line of the file.
+
+Usage:
+    python export_metadata.py papers.ndjson --venue NeurIPS --view summary --resume
+
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from app.common.enums import PaperListView
+from app.core.config import settings
+from app.external.database.mongo import MongoDBSessionManager
+from app.schemas.paper_metadata import ExportPaperMetadataParam
+from app.services.paper_service import PaperService
+
+# The size of the blocks the end of the export is read backwards in.
+RESUME_BLOCK_SIZE = 64 * 1024
+
+
+def get_resume_id(path: Path) -> str | None:
+    """Get the id to resume the export after.
+
+    This function truncates the partial last line of the export, which an interrupted
+    export may leave, and reads the id of the last complete line.
+
+    Args:
+        path (Path): The path of the export.
+
+    Returns:
+        str | None: The id of the last exported paper, or None if no paper is exported.
+
+    """
+
+    if not path.exists():
+        return None
+
+    with path.open("rb+") as file:
+        end = file.seek(0, os.SEEK_END)
+        position, tail = end, b""
+
+        # The line before the last newline is complete once a newline precedes it.
+        while position > 0 and tail.count(b"\n") < 2:
+            size = min(RESUME_BLOCK_SIZE, position)
+            position -= size
+            file.seek(position)
+            tail = file.read(size) + tail
+
+        *lines, partial_line = tail.split(b"\n")
+        file.truncate(end - len(partial_line))
+
+    lines = [line for line in lines if line]
+
+    return json.loads(lines[-1])["id"] if lines else None
+
+
+async def export(args: argparse.Namespace) -> int:
+    """Export the paper metadata.
+
+    Args:
+        args (argparse.Namespace): The arguments.
+
+    Returns:
+        int: The number of the exported papers.
+
+    """
+
+    path = Path(args.output)
+    obj = ExportPaperMetadataParam(
+        venue=args.venue,
+        author=args.author,
+        keyword=args.keyword,
+        published_from=args.published_from,
+        published_to=args.published_to,
+        view=args.view,
+        fields=args.fields,
+        after_id=get_resume_id(path) if args.resume else None,
+        batch_size=args.batch_size,
+    )
+
+    mongodb_session_manager = MongoDBSessionManager()
+    await mongodb_session_manager.connect_to_mongodb()
+
+    exported = 0
+
+    try:
+        lines = PaperService(http_session=None, search_index=None).iter_paper_metadata_export(obj)
+
+        with path.open("ab" if args.resume else "wb") as file:
+            async for batch in lines:
+                file.write(batch)
+                file.flush()
+                exported += batch.count(b"\n")
+
+    finally:
+        await mongodb_session_manager.close_connection()
+
+    return exported
+
+
+def main():
+    """Export the paper metadata."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output", help="The path of the newline delimited JSON file.")
+    parser.add_argument("--venue")
+    parser.add_argument("--author")
+    parser.add_argument("--keyword")
+    parser.add_argument("--published-from", type=datetime.fromisoformat)
+    parser.add_argument("--published-to", type=datetime.fromisoformat)
+    parser.add_argument(
+        "--view", choices=[view.value for view in PaperListView], default=PaperListView.FULL.value
+    )
+    parser.add_argument("--fields", help="The comma separated fields, which override the view.")
+    parser.add_argument("--batch-size", type=int, default=settings.PAPER_METADATA_EXPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--resume", action="store_true", help="Append after the last complete line."
+    )
+    exported = asyncio.run(export(parser.parse_args()))
+    print(f"Exported {exported} papers", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,25 @@
 """Test cases for the paper API endpoints."""
 
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import patch
 
 from fastapi import FastAPI
 from httpx import AsyncClient
 
 from app.api.v1.paper import router as paper_router
+from app.common.cache import CacheStats
+from app.common.exceptions import InvalidFieldError, InvalidPageTokenError, NotFoundError
+from app.external.storage import BlobMetadata
 from app.models.paper_metadata import PaperMetadata
+from app.schemas.paper_metadata import (
+    GetPaperDetailSchema,
+    GetPaperDocumentUrlSchema,
+    GetPaperListDetailSchema,
+    PaperRevisionSchema,
+    RegisterPaperBulkResultSchema,
+    get_paper_projection_model,
+)
 from app.services.paper_service import PaperService
 from tests.data.paper import DummyPaperFactory
 from tests.misc import patch_method
@@ -26,7 +38,7 @@ class TestPaperRoute(unittest.IsolatedAsyncioTestCase):
         self.mock_mongo_session = MockMongoDBSession()
 
         with patch.object(PaperService, "__init__", return_value=None):
-            self.mock_service = PaperService()
+            self.mock_service = PaperService(search_index=None)
 
         self.mock_app = FastAPI()
         self.mock_app.include_router(paper_router, prefix=self.base_path)
@@ -44,11 +56,14 @@ class TestPaperRoute(unittest.IsolatedAsyncioTestCase):
 
         return self.mock_service
 
-    @patch_method(PaperService.get_paper_metadata_list)
+    @patch_method(PaperService.get_paper_metadata_list_with_etag)
     async def test_async_get_paper_metadata_list(self, mock_get_paper_metadata_list) -> None:
         """Test get paper metadata list"""
 
-        mock_get_paper_metadata_list.return_value = self.dummy_data.get_paper_list_detail_schema
+        mock_get_paper_metadata_list.return_value = (
+            self.dummy_data.get_paper_list_detail_schema,
+            "etag",
+        )
         params = self.dummy_data.get_paper_metadata_list_param.model_dump(mode="json")
         expected_result = self.dummy_data.get_paper_list_detail_schema
 
@@ -71,3 +86,277 @@ class TestPaperRoute(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(response_data["code"], 200)
         self.assertEqual(response_data["data"], expected_result)
+
+    @patch_method(PaperService.register_paper_bulk)
+    async def test_async_register_paper_bulk(self, mock_register_paper_bulk) -> None:
+        """Test register paper bulk"""
+
+        mock_register_paper_bulk.return_value = RegisterPaperBulkResultSchema(total=1, succeeded=1)
+        data = [self.dummy_data.register_paper_schema.model_dump(mode="json")]
+
+        response = await self.async_client.post(f"{self.base_path}/bulk", json=data)
+        response_data = response.json()
+
+        self.assertEqual(response_data["code"], 200)
+        self.assertEqual(response_data["data"]["succeeded"], 1)
+        self.assertEqual(mock_register_paper_bulk.call_args.kwargs["objs"], data)
+
+    def mock_paper_document(self, mock_get_paper_document, mock_iter_paper_document):
+        """Mock the paper document which is the dummy raw paper bytes."""
+
+        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+
+        async def iter_paper_document(blob_url, start, end):
+            yield raw_paper_bytes[start : end + 1]
+
+        mock_get_paper_document.return_value = (
+            self.dummy_data.gcs_blob_url,
+            BlobMetadata(size=len(raw_paper_bytes), etag="etag"),
+        )
+        mock_iter_paper_document.side_effect = iter_paper_document
+
+    @patch_method(PaperService.iter_paper_document)
+    @patch_method(PaperService.get_paper_document)
+    async def test_async_download_paper_document(
+        self, mock_get_paper_document, mock_iter_paper_document
+    ) -> None:
+        """Test download paper document"""
+
+        self.mock_paper_document(mock_get_paper_document, mock_iter_paper_document)
+        url = f"{self.base_path}/{self.dummy_data.paper_metadata_id}/document"
+
+        response = await self.async_client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.dummy_data.raw_paper_bytes)
+        self.assertEqual(response.headers["accept-ranges"], "bytes")
+        self.assertEqual(response.headers["etag"], '"etag"')
+        self.assertEqual(response.headers["content-type"], "application/pdf")
+
+    @patch_method(PaperService.iter_paper_document)
+    @patch_method(PaperService.get_paper_document)
+    async def test_async_download_paper_document_range(
+        self, mock_get_paper_document, mock_iter_paper_document
+    ) -> None:
+        """Test download paper document with range headers"""
+
+        self.mock_paper_document(mock_get_paper_document, mock_iter_paper_document)
+        url = f"{self.base_path}/{self.dummy_data.paper_metadata_id}/document"
+        size = len(self.dummy_data.raw_paper_bytes)
+
+        partial = await self.async_client.get(url, headers={"Range": "bytes=1-2"})
+        stale = await self.async_client.get(
+            url, headers={"Range": "bytes=1-2", "If-Range": '"other"'}
+        )
+        unsatisfiable = await self.async_client.get(url, headers={"Range": f"bytes={size}-"})
+
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, self.dummy_data.raw_paper_bytes[1:3])
+        self.assertEqual(partial.headers["content-range"], f"bytes 1-2/{size}")
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.content, self.dummy_data.raw_paper_bytes)
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable.headers["content-range"], f"bytes */{size}")
+
+    @patch_method(PaperService.get_paper_document)
+    async def test_async_download_missing_paper_document(self, mock_get_paper_document) -> None:
+        """Test download paper document which is not uploaded"""
+
+        mock_get_paper_document.side_effect = NotFoundError("Paper document not found")
+        url = f"{self.base_path}/{self.dummy_data.paper_metadata_id}/document"
+
+        response = await self.async_client.get(url)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["code"], 404)
+
+    @patch_method(PaperService.get_paper_document_url)
+    async def test_async_download_paper_document_signed_url(
+        self, mock_get_paper_document_url
+    ) -> None:
+        """Test download paper document with the signed url deliveries"""
+
+        mock_get_paper_document_url.return_value = GetPaperDocumentUrlSchema(
+            url="https://storage.googleapis.com/signed",
+            expires_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        )
+        url = f"{self.base_path}/{self.dummy_data.paper_metadata_id}/document"
+
+        redirect = await self.async_client.get(url, params={"delivery": "redirect"})
+        signed_url = await self.async_client.get(url, params={"delivery": "signed_url"})
+
+        self.assertEqual(redirect.status_code, 307)
+        self.assertEqual(redirect.headers["location"], "https://storage.googleapis.com/signed")
+        self.assertEqual(signed_url.json()["code"], 200)
+        self.assertEqual(signed_url.json()["data"]["url"], "https://storage.googleapis.com/signed")
+
+    @patch_method(PaperService.iter_paper_document)
+    @patch_method(PaperService.get_paper_document)
+    @patch_method(PaperService.get_paper_document_url)
+    async def test_async_download_paper_document_unsigned_url(
+        self, mock_get_paper_document_url, mock_get_paper_document, mock_iter_paper_document
+    ) -> None:
+        """Test download paper document falls back to the streaming without signed urls"""
+
+        self.mock_paper_document(mock_get_paper_document, mock_iter_paper_document)
+        mock_get_paper_document_url.return_value = None
+        url = f"{self.base_path}/{self.dummy_data.paper_metadata_id}/document"
+
+        response = await self.async_client.get(url, params={"delivery": "redirect"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.dummy_data.raw_paper_bytes)
+
+    @patch_method(PaperService.get_paper_metadata_list_with_etag)
+    async def test_async_get_paper_metadata_list_invalid_page_token(
+        self, mock_get_paper_metadata_list
+    ) -> None:
+        """Test get paper metadata list with an invalid page token"""
+
+        mock_get_paper_metadata_list.side_effect = InvalidPageTokenError("Invalid page token")
+
+        response = await self.async_client.get(
+            f"{self.base_path}/metadata", params={"page_token": "invalid"}
+        )
+
+        self.assertEqual(response.json()["code"], 400)
+
+    @patch_method(PaperService.get_paper_metadata_list_with_etag)
+    async def test_async_get_paper_metadata_list_sparse_fields(
+        self, mock_get_paper_metadata_list
+    ) -> None:
+        """Test get paper metadata list leaves out the fields which are not read"""
+
+        projection_model = get_paper_projection_model(frozenset(["id", "title"]))
+        item = projection_model.model_validate(
+            {"_id": self.dummy_data.paper_metadata_id, "title": "title"}
+        )
+        mock_get_paper_metadata_list.return_value = (
+            GetPaperListDetailSchema(items=[item]),
+            "etag",
+        )
+
+        response = await self.async_client.get(
+            f"{self.base_path}/metadata", params={"fields": "title"}
+        )
+
+        self.assertEqual(
+            response.json()["data"]["items"],
+            [{"id": self.dummy_data.paper_metadata_id, "title": "title"}],
+        )
+
+    @patch_method(PaperService.get_paper_metadata_list_etag)
+    @patch_method(PaperService.get_paper_metadata_list_with_etag)
+    async def test_async_get_paper_metadata_list_not_modified(
+        self, mock_get_paper_metadata_list, mock_get_paper_metadata_list_etag
+    ) -> None:
+        """Test get paper metadata list answers the current entity tag with 304"""
+
+        mock_get_paper_metadata_list.return_value = (
+            self.dummy_data.get_paper_list_detail_schema,
+            "etag",
+        )
+        mock_get_paper_metadata_list_etag.return_value = "etag"
+        url = f"{self.base_path}/metadata"
+
+        response = await self.async_client.get(url)
+        not_modified = await self.async_client.get(url, headers={"If-None-Match": '"etag"'})
+        modified = await self.async_client.get(url, headers={"If-None-Match": '"other"'})
+
+        self.assertEqual(response.headers["ETag"], '"etag"')
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(modified.json()["code"], 200)
+        self.assertEqual(mock_get_paper_metadata_list.call_count, 2)
+        self.assertEqual(mock_get_paper_metadata_list_etag.call_count, 2)
+
+    @patch_method(PaperService.get_paper_metadata)
+    @patch_method(PaperService.get_paper_metadata_revision)
+    async def test_async_get_paper_metadata_not_modified(
+        self, mock_get_paper_metadata_revision, mock_get_paper_metadata
+    ) -> None:
+        """Test get paper metadata answers the current revision with 304"""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        paper_metadata.revision = 2
+        paper_metadata.updated_at = datetime(2024, 1, 2, 3, 4, 5)
+        mock_get_paper_metadata.return_value = GetPaperDetailSchema.model_validate(paper_metadata)
+        mock_get_paper_metadata_revision.return_value = PaperRevisionSchema.model_validate(
+            paper_metadata
+        )
+        url = f"{self.base_path}/{self.dummy_data.paper_metadata_id}/metadata"
+
+        response = await self.async_client.get(url)
+        not_modified = await self.async_client.get(
+            url, headers={"If-None-Match": response.headers["ETag"]}
+        )
+        not_modified_since = await self.async_client.get(
+            url, headers={"If-Modified-Since": response.headers["Last-Modified"]}
+        )
+
+        self.assertEqual(response.json()["data"]["revision"], 2)
+        self.assertEqual(response.headers["ETag"], f'"{self.dummy_data.paper_metadata_id}-2"')
+        self.assertEqual(response.headers["Last-Modified"], "Tue, 02 Jan 2024 03:04:05 GMT")
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified_since.status_code, 304)
+        self.assertEqual(mock_get_paper_metadata.call_count, 1)
+
+        modified = await self.async_client.get(url, headers={"If-None-Match": '"etag"'})
+
+        self.assertEqual(modified.status_code, 200)
+        mock_get_paper_metadata.assert_called_with(
+            self.dummy_data.paper_metadata_id, min_revision=2
+        )
+
+        mock_get_paper_metadata_revision.side_effect = NotFoundError("Paper metadata not found")
+        missing = await self.async_client.get(url, headers={"If-None-Match": '"etag"'})
+
+        self.assertEqual(missing.json()["code"], 404)
+
+    @patch_method(PaperService.get_paper_metadata_cache_stats)
+    async def test_async_get_paper_metadata_cache_stats(
+        self, mock_get_paper_metadata_cache_stats
+    ) -> None:
+        """Test get paper metadata cache stats"""
+
+        stats = CacheStats(size=1, maxsize=10, hits=3, misses=1, evictions=0, expirations=0)
+        mock_get_paper_metadata_cache_stats.return_value = stats
+
+        response = await self.async_client.get(f"{self.base_path}/metadata/cache")
+
+        self.assertEqual(response.json()["data"], stats.model_dump())
+
+    @patch_method(PaperService.iter_paper_metadata_export)
+    async def test_async_export_paper_metadata(self, mock_iter_paper_metadata_export) -> None:
+        """Test export paper metadata"""
+
+        lines = [b'{"id":"1"}\n{"id":"2"}\n', b'{"id":"3"}\n']
+
+        async def iter_lines():
+            for line in lines:
+                yield line
+
+        after_id = self.dummy_data.paper_metadata_id
+        mock_iter_paper_metadata_export.side_effect = [
+            iter_lines(),
+            InvalidFieldError("Unknown fields secret"),
+        ]
+        url = f"{self.base_path}/metadata/export"
+
+        response = await self.async_client.get(
+            url, params={"venue": "venue", "after_id": after_id, "batch_size": 2}
+        )
+        obj = mock_iter_paper_metadata_export.call_args.args[0]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"".join(lines))
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        self.assertEqual((obj.venue, str(obj.after_id), obj.batch_size), ("venue", after_id, 2))
+
+        response = await self.async_client.get(url, params={"fields": "secret"})
+
+        self.assertEqual(response.json()["code"], 400)
+
+        response = await self.async_client.get(url, params={"after_id": "invalid"})
+
+        self.assertEqual(response.status_code, 422)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the async requests module."""
+
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.common.async_requests import AsyncRequestHandler
+from app.common.exceptions import PayloadTooLargeError
+
+
+class TestAsyncRequestHandler(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the async request handler."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+
+        self.body = b"%PDF" * 256
+
+        async def sized(request: web.Request) -> web.Response:
+            return web.Response(body=self.body)
+
+        async def chunked(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse()
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+
+            for index in range(0, len(self.body), 64):
+                await response.write(self.body[index : index + 64])
+
+            return response
+
+        app = web.Application()
+        app.router.add_get("/sized.pdf", sized)
+        app.router.add_get("/chunked.pdf", chunked)
+
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.handler = AsyncRequestHandler()
+
+    async def asyncTearDown(self) -> None:
+        """Tear down the test case."""
+
+        await self.server.close()
+
+    async def read(self, path: str, max_size: int | None) -> list[bytes]:
+        """Read the response body of the path in chunks of 64 bytes."""
+
+        url = str(self.server.make_url(path))
+        chunks = self.handler.stream("GET", url, chunk_size=64, max_size=max_size)
+
+        return [chunk async for chunk in chunks]
+
+    async def test_stream(self):
+        """Test stream method reads the response body in chunks up to the max size."""
+
+        for path in ["/sized.pdf", "/chunked.pdf"]:
+            chunks = await self.read(path, max_size=len(self.body))
+
+            self.assertEqual(b"".join(chunks), self.body, path)
+            self.assertLessEqual(max(len(chunk) for chunk in chunks), 64, path)
+
+    async def test_stream_payload_too_large(self):
+        """Test stream method rejects the declared and the streamed bodies over the max size."""
+
+        with self.assertRaisesRegex(PayloadTooLargeError, f"is {len(self.body)} bytes"):
+            await self.read("/sized.pdf", max_size=len(self.body) - 1)
+
+        with self.assertRaisesRegex(PayloadTooLargeError, "exceeds the limit"):
+            await self.read("/chunked.pdf", max_size=len(self.body) - 1)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the batching module."""
+
+import asyncio
+import unittest
+
+from app.common.batching import MicroBatcher
+
+
+class TestMicroBatcher(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the micro batcher."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.batches: list[list[int]] = []
+
+    def double(self, items: list[int]) -> list[int]:
+        """Double the items of a batch, and record the batch."""
+
+        self.batches.append(items)
+
+        return [item * 2 for item in items]
+
+    async def test_batch_concurrent_submissions(self):
+        """Test the concurrent submissions are run in few batches."""
+
+        batcher = MicroBatcher(self.double, max_batch_size=32, max_wait=0.05)
+
+        results = await asyncio.gather(*[batcher.submit(item) for item in range(100)])
+        await batcher.stop()
+
+        self.assertEqual(results, [item * 2 for item in range(100)])
+        self.assertEqual(len(self.batches), 4)
+        self.assertTrue(all(len(batch) <= 32 for batch in self.batches))
+
+    async def test_flush_after_max_wait(self):
+        """Test a single submission is run once the max wait passes."""
+
+        batcher = MicroBatcher(self.double, max_batch_size=32, max_wait=0.01)
+
+        result = await asyncio.wait_for(batcher.submit(3), timeout=1)
+        await batcher.stop()
+
+        self.assertEqual(result, 6)
+        self.assertEqual(self.batches, [[3]])
+
+    async def test_propagate_exception(self):
+        """Test every caller of a failed batch gets the exception."""
+
+        def fail(items: list[int]) -> list[int]:
+            raise RuntimeError("failed")
+
+        batcher = MicroBatcher(fail, max_batch_size=4, max_wait=0.01)
+
+        results = await asyncio.gather(
+            *[batcher.submit(item) for item in range(3)], return_exceptions=True
+        )
+        result = await asyncio.wait_for(
+            asyncio.gather(batcher.submit(3), return_exceptions=True), timeout=1
+        )
+        await batcher.stop()
+
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in results))
+        self.assertIsInstance(result[0], RuntimeError)
+
+    async def test_reject_result_length_mismatch(self):
+        """Test the callers get an error if the batch function returns too few results."""
+
+        batcher = MicroBatcher(lambda items: items[:1], max_batch_size=4, max_wait=0.01)
+
+        results = await asyncio.gather(
+            *[batcher.submit(item) for item in range(2)], return_exceptions=True
+        )
+        await batcher.stop()
+
+        self.assertTrue(all(isinstance(e, ValueError) for e in results))
+
+    async def test_cancel_caller(self):
+        """Test a cancelled caller is dropped from its batch without affecting the others."""
+
+        batcher = MicroBatcher(self.double, max_batch_size=32, max_wait=0.05)
+
+        cancelled = asyncio.create_task(batcher.submit(1))
+        others = [asyncio.create_task(batcher.submit(item)) for item in (2, 3)]
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        results = await asyncio.gather(*others)
+        await batcher.stop()
+
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(results, [4, 6])
+        self.assertEqual(self.batches, [[2, 3]])
+
+    async def test_stop_cancels_pending(self):
+        """Test stopping the batcher cancels the callers waiting for their results."""
+
+        batcher = MicroBatcher(self.double, max_batch_size=32, max_wait=10)
+
+        pending = asyncio.create_task(batcher.submit(1))
+        await asyncio.sleep(0)
+        await batcher.stop()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+        self.assertEqual(self.batches, [])
+        self.assertEqual(await asyncio.wait_for(batcher.submit(2), timeout=11), 4)
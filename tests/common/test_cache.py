@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the cache module."""
+
+import unittest
+from unittest.mock import patch
+
+from app.common.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test cases for the time to live cache."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.now = 100.0
+        patcher = patch("app.common.cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_expire(self):
+        """Test the entries expire after their time to live."""
+
+        cache = TTLCache[str, int](maxsize=10, ttl=10)
+        cache.set("default", 1)
+        cache.set("short", 2, ttl=5)
+        cache.set("disabled", 3, ttl=0)
+
+        self.now += 5
+
+        self.assertEqual(cache.get("default"), 1)
+        self.assertIsNone(cache.get("short"))
+        self.assertIsNone(cache.get("disabled"))
+
+        self.now += 5
+
+        self.assertIsNone(cache.get("default"))
+        self.assertEqual(len(cache), 0)
+
+    def test_evict_least_recently_used(self):
+        """Test the least recently used entry is evicted beyond the maximum size."""
+
+        cache = TTLCache[str, int](maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+        cache.delete("a")
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+
+    def test_stats(self):
+        """Test the counters of the hits, the misses, the evictions and the expirations."""
+
+        cache = TTLCache[str, int](maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+        cache.get("a")
+        cache.get("missing")
+
+        self.now += 5
+
+        cache.get("b")
+        cache.set("c", 3)
+        cache.set("d", 4)
+
+        stats = cache.stats()
+
+        self.assertEqual((stats.size, stats.maxsize), (2, 2))
+        self.assertEqual((stats.hits, stats.misses), (1, 2))
+        self.assertEqual((stats.evictions, stats.expirations), (1, 1))
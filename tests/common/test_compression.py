@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the compression module."""
+
+import asyncio
+import json
+import unittest
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.common.compression import CompressionMiddleware, negotiate_encoding
+
+
+class TestNegotiateEncoding(unittest.TestCase):
+    """Test cases for the negotiation of the content codings."""
+
+    def test_negotiate_encoding(self):
+        """Test the content coding of the highest quality is selected, the preferred first."""
+
+        encodings = ["zstd", "gzip"]
+
+        self.assertEqual(negotiate_encoding("gzip, deflate, br, zstd", encodings), "zstd")
+        self.assertEqual(negotiate_encoding("gzip, zstd;q=0.5", encodings), "gzip")
+        self.assertEqual(negotiate_encoding("GZIP", ["gzip"]), "gzip")
+        self.assertEqual(negotiate_encoding("*;q=0.1, zstd;q=0", encodings), "gzip")
+        self.assertIsNone(negotiate_encoding("gzip;q=0", encodings))
+        self.assertIsNone(negotiate_encoding("br, identity", encodings))
+        self.assertIsNone(negotiate_encoding("", encodings))
+        self.assertIsNone(negotiate_encoding("gzip;q=high", encodings))
+
+
+class TestCompressionMiddleware(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the compression middleware."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.items = [{"id": index, "abstract": "abstract " * 50} for index in range(100)]
+
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=100, gzip_level=6)
+
+        @app.get("/json")
+        async def get_json() -> JSONResponse:
+            return JSONResponse(self.items, headers={"ETag": '"etag"'})
+
+        @app.get("/small")
+        async def get_small() -> JSONResponse:
+            return JSONResponse({"id": 1})
+
+        @app.get("/pdf")
+        async def get_pdf() -> Response:
+            return Response(b"%PDF" * 1000, media_type="application/pdf")
+
+        @app.get("/partial")
+        async def get_partial() -> Response:
+            return Response(
+                b"a" * 1000,
+                status_code=206,
+                headers={"Content-Range": "bytes 0-999/2000"},
+                media_type="text/plain",
+            )
+
+        @app.get("/stream")
+        async def get_stream() -> StreamingResponse:
+            async def lines():
+                for item in self.items:
+                    yield json.dumps(item) + "\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        self.app = app
+        self.client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self) -> None:
+        """Tear down the test case."""
+
+        await self.client.aclose()
+
+    async def test_compress_body(self):
+        """Test a large body is compressed and its entity tag is weakened."""
+
+        response = await self.client.get("/json", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["ETag"], 'W/"etag"')
+        self.assertEqual(response.json(), self.items)
+        self.assertLess(int(response.headers["Content-Length"]) * 10, len(response.content))
+
+    async def test_skip_bodies(self):
+        """Test the small, the compressed and the partial bodies are not compressed."""
+
+        for path in ["/small", "/pdf", "/partial"]:
+            response = await self.client.get(path, headers={"Accept-Encoding": "gzip"})
+
+            self.assertNotIn("Content-Encoding", response.headers, path)
+
+        response = await self.client.get("/json", headers={"Accept-Encoding": "identity"})
+
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["ETag"], '"etag"')
+
+    async def test_compress_stream(self):
+        """Test a streamed body is compressed and flushed chunk by chunk."""
+
+        messages = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/stream",
+            "raw_path": b"/stream",
+            "root_path": "",
+            "scheme": "http",
+            "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")],
+            "server": ("test", 80),
+        }
+
+        await self.app(scope, receive, send)
+
+        headers = dict(messages[0]["headers"])
+        bodies = [message["body"] for message in messages[1:]]
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        lines = [decompressor.decompress(body) for body in bodies]
+
+        self.assertEqual(headers[b"content-encoding"], b"gzip")
+        self.assertNotIn(b"content-length", headers)
+        self.assertGreater(len(bodies), 50)
+        self.assertTrue(all(lines[1:-1]))
+        self.assertEqual([json.loads(line) for line in b"".join(lines).splitlines()], self.items)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the http range utility functions."""
+
+import unittest
+from datetime import datetime, timezone
+
+from app.common.exceptions import RangeNotSatisfiableError
+from app.common.http_range import (
+    format_etag,
+    format_http_date,
+    is_if_range_fresh,
+    is_not_modified,
+    parse_range_header,
+)
+
+
+class TestHttpRange(unittest.TestCase):
+    """Test cases for the http range utility functions."""
+
+    def test_parse_range_header(self):
+        """Test parse_range_header resolves the byte ranges against the size."""
+
+        self.assertEqual(parse_range_header("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range_header("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range_header("bytes=90-1000", 100), (90, 99))
+        self.assertEqual(parse_range_header("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range_header("bytes=-1000", 100), (0, 99))
+
+    def test_parse_ignored_range_header(self):
+        """Test parse_range_header ignores the unsupported range headers."""
+
+        for range_header in ["items=0-9", "bytes=0-9,20-29", "bytes=9-0", "bytes=a-b", "bytes"]:
+            self.assertIsNone(parse_range_header(range_header, 100), range_header)
+
+    def test_parse_unsatisfiable_range_header(self):
+        """Test parse_range_header rejects the ranges outside of the content."""
+
+        for range_header, size in [("bytes=100-", 100), ("bytes=-0", 100), ("bytes=0-", 0)]:
+            with self.assertRaises(RangeNotSatisfiableError):
+                parse_range_header(range_header, size)
+
+    def test_is_if_range_fresh(self):
+        """Test is_if_range_fresh compares the entity tags strongly and the dates exactly."""
+
+        last_modified = format_http_date(datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+        etag = format_etag("etag")
+
+        self.assertEqual(etag, '"etag"')
+        self.assertEqual(last_modified, "Tue, 02 Jan 2024 03:04:05 GMT")
+        self.assertTrue(is_if_range_fresh('"etag"', etag, last_modified))
+        self.assertTrue(is_if_range_fresh(last_modified, etag, last_modified))
+        self.assertFalse(is_if_range_fresh('W/"etag"', etag, last_modified))
+        self.assertFalse(is_if_range_fresh('"other"', etag, last_modified))
+        self.assertFalse(is_if_range_fresh(last_modified, etag, None))
+
+    def test_is_not_modified(self):
+        """Test is_not_modified compares the entity tags weakly before the dates."""
+
+        updated_at = datetime(2024, 1, 2, 3, 4, 5, 678000)
+        last_modified = format_http_date(updated_at)
+        etag = format_etag("etag")
+
+        self.assertTrue(is_not_modified('"other", W/"etag"', None, etag, updated_at))
+        self.assertTrue(is_not_modified("*", None, etag, None))
+        self.assertFalse(is_not_modified('"other"', last_modified, etag, updated_at))
+        self.assertTrue(is_not_modified(None, last_modified, etag, updated_at))
+        self.assertFalse(is_not_modified(None, "Tue, 02 Jan 2024 03:04:04 GMT", etag, updated_at))
+        self.assertFalse(is_not_modified(None, "yesterday", etag, updated_at))
+        self.assertFalse(is_not_modified(None, last_modified, etag, None))
+        self.assertFalse(is_not_modified(None, None, etag, updated_at))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the keyset pagination module."""
+
+import unittest
+from datetime import datetime
+
+from beanie import PydanticObjectId
+
+from app.common.exceptions import InvalidPageTokenError
+from app.common.pagination import (
+    PageCursor,
+    build_keyset_query,
+    decode_page_cursor,
+    encode_page_cursor,
+    get_seek_sort,
+)
+
+SORT_KEYS = [("published_at", -1), ("_id", -1)]
+
+
+class TestPagination(unittest.TestCase):
+    """Test cases for the keyset pagination module."""
+
+    def test_page_cursor_round_trip(self):
+        """Test the page cursor keeps the bson types of the sort key."""
+
+        cursor = PageCursor(
+            sort="published_at",
+            values=[datetime(2021, 1, 1), PydanticObjectId()],
+            backward=True,
+        )
+
+        page_token = encode_page_cursor(cursor)
+
+        self.assertNotIn("=", page_token)
+        self.assertEqual(decode_page_cursor(page_token), cursor)
+
+    def test_decode_invalid_page_token(self):
+        """Test decode_page_cursor rejects the malformed page tokens."""
+
+        for page_token in [
+            "",
+            "not a token",
+            encode_page_cursor(PageCursor(sort="id", values=[]))[:-2],
+        ]:
+            with self.assertRaises(InvalidPageTokenError):
+                decode_page_cursor(page_token)
+
+    def test_build_keyset_query(self):
+        """Test build_keyset_query bounds the first field and breaks the ties with the rest."""
+
+        published_at, obj_id = datetime(2021, 1, 1), PydanticObjectId()
+
+        forward = build_keyset_query(SORT_KEYS, [published_at, obj_id], backward=False)
+        backward = build_keyset_query(SORT_KEYS, [published_at, obj_id], backward=True)
+
+        self.assertEqual(
+            forward,
+            {
+                "published_at": {"$lte": published_at},
+                "$or": [
+                    {"published_at": {"$lt": published_at}},
+                    {"published_at": published_at, "_id": {"$lt": obj_id}},
+                ],
+            },
+        )
+        self.assertEqual(backward["published_at"], {"$gte": published_at})
+        self.assertEqual(get_seek_sort(SORT_KEYS, backward=True), [("published_at", 1), ("_id", 1)])
+
+        with self.assertRaises(InvalidPageTokenError):
+            build_keyset_query(SORT_KEYS, [published_at], backward=False)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the response module."""
+
+import json
+import unittest
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.common.response import ModelJSONResponse, ResponseBase, ResponseModel
+from app.schemas.paper_metadata import GetPaperListDetailSchema, get_paper_projection_model
+
+
+class TestModelJSONResponse(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the model JSON response."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+
+        projection_model = get_paper_projection_model(frozenset(["id", "title", "published_at"]))
+        item = projection_model.model_validate(
+            {
+                "_id": "65f0c0ffee00000000000001",
+                "title": "Attention is all you need",
+                "published_at": datetime(2017, 6, 12),
+            }
+        )
+        self.data = GetPaperListDetailSchema.model_construct(
+            page_size=10, total_items=1, items=[item]
+        )
+
+    async def test_render_like_response_model(self):
+        """Test the response is rendered like FastAPI renders the response model."""
+
+        response = await ResponseBase.fast_success(data=self.data, exclude_unset=True)
+        field = create_response_field(
+            name="response", type_=ResponseModel[GetPaperListDetailSchema], mode="serialization"
+        )
+        expected = await serialize_response(
+            field=field,
+            response_content=await ResponseBase.success(data=self.data),
+            exclude_unset=True,
+            is_coroutine=True,
+        )
+
+        self.assertIsInstance(response, ModelJSONResponse)
+        self.assertEqual(response.media_type, "application/json")
+        self.assertEqual(json.loads(response.body), jsonable_encoder(expected))
+        self.assertEqual(
+            json.loads(response.body)["data"]["items"],
+            [
+                {
+                    "id": "65f0c0ffee00000000000001",
+                    "title": "Attention is all you need",
+                    "published_at": "2017-06-12T00:00:00",
+                }
+            ],
+        )
+
+    async def test_render_unset_fields(self):
+        """Test the fields which are not set are rendered unless they are excluded."""
+
+        response = await ResponseBase.fast_success(data=self.data)
+
+        self.assertIsNone(json.loads(response.body)["data"]["items"][0]["venue"])
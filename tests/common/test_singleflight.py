@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the single flight module."""
+
+import asyncio
+import unittest
+
+from app.common.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the single flight."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.calls: list[str] = []
+        self.release = asyncio.Event()
+
+    async def load(self, key: str) -> str:
+        """Load the key once the release event is set, and record the call."""
+
+        self.calls.append(key)
+        await self.release.wait()
+
+        if key == "error":
+            raise ValueError(key)
+
+        return key.upper()
+
+    async def test_share_concurrent_calls(self):
+        """Test the concurrent callers of a key share a call, and the later ones start one."""
+
+        flight = SingleFlight[str, str]()
+        callers = [
+            asyncio.create_task(flight.do(key, lambda key=key: self.load(key)))
+            for key in ["a", "a", "b", "a"]
+        ]
+
+        await asyncio.sleep(0)
+        self.assertEqual(len(flight), 2)
+
+        self.release.set()
+        results = await asyncio.gather(*callers)
+
+        self.assertEqual(results, ["A", "A", "B", "A"])
+        self.assertEqual(self.calls, ["a", "b"])
+        self.assertEqual(len(flight), 0)
+
+        self.assertEqual(await flight.do("a", lambda: self.load("a")), "A")
+        self.assertEqual(self.calls, ["a", "b", "a"])
+
+    async def test_propagate_error(self):
+        """Test every caller of a failed call gets its exception, which is not cached."""
+
+        flight = SingleFlight[str, str]()
+        callers = [flight.do("error", lambda: self.load("error")) for _ in range(3)]
+        self.release.set()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(self.calls, ["error"])
+        self.assertEqual(len(flight), 0)
+
+    async def test_cancel_caller(self):
+        """Test a cancelled caller does not cancel the call of the other callers."""
+
+        flight = SingleFlight[str, str]()
+        cancelled = asyncio.create_task(flight.do("a", lambda: self.load("a")))
+        waiting = asyncio.create_task(flight.do("a", lambda: self.load("a")))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await waiting, "A")
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(self.calls, ["a"])
+
+    async def test_cancel_every_caller(self):
+        """Test the call is cancelled once all of its callers are cancelled."""
+
+        flight = SingleFlight[str, str]()
+        callers = [asyncio.create_task(flight.do("a", lambda: self.load("a"))) for _ in range(2)]
+        await asyncio.sleep(0)
+        call = flight._flights["a"].task
+
+        for caller in callers:
+            caller.cancel()
+
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        self.assertTrue(call.cancelled())
+        self.assertEqual(len(flight), 0)
+
+        self.release.set()
+        self.assertEqual(await flight.do("a", lambda: self.load("a")), "A")
+
+    async def test_forget(self):
+        """Test the callers after forget start a new call, and the earlier ones are served."""
+
+        flight = SingleFlight[str, str]()
+        earlier = asyncio.create_task(flight.do("a", lambda: self.load("a")))
+        await asyncio.sleep(0)
+
+        flight.forget("a")
+        later = asyncio.create_task(flight.do("a", lambda: self.load("a")))
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(earlier, later), ["A", "A"])
+        self.assertEqual(self.calls, ["a", "a"])
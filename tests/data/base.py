@@ -4,6 +4,8 @@ This module contains the base json formed dummy data.
 
 """
 
+from typing import AsyncIterator
+
 from pydantic import Field, HttpUrl
 
 from app.common.pydantic_model import ModelBase
@@ -42,3 +44,20 @@ class BaseDummyDataFactory(ModelBase):
             "keywords": ["keyword1", "keyword2"],
             "url": self.paper_url,
         }
+
+    async def iter_raw_paper_chunks(self, *args, **kwargs) -> AsyncIterator[bytes]:
+        """Iterate the raw paper bytes in chunks.
+
+        This method is responsible for mocking a streamed paper document.
+
+        Args:
+            *args: The ignored positional arguments.
+            **kwargs: The ignored keyword arguments.
+
+        Yields:
+            bytes: The chunk of the raw paper bytes.
+
+        """
+
+        for index in range(len(self.raw_paper_bytes)):
+            yield self.raw_paper_bytes[index : index + 1]
@@ -5,7 +5,13 @@ This module contains the dummy data for paper document.
 
 """
 
+import hashlib
+
+from beanie import PydanticObjectId
+
+from app.common.enums import PaperSortOrder
 from app.common.misc import get_gcs_url
+from app.common.pagination import PageCursor, encode_page_cursor
 from app.common.pydantic_model import PaginatedResult
 from app.common.types import GCSBlobUrl
 from app.core.config import settings
@@ -40,7 +46,37 @@ class DummyPaperFactory(BaseDummyDataFactory):
 
         return get_gcs_url(
             str(settings.GOOGLE_CLOUD_STORAGE_BUCKET_ID),
-            PaperDocumentRepository.get_gcs_paper_blob_name(self.paper_metadata_id),
+            PaperDocumentRepository.get_paper_blob_name(self.paper_metadata_id),
+        )
+
+    @property
+    def content_hash(self) -> str:
+        """Get the content hash of the raw paper bytes.
+
+        This method is responsible for getting the sha256 hex digest of the raw paper bytes.
+
+        Returns:
+            str: The content hash.
+
+        """
+
+        return hashlib.sha256(self.raw_paper_bytes).hexdigest()
+
+    @property
+    def gcs_content_blob_url(self) -> GCSBlobUrl:
+        """Get the content addressed google cloud storage file path.
+
+        This method is responsible for getting the google cloud storage file path keyed by
+        the content hash.
+
+        Returns:
+            GCSBlobUrl: The google cloud storage file path.
+
+        """
+
+        return get_gcs_url(
+            str(settings.GOOGLE_CLOUD_STORAGE_BUCKET_ID),
+            PaperDocumentRepository.get_content_blob_name(self.content_hash),
         )
 
     @property
@@ -56,6 +92,21 @@ class DummyPaperFactory(BaseDummyDataFactory):
 
         return PaperMetadata.model_validate(self.paper_metadata_json)
 
+    @property
+    def page_token(self) -> str:
+        """Get the page token after the paper metadata.
+
+        This method is responsible for getting the page token of the registration order.
+
+        Returns:
+            str: The page token.
+
+        """
+
+        return encode_page_cursor(
+            PageCursor(sort=PaperSortOrder.ID, values=[PydanticObjectId(self.paper_metadata_id)])
+        )
+
     @property
     def paginated_paper_metadata(self) -> PaginatedResult[PaperMetadata]:
         """Get the paginated paper metadata.
@@ -70,6 +121,7 @@ class DummyPaperFactory(BaseDummyDataFactory):
         return PaginatedResult[PaperMetadata](
             total=1,
             items=[self.paper_metadata_model],
+            next_page_token=self.page_token,
         )
 
     @property
@@ -116,7 +168,7 @@ class DummyPaperFactory(BaseDummyDataFactory):
 
         return GetPaperListDetailSchema.model_validate(
             {
-                "page_token": self.paper_metadata_id,
+                "page_token": self.page_token,
                 "page_size": self.get_paper_metadata_list_param.page_size,
                 "total_pages": 1,
                 "total_items": 1,
@@ -0,0 +1,69 @@
+"""This module is for dummy search data.
+
+This module contains the text encoder which embeds the texts without a model, and the
+clustered vectors to index.
+
+"""
+
+import zlib
+
+import numpy as np
+
+from app.search.bm25 import tokenize
+from app.search.embedding import TextEncoderBase, normalize_vectors
+
+
+class DummyTextEncoder(TextEncoderBase):
+    """This class is for dummy text encoder.
+
+    This class is responsible for embedding the texts by hashing their tokens into the
+    dimensions, so the texts sharing the tokens are similar.
+
+    """
+
+    def __init__(self, dim: int = 64):
+        """Initialize the dummy text encoder.
+
+        Args:
+            dim (int): The dimensions of the vectors.
+
+        """
+
+        self.dim = dim
+        self.encoded: list[str] = []
+
+    @classmethod
+    def from_settings(cls) -> "DummyTextEncoder":
+        """Create the dummy text encoder."""
+
+        return cls()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode the texts.
+
+        Args:
+            texts (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The unit vectors of the texts.
+
+        """
+
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                vectors[row, zlib.crc32(token.encode()) % self.dim] += 1
+
+        return normalize_vectors(vectors)
+
+
+def make_clustered_vectors(rng: np.random.Generator, size: int, dim: int) -> np.ndarray:
+    """Make the unit vectors around 16 random centers."""
+
+    centers = rng.standard_normal((16, dim))
+
+    return normalize_vectors(
+        centers[rng.integers(0, 16, size)] + 0.3 * rng.standard_normal((size, dim))
+    )
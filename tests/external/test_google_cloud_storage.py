@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the google cloud storage handler."""
+
+import asyncio
+import time
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from google.oauth2 import service_account
+
+from app.common.exceptions import PayloadTooLargeError
+from app.external.storage.google_cloud_storage import GoogleCloudStorageHandler
+from tests.data.paper import DummyPaperFactory
+from tests.misc import generate_random_obj_id
+
+# Latency of every mocked storage request, and the longest tolerated stall of the event loop.
+STORAGE_LATENCY = 0.2
+LOOP_BLOCK_THRESHOLD = 0.05
+
+
+def block(*args, **kwargs):
+    """Block the calling thread like a synchronous storage request."""
+
+    time.sleep(STORAGE_LATENCY)
+
+
+class TestGoogleCloudStorageHandler(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the google cloud storage handler."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.dummy_data = DummyPaperFactory()
+
+        GoogleCloudStorageHandler.clients.clear()
+        GoogleCloudStorageHandler.buckets.clear()
+
+        self.mock_blob = MagicMock(
+            size=4, etag="etag", updated=None, content_type="application/pdf"
+        )
+        self.mock_blob.upload_from_string.side_effect = block
+        self.mock_blob.download_as_bytes.side_effect = lambda: block() or b"test"
+
+        self.mock_bucket = MagicMock()
+        self.mock_bucket.blob.return_value = self.mock_blob
+        self.mock_bucket.get_blob.side_effect = lambda name: block() or self.mock_blob
+
+        self.mock_client = MagicMock()
+        self.mock_client.get_bucket.side_effect = lambda name: block() or self.mock_bucket
+
+        self.mock_credentials = MagicMock(spec=service_account.Credentials)
+
+        patcher = patch(
+            "app.external.storage.google_cloud_storage.Client",
+            side_effect=lambda project, credentials: block() or self.mock_client,
+        )
+        self.mock_client_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch(
+            "google.auth.default", side_effect=lambda scopes: (self.mock_credentials, "project")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.handler = GoogleCloudStorageHandler(project_id="project", bucket_id="bucket")
+
+    async def measure_max_loop_lag(self, stop: asyncio.Event) -> float:
+        """Measure the longest stall of the event loop until `stop` is set.
+
+        Args:
+            stop (asyncio.Event): The event which stops the measurement.
+
+        Returns:
+            float: The longest stall in seconds.
+
+        """
+
+        max_lag = 0.0
+        interval = 0.005
+
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, time.perf_counter() - started - interval)
+
+        return max_lag
+
+    async def test_storage_operations_do_not_block_loop(self):
+        """Test the storage operations never block the event loop."""
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(self.measure_max_loop_lag(stop))
+
+        await self.handler.upload_blob("bucket", self.dummy_data.raw_paper_bytes, "blob")
+        await self.handler.get_blob_metadata("bucket", "blob")
+        result = await self.handler.download_blob("bucket", "blob")
+
+        stop.set()
+        max_lag = await monitor
+
+        self.assertEqual(result, b"test")
+        self.assertLess(max_lag, LOOP_BLOCK_THRESHOLD)
+
+    async def test_bucket_is_cached(self):
+        """Test the client and the bucket are resolved once per process."""
+
+        await self.handler.get_blob_metadata("bucket", "blob")
+        await self.handler.download_blob("bucket", "blob")
+        other_handler = GoogleCloudStorageHandler(project_id="project", bucket_id="bucket")
+        await other_handler.upload_blob("bucket", b"", "blob")
+
+        self.assertEqual(self.mock_client_class.call_count, 1)
+        self.assertEqual(self.mock_client.get_bucket.call_count, 1)
+
+    async def test_upload_blob_from_stream(self):
+        """Test upload_blob_from_stream method copies the completed partial blob."""
+
+        writer = self.mock_blob.open.return_value
+        writer.closed = False
+
+        def close():
+            writer.closed = True
+
+        writer.close.side_effect = close
+
+        result = await self.handler.upload_blob_from_stream(
+            "bucket", self.dummy_data.iter_raw_paper_chunks(), "blob", chunk_size=1
+        )
+        partial_blob_name = self.mock_bucket.blob.call_args.args[0]
+
+        self.assertEqual(result, "gs://bucket/blob")
+        self.assertTrue(partial_blob_name.startswith("blob.") and partial_blob_name != "blob")
+        self.assertEqual(
+            b"".join(call.args[0] for call in writer.write.call_args_list),
+            self.dummy_data.raw_paper_bytes,
+        )
+        self.mock_bucket.copy_blob.assert_called_once_with(self.mock_blob, self.mock_bucket, "blob")
+        self.mock_blob.delete.assert_called_once()
+
+    async def test_upload_blob_from_stream_error(self):
+        """Test upload_blob_from_stream method deletes the partial blob of a failed stream."""
+
+        writer = self.mock_blob.open.return_value
+        writer.closed = False
+
+        async def stream():
+            yield b"test"
+            raise PayloadTooLargeError("Response body exceeds the limit of 4 bytes")
+
+        with self.assertRaises(PayloadTooLargeError):
+            await self.handler.upload_blob_from_stream("bucket", stream(), "blob", chunk_size=1)
+
+        writer.close.assert_called_once()
+        self.mock_bucket.copy_blob.assert_not_called()
+        self.mock_blob.delete.assert_called_once()
+
+    async def test_iter_blob(self):
+        """Test iter_blob method downloads the byte range with a ranged request per chunk."""
+
+        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+        self.mock_blob.download_as_bytes.side_effect = lambda start, end: raw_paper_bytes[
+            start : end + 1
+        ]
+
+        chunks = [
+            chunk
+            async for chunk in self.handler.iter_blob(
+                "bucket", "blob", start=1, end=len(raw_paper_bytes) - 2, chunk_size=1
+            )
+        ]
+        ranges = [call.kwargs for call in self.mock_blob.download_as_bytes.call_args_list]
+
+        self.assertEqual(b"".join(chunks), raw_paper_bytes[1:-1])
+        self.assertEqual(ranges, [{"start": 1, "end": 1}, {"start": 2, "end": 2}])
+
+    async def test_generate_signed_url(self):
+        """Test generate_signed_url signs with the key or on behalf of the service account."""
+
+        self.mock_blob.generate_signed_url.return_value = "https://signed"
+        expiration = timedelta(minutes=15)
+
+        signed_with_key = await self.handler.generate_signed_url("bucket", "blob", expiration)
+        key_kwargs = self.mock_blob.generate_signed_url.call_args.kwargs
+        key_credentials = self.mock_client_class.call_args.kwargs["credentials"]
+
+        access_token = generate_random_obj_id()
+        GoogleCloudStorageHandler.clients.clear()
+        self.mock_credentials = MagicMock(
+            valid=True, service_account_email="worker@project", token=access_token
+        )
+        signed_with_iam = await self.handler.generate_signed_url("bucket", "blob", expiration)
+        iam_kwargs = self.mock_blob.generate_signed_url.call_args.kwargs
+
+        self.assertEqual([signed_with_key, signed_with_iam], ["https://signed"] * 2)
+        self.assertIs(key_kwargs["credentials"], key_credentials)
+        self.assertNotIn("access_token", key_kwargs)
+        self.assertEqual(iam_kwargs["service_account_email"], "worker@project")
+        self.assertEqual(iam_kwargs["access_token"], access_token)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the local storage handler."""
+
+import io
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+
+from app.external.storage.local_storage import LocalStorageHandler
+from tests.data.paper import DummyPaperFactory
+
+
+class TestLocalStorageHandler(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the local storage handler."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.dummy_data = DummyPaperFactory()
+        self.root_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root_dir.cleanup)
+
+        self.handler = LocalStorageHandler(root_path=self.root_dir.name, bucket_id="bucket")
+        self.blob_name = "paper_documents/paper.pdf"
+
+    def list_files(self) -> list[str]:
+        """List the files under the root directory.
+
+        Returns:
+            list[str]: The names of the files.
+
+        """
+
+        return [name for _, _, names in os.walk(self.root_dir.name) for name in names]
+
+    async def test_upload_and_download_blob(self):
+        """Test upload_blob and download_blob methods."""
+
+        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+
+        blob_url = await self.handler.upload_blob("bucket", raw_paper_bytes, self.blob_name)
+        metadata = await self.handler.get_blob_metadata("bucket", self.blob_name)
+
+        self.assertEqual(blob_url, f"local://bucket/{self.blob_name}")
+        self.assertEqual(
+            await self.handler.download_blob("bucket", self.blob_name), raw_paper_bytes
+        )
+        self.assertEqual(metadata.size, len(raw_paper_bytes))
+        self.assertEqual(metadata.content_type, "application/pdf")
+        self.assertEqual(self.list_files(), ["paper.pdf"])
+
+    async def test_get_blob_path(self):
+        """Test get_blob_path method shards the blobs and rejects escaping names."""
+
+        path = self.handler.get_blob_path("bucket", self.blob_name)
+        shard = os.path.relpath(path, os.path.join(self.root_dir.name, "bucket")).split(os.sep)
+
+        self.assertEqual([len(shard[0]), len(shard[1])], [2, 2])
+        self.assertEqual(shard[2:], ["paper_documents", "paper.pdf"])
+        self.assertIsNone(await self.handler.get_blob_metadata("bucket", self.blob_name))
+
+        with self.assertRaises(ValueError):
+            self.handler.get_blob_path("bucket", "../../../etc/passwd")
+
+    async def test_upload_blob_from_stream(self):
+        """Test upload_blob_from_stream method."""
+
+        await self.handler.upload_blob_from_stream(
+            "bucket", self.dummy_data.iter_raw_paper_chunks(), self.blob_name, chunk_size=1
+        )
+
+        self.assertEqual(
+            await self.handler.download_blob("bucket", self.blob_name),
+            self.dummy_data.raw_paper_bytes,
+        )
+
+    async def test_upload_blob_from_failed_stream(self):
+        """Test upload_blob_from_stream method leaves nothing when the stream fails."""
+
+        async def failing_stream():
+            yield b"partial"
+            raise ConnectionError("Connection reset")
+
+        with self.assertRaises(ConnectionError):
+            await self.handler.upload_blob_from_stream(
+                "bucket", failing_stream(), self.blob_name, chunk_size=1
+            )
+
+        self.assertEqual(self.list_files(), [])
+
+    async def test_upload_blob_from_file(self):
+        """Test upload_blob_from_file method with in memory and on disk files."""
+
+        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+
+        with tempfile.TemporaryFile() as file:
+            file.write(raw_paper_bytes)
+            await self.handler.upload_blob_from_file("bucket", file, "disk.pdf", chunk_size=1)
+
+        await self.handler.upload_blob_from_file(
+            "bucket", io.BytesIO(raw_paper_bytes), "memory.pdf", chunk_size=1
+        )
+
+        self.assertEqual(await self.handler.download_blob("bucket", "disk.pdf"), raw_paper_bytes)
+        self.assertEqual(await self.handler.download_blob("bucket", "memory.pdf"), raw_paper_bytes)
+
+    async def test_delete_blob(self):
+        """Test delete_blob method."""
+
+        await self.handler.upload_blob("bucket", self.dummy_data.raw_paper_bytes, self.blob_name)
+
+        self.assertTrue(await self.handler.delete_blob("bucket", self.blob_name))
+        self.assertFalse(await self.handler.delete_blob("bucket", self.blob_name))
+        self.assertIsNone(await self.handler.get_blob_metadata("bucket", self.blob_name))
+
+    async def test_iter_blob(self):
+        """Test iter_blob method reads the byte range in chunks."""
+
+        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+        await self.handler.upload_blob("bucket", raw_paper_bytes, self.blob_name)
+        await self.handler.upload_blob("bucket", b"", "empty.pdf")
+
+        chunks = [
+            chunk
+            async for chunk in self.handler.iter_blob(
+                "bucket", self.blob_name, start=1, end=len(raw_paper_bytes) - 2, chunk_size=3
+            )
+        ]
+        empty_chunks = [
+            chunk async for chunk in self.handler.iter_blob("bucket", "empty.pdf", 0, -1, 3)
+        ]
+
+        self.assertEqual(b"".join(chunks), raw_paper_bytes[1:-1])
+        self.assertTrue(all(len(chunk) <= 3 for chunk in chunks))
+        self.assertEqual(empty_chunks, [])
+
+    async def test_generate_signed_url(self):
+        """Test generate_signed_url method is not supported."""
+
+        self.assertIsNone(
+            await self.handler.generate_signed_url("bucket", self.blob_name, timedelta(1))
+        )
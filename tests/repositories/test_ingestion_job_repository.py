@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the ingestion job repository."""
+
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from beanie import PydanticObjectId
+
+from app.common.enums import IngestionJobStatus
+from app.core.config import settings
+from app.models.ingestion_job import IngestionJob
+from app.repositories.ingestion_job import IngestionJobRepository
+from tests.session.mongo import MockMongoDBSession
+
+
+class TestIngestionJobRepository(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ingestion job repository."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.mock_session = MockMongoDBSession()
+        self.repo = IngestionJobRepository()
+
+    async def asyncSetUp(self) -> None:
+        """Set up the async test case."""
+
+        await self.mock_session.connect_to_mock_mongo(models=[IngestionJob])
+        await IngestionJob.delete_all()
+
+    async def test_claim(self):
+        """Test claim method leases a pending job only once."""
+
+        job = await self.repo.enqueue(paper_id=PydanticObjectId())
+
+        claimed = await self.repo.claim(worker_id="worker-1", lease_seconds=60)
+
+        self.assertIsNotNone(claimed)
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, IngestionJobStatus.RUNNING)
+        self.assertEqual(claimed.lease_owner, "worker-1")
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(await self.repo.claim(worker_id="worker-2", lease_seconds=60))
+
+    async def test_claim_expired_lease(self):
+        """Test claim method takes over a job whose lease is expired."""
+
+        await self.repo.enqueue(paper_id=PydanticObjectId())
+        stale = await self.repo.claim(worker_id="worker-1", lease_seconds=-1)
+
+        claimed = await self.repo.claim(worker_id="worker-2", lease_seconds=60)
+
+        self.assertEqual(claimed.id, stale.id)
+        self.assertEqual(claimed.lease_owner, "worker-2")
+        self.assertEqual(claimed.attempts, 2)
+        self.assertFalse(await self.repo.heartbeat(stale, lease_seconds=60))
+        self.assertTrue(await self.repo.heartbeat(claimed, lease_seconds=60))
+
+    @patch.object(settings, "INGESTION_JOB_MAX_ATTEMPTS", 2)
+    async def test_dead_letter_expired(self):
+        """Test an expired job without attempts left is not claimed but dead lettered."""
+
+        job = await self.repo.enqueue(paper_id=PydanticObjectId())
+        await self.repo.claim(worker_id="worker-1", lease_seconds=-1)
+
+        stale = await self.repo.claim(worker_id="worker-2", lease_seconds=-1)
+
+        self.assertEqual((stale.id, stale.attempts), (job.id, 2))
+        self.assertIsNone(await self.repo.claim(worker_id="worker-3", lease_seconds=60))
+
+        dead_jobs = await self.repo.dead_letter_expired()
+
+        self.assertEqual([dead_job.id for dead_job in dead_jobs], [job.id])
+        self.assertEqual(dead_jobs[0].status, IngestionJobStatus.FAILED)
+        self.assertIsNone(dead_jobs[0].lease_owner)
+        self.assertEqual(await self.repo.dead_letter_expired(), [])
+
+    async def test_enqueue_many(self):
+        """Test enqueue_many method inserts the jobs in chunks."""
+
+        paper_ids = [PydanticObjectId() for _ in range(5)]
+
+        with patch.object(
+            IngestionJobRepository, "create_many", wraps=self.repo.create_many
+        ) as mock_create_many:
+            errors = await self.repo.enqueue_many(paper_ids, chunk_size=2)
+
+        jobs = await IngestionJob.find_all().to_list()
+
+        self.assertEqual(errors, {})
+        self.assertEqual(mock_create_many.call_count, 3)
+        self.assertEqual(sorted(job.paper_id for job in jobs), sorted(paper_ids))
+
+    async def test_complete(self):
+        """Test complete method."""
+
+        await self.repo.enqueue(paper_id=PydanticObjectId())
+        claimed = await self.repo.claim(worker_id="worker-1", lease_seconds=60)
+
+        self.assertTrue(await self.repo.complete(claimed))
+
+        completed = await IngestionJob.get(claimed.id)
+        self.assertEqual(completed.status, IngestionJobStatus.SUCCESS)
+        self.assertIsNone(completed.lease_owner)
+
+    async def test_fail_with_retry(self):
+        """Test fail method reschedules the job with an exponential backoff."""
+
+        await self.repo.enqueue(paper_id=PydanticObjectId())
+        claimed = await self.repo.claim(worker_id="worker-1", lease_seconds=60)
+
+        status = await self.repo.fail(claimed, error="error")
+
+        failed = await IngestionJob.get(claimed.id)
+        delay = failed.next_run_at - datetime.utcnow()
+        self.assertEqual(status, IngestionJobStatus.PENDING)
+        self.assertEqual(failed.last_error, "error")
+        self.assertGreater(delay, timedelta(seconds=settings.INGESTION_JOB_RETRY_BASE_DELAY - 5))
+        self.assertIsNone(await self.repo.claim(worker_id="worker-1", lease_seconds=60))
+
+    @patch.object(settings, "INGESTION_JOB_MAX_ATTEMPTS", 1)
+    async def test_fail_without_attempts_left(self):
+        """Test fail method marks the job as failed when it runs out of attempts."""
+
+        await self.repo.enqueue(paper_id=PydanticObjectId())
+        claimed = await self.repo.claim(worker_id="worker-1", lease_seconds=60)
+
+        status = await self.repo.fail(claimed, error="error")
+
+        failed = await IngestionJob.get(claimed.id)
+        self.assertEqual(status, IngestionJobStatus.FAILED)
+        self.assertEqual(failed.status, IngestionJobStatus.FAILED)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the paper blob repository."""
+
+import asyncio
+import unittest
+
+from app.models.paper_blob import PaperBlob
+from app.repositories.paper_blob import PaperBlobRepository
+from tests.data.paper import DummyPaperFactory
+from tests.session.mongo import MockMongoDBSession
+
+
+class TestPaperBlobRepository(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the paper blob repository."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.mock_session = MockMongoDBSession()
+        self.dummy_data = DummyPaperFactory()
+        self.repo = PaperBlobRepository()
+
+    async def asyncSetUp(self) -> None:
+        """Set up the async test case."""
+
+        await self.mock_session.connect_to_mock_mongo(models=[PaperBlob])
+        await PaperBlob.delete_all()
+
+    async def test_acquire(self):
+        """Test acquire method counts the references of the same content."""
+
+        content_hash = self.dummy_data.content_hash
+        blob_url = self.dummy_data.gcs_content_blob_url
+
+        await self.repo.acquire(content_hash=content_hash, blob_url=blob_url, size=4)
+        paper_blob = await self.repo.acquire(
+            content_hash=content_hash, blob_url="gs://bucket/other.pdf", size=4
+        )
+
+        self.assertEqual(paper_blob.ref_count, 2)
+        self.assertEqual(paper_blob.blob_url, blob_url)
+        self.assertEqual(await self.repo.get_by_hash(content_hash), paper_blob)
+
+    async def test_release(self):
+        """Test release method."""
+
+        content_hash = self.dummy_data.content_hash
+        blob_url = self.dummy_data.gcs_content_blob_url
+
+        await self.repo.acquire(content_hash=content_hash, blob_url=blob_url, size=4)
+
+        paper_blob = await self.repo.release(content_hash=content_hash)
+
+        self.assertEqual(paper_blob.ref_count, 0)
+        self.assertIsNone(await self.repo.release(content_hash=content_hash))
+
+    async def test_delete_marked(self):
+        """Test the unreferenced paper blob is marked and deleted, and hidden meanwhile."""
+
+        content_hash = self.dummy_data.content_hash
+        blob_url = self.dummy_data.gcs_content_blob_url
+
+        await self.repo.acquire(content_hash=content_hash, blob_url=blob_url, size=4)
+        self.assertIsNone(await self.repo.mark_deleting(content_hash))
+
+        await self.repo.release(content_hash=content_hash)
+        paper_blob = await self.repo.mark_deleting(content_hash)
+
+        self.assertEqual(paper_blob.ref_count, -1)
+        self.assertIsNone(await self.repo.get_by_hash(content_hash))
+        self.assertIsNone(await self.repo.release(content_hash=content_hash))
+
+        self.assertTrue(await self.repo.unmark_deleting(content_hash))
+        self.assertEqual((await self.repo.get_by_hash(content_hash)).ref_count, 0)
+
+        await self.repo.mark_deleting(content_hash)
+
+        self.assertTrue(await self.repo.delete_marked(content_hash))
+        self.assertFalse(await self.repo.delete_marked(content_hash))
+        self.assertEqual(await PaperBlob.count(), 0)
+
+    async def test_acquire_while_deleting(self):
+        """Test acquire method waits for the deletion of the paper blob to finish."""
+
+        content_hash = self.dummy_data.content_hash
+        blob_url = self.dummy_data.gcs_content_blob_url
+
+        await self.repo.acquire(content_hash=content_hash, blob_url=blob_url, size=4)
+        await self.repo.release(content_hash=content_hash)
+        await self.repo.mark_deleting(content_hash)
+
+        acquired = asyncio.create_task(
+            self.repo.acquire(content_hash=content_hash, blob_url=blob_url, size=4)
+        )
+        await asyncio.sleep(0.05)
+
+        self.assertFalse(acquired.done())
+
+        await self.repo.delete_marked(content_hash)
+        paper_blob = await acquired
+
+        self.assertEqual(paper_blob.ref_count, 1)
+        self.assertEqual(await PaperBlob.count(), 1)
@@ -1,9 +1,16 @@
 # -*- coding: utf-8 -*-
 """Test for Paper document repository."""
 
+import asyncio
+import gc
+import os
 import unittest
-from unittest.mock import patch
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
 
+import aiohttp
+
+from app.core.config import settings
 from app.external.storage.google_cloud_storage import GoogleCloudStorageHandler
 from app.repositories.paper_document import PaperDocumentRepository
 from tests.data.paper import DummyPaperFactory
@@ -17,38 +24,184 @@ class TestPaperDocumentRepository(unittest.IsolatedAsyncioTestCase):
         """Set up the test case."""
 
         self.dummy_data = DummyPaperFactory()
-        with patch.object(GoogleCloudStorageHandler, "__init__", return_value=None):
-            self.paper_document_repo = PaperDocumentRepository()
+        self.storage = GoogleCloudStorageHandler.from_settings()
+        self.paper_document_repo = PaperDocumentRepository(storage=self.storage)
 
-    @patch_method(PaperDocumentRepository.download_blob)
-    async def test_download_paper_document(self, mock_download_blob):
-        """Test download_paper_document method."""
+        PaperDocumentRepository.signed_urls.clear()
 
-        paper_metadata_id = self.dummy_data.paper_metadata_id
-        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+    async def test_connect_shared_http_session(self):
+        """Test connect_session method with the shared http session."""
 
-        mock_download_blob.return_value = raw_paper_bytes
-        result = await self.paper_document_repo.download_paper_document(
-            paper_obj_id=paper_metadata_id
+        http_session = MagicMock(spec=aiohttp.ClientSession)
+        paper_document_repo = PaperDocumentRepository(
+            http_session=http_session, storage=self.storage
         )
 
-        self.assertEqual(result, raw_paper_bytes)
+        async with paper_document_repo.connect_session() as session:
+            self.assertIs(session, http_session)
+
+        http_session.close.assert_not_called()
 
-    @patch_method(PaperDocumentRepository.request)
-    @patch_method(PaperDocumentRepository.upload_blob)
-    async def test_upload_paper_document(self, mock_upload_blob, mock_request):
+    @patch_method(PaperDocumentRepository.stream)
+    @patch_method(GoogleCloudStorageHandler.upload_blob_from_stream)
+    async def test_upload_paper_document(self, mock_upload_blob_from_stream, mock_stream):
         """Test upload_paper_document method."""
 
+        paper_url = self.dummy_data.paper_url
+        paper_metadata_id = self.dummy_data.paper_metadata_id
+        gcs_blob_url = self.dummy_data.gcs_blob_url
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+
+        mock_upload_blob_from_stream.return_value = gcs_blob_url
+        result = await self.paper_document_repo.upload_paper_document(
+            paper_obj_id=paper_metadata_id, paper_url=paper_url
+        )
+
+        self.assertEqual(result, gcs_blob_url)
+        self.assertEqual(mock_stream.call_args.kwargs["max_size"], settings.PAPER_DOCUMENT_MAX_SIZE)
+
+    @patch.object(settings, "PAPER_DOCUMENT_STREAMING", False)
+    @patch_method(PaperDocumentRepository.stream)
+    @patch_method(GoogleCloudStorageHandler.upload_blob_from_file)
+    async def test_upload_paper_document_without_streaming(
+        self, mock_upload_blob_from_file, mock_stream
+    ):
+        """Test upload_paper_document method without streaming."""
+
         paper_url = self.dummy_data.paper_url
         paper_metadata_id = self.dummy_data.paper_metadata_id
         raw_paper_bytes = self.dummy_data.raw_paper_bytes
         gcs_blob_url = self.dummy_data.gcs_blob_url
+        uploaded = []
 
-        mock_request.content.read.return_value = raw_paper_bytes
+        async def upload_blob_from_file(**kwargs):
+            uploaded.append(kwargs["file"].read())
+            return gcs_blob_url
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+        mock_upload_blob_from_file.side_effect = upload_blob_from_file
 
-        mock_upload_blob.return_value = None
         result = await self.paper_document_repo.upload_paper_document(
             paper_obj_id=paper_metadata_id, paper_url=paper_url
         )
 
         self.assertEqual(result, gcs_blob_url)
+        self.assertEqual(uploaded, [raw_paper_bytes])
+        self.assertEqual(
+            mock_upload_blob_from_file.call_args.kwargs["destination_blob_name"],
+            PaperDocumentRepository.get_paper_blob_name(paper_metadata_id),
+        )
+
+    @patch_method(PaperDocumentRepository.stream)
+    async def test_spool_paper_document(self, mock_stream):
+        """Test spool_paper_document method."""
+
+        paper_url = self.dummy_data.paper_url
+        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+
+        async with self.paper_document_repo.spool_paper_document(paper_url) as (
+            file,
+            content_hash,
+            size,
+        ):
+            self.assertEqual(file.read(), raw_paper_bytes)
+            self.assertEqual(content_hash, self.dummy_data.content_hash)
+            self.assertEqual(size, len(raw_paper_bytes))
+
+    @patch.object(settings, "PAPER_DOCUMENT_SPOOL_MEMORY_SIZE", 1)
+    @patch_method(PaperDocumentRepository.stream)
+    async def test_spool_paper_document_concurrently(self, mock_stream):
+        """Test the concurrent spools of a url share a download, and its file."""
+
+        paper_url = self.dummy_data.paper_url
+        raw_paper_bytes = self.dummy_data.raw_paper_bytes
+
+        async def stream(*args, **kwargs):
+            async for chunk in self.dummy_data.iter_raw_paper_chunks():
+                await asyncio.sleep(0)
+                yield chunk
+
+        async def spool():
+            async with self.paper_document_repo.spool_paper_document(paper_url) as (
+                file,
+                content_hash,
+                size,
+            ):
+                await asyncio.sleep(0.01)
+                return file.name, file.read(), content_hash, size
+
+        mock_stream.side_effect = stream
+
+        results = await asyncio.gather(*[spool() for _ in range(10)])
+        gc.collect()
+
+        mock_stream.assert_called_once()
+        self.assertEqual(len({name for name, *_ in results}), 1)
+        self.assertEqual(
+            [result[1:] for result in results],
+            [(raw_paper_bytes, self.dummy_data.content_hash, len(raw_paper_bytes))] * 10,
+        )
+        self.assertFalse(os.path.exists(results[0][0]))
+
+    @patch_method(PaperDocumentRepository.stream)
+    async def test_spool_paper_document_error(self, mock_stream):
+        """Test the concurrent spools of a url share the error of the download."""
+
+        mock_stream.side_effect = aiohttp.ClientError("Connection reset")
+
+        async def spool():
+            async with self.paper_document_repo.spool_paper_document(self.dummy_data.paper_url):
+                pass
+
+        results = await asyncio.gather(*[spool() for _ in range(2)], return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, aiohttp.ClientError) for result in results))
+        mock_stream.assert_called_once()
+        self.assertEqual(len(PaperDocumentRepository.spools), 0)
+
+    @patch_method(GoogleCloudStorageHandler.upload_blob_from_file)
+    async def test_upload_paper_document_file(self, mock_upload_blob_from_file):
+        """Test upload_paper_document_file method."""
+
+        mock_upload_blob_from_file.return_value = self.dummy_data.gcs_content_blob_url
+        result = await self.paper_document_repo.upload_paper_document_file(
+            file=MagicMock(), content_hash=self.dummy_data.content_hash
+        )
+
+        self.assertEqual(result, self.dummy_data.gcs_content_blob_url)
+
+    @patch_method(GoogleCloudStorageHandler.generate_signed_url)
+    async def test_get_paper_document_signed_url(self, mock_generate_signed_url):
+        """Test get_paper_document_signed_url method reuses the signed url."""
+
+        gcs_blob_url = self.dummy_data.gcs_blob_url
+        mock_generate_signed_url.return_value = "https://storage.googleapis.com/signed"
+
+        first = await self.paper_document_repo.get_paper_document_signed_url(gcs_blob_url)
+        second = await self.paper_document_repo.get_paper_document_signed_url(gcs_blob_url)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], "https://storage.googleapis.com/signed")
+        mock_generate_signed_url.assert_called_once_with(
+            bucket_name=str(settings.GOOGLE_CLOUD_STORAGE_BUCKET_ID),
+            blob_name=PaperDocumentRepository.get_paper_blob_name(
+                self.dummy_data.paper_metadata_id
+            ),
+            expiration=timedelta(seconds=settings.PAPER_DOCUMENT_SIGNED_URL_EXPIRATION),
+        )
+
+    @patch_method(GoogleCloudStorageHandler.generate_signed_url)
+    async def test_get_paper_document_unsigned_url(self, mock_generate_signed_url):
+        """Test get_paper_document_signed_url method with a storage which can not sign."""
+
+        mock_generate_signed_url.return_value = None
+
+        result = await self.paper_document_repo.get_paper_document_signed_url(
+            self.dummy_data.gcs_blob_url
+        )
+
+        self.assertIsNone(result)
+        self.assertEqual(len(PaperDocumentRepository.signed_urls), 0)
@@ -1,14 +1,32 @@
 # -*- coding: utf-8 -*-
 """Test cases for the paper metadata repository."""
 
+import asyncio
+import itertools
+import os
 import unittest
+from datetime import datetime
 from unittest.mock import patch
 
+from beanie import PydanticObjectId, init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel
+
+from app.common.cache import TTLCache
+from app.common.enums import BackgroundTaskStatus, CountStrategy, PaperListView, PaperSortOrder
+from app.common.exceptions import InvalidFieldError, InvalidPageTokenError, NotFoundError
 from app.external.database.mongo import MongoDBDocumentHandler
 from app.models.paper_metadata import PaperMetadata
-from app.repositories.paper_metadata import PaperMetadataRepository
+from app.repositories.paper_metadata import PAPER_SORT_KEYS, PaperMetadataRepository
+from app.schemas.paper_metadata import (
+    PAPER_LIST_VIEW_FIELDS,
+    ExportPaperMetadataParam,
+    GetPaperDetailSchema,
+    GetPaperListDetailSchema,
+    GetPaperMetadataListParam,
+)
 from tests.data.paper import DummyPaperFactory
-from tests.misc import patch_method
+from tests.misc import generate_random_obj_id, patch_method
 from tests.session.mongo import MockMongoDBSession
 
 
@@ -29,6 +47,9 @@ class TestPaperMetadataRepository(unittest.IsolatedAsyncioTestCase):
 
         await self.mock_session.connect_to_mock_mongo(models=[PaperMetadata])
 
+        MongoDBDocumentHandler.count_caches.clear()
+        PaperMetadataRepository.detail_cache = TTLCache(maxsize=10, ttl=60)
+
     @patch_method(PaperMetadataRepository.get)
     async def test_get_by_obj_id(self, mock_get):
         """Test get_by_obj_id method."""
@@ -53,7 +74,22 @@ class TestPaperMetadataRepository(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(result, paper_metadata_model)
 
-    @patch_method(PaperMetadataRepository.replace)
+    @patch_method(PaperMetadataRepository.create_many)
+    async def test_register_metadata_bulk(self, mock_create_many):
+        """Test register_metadata_bulk method."""
+
+        objs = [self.dummy_data.register_paper_schema for _ in range(5)]
+        mock_create_many.side_effect = [{}, {1: "E11000 Duplicate Key Error"}, {}]
+
+        documents, errors = await self.repo.register_metadata_bulk(objs=objs, chunk_size=2)
+
+        self.assertEqual(len(documents), 5)
+        self.assertEqual(errors, {3: "E11000 Duplicate Key Error"})
+        self.assertEqual(
+            [len(call.kwargs["documents"]) for call in mock_create_many.call_args_list], [2, 2, 1]
+        )
+
+    @patch_method(PaperMetadataRepository.update)
     async def test_update_gcs_blob_url(self, mock_update_one):
         """Test update_gcs_blob_url method."""
 
@@ -66,6 +102,177 @@ class TestPaperMetadataRepository(unittest.IsolatedAsyncioTestCase):
         )
 
         self.assertEqual(result, paper_metadata_model)
+        self.assertEqual(mock_update_one.call_args.kwargs["update"]["$inc"], {"revision": 1})
+
+    async def test_update_gcs_blob_url_revision(self):
+        """Test update_gcs_blob_url method increments the revision of the paper metadata."""
+
+        repo = PaperMetadataRepository()
+        created = await repo.register_metadata(self.dummy_data.register_paper_schema)
+        stale = created.model_copy()
+        stale.title = "stale title"
+
+        first, second = await asyncio.gather(
+            repo.update_gcs_blob_url(stale, BackgroundTaskStatus.FAILED),
+            repo.update_gcs_blob_url(stale, self.dummy_data.gcs_blob_url, content_hash="hash"),
+        )
+        revision = await repo.get_metadata_revision(str(created.id))
+
+        self.assertEqual(created.revision, 1)
+        self.assertIsNotNone(created.updated_at)
+        self.assertEqual({first.revision, second.revision}, {2, 3})
+        self.assertEqual(second.title, created.title)
+        self.assertEqual(second.content_hash, "hash")
+        self.assertEqual((revision.id, revision.revision), (created.id, 3))
+        self.assertGreaterEqual(revision.updated_at, created.updated_at.replace(tzinfo=None))
+        self.assertIsNone(await repo.get_metadata_revision(str(PydanticObjectId())))
+
+        stale.id = PydanticObjectId()
+
+        with self.assertRaises(NotFoundError):
+            await repo.update_gcs_blob_url(stale, BackgroundTaskStatus.FAILED)
+
+    async def test_get_metadata_by_id_concurrently(self):
+        """Test the concurrent reads of a paper metadata share a read until a write."""
+
+        repo = PaperMetadataRepository()
+        created = await repo.register_metadata(self.dummy_data.register_paper_schema)
+        obj_id = str(created.id)
+
+        with patch.object(PaperMetadataRepository, "get", wraps=repo.get) as mock_get:
+            results = await asyncio.gather(
+                *[repo.get_metadata_by_id(obj_id) for _ in range(10)],
+                *[repo.get_metadata_detail_by_id(obj_id) for _ in range(10)],
+            )
+
+            self.assertTrue(all(result is results[0] for result in results[:10]))
+            self.assertTrue(all(result is results[10] for result in results[10:]))
+            self.assertEqual(mock_get.call_count, 2)
+
+            read = asyncio.ensure_future(repo.get_metadata_by_id(obj_id))
+            await asyncio.sleep(0)
+            await repo.update_gcs_blob_url(created, BackgroundTaskStatus.FAILED)
+            updated = await repo.get_metadata_by_id(obj_id)
+            await read
+
+            self.assertEqual(updated.gcs_blob_url, BackgroundTaskStatus.FAILED)
+            self.assertEqual(mock_get.call_count, 4)
+
+    async def test_get_metadata_detail_by_id(self):
+        """Test get_metadata_detail_by_id method reads through the cache."""
+
+        repo = PaperMetadataRepository()
+        created = await repo.register_metadata(self.dummy_data.register_paper_schema)
+        missing_id = str(PydanticObjectId())
+
+        with patch.object(PaperMetadataRepository, "get", wraps=repo.get) as mock_get:
+            first = await repo.get_metadata_detail_by_id(str(created.id))
+            second = await repo.get_metadata_detail_by_id(str(created.id))
+            missing = await repo.get_metadata_detail_by_id(missing_id)
+            missing_again = await repo.get_metadata_detail_by_id(missing_id)
+
+        stats = repo.detail_cache.stats()
+
+        self.assertIs(first, second)
+        self.assertEqual(
+            first.model_dump(exclude={"updated_at"}),
+            GetPaperDetailSchema.model_validate(created).model_dump(exclude={"updated_at"}),
+        )
+        self.assertIsNone(missing)
+        self.assertIsNone(missing_again)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual((stats.hits, stats.misses), (2, 2))
+
+    async def test_get_metadata_detail_by_id_invalidation(self):
+        """Test the writes of the paper metadata invalidate its cached detail."""
+
+        repo = PaperMetadataRepository()
+        created = await repo.register_metadata(self.dummy_data.register_paper_schema)
+        obj_id = str(created.id)
+
+        cached = await repo.get_metadata_detail_by_id(obj_id)
+        await repo.update_gcs_blob_url(created, self.dummy_data.gcs_blob_url)
+        updated = await repo.get_metadata_detail_by_id(obj_id)
+
+        created.title = "replaced title"
+        await repo.replace(created)
+        replaced = await repo.get_metadata_detail_by_id(obj_id)
+
+        self.assertEqual(cached.gcs_blob_url, BackgroundTaskStatus.IN_PROGRESS)
+        self.assertEqual(updated.gcs_blob_url, self.dummy_data.gcs_blob_url)
+        self.assertEqual(updated.revision, 2)
+        self.assertEqual(replaced.title, "replaced title")
+
+        # A read which overlaps a write is not cached.
+        repo.invalidate_detail_cache([created.id])
+        read = repo.get
+
+        async def get_during_write(obj_id):
+            document = await read(obj_id=obj_id)
+            await repo.update_gcs_blob_url(created, BackgroundTaskStatus.FAILED)
+            return document
+
+        with patch.object(PaperMetadataRepository, "get", side_effect=get_during_write):
+            stale = await repo.get_metadata_detail_by_id(obj_id)
+
+        fresh = await repo.get_metadata_detail_by_id(obj_id)
+
+        self.assertEqual(stale.title, "replaced title")
+        self.assertEqual(fresh.gcs_blob_url, BackgroundTaskStatus.FAILED)
+
+        missing_id = PydanticObjectId()
+        self.assertIsNone(await repo.get_metadata_detail_by_id(str(missing_id)))
+
+        document = PaperMetadataRepository.create_document(self.dummy_data.register_paper_schema)
+        document.id = missing_id
+        await repo.create(document)
+
+        self.assertIsNotNone(await repo.get_metadata_detail_by_id(str(missing_id)))
+
+    async def test_get_metadata_detail_by_id_min_revision(self):
+        """Test a cached detail older than the revision in the database is read again."""
+
+        repo = PaperMetadataRepository()
+        created = await repo.register_metadata(self.dummy_data.register_paper_schema)
+        obj_id = str(created.id)
+
+        cached = await repo.get_metadata_detail_by_id(obj_id)
+
+        # Another process writes the paper metadata, which does not invalidate this cache.
+        await PaperMetadata.find_one(PaperMetadata.id == created.id).update(
+            {"$set": {"gcs_blob_url": self.dummy_data.gcs_blob_url}, "$inc": {"revision": 1}}
+        )
+        revision = await repo.get_metadata_revision(obj_id)
+
+        stale = await repo.get_metadata_detail_by_id(obj_id)
+        fresh = await repo.get_metadata_detail_by_id(obj_id, min_revision=revision.revision)
+
+        self.assertIs(stale, cached)
+        self.assertEqual(revision.revision, cached.revision + 1)
+        self.assertEqual(fresh.revision, revision.revision)
+        self.assertEqual(fresh.gcs_blob_url, self.dummy_data.gcs_blob_url)
+        self.assertIs(await repo.get_metadata_detail_by_id(obj_id), fresh)
+
+    async def test_get_metadata_revisions_by_page(self):
+        """Test get_metadata_revisions_by_page method reads only the revisions of the page."""
+
+        repo = PaperMetadataRepository()
+        documents, _ = await repo.register_metadata_bulk(
+            [self.dummy_data.register_paper_schema] * 3
+        )
+        obj = GetPaperMetadataListParam(page_size=2, sort=PaperSortOrder.TITLE)
+
+        page = await repo.get_metadata_list_by_page(obj)
+        revisions = await repo.get_metadata_revisions_by_page(obj)
+
+        self.assertEqual([item.id for item in revisions.items], [item.id for item in page.items])
+        self.assertEqual(revisions.next_page_token, page.next_page_token)
+        self.assertEqual(revisions.total, 3)
+        self.assertEqual(revisions.items[0].model_fields_set, {"id", "title", "revision"})
+        self.assertEqual(revisions.items[0].revision, documents[0].revision)
+
+        with self.assertRaises(InvalidFieldError):
+            await repo.get_metadata_revisions_by_page(GetPaperMetadataListParam(fields="secret"))
 
     @patch_method(PaperMetadataRepository.find_many)
     async def test_get_metadata_list(self, mock_find):
@@ -78,3 +285,440 @@ class TestPaperMetadataRepository(unittest.IsolatedAsyncioTestCase):
         result = await self.repo.get_metadata_list_by_page(obj=obj)
 
         self.assertEqual(result, paginated_paper_metadata)
+
+    async def test_count(self):
+        """Test count method with the count strategies."""
+
+        repo = PaperMetadataRepository()
+        query = {"venue": "venue"}
+        await repo.register_metadata_bulk([self.dummy_data.register_paper_schema] * 3)
+
+        self.assertEqual(await repo.count({}, CountStrategy.ESTIMATED), 3)
+        self.assertEqual(await repo.count(query, CountStrategy.CACHED), 3)
+        self.assertEqual(len(repo.count_cache), 1)
+        self.assertIsNone(await repo.count(query, CountStrategy.SKIP))
+
+        await repo.register_metadata(self.dummy_data.register_paper_schema)
+
+        self.assertEqual(len(repo.count_cache), 0)
+        self.assertEqual(await repo.count(query, CountStrategy.CACHED), 4)
+        self.assertEqual(await repo.count({"venue": "other"}, CountStrategy.EXACT), 0)
+
+    async def test_count_cache_updates(self):
+        """Test the count cache is only cleared by the updates of the filtered fields."""
+
+        repo = PaperMetadataRepository()
+        query = {"venue": "venue"}
+        documents, _ = await repo.register_metadata_bulk(
+            [self.dummy_data.register_paper_schema] * 3
+        )
+
+        self.assertEqual(await repo.count(query, CountStrategy.CACHED), 3)
+
+        await repo.update_gcs_blob_url(
+            documents[0], self.dummy_data.gcs_content_blob_url, content_hash="0" * 64
+        )
+        await repo.update_gcs_blob_url(documents[1], BackgroundTaskStatus.FAILED)
+
+        self.assertEqual(len(repo.count_cache), 1)
+
+        await repo.update(documents[0].id, {"$set": {"venue": "other"}})
+
+        self.assertEqual(len(repo.count_cache), 0)
+        self.assertEqual(await repo.count(query, CountStrategy.CACHED), 2)
+
+    async def test_get_metadata_list_total(self):
+        """Test get_metadata_list method counts the total regardless of the page."""
+
+        repo = PaperMetadataRepository()
+        await repo.register_metadata_bulk([self.dummy_data.register_paper_schema] * 3)
+
+        first_page = await repo.get_metadata_list_by_page(GetPaperMetadataListParam(page_size=1))
+        next_page = await repo.get_metadata_list_by_page(
+            GetPaperMetadataListParam(page_token=first_page.next_page_token, page_size=1)
+        )
+        without_total = await repo.get_metadata_list_by_page(
+            GetPaperMetadataListParam(page_size=1, include_total=False)
+        )
+
+        self.assertEqual(first_page.total, 3)
+        self.assertEqual(next_page.total, 3)
+        self.assertEqual(len(next_page.items), 1)
+        self.assertIsNone(without_total.total)
+
+    async def register_papers(self, repo: PaperMetadataRepository) -> list[PaperMetadata]:
+        """Register papers whose published dates and titles have ties.
+
+        Args:
+            repo (PaperMetadataRepository): The paper metadata repository.
+
+        Returns:
+            list[PaperMetadata]: The registered paper metadata.
+
+        """
+
+        objs = []
+
+        for index in range(7):
+            obj = self.dummy_data.register_paper_schema
+            obj.title = f"title {index % 3}"
+            obj.published_at = datetime(2021, 1, 1 + index % 2)
+            objs.append(obj)
+
+        documents, _ = await repo.register_metadata_bulk(objs)
+
+        return documents
+
+    async def test_get_metadata_list_keyset_pages(self):
+        """Test get_metadata_list method pages forward and backward in every sort order."""
+
+        repo = PaperMetadataRepository()
+        documents = await self.register_papers(repo)
+
+        expected_orders = {
+            PaperSortOrder.ID: sorted(documents, key=lambda document: document.id),
+            PaperSortOrder.PUBLISHED_AT: sorted(
+                documents,
+                key=lambda document: (document.published_at, document.id),
+                reverse=True,
+            ),
+            PaperSortOrder.TITLE: sorted(
+                documents, key=lambda document: (document.title, document.id)
+            ),
+        }
+
+        for sort, expected in expected_orders.items():
+            pages, page_token = [], None
+
+            while True:
+                page = await repo.get_metadata_list_by_page(
+                    GetPaperMetadataListParam(page_token=page_token, page_size=3, sort=sort)
+                )
+                pages.append(page)
+                page_token = page.next_page_token
+
+                if page_token is None:
+                    break
+
+            previous_page = await repo.get_metadata_list_by_page(
+                GetPaperMetadataListParam(
+                    page_token=pages[-1].prev_page_token, page_size=3, sort=sort
+                )
+            )
+
+            self.assertEqual(
+                [document.id for page in pages for document in page.items],
+                [document.id for document in expected],
+                sort,
+            )
+            self.assertEqual([len(page.items) for page in pages], [3, 3, 1])
+            self.assertIsNone(pages[0].prev_page_token)
+            self.assertEqual(
+                [document.id for document in previous_page.items],
+                [document.id for document in pages[1].items],
+            )
+            self.assertIsNotNone(previous_page.prev_page_token)
+
+    async def test_get_metadata_list_invalid_page_token(self):
+        """Test get_metadata_list method rejects the page token of another sort order."""
+
+        repo = PaperMetadataRepository()
+        await self.register_papers(repo)
+        page = await repo.get_metadata_list_by_page(
+            GetPaperMetadataListParam(page_size=3, sort=PaperSortOrder.TITLE)
+        )
+
+        with self.assertRaises(InvalidPageTokenError):
+            await repo.get_metadata_list_by_page(
+                GetPaperMetadataListParam(page_token=page.next_page_token, page_size=3)
+            )
+
+    def test_sort_order_indexes(self):
+        """Test every sort order has a compound index of its sort key."""
+
+        index_keys = [
+            list(index.document["key"].items())
+            for index in PaperMetadata.Settings.indexes
+            if isinstance(index, IndexModel)
+        ]
+
+        for sort_keys in PAPER_SORT_KEYS.values():
+            if len(sort_keys) > 1:
+                self.assertIn([(key, int(direction)) for key, direction in sort_keys], index_keys)
+
+    def test_filter_sort_order_indexes(self):
+        """Test every filter field has a compound index for every sort order."""
+
+        index_keys = [
+            list(index.document["key"].items())
+            for index in PaperMetadata.Settings.indexes
+            if isinstance(index, IndexModel)
+        ]
+
+        for field in ["venue", "authors", "keywords"]:
+            for sort_keys in PAPER_SORT_KEYS.values():
+                self.assertIn(
+                    [(field, 1), *((key, int(direction)) for key, direction in sort_keys)],
+                    index_keys,
+                )
+
+    async def test_get_metadata_list_filters(self):
+        """Test get_metadata_list method with the filters."""
+
+        repo = PaperMetadataRepository()
+        objs = []
+
+        for index in range(6):
+            obj = self.dummy_data.register_paper_schema
+            obj.venue = f"venue {index % 2}"
+            obj.authors = [f"author {index}", "author"]
+            obj.keywords = [f"keyword {index % 3}"]
+            obj.published_at = datetime(2021, 1 + index, 1)
+            objs.append(obj)
+
+        await repo.register_metadata_bulk(objs)
+
+        filters_and_counts = [
+            ({"venue": "venue 0"}, 3),
+            ({"author": "author 1"}, 1),
+            ({"author": "author"}, 6),
+            ({"keyword": "keyword 2"}, 2),
+            ({"published_from": datetime(2021, 2, 1), "published_to": datetime(2021, 4, 1)}, 2),
+            (
+                {
+                    "venue": "venue 1",
+                    "keyword": "keyword 0",
+                    "published_from": datetime(2021, 4, 1),
+                },
+                1,
+            ),
+        ]
+
+        for filters, count in filters_and_counts:
+            page = await repo.get_metadata_list_by_page(
+                GetPaperMetadataListParam(page_size=10, **filters)
+            )
+
+            self.assertEqual(len(page.items), count, filters)
+            self.assertEqual(page.total, count, filters)
+
+    def test_filter_indexes(self):
+        """Test every filter of the paper list is the prefix of an index."""
+
+        leading_keys = {
+            next(iter(index.document["key"]))
+            for index in PaperMetadata.Settings.indexes
+            if isinstance(index, IndexModel)
+        }
+        query = PaperMetadataRepository.get_metadata_filter_query(
+            GetPaperMetadataListParam(
+                venue="venue",
+                author="author",
+                keyword="keyword",
+                published_from=datetime(2021, 1, 1),
+                published_to=datetime(2022, 1, 1),
+            )
+        )
+
+        self.assertEqual(
+            query["published_at"], {"$gte": datetime(2021, 1, 1), "$lt": datetime(2022, 1, 1)}
+        )
+        self.assertLessEqual(set(query), leading_keys)
+
+    async def test_get_metadata_list_projection(self):
+        """Test get_metadata_list method reads only the fields of the view or the fields."""
+
+        repo = PaperMetadataRepository()
+        obj = self.dummy_data.register_paper_schema
+        obj.abstract = "abstract " * 500
+        await repo.register_metadata_bulk([obj] * 10)
+
+        full = await repo.get_metadata_list_by_page(GetPaperMetadataListParam(page_size=10))
+        summary = await repo.get_metadata_list_by_page(
+            GetPaperMetadataListParam(page_size=10, view=PaperListView.SUMMARY)
+        )
+        sparse = await repo.get_metadata_list_by_page(
+            GetPaperMetadataListParam(
+                page_size=5, fields="title, keywords", sort=PaperSortOrder.PUBLISHED_AT
+            )
+        )
+
+        full_json = GetPaperListDetailSchema(items=full.items).model_dump_json(exclude_unset=True)
+        summary_json = GetPaperListDetailSchema(items=summary.items).model_dump_json(
+            exclude_unset=True
+        )
+
+        self.assertEqual(full.items[0].abstract, obj.abstract)
+        self.assertEqual(
+            summary.items[0].model_fields_set,
+            PAPER_LIST_VIEW_FIELDS[PaperListView.SUMMARY] | {"revision"},
+        )
+        self.assertEqual(
+            sparse.items[0].model_fields_set,
+            {"id", "title", "keywords", "published_at", "revision"},
+        )
+        self.assertIsNotNone(sparse.next_page_token)
+        self.assertLess(len(summary_json) * 10, len(full_json))
+
+        with self.assertRaises(InvalidFieldError):
+            await repo.get_metadata_list_by_page(GetPaperMetadataListParam(fields="title,secret"))
+
+    async def test_iter_metadata(self):
+        """Test iter_metadata method reads every paper metadata in batches of the fields."""
+
+        repo = PaperMetadataRepository()
+        documents, _ = await repo.register_metadata_bulk(
+            [self.dummy_data.register_paper_schema] * 5
+        )
+
+        batches = [batch async for batch in repo.iter_metadata(frozenset(["title"]), batch_size=2)]
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(
+            [item.id for batch in batches for item in batch],
+            [document.id for document in documents],
+        )
+        self.assertEqual(batches[0][0].model_fields_set, {"id", "title"})
+
+    async def test_iter_metadata_by_filter(self):
+        """Test iter_metadata_by_filter method reads the filtered paper metadata after an id."""
+
+        repo = PaperMetadataRepository()
+        objs = []
+
+        for index in range(7):
+            obj = self.dummy_data.register_paper_schema
+            obj.venue = f"venue {index % 2}"
+            objs.append(obj)
+
+        documents, _ = await repo.register_metadata_bulk(objs)
+        venue_ids = [document.id for document in documents if document.venue == "venue 0"]
+
+        batches = [
+            batch
+            async for batch in repo.iter_metadata_by_filter(
+                ExportPaperMetadataParam(venue="venue 0", fields="title", batch_size=3)
+            )
+        ]
+        resumed = [
+            item.id
+            async for batch in repo.iter_metadata_by_filter(
+                ExportPaperMetadataParam(venue="venue 0", after_id=venue_ids[1], batch_size=3)
+            )
+            for item in batch
+        ]
+
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        self.assertEqual([item.id for batch in batches for item in batch], venue_ids)
+        self.assertEqual(batches[0][0].model_fields_set, {"id", "title"})
+        self.assertEqual(resumed, venue_ids[2:])
+
+        with self.assertRaises(InvalidFieldError):
+            repo.iter_metadata_by_filter(ExportPaperMetadataParam(fields="title,secret"))
+
+    async def test_get_metadata_by_ids(self):
+        """Test get_metadata_by_ids method reads the fields of the existing paper metadata."""
+
+        repo = PaperMetadataRepository()
+        documents, _ = await repo.register_metadata_bulk(
+            [self.dummy_data.register_paper_schema] * 3
+        )
+        missing_id = PydanticObjectId()
+
+        result = await repo.get_metadata_by_ids(
+            [documents[2].id, missing_id, documents[0].id], fields=frozenset(["title"])
+        )
+
+        self.assertEqual(set(result), {documents[0].id, documents[2].id})
+        self.assertEqual(result[documents[0].id].title, documents[0].title)
+        self.assertIsNone(result[documents[0].id].abstract)
+
+
+@unittest.skipUnless(
+    os.environ.get("MONGODB_TEST_URI"), "The query plans are only checked with a real MongoDB."
+)
+class TestPaperMetadataQueryPlan(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the query plans of the paper metadata list on a real MongoDB."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the async test case."""
+
+        self.dummy_data = DummyPaperFactory()
+        self.client = AsyncIOMotorClient(os.environ["MONGODB_TEST_URI"])
+        self.database = self.client[f"test_paper_quest_{generate_random_obj_id()}"]
+
+        await init_beanie(database=self.database, document_models=[PaperMetadata])
+
+        self.repo = PaperMetadataRepository()
+        await self.repo.register_metadata_bulk([self.dummy_data.register_paper_schema] * 100)
+
+    async def asyncTearDown(self) -> None:
+        """Tear down the async test case."""
+
+        await self.client.drop_database(self.database.name)
+        self.client.close()
+
+    async def test_filters_use_sort_indexes(self):
+        """Test every combination of the filters and the sort orders scans a sort index.
+
+        A filtered page is read from the compound index of an equality filter and the sort
+        order, or from the index of the sort order without the equality filters, and is
+        never sorted in memory.
+
+        """
+
+        filters = {
+            "venue": "venue",
+            "author": "author1",
+            "keyword": "keyword1",
+            "published_from": datetime(2021, 1, 1),
+        }
+        fields = {"venue": "venue", "author": "authors", "keyword": "keywords"}
+        collection = PaperMetadata.get_motor_collection()
+
+        for size in range(1, len(filters) + 1):
+            for names in itertools.combinations(filters, size):
+                for sort, sort_keys in PAPER_SORT_KEYS.items():
+                    obj = GetPaperMetadataListParam(
+                        sort=sort, **{name: filters[name] for name in names}
+                    )
+                    query = PaperMetadataRepository.get_metadata_filter_query(obj)
+                    explain = await collection.find(query).sort(sort_keys).limit(11).explain()
+                    winning_plan = explain["queryPlanner"]["winningPlan"]
+                    stages = list(iter_plan_stages(winning_plan.get("queryPlan", winning_plan)))
+
+                    sort_index = "_".join(f"{key}_{int(direction)}" for key, direction in sort_keys)
+                    equality_fields = [fields[name] for name in names if name in fields]
+                    index_names = (
+                        {f"{field}_1_{sort_index}" for field in equality_fields}
+                        if equality_fields
+                        else {"_id_" if sort == PaperSortOrder.ID else sort_index}
+                    )
+
+                    self.assertNotIn("SORT", [stage["stage"] for stage in stages], (names, sort))
+                    self.assertIn(
+                        next(stage["indexName"] for stage in stages if stage["stage"] == "IXSCAN"),
+                        index_names,
+                        (names, sort),
+                    )
+
+
+def iter_plan_stages(plan: dict):
+    """Iterate the stages of a query plan.
+
+    The slot based execution engine nests the plan under `queryPlan`, which is read by the
+    caller.
+
+    Args:
+        plan (dict): The query plan.
+
+    Yields:
+        dict: The stage of the query plan.
+
+    """
+
+    yield plan
+
+    for child in [plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child is not None:
+            yield from iter_plan_stages(child)
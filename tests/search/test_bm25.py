@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the BM25 index."""
+
+import unittest
+
+from app.search.bm25 import BM25Index, tokenize
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for the BM25 index."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.index = BM25Index(field_weights={"title": 3, "abstract": 1})
+        self.index.add(
+            "attention", {"title": "Attention is all you need", "abstract": "Transformers."}
+        )
+        self.index.add(
+            "resnet",
+            {"title": "Deep residual learning", "abstract": "Residual networks ease training."},
+        )
+        self.index.add(
+            "vit",
+            {
+                "title": "An image is worth 16x16 words",
+                "abstract": "Transformers for images, attention.",
+            },
+        )
+
+    def test_tokenize(self):
+        """Test tokenize lower cases the words and drops the stop words and punctuation."""
+
+        self.assertEqual(
+            tokenize("The Deep_Residual, learning of 16x16!"),
+            ["deep", "residual", "learning", "16x16"],
+        )
+
+    def test_search(self):
+        """Test search ranks the documents by their weighted term frequencies."""
+
+        result = self.index.search("attention transformers", k=10)
+
+        self.assertEqual([doc_id for doc_id, _ in result], ["attention", "vit"])
+        self.assertGreater(result[0][1], result[1][1])
+        self.assertEqual(self.index.search("residual", k=10)[0][0], "resnet")
+
+    def test_search_top_k(self):
+        """Test search returns at most k documents, and none for unknown terms."""
+
+        self.assertEqual(len(self.index.search("attention transformers residual", k=2)), 2)
+        self.assertEqual(self.index.search("diffusion", k=10), [])
+        self.assertEqual(self.index.search("the of", k=10), [])
+        self.assertEqual(self.index.search("attention", k=0), [])
+
+    def test_search_skips_common_terms(self):
+        """Test the top k documents do not change when the common terms are skipped."""
+
+        index = BM25Index(field_weights={"title": 1})
+
+        for number in range(200):
+            index.add(str(number), {"title": "learning " * (number % 7 + 1) + f"rare{number % 40}"})
+
+        full = index.search("rare3 learning", k=200)
+
+        self.assertEqual(index.search("rare3 learning", k=3), full[:3])
+
+    def test_add_is_idempotent(self):
+        """Test adding a document twice keeps its postings once."""
+
+        before = self.index.search("residual", k=10)
+
+        self.index.add("resnet", {"title": "Deep residual learning"})
+
+        self.assertEqual(len(self.index), 3)
+        self.assertIn("resnet", self.index)
+        self.assertEqual(self.index.search("residual", k=10), before)
+
+    def test_list_fields(self):
+        """Test the fields of lists of texts are indexed."""
+
+        index = BM25Index(field_weights={"authors": 1})
+        index.add("paper", {"authors": ["Kaiming He", "Jian Sun"]})
+
+        self.assertEqual(index.search("kaiming", k=1)[0][0], "paper")
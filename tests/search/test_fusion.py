@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the rank fusion."""
+
+import unittest
+
+from app.search.fusion import reciprocal_rank_fusion
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    """Test cases for the reciprocal rank fusion."""
+
+    def test_fuse(self):
+        """Test the documents ranked high by both rankings come first."""
+
+        result = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]], k=10, rrf_k=60)
+
+        self.assertEqual([doc_id for doc_id, _ in result], ["b", "a", "d", "c"])
+        self.assertAlmostEqual(result[0][1], 1 / 62 + 1 / 61)
+        self.assertAlmostEqual(result[2][1], 1 / 62)
+
+    def test_top_k_and_ties(self):
+        """Test only the top k documents are kept, and the ties keep the first order."""
+
+        result = reciprocal_rank_fusion([["a", "b"], ["c", "d"]], k=3)
+
+        self.assertEqual([doc_id for doc_id, _ in result], ["a", "c", "b"])
+        self.assertEqual(reciprocal_rank_fusion([], k=3), [])
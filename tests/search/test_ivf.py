@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the inverted file vector index."""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from app.core.config import settings
+from app.search import ivf
+from app.search.ivf import IVFFlatIndex, train_centroids
+from app.search.vector import FlatVectorIndex, VectorIndexBase
+from tests.data.search import make_clustered_vectors
+
+
+class TestIVFFlatIndex(unittest.TestCase):
+    """Test cases for the inverted file flat index."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.rng = np.random.default_rng(0)
+        self.vectors = make_clustered_vectors(self.rng, 2000, 32)
+        self.doc_ids = [f"doc{number}" for number in range(2000)]
+        self.queries = make_clustered_vectors(self.rng, 20, 32)
+
+        self.exact = FlatVectorIndex(dim=32)
+        self.exact.add(self.doc_ids, self.vectors)
+
+        self.index = IVFFlatIndex(dim=32, nlist=16, nprobe=4, train_size=1000)
+        self.index.add(self.doc_ids[:1500], self.vectors[:1500])
+        self.index.add(self.doc_ids[1500:], self.vectors[1500:])
+        self.index.wait_trained()
+
+    def recall(self, index: VectorIndexBase) -> float:
+        """Get the recall@10 of the index against the exact search."""
+
+        hits = 0
+
+        for query in self.queries:
+            expected = {doc_id for doc_id, _ in self.exact.search(query, 10)}
+            hits += len(expected & {doc_id for doc_id, _ in index.search(query, 10)})
+
+        return hits / (10 * len(self.queries))
+
+    def test_train_centroids(self):
+        """Test the centroids are the unit vectors of the clusters."""
+
+        centroids = train_centroids(self.vectors, nlist=16, iterations=5)
+
+        self.assertEqual(centroids.shape, (16, 32))
+        self.assertTrue(np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5))
+
+    def test_search_untrained(self):
+        """Test the documents are searched exactly until the centroids are trained."""
+
+        index = IVFFlatIndex(dim=32, nlist=16, nprobe=1, train_size=1000)
+        index.add(self.doc_ids[:999], self.vectors[:999])
+
+        self.assertEqual(len(index.centroids), 0)
+        self.assertEqual(index.search(self.vectors[0], 1)[0][0], "doc0")
+
+    def test_search(self):
+        """Test the recall grows with the probed clusters, and is exact with all of them."""
+
+        self.assertEqual(len(self.index.centroids), 16)
+        self.assertGreater(self.recall(self.index), 0.8)
+
+        self.index.nprobe = 16
+
+        self.assertEqual(self.recall(self.index), 1.0)
+
+    def test_add_during_training(self):
+        """Test the training runs without the lock, and the documents added meanwhile are kept."""
+
+        started, resumed = threading.Event(), threading.Event()
+
+        def train_blocked(*args, **kwargs):
+            started.set()
+            resumed.wait()
+            return train_centroids(*args, **kwargs)
+
+        index = IVFFlatIndex(dim=32, nlist=16, nprobe=16, train_size=1000)
+
+        with patch.object(ivf, "train_centroids", side_effect=train_blocked):
+            index.add(self.doc_ids[:1000], self.vectors[:1000])
+            self.assertTrue(started.wait(5))
+
+            index.add(self.doc_ids[1000:], self.vectors[1000:])
+
+            self.assertFalse(index.wait_trained(0))
+            self.assertEqual(index.search(self.vectors[1999], 1)[0][0], "doc1999")
+
+            resumed.set()
+
+            self.assertTrue(index.wait_trained(5))
+
+        self.assertEqual(len(index.centroids), 16)
+        self.assertEqual(sum(index._list_sizes), 2000)
+        self.assertEqual(self.recall(index), 1.0)
+
+    def test_add_after_training(self):
+        """Test the documents added after the training are found."""
+
+        self.index.add(["new"], self.queries[:1])
+
+        self.assertEqual(self.index.search(self.queries[0], 1)[0][0], "new")
+        self.assertEqual(len(self.index), 2001)
+
+    def test_rescore(self):
+        """Test the documents are rescored by their exact cosine similarities."""
+
+        untrained = IVFFlatIndex(dim=32, nlist=16, nprobe=4, train_size=1000)
+        untrained.add(self.doc_ids[:10], self.vectors[:10])
+        doc_ids = self.doc_ids[::50] + ["unknown"]
+
+        for index in [self.index, untrained]:
+            expected = self.exact.rescore(self.queries[0], [d for d in doc_ids if d in index])
+            result = index.rescore(self.queries[0], doc_ids)
+
+            self.assertEqual([doc_id for doc_id, _ in result], [d for d, _ in expected])
+            np.testing.assert_allclose(
+                [score for _, score in result], [score for _, score in expected], rtol=1e-5
+            )
+
+    @patch.object(settings, "IVF_NPROBE", 4)
+    def test_save_and_load(self):
+        """Test the trained and the untrained indexes are loaded as they are saved."""
+
+        untrained = IVFFlatIndex(dim=32, nlist=16, nprobe=4, train_size=1000)
+        untrained.add(self.doc_ids[:10], self.vectors[:10])
+
+        with tempfile.TemporaryDirectory() as directory:
+            for index in [self.index, untrained, self.exact]:
+                path = os.path.join(directory, "index.npz")
+                index.save(path)
+                loaded = VectorIndexBase.load(path)
+
+                self.assertIs(type(loaded), type(index))
+                self.assertEqual(loaded.doc_ids, index.doc_ids)
+
+                for query in self.queries[:3]:
+                    self.assertEqual(
+                        [doc_id for doc_id, _ in loaded.search(query, 10)],
+                        [doc_id for doc_id, _ in index.search(query, 10)],
+                    )
+                    np.testing.assert_allclose(
+                        [score for _, score in loaded.rescore(query, self.doc_ids[:100])],
+                        [score for _, score in index.rescore(query, self.doc_ids[:100])],
+                        rtol=1e-5,
+                    )
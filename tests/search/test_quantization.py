@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the quantized vector indexes."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from app.core.config import settings
+from app.search.quantization import (
+    FloatVectorStore,
+    ProductQuantizedIndex,
+    QuantizedIndexBase,
+    ScalarQuantizedIndex,
+)
+from app.search.vector import FlatVectorIndex, VectorIndexBase
+from tests.data.search import make_clustered_vectors
+
+
+class TestFloatVectorStore(unittest.TestCase):
+    """Test cases for the float vector store."""
+
+    def test_append(self):
+        """Test the appended vectors are read back in order."""
+
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((10, 8)).astype(np.float32)
+        store = FloatVectorStore(dim=8)
+
+        store.append(vectors[:4])
+        first = store.vectors
+        store.append(vectors[4:])
+
+        self.assertEqual(len(store), 10)
+        np.testing.assert_array_equal(first, vectors[:4])
+        np.testing.assert_array_equal(store.vectors, vectors)
+
+
+class TestQuantizedIndex(unittest.TestCase):
+    """Test cases for the scalar and the product quantized indexes."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.rng = np.random.default_rng(0)
+        self.vectors = make_clustered_vectors(self.rng, 2000, 32)
+        self.doc_ids = [f"doc{number}" for number in range(2000)]
+        self.queries = make_clustered_vectors(self.rng, 20, 32)
+
+        self.exact = FlatVectorIndex(dim=32)
+        self.exact.add(self.doc_ids, self.vectors)
+
+    def make_indexes(self, train_size: int = 1000) -> list[QuantizedIndexBase]:
+        """Make the scalar and the product quantized indexes of the documents."""
+
+        indexes = [
+            ScalarQuantizedIndex(dim=32, train_size=train_size, rescore_factor=4),
+            ProductQuantizedIndex(dim=32, subspaces=8, train_size=train_size, rescore_factor=8),
+        ]
+
+        for index in indexes:
+            index.add(self.doc_ids[:1500], self.vectors[:1500])
+            index.add(self.doc_ids[1500:], self.vectors[1500:])
+            index.wait_trained()
+
+        return indexes
+
+    def recall(self, index: VectorIndexBase) -> float:
+        """Get the recall@10 of the index against the exact search."""
+
+        hits = 0
+
+        for query in self.queries:
+            expected = {doc_id for doc_id, _ in self.exact.search(query, 10)}
+            hits += len(expected & {doc_id for doc_id, _ in index.search(query, 10)})
+
+        return hits / (10 * len(self.queries))
+
+    def test_search_untrained(self):
+        """Test the documents are searched exactly until the quantizer is trained."""
+
+        for index in self.make_indexes(train_size=5000):
+            self.assertFalse(index.trained)
+            self.assertEqual(self.recall(index), 1.0)
+
+    def test_search(self):
+        """Test the codes are compact, and the rescored search finds the nearest documents."""
+
+        for index in self.make_indexes():
+            self.assertTrue(index.trained)
+            self.assertEqual(index._codes[: index._size].shape, (2000, index.code_size))
+            self.assertGreaterEqual(self.recall(index), 0.9)
+
+            result = index.search(self.queries[0], 10)
+            expected = dict(self.exact.rescore(self.queries[0], [d for d, _ in result]))
+
+            for doc_id, score in result:
+                self.assertAlmostEqual(score, expected[doc_id], places=5)
+
+    def test_add_during_training(self):
+        """Test the add crossing the train size returns promptly, and the later adds are kept."""
+
+        for index in [
+            ScalarQuantizedIndex(dim=32, train_size=1000, rescore_factor=4),
+            ProductQuantizedIndex(dim=32, subspaces=8, train_size=1000, rescore_factor=8),
+        ]:
+            started, resumed = threading.Event(), threading.Event()
+            train = index._train
+
+            def train_blocked(vectors, train=train, started=started, resumed=resumed):
+                started.set()
+                resumed.wait()
+                train(vectors)
+
+            with patch.object(index, "_train", side_effect=train_blocked):
+                start = time.perf_counter()
+                index.add(self.doc_ids[:1000], self.vectors[:1000])
+
+                self.assertLess(time.perf_counter() - start, 1.0)
+                self.assertTrue(started.wait(5))
+
+                index.add(self.doc_ids[1000:], self.vectors[1000:])
+
+                self.assertFalse(index.wait_trained(0))
+                self.assertEqual(index.search(self.vectors[1999], 1)[0][0], "doc1999")
+
+                resumed.set()
+
+                self.assertTrue(index.wait_trained(5))
+
+            self.assertEqual(index._size, 2000)
+            self.assertGreaterEqual(self.recall(index), 0.9)
+
+    def test_add_after_training(self):
+        """Test the documents added after the training are found."""
+
+        for index in self.make_indexes():
+            index.add(["new"], self.queries[:1])
+
+            self.assertEqual(index.search(self.queries[0], 1)[0][0], "new")
+            self.assertEqual(len(index), 2001)
+
+    @patch.object(settings, "PQ_SUBSPACES", 8)
+    def test_save_and_load(self):
+        """Test the trained and the untrained indexes are loaded as they are saved."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            for index in self.make_indexes() + self.make_indexes(train_size=5000):
+                path = os.path.join(directory, "index.npz")
+                index.save(path)
+                loaded = VectorIndexBase.load(path)
+
+                self.assertIs(type(loaded), type(index))
+                self.assertEqual(loaded.doc_ids, index.doc_ids)
+                self.assertEqual(loaded.trained, index.trained)
+                np.testing.assert_allclose(loaded._store.vectors, index._store.vectors, atol=1e-6)
+
+                for query in self.queries[:3]:
+                    self.assertEqual(
+                        [doc_id for doc_id, _ in loaded.search(query, 10)],
+                        [doc_id for doc_id, _ in index.search(query, 10)],
+                    )
+
+    def test_invalid_subspaces(self):
+        """Test the dimensions must be divisible by the number of the subspaces."""
+
+        with self.assertRaises(ValueError):
+            ProductQuantizedIndex(dim=32, subspaces=5, train_size=100, rescore_factor=1)
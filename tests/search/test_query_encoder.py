@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the query encoder."""
+
+import asyncio
+import unittest
+
+import numpy as np
+
+from app.search.embedding import QueryEncoder, normalize_query
+from tests.data.search import DummyTextEncoder
+
+
+class TestQueryEncoder(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the query encoder."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+
+        self.encoder = DummyTextEncoder()
+        self.query_encoder = QueryEncoder(
+            self.encoder, max_batch_size=16, max_wait=0.01, cache_size=100, cache_ttl=60
+        )
+
+    async def asyncTearDown(self) -> None:
+        """Tear down the test case."""
+
+        await self.query_encoder.stop()
+
+    def test_normalize_query(self):
+        """Test the queries are lower cased and their whitespaces are collapsed."""
+
+        self.assertEqual(normalize_query("  Graph\tNeural  NETWORKS\n"), "graph neural networks")
+
+    async def test_encode(self):
+        """Test the query is encoded like the text encoder does."""
+
+        vector = await self.query_encoder.encode("graph neural networks")
+
+        np.testing.assert_allclose(vector, self.encoder.encode(["graph neural networks"])[0])
+
+    async def test_cache(self):
+        """Test the queries differing only in the case and the whitespaces are encoded once."""
+
+        first = await self.query_encoder.encode("Graph Neural Networks")
+        second = await self.query_encoder.encode("  graph neural   networks ")
+
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(self.encoder.encoded, ["graph neural networks"])
+
+    async def test_encode_duplicates_once(self):
+        """Test the duplicate queries of a batch are encoded once."""
+
+        queries = ["diffusion models", "Diffusion Models", "protein folding"] * 4
+
+        vectors = await asyncio.gather(*[self.query_encoder.encode(query) for query in queries])
+
+        self.assertEqual(self.encoder.encoded, ["diffusion models", "protein folding"])
+        np.testing.assert_array_equal(vectors[0], vectors[1])
+        self.assertEqual(len(vectors), len(queries))
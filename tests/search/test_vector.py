@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the vector index."""
+
+import unittest
+
+import numpy as np
+
+from app.search.embedding import normalize_vectors
+from app.search.vector import FlatVectorIndex
+
+
+class TestFlatVectorIndex(unittest.TestCase):
+    """Test cases for the flat vector index."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.rng = np.random.default_rng(0)
+        self.vectors = normalize_vectors(self.rng.standard_normal((100, 16)))
+        self.doc_ids = [f"doc{number}" for number in range(100)]
+
+        self.index = FlatVectorIndex(dim=16, capacity=8)
+        self.index.add(self.doc_ids[:50], self.vectors[:50])
+        self.index.add(self.doc_ids[50:], self.vectors[50:])
+
+    def test_search(self):
+        """Test search returns the top k documents by the cosine similarity."""
+
+        query = self.rng.standard_normal(16)
+        expected = np.argsort(-(self.vectors @ normalize_vectors(query)))[:10]
+
+        result = self.index.search(query, k=10)
+
+        self.assertEqual([doc_id for doc_id, _ in result], [self.doc_ids[i] for i in expected])
+        self.assertEqual(
+            [score for _, score in result], sorted((s for _, s in result), reverse=True)
+        )
+        self.assertAlmostEqual(self.index.search(self.vectors[3] * 5, k=1)[0][1], 1.0, places=5)
+
+    def test_search_all(self):
+        """Test search returns every document if k exceeds the number of the documents."""
+
+        self.assertEqual(len(self.index.search(self.vectors[0], k=1000)), 100)
+        self.assertEqual(FlatVectorIndex(dim=16).search(self.vectors[0], k=10), [])
+
+    def test_add_is_idempotent(self):
+        """Test adding a document twice keeps its first vector."""
+
+        self.index.add(["doc0", "new", "new"], self.vectors[[1, 2, 3]])
+
+        self.assertEqual(len(self.index), 101)
+        self.assertTrue(np.allclose(self.index.vectors[0], self.vectors[0]))
+        self.assertTrue(np.allclose(self.index.vectors[100], self.vectors[2]))
+        self.assertTrue(self.index.vectors.flags.c_contiguous)
+
+    def test_rescore(self):
+        """Test rescore ranks only the given documents by the cosine similarity."""
+
+        query = self.rng.standard_normal(16)
+        doc_ids = ["doc7", "doc3", "unknown", "doc42", "doc3"]
+        scores = self.vectors[[7, 3, 42]] @ normalize_vectors(query)
+
+        result = self.index.rescore(query, doc_ids)
+
+        self.assertEqual(
+            [doc_id for doc_id, _ in result],
+            [["doc7", "doc3", "doc42"][i] for i in np.argsort(-scores)],
+        )
+        self.assertAlmostEqual(result[0][1], float(scores.max()), places=5)
+        self.assertEqual(self.index.rescore(query, ["unknown"]), [])
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the ingestion worker pool."""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from beanie import PydanticObjectId
+
+from app.common.enums import BackgroundTaskStatus, IngestionJobStatus
+from app.core.config import settings
+from app.models.ingestion_job import IngestionJob
+from app.models.paper_metadata import PaperMetadata
+from app.repositories.ingestion_job import IngestionJobRepository
+from app.repositories.paper_document import PaperDocumentRepository
+from app.repositories.paper_metadata import PaperMetadataRepository
+from app.services.ingestion_worker import IngestionWorkerPool
+from app.services.paper_service import PaperService
+from tests.data.paper import DummyPaperFactory
+from tests.misc import patch_method
+from tests.session.mongo import MockMongoDBSession
+
+
+class TestIngestionWorkerPool(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ingestion worker pool."""
+
+    def setUp(self) -> None:
+        """Set up the test."""
+
+        self.dummy_data = DummyPaperFactory()
+        self.mock_mongo_session = MockMongoDBSession()
+
+        with (
+            patch.object(PaperMetadataRepository, "__init__", return_value=None),
+            patch.object(PaperDocumentRepository, "__init__", return_value=None),
+            patch.object(IngestionJobRepository, "__init__", return_value=None),
+        ):
+            self.worker_pool = IngestionWorkerPool(concurrency=1, poll_interval=0.01)
+
+    async def asyncSetUp(self) -> None:
+        """Set up the async test."""
+
+        await self.mock_mongo_session.connect_to_mock_mongo([IngestionJob, PaperMetadata])
+
+        self.job = IngestionJob(
+            paper_id=PydanticObjectId(self.dummy_data.paper_metadata_id),
+            status=IngestionJobStatus.RUNNING,
+            attempts=1,
+            lease_owner="worker",
+        )
+
+    @patch_method(IngestionJobRepository.complete)
+    @patch_method(PaperService.upload_paper_document)
+    @patch_method(PaperMetadataRepository.get_metadata_by_id)
+    async def test_process(self, mock_get_metadata_by_id, mock_upload, mock_complete):
+        """Test process uploads the paper document and completes the job."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        mock_get_metadata_by_id.return_value = paper_metadata
+
+        await self.worker_pool.process(self.job)
+
+        mock_upload.assert_called_once_with(paper_metadata, self.dummy_data.paper_metadata_id)
+        mock_complete.assert_called_once_with(self.job)
+
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    @patch_method(IngestionJobRepository.fail)
+    @patch_method(PaperService.upload_paper_document)
+    @patch_method(PaperMetadataRepository.get_metadata_by_id)
+    async def test_process_failed(
+        self, mock_get_metadata_by_id, mock_upload, mock_fail, mock_update_gcs_blob_url
+    ):
+        """Test process marks the paper as failed when the job runs out of attempts."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        mock_get_metadata_by_id.return_value = paper_metadata
+        mock_upload.side_effect = ValueError("Invalid url")
+        mock_fail.return_value = IngestionJobStatus.FAILED
+
+        await self.worker_pool.process(self.job)
+
+        self.assertTrue(mock_fail.call_args.kwargs["retry"])
+        mock_update_gcs_blob_url.assert_called_once_with(
+            paper_metadata, BackgroundTaskStatus.FAILED
+        )
+
+    @patch.object(settings, "INGESTION_JOB_HEARTBEAT_INTERVAL", 0.01)
+    @patch_method(IngestionJobRepository.complete)
+    @patch_method(IngestionJobRepository.heartbeat)
+    @patch_method(PaperService.upload_paper_document)
+    @patch_method(PaperMetadataRepository.get_metadata_by_id)
+    async def test_process_lost_lease(
+        self, mock_get_metadata_by_id, mock_upload, mock_heartbeat, mock_complete
+    ):
+        """Test process cancels the upload when the lease is lost."""
+
+        mock_get_metadata_by_id.return_value = self.dummy_data.paper_metadata_model
+
+        async def upload_forever(*args):
+            await asyncio.sleep(10)
+
+        mock_upload.side_effect = upload_forever
+        mock_heartbeat.return_value = False
+
+        await asyncio.wait_for(self.worker_pool.process(self.job), timeout=1)
+
+        mock_complete.assert_not_called()
+
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    @patch_method(PaperMetadataRepository.get_metadata_by_id)
+    @patch_method(IngestionJobRepository.dead_letter_expired)
+    async def test_dead_letter(
+        self, mock_dead_letter_expired, mock_get_metadata_by_id, mock_update_gcs_blob_url
+    ):
+        """Test the papers of the dead lettered jobs are marked as failed once per lease."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        mock_dead_letter_expired.return_value = [self.job]
+        mock_get_metadata_by_id.return_value = paper_metadata
+
+        await self.worker_pool._dead_letter()
+        await self.worker_pool._dead_letter()
+
+        mock_dead_letter_expired.assert_called_once()
+        mock_get_metadata_by_id.assert_called_once_with(self.dummy_data.paper_metadata_id)
+        mock_update_gcs_blob_url.assert_called_once_with(
+            paper_metadata, BackgroundTaskStatus.FAILED
+        )
+
+    @patch_method(IngestionJobRepository.dead_letter_expired)
+    @patch_method(IngestionJobRepository.claim)
+    async def test_start_and_stop(self, mock_claim, mock_dead_letter_expired):
+        """Test the workers poll the queue until the pool is stopped."""
+
+        mock_claim.return_value = None
+        mock_dead_letter_expired.return_value = []
+
+        await self.worker_pool.start()
+        await asyncio.sleep(0.05)
+        await self.worker_pool.stop()
+
+        self.assertGreater(mock_claim.call_count, 1)
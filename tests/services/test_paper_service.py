@@ -1,12 +1,32 @@
 # -*- coding: utf-8 -*-
 """Test cases for the paper service."""
 
+import asyncio
+import json
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import patch
 
+from beanie import PydanticObjectId
+
+from app.common.enums import BackgroundTaskStatus, PaperListView
+from app.common.exceptions import NotFoundError
+from app.common.pydantic_model import PaginatedResult
+from app.core.config import settings
+from app.external.storage import BlobMetadata
+from app.models.paper_blob import PaperBlob
 from app.models.paper_metadata import PaperMetadata
+from app.repositories.ingestion_job import IngestionJobRepository
+from app.repositories.paper_blob import PaperBlobRepository
 from app.repositories.paper_document import PaperDocumentRepository
 from app.repositories.paper_metadata import PaperMetadataRepository
+from app.schemas.paper_metadata import (
+    ExportPaperMetadataParam,
+    GetPaperDocumentUrlSchema,
+    GetPaperListItemSchema,
+    GetPaperMetadataListParam,
+    PaperRevisionSchema,
+)
 from app.services.paper_service import PaperService
 from tests.data.paper import DummyPaperFactory
 from tests.misc import patch_method
@@ -26,14 +46,17 @@ class TestPaperService(unittest.IsolatedAsyncioTestCase):
         with (
             patch.object(PaperMetadataRepository, "__init__", return_value=None),
             patch.object(PaperDocumentRepository, "__init__", return_value=None),
+            patch.object(IngestionJobRepository, "__init__", return_value=None),
+            patch.object(PaperBlobRepository, "__init__", return_value=None),
         ):
-            self.paper_service = PaperService()
+            self.paper_service = PaperService(search_index=None)
 
     async def asyncSetUp(self) -> None:
         """Set up the test."""
 
-        await self.mock_mongo_session.connect_to_mock_mongo([PaperMetadata])
+        await self.mock_mongo_session.connect_to_mock_mongo([PaperMetadata, PaperBlob])
 
+    @patch.object(settings, "PAPER_DOCUMENT_DEDUPLICATION", False)
     @patch_method(PaperDocumentRepository.upload_paper_document)
     @patch_method(PaperMetadataRepository.update_gcs_blob_url)
     async def test_upload_paper_document(
@@ -54,8 +77,298 @@ class TestPaperService(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(result, expected_result)
 
+    @patch.object(settings, "PAPER_DOCUMENT_DEDUPLICATION", False)
+    @patch_method(PaperDocumentRepository.upload_paper_document)
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    async def test_upload_paper_document_concurrently(
+        self,
+        mock_update_gcs_blob_url,
+        mock_upload_paper_document,
+    ):
+        """Test the concurrent uploads of a paper share an upload."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        paper_obj_id = self.dummy_data.paper_metadata_id
+
+        async def upload_paper_document(**kwargs):
+            await asyncio.sleep(0.01)
+            return self.dummy_data.gcs_blob_url
+
+        mock_upload_paper_document.side_effect = upload_paper_document
+        mock_update_gcs_blob_url.return_value = paper_metadata
+
+        results = await asyncio.gather(
+            *[
+                self.paper_service.upload_paper_document(paper_metadata, paper_obj_id)
+                for _ in range(3)
+            ]
+        )
+
+        self.assertEqual(results, [self.dummy_data.get_paper_detail_schema] * 3)
+        mock_upload_paper_document.assert_called_once()
+        mock_update_gcs_blob_url.assert_called_once()
+
+    @patch_method(PaperDocumentRepository.get_paper_document_metadata)
+    @patch_method(PaperBlobRepository.acquire)
+    @patch_method(PaperBlobRepository.get_by_hash)
+    @patch_method(PaperDocumentRepository.upload_paper_document_file)
+    @patch_method(PaperDocumentRepository.stream)
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    async def test_upload_deduplicated_paper_document(
+        self,
+        mock_update_gcs_blob_url,
+        mock_stream,
+        mock_upload_paper_document_file,
+        mock_get_by_hash,
+        mock_acquire,
+        mock_get_paper_document_metadata,
+    ):
+        """Test upload paper document uploads a new content."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        gcs_content_blob_url = self.dummy_data.gcs_content_blob_url
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+        mock_get_by_hash.return_value = None
+        mock_upload_paper_document_file.return_value = gcs_content_blob_url
+        mock_acquire.return_value = PaperBlob(
+            content_hash=self.dummy_data.content_hash,
+            blob_url=gcs_content_blob_url,
+            size=len(self.dummy_data.raw_paper_bytes),
+            ref_count=1,
+        )
+        mock_get_paper_document_metadata.return_value = BlobMetadata(
+            size=len(self.dummy_data.raw_paper_bytes), etag="etag"
+        )
+        mock_update_gcs_blob_url.return_value = paper_metadata
+
+        await self.paper_service.upload_paper_document(
+            paper_metadata, self.dummy_data.paper_metadata_id
+        )
+
+        mock_upload_paper_document_file.assert_called_once()
+        mock_acquire.assert_called_once_with(
+            content_hash=self.dummy_data.content_hash,
+            blob_url=gcs_content_blob_url,
+            size=len(self.dummy_data.raw_paper_bytes),
+        )
+        mock_update_gcs_blob_url.assert_called_once_with(
+            paper_metadata, gcs_content_blob_url, content_hash=self.dummy_data.content_hash
+        )
+
+    @patch_method(PaperBlobRepository.acquire)
+    @patch_method(PaperBlobRepository.get_by_hash)
+    @patch_method(PaperDocumentRepository.upload_paper_document_file)
+    @patch_method(PaperDocumentRepository.stream)
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    async def test_upload_duplicated_paper_document(
+        self,
+        mock_update_gcs_blob_url,
+        mock_stream,
+        mock_upload_paper_document_file,
+        mock_get_by_hash,
+        mock_acquire,
+    ):
+        """Test upload paper document skips the upload of a stored content."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        paper_blob = PaperBlob(
+            content_hash=self.dummy_data.content_hash,
+            blob_url=self.dummy_data.gcs_content_blob_url,
+            size=len(self.dummy_data.raw_paper_bytes),
+            ref_count=1,
+        )
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+        mock_get_by_hash.return_value = paper_blob
+        mock_acquire.return_value = paper_blob.model_copy(update={"ref_count": 2})
+        mock_update_gcs_blob_url.return_value = paper_metadata
+
+        await self.paper_service.upload_paper_document(
+            paper_metadata, self.dummy_data.paper_metadata_id
+        )
+
+        mock_upload_paper_document_file.assert_not_called()
+        mock_acquire.assert_called_once()
+        mock_update_gcs_blob_url.assert_called_once_with(
+            paper_metadata, paper_blob.blob_url, content_hash=paper_blob.content_hash
+        )
+
+    @patch_method(PaperDocumentRepository.get_paper_document_metadata)
+    @patch_method(PaperBlobRepository.acquire)
+    @patch_method(PaperBlobRepository.get_by_hash)
+    @patch_method(PaperDocumentRepository.upload_paper_document_file)
+    @patch_method(PaperDocumentRepository.stream)
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    async def test_upload_deleted_paper_document(
+        self,
+        mock_update_gcs_blob_url,
+        mock_stream,
+        mock_upload_paper_document_file,
+        mock_get_by_hash,
+        mock_acquire,
+        mock_get_paper_document_metadata,
+    ):
+        """Test upload paper document uploads the content deleted before it is referred."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        paper_blob = PaperBlob(
+            content_hash=self.dummy_data.content_hash,
+            blob_url=self.dummy_data.gcs_content_blob_url,
+            size=len(self.dummy_data.raw_paper_bytes),
+            ref_count=1,
+        )
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+        mock_get_by_hash.return_value = paper_blob
+        mock_acquire.return_value = paper_blob
+        mock_get_paper_document_metadata.return_value = None
+        mock_upload_paper_document_file.return_value = paper_blob.blob_url
+        mock_update_gcs_blob_url.return_value = paper_metadata
+
+        await self.paper_service.upload_paper_document(
+            paper_metadata, self.dummy_data.paper_metadata_id
+        )
+
+        mock_get_paper_document_metadata.assert_called_once_with(paper_blob.blob_url)
+        mock_upload_paper_document_file.assert_called_once()
+
+    @patch_method(PaperDocumentRepository.get_paper_document_metadata)
+    @patch_method(PaperDocumentRepository.delete_paper_document)
+    @patch_method(PaperDocumentRepository.upload_paper_document_file)
+    @patch_method(PaperDocumentRepository.stream)
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    async def test_upload_paper_document_while_deleted(
+        self,
+        mock_update_gcs_blob_url,
+        mock_stream,
+        mock_upload_paper_document_file,
+        mock_delete_paper_document,
+        mock_get_paper_document_metadata,
+    ):
+        """Test upload paper document uploads again the content deleted after its upload."""
+
+        self.paper_service.paper_blob_repo = PaperBlobRepository()
+        await PaperBlob.delete_all()
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        content_hash = self.dummy_data.content_hash
+        blob_url = self.dummy_data.gcs_content_blob_url
+        blobs: set[str] = set()
+        uploaded = asyncio.Event()
+
+        await self.paper_service.paper_blob_repo.acquire(
+            content_hash=content_hash, blob_url=blob_url, size=4
+        )
+        await self.paper_service.paper_blob_repo.release(content_hash=content_hash)
+
+        async def upload_paper_document_file(**kwargs):
+            blobs.add(blob_url)
+            uploaded.set()
+            return blob_url
+
+        async def delete_paper_document(url):
+            await uploaded.wait()
+            blobs.discard(url)
+            return True
+
+        async def get_paper_document_metadata(url):
+            if url in blobs:
+                return BlobMetadata(size=len(self.dummy_data.raw_paper_bytes), etag="etag")
+
+            return None
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+        mock_upload_paper_document_file.side_effect = upload_paper_document_file
+        mock_delete_paper_document.side_effect = delete_paper_document
+        mock_get_paper_document_metadata.side_effect = get_paper_document_metadata
+        mock_update_gcs_blob_url.return_value = paper_metadata
+
+        deletion = asyncio.create_task(
+            self.paper_service._delete_unreferenced_paper_blob(content_hash)
+        )
+        await asyncio.sleep(0)
+        await self.paper_service.upload_paper_document(
+            paper_metadata, self.dummy_data.paper_metadata_id
+        )
+
+        self.assertTrue(await deletion)
+        self.assertEqual(mock_upload_paper_document_file.call_count, 2)
+        self.assertEqual(blobs, {blob_url})
+
+        paper_blob = await self.paper_service.paper_blob_repo.get_by_hash(content_hash)
+
+        self.assertEqual(paper_blob.ref_count, 1)
+
+    @patch_method(PaperDocumentRepository.get_paper_document_metadata)
+    @patch_method(PaperDocumentRepository.delete_paper_document)
+    @patch_method(PaperDocumentRepository.upload_paper_document_file)
+    @patch_method(PaperDocumentRepository.stream)
+    @patch_method(PaperMetadataRepository.update_gcs_blob_url)
+    async def test_upload_replaced_paper_document(
+        self,
+        mock_update_gcs_blob_url,
+        mock_stream,
+        mock_upload_paper_document_file,
+        mock_delete_paper_document,
+        mock_get_paper_document_metadata,
+    ):
+        """Test upload paper document deletes the replaced content no paper refers."""
+
+        self.paper_service.paper_blob_repo = PaperBlobRepository()
+        await PaperBlob.delete_all()
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        paper_metadata.content_hash = "0" * 64
+        await self.paper_service.paper_blob_repo.acquire(
+            content_hash=paper_metadata.content_hash, blob_url="gs://bucket/replaced.pdf", size=4
+        )
+
+        mock_stream.side_effect = self.dummy_data.iter_raw_paper_chunks
+        mock_upload_paper_document_file.return_value = self.dummy_data.gcs_content_blob_url
+        mock_get_paper_document_metadata.return_value = BlobMetadata(
+            size=len(self.dummy_data.raw_paper_bytes), etag="etag"
+        )
+        mock_update_gcs_blob_url.return_value = paper_metadata
+
+        await self.paper_service.upload_paper_document(
+            paper_metadata, self.dummy_data.paper_metadata_id
+        )
+
+        mock_delete_paper_document.assert_called_once_with("gs://bucket/replaced.pdf")
+        self.assertEqual(
+            [paper_blob.content_hash async for paper_blob in PaperBlob.find_all()],
+            [self.dummy_data.content_hash],
+        )
+
+    @patch_method(PaperDocumentRepository.delete_paper_document)
+    async def test_delete_unreferenced_paper_blob_failed(self, mock_delete_paper_document):
+        """Test the paper blob is kept if its paper document is not deleted."""
+
+        self.paper_service.paper_blob_repo = PaperBlobRepository()
+        await PaperBlob.delete_all()
+
+        content_hash = self.dummy_data.content_hash
+        await self.paper_service.paper_blob_repo.acquire(
+            content_hash=content_hash, blob_url=self.dummy_data.gcs_content_blob_url, size=4
+        )
+
+        self.assertFalse(await self.paper_service._delete_unreferenced_paper_blob(content_hash))
+        mock_delete_paper_document.assert_not_called()
+
+        await self.paper_service.paper_blob_repo.release(content_hash=content_hash)
+        mock_delete_paper_document.side_effect = RuntimeError("storage is unavailable")
+
+        with self.assertLogs("app.services.paper_service", "ERROR"):
+            self.assertFalse(await self.paper_service._delete_unreferenced_paper_blob(content_hash))
+
+        paper_blob = await self.paper_service.paper_blob_repo.get_by_hash(content_hash)
+
+        self.assertEqual(paper_blob.ref_count, 0)
+
+    @patch_method(IngestionJobRepository.enqueue)
     @patch_method(PaperMetadataRepository.register_metadata)
-    async def test_register_paper(self, mock_register_metadata):
+    async def test_register_paper(self, mock_register_metadata, mock_enqueue):
         """Test register paper."""
 
         paper_metadata = self.dummy_data.paper_metadata_model
@@ -66,21 +379,164 @@ class TestPaperService(unittest.IsolatedAsyncioTestCase):
         result = await self.paper_service.register_paper(self.dummy_data.register_paper_schema)
 
         self.assertEqual(result, expected_result)
+        mock_enqueue.assert_called_once_with(paper_id=paper_metadata.id)
+
+    @patch_method(IngestionJobRepository.enqueue_many)
+    @patch_method(PaperMetadataRepository.register_metadata_bulk)
+    async def test_register_paper_bulk(self, mock_register_metadata_bulk, mock_enqueue_many):
+        """Test register paper bulk."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        raw_objs = [
+            self.dummy_data.paper_metadata_json,
+            {"title": "title"},
+            self.dummy_data.paper_metadata_json,
+        ]
+
+        mock_register_metadata_bulk.return_value = (
+            [paper_metadata, paper_metadata],
+            {1: "E11000 Duplicate Key Error"},
+        )
+
+        result = await self.paper_service.register_paper_bulk(raw_objs)
+
+        self.assertEqual((result.total, result.succeeded, result.failed), (3, 1, 2))
+        self.assertEqual([item.success for item in result.items], [True, False, False])
+        self.assertEqual(result.items[0].id, paper_metadata.id)
+        self.assertIn("authors", result.items[1].error)
+        self.assertEqual(result.items[2].error, "E11000 Duplicate Key Error")
+        self.assertEqual(len(mock_register_metadata_bulk.call_args.args[0]), 2)
+        mock_enqueue_many.assert_called_once_with(paper_ids=[paper_metadata.id])
 
+    @patch_method(PaperDocumentRepository.get_paper_document_metadata)
     @patch_method(PaperMetadataRepository.get_metadata_by_id)
-    async def test_get_paper_metadta(self, mock_get_by_obj_id):
-        """Test get paper metadata."""
+    async def test_get_paper_document(self, mock_get_by_obj_id, mock_get_document_metadata):
+        """Test get paper document."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        paper_metadata.gcs_blob_url = self.dummy_data.gcs_blob_url
+        blob_metadata = BlobMetadata(size=len(self.dummy_data.raw_paper_bytes), etag="etag")
+
+        mock_get_by_obj_id.return_value = paper_metadata
+        mock_get_document_metadata.return_value = blob_metadata
+
+        result = await self.paper_service.get_paper_document(self.dummy_data.paper_metadata_id)
+
+        self.assertEqual(result, (paper_metadata.gcs_blob_url, blob_metadata))
+        mock_get_document_metadata.assert_called_once_with(paper_metadata.gcs_blob_url)
+
+    @patch_method(PaperDocumentRepository.get_paper_document_metadata)
+    @patch_method(PaperMetadataRepository.get_metadata_by_id)
+    async def test_get_paper_document_not_uploaded(
+        self, mock_get_by_obj_id, mock_get_document_metadata
+    ):
+        """Test get paper document of a paper whose upload is in progress."""
+
+        paper_metadata = self.dummy_data.paper_metadata_model
+        paper_metadata.gcs_blob_url = BackgroundTaskStatus.IN_PROGRESS
+        mock_get_by_obj_id.return_value = paper_metadata
+
+        with self.assertRaises(NotFoundError):
+            await self.paper_service.get_paper_document(self.dummy_data.paper_metadata_id)
+
+        mock_get_document_metadata.assert_not_called()
+
+    @patch_method(PaperDocumentRepository.get_paper_document_signed_url)
+    @patch_method(PaperMetadataRepository.get_metadata_by_id)
+    async def test_get_paper_document_url(self, mock_get_by_obj_id, mock_get_signed_url):
+        """Test get paper document url."""
 
         paper_metadata = self.dummy_data.paper_metadata_model
+        paper_metadata.gcs_blob_url = self.dummy_data.gcs_blob_url
+        expires_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        mock_get_by_obj_id.return_value = paper_metadata
+        mock_get_signed_url.return_value = ("https://signed", expires_at)
+
+        result = await self.paper_service.get_paper_document_url(self.dummy_data.paper_metadata_id)
+
+        self.assertEqual(
+            result, GetPaperDocumentUrlSchema(url="https://signed", expires_at=expires_at)
+        )
+        mock_get_signed_url.assert_called_once_with(paper_metadata.gcs_blob_url)
+
+    @patch_method(PaperMetadataRepository.get_metadata_detail_by_id)
+    async def test_get_paper_metadta(self, mock_get_detail_by_obj_id):
+        """Test get paper metadata."""
+
         paper_obj_id = self.dummy_data.paper_metadata_id
         expected_result = self.dummy_data.get_paper_detail_schema
 
-        mock_get_by_obj_id.return_value = paper_metadata
+        mock_get_detail_by_obj_id.side_effect = [expected_result, None]
 
         result = await self.paper_service.get_paper_metadata(paper_obj_id)
 
         self.assertEqual(result, expected_result)
 
+        with self.assertRaises(NotFoundError):
+            await self.paper_service.get_paper_metadata(paper_obj_id)
+
+    @patch_method(PaperMetadataRepository.get_metadata_revision)
+    async def test_get_paper_metadata_revision(self, mock_get_metadata_revision):
+        """Test get paper metadata revision."""
+
+        revision = PaperRevisionSchema(id=self.dummy_data.paper_metadata_id, revision=2)
+        mock_get_metadata_revision.side_effect = [revision, None]
+
+        result = await self.paper_service.get_paper_metadata_revision(
+            self.dummy_data.paper_metadata_id
+        )
+
+        self.assertEqual(result, revision)
+
+        with self.assertRaises(NotFoundError):
+            await self.paper_service.get_paper_metadata_revision(self.dummy_data.paper_metadata_id)
+
+    @patch_method(PaperMetadataRepository.get_metadata_revisions_by_page)
+    async def test_get_paper_metadata_list_etag(self, mock_get_revisions):
+        """Test get paper metadata list etag changes with the revisions and the parameters."""
+
+        obj = self.dummy_data.get_paper_metadata_list_param
+        revisions = self.dummy_data.paginated_paper_metadata
+        mock_get_revisions.return_value = revisions
+
+        etag = await self.paper_service.get_paper_metadata_list_etag(obj)
+        same_etag = await self.paper_service.get_paper_metadata_list_etag(obj)
+
+        revisions.items[0].revision += 1
+        revised_etag = await self.paper_service.get_paper_metadata_list_etag(obj)
+
+        obj.view = PaperListView.SUMMARY
+        summary_etag = await self.paper_service.get_paper_metadata_list_etag(obj)
+
+        self.assertEqual(etag, same_etag)
+        self.assertEqual(len({etag, revised_etag, summary_etag}), 3)
+
+    @patch_method(PaperMetadataRepository.iter_metadata_by_filter)
+    async def test_iter_paper_metadata_export(self, mock_iter_metadata_by_filter):
+        """Test iter paper metadata export encodes a batch into the lines of the papers."""
+
+        items = [
+            GetPaperListItemSchema(id=PydanticObjectId(), title=f"title {index}")
+            for index in range(3)
+        ]
+
+        async def iter_batches():
+            yield items[:2]
+            yield items[2:]
+
+        obj = ExportPaperMetadataParam(fields="title", batch_size=2)
+        mock_iter_metadata_by_filter.return_value = iter_batches()
+
+        chunks = [chunk async for chunk in self.paper_service.iter_paper_metadata_export(obj)]
+
+        mock_iter_metadata_by_filter.assert_called_once_with(obj)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(
+            [json.loads(line) for line in b"".join(chunks).splitlines()],
+            [{"id": str(item.id), "title": item.title} for item in items],
+        )
+
     @patch_method(PaperMetadataRepository.get_metadata_list_by_page)
     async def test_get_paper_metadata_list(self, mock_get_metadata_list):
         """Test get paper metadata list."""
@@ -95,3 +551,49 @@ class TestPaperService(unittest.IsolatedAsyncioTestCase):
         )
 
         self.assertEqual(result, expected_result)
+
+    @patch_method(PaperMetadataRepository.get_metadata_revisions_by_page)
+    @patch_method(PaperMetadataRepository.get_metadata_list_by_page)
+    async def test_get_paper_metadata_list_with_etag(
+        self, mock_get_metadata_list, mock_get_revisions
+    ):
+        """Test get paper metadata list etag is of the papers read, whose revisions are hidden."""
+
+        obj = GetPaperMetadataListParam(fields="title")
+        projection_model = PaperMetadataRepository.get_metadata_projection_model(obj)
+        item = projection_model.model_validate(
+            {"_id": self.dummy_data.paper_metadata_id, "title": "title", "revision": 3}
+        )
+        page = PaginatedResult[GetPaperListItemSchema](total=1, items=[item])
+        mock_get_metadata_list.return_value = page
+        mock_get_revisions.return_value = page
+
+        result, etag = await self.paper_service.get_paper_metadata_list_with_etag(obj)
+
+        self.assertEqual(etag, await self.paper_service.get_paper_metadata_list_etag(obj))
+        self.assertEqual(
+            result.items[0].model_dump(mode="json", exclude_unset=True),
+            {"id": self.dummy_data.paper_metadata_id, "title": "title"},
+        )
+
+        item.revision = 4
+        _, revised_etag = await self.paper_service.get_paper_metadata_list_with_etag(obj)
+
+        self.assertNotEqual(etag, revised_etag)
+
+    @patch_method(PaperMetadataRepository.get_metadata_list_by_page)
+    async def test_get_paper_metadata_list_without_total(self, mock_get_metadata_list):
+        """Test get paper metadata list without counting the total."""
+
+        paginated_paper_metadata = self.dummy_data.paginated_paper_metadata
+        paginated_paper_metadata.total = None
+
+        mock_get_metadata_list.return_value = paginated_paper_metadata
+
+        result = await self.paper_service.get_paper_metadata_list(
+            obj=self.dummy_data.get_paper_metadata_list_param
+        )
+
+        self.assertIsNone(result.total_items)
+        self.assertIsNone(result.total_pages)
+        self.assertEqual(len(result.items), 1)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the search service."""
+
+import os
+import tempfile
+import unittest
+
+from app.common.enums import PaperListView
+from app.common.exceptions import ServiceUnavailableError
+from app.models.paper_metadata import PaperMetadata
+from app.schemas.paper_metadata import PAPER_LIST_VIEW_FIELDS
+from app.schemas.search import HybridSearchPaperParam, SearchPaperParam
+from app.services.paper_service import PaperService
+from app.services.search_index import PaperSearchIndex
+from app.services.search_service import SearchService
+from tests.data.paper import DummyPaperFactory
+from tests.data.search import DummyTextEncoder
+from tests.session.mongo import MockMongoDBSession
+
+
+class TestSearchService(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the search service."""
+
+    def setUp(self) -> None:
+        """Set up the test."""
+
+        self.dummy_data = DummyPaperFactory()
+        self.mock_mongo_session = MockMongoDBSession()
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test."""
+
+        await self.mock_mongo_session.connect_to_mock_mongo([PaperMetadata])
+
+        self.registered = []
+
+        for title in ["Deep residual learning", "Attention is all you need"]:
+            obj = self.dummy_data.register_paper_schema
+            obj.title = title
+            self.registered.append(await PaperMetadata.model_validate(obj).create())
+
+        self.encoder = DummyTextEncoder()
+        self.search_index = PaperSearchIndex(batch_size=1, encoder=self.encoder)
+        await self.search_index.build()
+
+    async def test_build(self):
+        """Test the search index is built from the paper metadata repository."""
+
+        self.assertEqual(len(self.search_index), 2)
+        self.assertEqual(len(self.search_index.vectors), 2)
+
+    async def test_search_papers(self):
+        """Test search papers ranks the papers and reads the fields of the view."""
+
+        search_service = SearchService(search_index=self.search_index)
+
+        result = await search_service.search_papers(SearchPaperParam(query="residual learning"))
+
+        self.assertEqual(len(result.items), 1)
+        self.assertEqual(result.items[0].paper.id, self.registered[0].id)
+        self.assertGreater(result.items[0].score, 0)
+        self.assertEqual(
+            result.items[0].paper.model_fields_set, PAPER_LIST_VIEW_FIELDS[PaperListView.SUMMARY]
+        )
+
+    async def test_search_papers_semantic(self):
+        """Test search papers semantically ranks the papers by their embeddings."""
+
+        search_service = SearchService(search_index=self.search_index)
+
+        result = await search_service.search_papers_semantic(
+            SearchPaperParam(query="attention you need", k=1)
+        )
+
+        self.assertEqual(len(result.items), 1)
+        self.assertEqual(result.items[0].paper.id, self.registered[1].id)
+        self.assertEqual(self.encoder.encoded[-1], "attention you need")
+
+        with self.assertRaises(ServiceUnavailableError):
+            await SearchService(search_index=PaperSearchIndex()).search_papers_semantic(
+                SearchPaperParam(query="deep")
+            )
+
+    async def test_search_papers_hybrid(self):
+        """Test search papers hybrid rescores the candidates and fuses the rankings."""
+
+        search_service = SearchService(search_index=self.search_index)
+
+        result = await search_service.search_papers_hybrid(
+            HybridSearchPaperParam(query="residual learning", k=2, candidates=1)
+        )
+
+        self.assertEqual(result.items[0].paper.id, self.registered[0].id)
+        self.assertEqual(result.candidates, 2)
+        self.assertEqual(len(result.items), 2)
+        self.assertGreater(result.items[0].score, result.items[1].score)
+        self.assertGreaterEqual(
+            result.timings.total_ms,
+            result.timings.candidates_ms + result.timings.rerank_ms + result.timings.fetch_ms,
+        )
+
+    async def test_search_papers_hybrid_without_semantic(self):
+        """Test search papers hybrid ranks the keyword candidates without the embeddings."""
+
+        search_index = PaperSearchIndex()
+        await search_index.build()
+        search_service = SearchService(search_index=search_index)
+
+        result = await search_service.search_papers_hybrid(
+            HybridSearchPaperParam(query="attention", k=5)
+        )
+
+        self.assertEqual([item.paper.id for item in result.items], [self.registered[1].id])
+        self.assertEqual(result.candidates, 1)
+
+    async def test_search_registered_paper(self):
+        """Test the registered papers are added to the search index."""
+
+        paper_service = PaperService(http_session=None, search_index=self.search_index)
+        search_service = SearchService(search_index=self.search_index)
+        obj = self.dummy_data.register_paper_schema
+        obj.title = "Denoising diffusion probabilistic models"
+
+        await paper_service.register_paper_bulk([obj.model_dump(mode="json")])
+        result = await search_service.search_papers(SearchPaperParam(query="diffusion"))
+        semantic_result = await search_service.search_papers_semantic(
+            SearchPaperParam(query="diffusion models", k=1)
+        )
+
+        self.assertEqual(len(result.items), 1)
+        self.assertEqual(result.items[0].paper.title, obj.title)
+        self.assertEqual(semantic_result.items[0].paper.title, obj.title)
+
+    async def test_persist_vector_index(self):
+        """Test the vector index is saved once built, and only new papers are embedded."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "vectors.npz")
+            search_index = PaperSearchIndex(encoder=self.encoder, vector_index_path=path)
+            await search_index.build()
+
+            encoder = DummyTextEncoder()
+            loaded = PaperSearchIndex(encoder=encoder, vector_index_path=path)
+            await loaded.build()
+
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(len(loaded.vectors), 2)
+            self.assertEqual(encoder.encoded, [])
+
+    async def test_search_papers_without_index(self):
+        """Test search papers fails without the search index."""
+
+        with self.assertRaises(ServiceUnavailableError):
+            await SearchService(search_index=None).search_papers(SearchPaperParam(query="deep"))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Test cases for the export of the paper metadata."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from export_metadata import get_resume_id
+
+
+class TestGetResumeId(unittest.TestCase):
+    """Test cases for the id to resume the export after."""
+
+    def setUp(self) -> None:
+        """Set up the test case."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "papers.ndjson"
+
+    def tearDown(self) -> None:
+        """Tear down the test case."""
+
+        self.directory.cleanup()
+
+    def test_get_resume_id(self):
+        """Test the id of the last complete line is read, and the partial line is truncated."""
+
+        lines = b"".join(
+            f'{{"id":"{index}","abstract":"{"a" * 50}"}}\n'.encode() for index in range(5)
+        )
+
+        self.assertIsNone(get_resume_id(self.path))
+
+        self.path.write_bytes(b"")
+        self.assertIsNone(get_resume_id(self.path))
+
+        self.path.write_bytes(b'{"id":"0","abs')
+        self.assertIsNone(get_resume_id(self.path))
+        self.assertEqual(self.path.read_bytes(), b"")
+
+        # The blocks are smaller than a line, so the end is read across the blocks.
+        with patch("export_metadata.RESUME_BLOCK_SIZE", 16):
+            self.path.write_bytes(lines)
+            self.assertEqual(get_resume_id(self.path), "4")
+            self.assertEqual(self.path.read_bytes(), lines)
+
+            self.path.write_bytes(lines + b'{"id":"5","abstract":"aa')
+            self.assertEqual(get_resume_id(self.path), "4")
+            self.assertEqual(self.path.read_bytes(), lines)